@@ -0,0 +1,61 @@
+#!/usr/bin/env python3
+"""Benchmark of flashcard images: mdx2img per word vs. one mdx2cards batch
+
+Renders the first words of the word list one ``mdx2img`` call per word (a full
+conversion each) and then as one ``mdx2cards`` batch per worker count, and reports
+the throughput in images per second. Requires wkhtmltoimage.
+
+Usage:
+    python scripts/bench_cards.py <dict.mdx> <words.txt> [count] [workers ...]
+
+    count defaults to 50 words; workers defaults to "1 4"
+"""
+
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+
+from mdxscraper.core.cards import mdx2cards  # noqa: E402
+from mdxscraper.core.converter import mdx2img  # noqa: E402
+from mdxscraper.core.parser import WordParser  # noqa: E402
+
+IMG_OPTIONS = {"width": "600", "encoder": "draft"}
+
+
+def main() -> None:
+    if len(sys.argv) < 3:
+        print(__doc__)
+        sys.exit(1)
+    mdx_file, input_file = Path(sys.argv[1]), Path(sys.argv[2])
+    count = int(sys.argv[3]) if len(sys.argv) > 3 else 50
+    workers = [int(n) for n in sys.argv[4:]] or [1, 4]
+    words = [w for lesson in WordParser(str(input_file)).parse() for w in lesson["words"]]
+    words = words[:count]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        word_list = Path(tmp) / "words.txt"
+        word_list.write_text("\n".join(words), encoding="utf-8")
+
+        start = time.perf_counter()
+        for n, word in enumerate(words, 1):
+            single = Path(tmp) / f"single-{n}.txt"
+            single.write_text(word, encoding="utf-8")
+            mdx2img(mdx_file, single, Path(tmp) / "single" / f"{n}.png", IMG_OPTIONS)
+        elapsed = time.perf_counter() - start
+        print(f"mdx2img per word   {elapsed:8.2f} s  {len(words) / elapsed:6.2f} images/s")
+
+        for n in workers:
+            output_dir = Path(tmp) / f"cards-{n}"
+            start = time.perf_counter()
+            found, _, _ = mdx2cards(
+                mdx_file, word_list, output_dir, "png", workers=n, img_options=IMG_OPTIONS
+            )
+            elapsed = time.perf_counter() - start
+            print(f"mdx2cards workers={n:<3} {elapsed:8.2f} s  {found / elapsed:6.2f} images/s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+"""Benchmark for inlining MDD images into a document
+
+Builds a document with one <img> per MDD image key (up to ``count``) and times
+embed_images with per-image lookups (a fresh SQLite query, file open and block
+decompression per image, as the vendored mdd_lookup does) against the batched
+resolution used for IndexBuilder dictionaries.
+
+Usage:
+    python scripts/bench_embed_images.py <dict.mdx> [count]
+
+    Defaults: 2000 images
+"""
+
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+
+from bs4 import BeautifulSoup  # noqa: E402
+
+from mdxscraper.core.renderer import embed_images  # noqa: E402
+from mdxscraper.mdict.mdict_query import IndexBuilder, _mdict_query  # noqa: E402
+
+
+class PerImageLookup:
+    """Unbatched, uncached MDD access through the vendored code path."""
+
+    def __init__(self, impl: IndexBuilder):
+        self._impl = impl
+        self._mdd_db = impl._mdd_db
+
+    def mdd_lookup(self, keyword):
+        results = []
+        for index in self._impl.lookup_indexes(self._mdd_db, keyword):
+            with open(index["file_name"], "rb") as fmdd:
+                results.append(_mdict_query.IndexBuilder.get_data_by_index(fmdd, index))
+        return results
+
+
+def main() -> None:
+    if len(sys.argv) < 2:
+        print(__doc__)
+        sys.exit(1)
+    count = int(sys.argv[2]) if len(sys.argv) > 2 else 2000
+
+    impl = IndexBuilder(sys.argv[1])
+    extensions = (".png", ".jpg", ".jpeg", ".gif", ".bmp", ".svg", ".webp")
+    keys = [k for k in impl.get_mdd_keys() if k.lower().endswith(extensions)][:count]
+    if not keys:
+        print("No images in the MDD")
+        sys.exit(1)
+    html = "".join(f'<p><img src="{k.lstrip(chr(92)).replace(chr(92), "/")}"/></p>' for k in keys)
+    print(f"{len(keys)} images")
+
+    for name, dictionary in (("per-image", PerImageLookup(impl)), ("batched", impl)):
+        impl.block_cache.clear()
+        soup = BeautifulSoup(html, "lxml")
+        start = time.perf_counter()
+        embed_images(soup, dictionary)
+        elapsed = time.perf_counter() - start
+        inlined = sum(img["src"].startswith("data:") for img in soup.find_all("img"))
+        print(f"{name:>9}: {elapsed * 1000:9.1f} ms, {inlined} inlined")
+
+
+if __name__ == "__main__":
+    main()
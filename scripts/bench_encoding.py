@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+"""Benchmark of PNG/WEBP encoder profiles and tiled encoding (mdx2img img_options)
+
+Re-encodes a tall rendered page the way mdx2img does after wkhtmltoimage and reports
+the encode time and output size for every encoder profile, untiled and tiled. Without
+a page a synthetic one is drawn: text lines on white, like a rendered word list.
+
+Usage:
+    python scripts/bench_encoding.py [page.png] [--height N] [--tile-height N] [--workers N]
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from PIL import Image, ImageDraw
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+
+from mdxscraper.core.encoding import ENCODER_PROFILES, WEBP_MAX_SIZE, save_image  # noqa: E402
+
+
+def synthetic_page(height: int) -> Image.Image:
+    image = Image.new("RGB", (800, height), "white")
+    draw = ImageDraw.Draw(image)
+    for y in range(0, height, 18):
+        draw.text((20, y), f"word {y // 18}: a definition with some example text", fill="black")
+        if y % 900 == 0:
+            draw.rectangle((600, y, 760, y + 120), fill=(70, 130, 180))
+    return image
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("page", nargs="?", help="PNG rendered by wkhtmltoimage")
+    parser.add_argument("--height", type=int, default=30000, help="synthetic page height")
+    parser.add_argument("--tile-height", type=int, default=4096)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    args = parser.parse_args()
+
+    image = Image.open(args.page) if args.page else synthetic_page(args.height)
+    image.load()
+    print(f"page {image.width}x{image.height} {image.mode}, {args.workers} workers")
+    tiled = {"tile_height": args.tile_height, "encode_workers": args.workers}
+    with tempfile.TemporaryDirectory() as tmp:
+        for suffix in (".png", ".webp"):
+            for profile in ENCODER_PROFILES:
+                split = ("split", {**tiled, "split_tiles": True})
+                if suffix == ".png":
+                    modes = [("whole", {}), ("tiled", tiled), split]
+                elif image.height > WEBP_MAX_SIZE:
+                    # Too tall for one WEBP file
+                    modes = [split]
+                else:
+                    modes = [("whole", {}), split]
+                for mode, options in modes:
+                    output = Path(tmp) / mode / f"page{suffix}"
+                    output.parent.mkdir(exist_ok=True)
+                    start = time.perf_counter()
+                    paths = save_image(image, output, {"encoder": profile, **options})
+                    elapsed = time.perf_counter() - start
+                    size = sum(path.stat().st_size for path in paths)
+                    print(
+                        f"{suffix[1:]:<5}{profile:<11}{mode:<6}{elapsed * 1000:9.0f} ms"
+                        f"{size:>12} bytes  {len(paths)} file(s)"
+                    )
+                    for path in paths:
+                        path.unlink()
+
+
+if __name__ == "__main__":
+    main()
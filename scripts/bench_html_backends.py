@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+"""Side-by-side benchmark of the mdx2html fragment rendering backends
+
+Looks up every word of the input list once, then times rendering the definitions
+into ``scrapedword`` fragments with each backend (parse, image rewrite, serialize),
+followed by a full ``mdx2html`` run per backend.
+
+Usage:
+    python scripts/bench_html_backends.py <dict.mdx> <words.txt> [repeat]
+
+    Defaults: 3 repeats, best time reported
+"""
+
+import sys
+import tempfile
+import time
+import timeit
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+
+from mdxscraper.core.converter import mdx2html  # noqa: E402
+from mdxscraper.core.dictionary import Dictionary  # noqa: E402
+from mdxscraper.core.html_writer import RENDERERS  # noqa: E402
+from mdxscraper.core.parser import WordParser  # noqa: E402
+
+
+def main() -> None:
+    if len(sys.argv) < 3:
+        print(__doc__)
+        sys.exit(1)
+    mdx_file, input_file = Path(sys.argv[1]), Path(sys.argv[2])
+    repeat = int(sys.argv[3]) if len(sys.argv) > 3 else 3
+
+    words = [w for lesson in WordParser(str(input_file)).parse() for w in lesson["words"]]
+    with Dictionary(mdx_file) as dictionary:
+        definitions = [(w, dictionary.lookup_html(w)) for w in words]
+        print(f"{len(definitions)} words, {sum(len(d) for _, d in definitions) / 1e6:.1f} MB")
+
+        timings = {}
+        for name, renderer_cls in RENDERERS.items():
+
+            def run():
+                renderer = renderer_cls(dictionary.impl)
+                for word, result in definitions:
+                    renderer.render(word, result)
+
+            timings[name] = min(timeit.repeat(run, number=1, repeat=repeat))
+        base = timings["bs4"]
+        for name, seconds in timings.items():
+            print(f"render  {name:>5}: {seconds * 1000:9.1f} ms  x{base / seconds:.2f}")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for name in RENDERERS:
+            output = Path(tmp) / f"{name}.html"
+            start = time.perf_counter()
+            mdx2html(mdx_file, input_file, output, backend=name)
+            elapsed = time.perf_counter() - start
+            print(
+                f"mdx2html {name:>5}: {elapsed * 1000:9.1f} ms  "
+                f"{output.stat().st_size / 1e6:.2f} MB output"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+"""Benchmark for the image optimization stage
+
+Generates synthetic dictionary illustrations (large BMP, TIFF and PNG files), then
+compares embedding them as-is with running them through ImageOptimizer, both in
+one process and on a process pool. Reports the embedded (base64) size and time.
+
+Usage:
+    python scripts/bench_image_optimizer.py [images] [width] [height]
+
+    Defaults: 60 images of 2400x1600
+"""
+
+import io
+import os
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+
+from PIL import Image, ImageDraw  # noqa: E402
+
+from mdxscraper.core.assets import data_uri  # noqa: E402
+from mdxscraper.core.images import ImageOptimizer  # noqa: E402
+
+
+def make_images(count: int, width: int, height: int) -> dict[str, bytes]:
+    images = {}
+    for i in range(count):
+        im = Image.linear_gradient("L").resize((width, height)).convert("RGB")
+        draw = ImageDraw.Draw(im)
+        for j in range(20):
+            x = (i * 97 + j * 131) % width
+            box = (x, j * height // 20, x + width // 8, (j + 2) * height // 20)
+            draw.ellipse(box, fill=(j * 12, 90, 200))
+        fmt = ("BMP", "TIFF", "PNG")[i % 3]
+        out = io.BytesIO()
+        im.save(out, format=fmt)
+        images[f"img{i}.{fmt.lower()}"] = out.getvalue()
+    return images
+
+
+def embedded_size(results: dict[str, tuple[bytes, str | None]]) -> int:
+    return sum(len(data_uri(name, data, fmt)) for name, (data, fmt) in results.items())
+
+
+def main() -> None:
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 60
+    width = int(sys.argv[2]) if len(sys.argv) > 2 else 2400
+    height = int(sys.argv[3]) if len(sys.argv) > 3 else 1600
+
+    images = make_images(count, width, height)
+    raw = {name: (data, None) for name, data in images.items()}
+    print(f"{count} images, {sum(map(len, images.values())) / 1e6:.1f} MB raw")
+    print(f"{'as-is':>12}: {embedded_size(raw) / 1e6:8.1f} MB embedded")
+
+    for processes in (1, os.cpu_count() or 1):
+        with ImageOptimizer(processes=processes) as optimizer:
+            start = time.perf_counter()
+            results = optimizer.optimize_many(images)
+            elapsed = time.perf_counter() - start
+            start = time.perf_counter()
+            optimizer.optimize_many(images)
+            cached = time.perf_counter() - start
+        print(
+            f"{processes:>2} process(es): {embedded_size(results) / 1e6:8.1f} MB embedded, "
+            f"{elapsed:6.2f} s ({cached * 1000:.1f} ms cached)"
+        )
+        if processes == os.cpu_count():
+            break
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,50 @@
+#!/usr/bin/env python3
+"""Benchmark of parallel PDF rendering (mdx2pdf pdf_workers=N)
+
+Renders the word list to PDF once in a single wkhtmltopdf process and once per
+worker count, and reports the wall-clock time, the speedup and the page count of
+each result. Requires wkhtmltopdf, and pypdf for the parallel runs.
+
+Usage:
+    python scripts/bench_parallel_pdf.py <dict.mdx> <words.txt> [workers ...]
+
+    workers defaults to "2 4"; more processes than CPU cores only adds contention
+"""
+
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+
+from mdxscraper.core.converter import mdx2pdf  # noqa: E402
+from mdxscraper.core.sharding import pypdf  # noqa: E402
+
+PDF_OPTIONS = {"page-size": "A4", "encoding": "UTF-8", "quiet": ""}
+
+
+def main() -> None:
+    if len(sys.argv) < 3:
+        print(__doc__)
+        sys.exit(1)
+    mdx_file, input_file = Path(sys.argv[1]), Path(sys.argv[2])
+    workers = [int(n) for n in sys.argv[3:]] or [2, 4]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        baseline = None
+        for n in [1, *workers]:
+            output = Path(tmp) / f"workers-{n}.pdf"
+            start = time.perf_counter()
+            mdx2pdf(mdx_file, input_file, output, PDF_OPTIONS, pdf_workers=n)
+            elapsed = time.perf_counter() - start
+            baseline = baseline or elapsed
+            pages = len(pypdf.PdfReader(output).pages) if pypdf else "?"
+            print(
+                f"pdf_workers={n:<3} {elapsed:8.2f} s  speedup {baseline / elapsed:5.2f}x  "
+                f"{pages} pages  {output.stat().st_size:>10} bytes"
+            )
+
+
+if __name__ == "__main__":
+    main()
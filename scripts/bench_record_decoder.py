@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+"""Micro-benchmark for MDX record decoding on stylesheet-heavy dictionaries
+
+Compares the vendored decode path (decode -> encode -> regex split/findall ->
+string concatenation -> decode) with the single-pass RecordDecoder on synthetic
+records dense with `N` style markers.
+
+Usage:
+    python scripts/bench_record_decoder.py [records] [markers_per_record]
+
+    Defaults: 2000 records, 200 markers per record
+"""
+
+import re
+import sys
+import timeit
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+
+from mdxscraper.mdict.record_decoder import RecordDecoder  # noqa: E402
+
+STYLESHEET = {str(n): (f'<span class="s{n}">', "</span>") for n in range(1, 31)}
+
+
+def legacy_decode(data: bytes, encoding: str, stylesheet: dict) -> str:
+    """Vendored algorithm, applied to text as the upstream code intends."""
+    record = data.decode(encoding, errors="ignore").strip("\x00").encode("utf-8")
+    txt = record.decode("utf-8")
+    txt_list = re.split(r"`\d+`", txt)
+    txt_tag = re.findall(r"`\d+`", txt)
+    txt_styled = txt_list[0]
+    for j, p in enumerate(txt_list[1:]):
+        style = stylesheet[txt_tag[j][1:-1]]
+        if p and p[-1] == "\n":
+            txt_styled = txt_styled + style[0] + p.rstrip() + style[1] + "\r\n"
+        else:
+            txt_styled = txt_styled + style[0] + p + style[1]
+    return txt_styled
+
+
+def make_records(count: int, markers: int, encoding: str) -> list[bytes]:
+    records = []
+    for i in range(count):
+        body = "".join(f"`{(j % 30) + 1}`词条 {i}-{j} sample text\n" for j in range(markers))
+        records.append(body.encode(encoding))
+    return records
+
+
+def main() -> None:
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    markers = int(sys.argv[2]) if len(sys.argv) > 2 else 200
+
+    for encoding in ("utf-8", "gbk"):
+        records = make_records(count, markers, encoding)
+        decoder = RecordDecoder(encoding, STYLESHEET)
+        views = [memoryview(r) for r in records]
+        assert all(legacy_decode(r, encoding, STYLESHEET) == decoder.decode(r) for r in records[:5])
+
+        legacy = min(
+            timeit.repeat(
+                lambda: [legacy_decode(r, encoding, STYLESHEET) for r in records],
+                number=1,
+                repeat=3,
+            )
+        )
+        fast = min(timeit.repeat(lambda: [decoder.decode(v) for v in views], number=1, repeat=3))
+        size_mb = sum(len(r) for r in records) / 1e6
+        print(
+            f"{encoding:>6}: {count} records, {markers} markers each, {size_mb:.1f} MB | "
+            f"legacy {legacy * 1000:8.1f} ms | single-pass {fast * 1000:8.1f} ms | "
+            f"x{legacy / fast:.2f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
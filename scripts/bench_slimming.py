@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+"""Benchmark of HTML slimming (mdx2html slim=True)
+
+Writes the document with and without slimming and reports the document size and
+the CSS and markup bytes saved. If wkhtmltopdf is on PATH, each document is also
+rendered to PDF and timed, to show the layout time saved on the pruned stylesheet.
+
+Usage:
+    python scripts/bench_slimming.py <dict.mdx> <words.txt> [additional.css]
+
+    additional.css is merged like the GUI's custom styles, e.g. to try a large
+    stylesheet with a dictionary whose own stylesheet is small
+"""
+
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+
+from mdxscraper.core.converter import mdx2html  # noqa: E402
+from mdxscraper.core.slimming import HtmlSlimmer  # noqa: E402
+
+
+def main() -> None:
+    if len(sys.argv) < 3:
+        print(__doc__)
+        sys.exit(1)
+    mdx_file, input_file = Path(sys.argv[1]), Path(sys.argv[2])
+    styles = Path(sys.argv[3]).read_text(encoding="utf-8") if len(sys.argv) > 3 else None
+    wkhtmltopdf = shutil.which("wkhtmltopdf")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for name, slim in (("full", False), ("slim", HtmlSlimmer())):
+            output = Path(tmp) / f"{name}.html"
+            start = time.perf_counter()
+            mdx2html(
+                mdx_file, input_file, output, additional_styles=styles, backend="lxml", slim=slim
+            )
+            elapsed = time.perf_counter() - start
+            line = f"{name}: mdx2html {elapsed * 1000:8.1f} ms  {output.stat().st_size:>10} bytes"
+            if slim:
+                stats = slim.stats
+                line += (
+                    f"  saved {stats.bytes_saved} (CSS {stats.css_in} -> {stats.css_out}, "
+                    f"markup {stats.html_in} -> {stats.html_out})"
+                )
+            print(line)
+            if wkhtmltopdf:
+                start = time.perf_counter()
+                subprocess.run(
+                    [wkhtmltopdf, "--quiet", str(output), str(output.with_suffix(".pdf"))],
+                    check=True,
+                )
+                print(f"{name}: wkhtmltopdf {(time.perf_counter() - start) * 1000:8.1f} ms")
+        if not wkhtmltopdf:
+            print("wkhtmltopdf not found on PATH; PDF timing skipped")
+
+
+if __name__ == "__main__":
+    main()
@@ -37,11 +37,19 @@ For more information, see:
 
 # Core headless functionality (no GUI dependencies)
 from mdxscraper.core import (
+    AsyncDictionary,
     Dictionary,
     WordParser,
+    amdx2html,
+    mdx2apkg,
+    mdx2cards,
+    mdx2epub,
     mdx2html,
     mdx2img,
+    mdx2jsonl,
+    mdx2outputs,
     mdx2pdf,
+    mdx2shards,
 )
 
 __version__ = "5.2.13"
@@ -53,6 +61,15 @@ __all__ = [
     "mdx2html",
     "mdx2pdf",
     "mdx2img",
+    "mdx2outputs",
+    "mdx2shards",
+    "mdx2cards",
+    "mdx2epub",
+    "mdx2apkg",
+    "mdx2jsonl",
+    # Asyncio API
+    "AsyncDictionary",
+    "amdx2html",
     # Version
     "__version__",
 ]
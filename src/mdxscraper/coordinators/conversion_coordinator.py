@@ -25,20 +25,21 @@ class ConversionCoordinator:
         self.cm = cm
         self.worker: Optional[ConversionWorker] = None
 
-    def run(self, mw) -> None:
+    def run(self, mw, preview: bool = False) -> None:
         # sync pages to settings
         mw.cfgc.sync_all_to_config(mw)
         # autosave Untitled before run
         mw.preset_coordinator.autosave_untitled_if_needed(mw)
 
         mw.command_panel.btn_scrape.setEnabled(False)
+        mw.command_panel.btn_preview.setEnabled(False)
 
         # Use editor content directly per spec
         pdf_text = mw.tab_pdf.pdf_editor.toPlainText()
         css_text = mw.tab_css.css_editor.toPlainText()
 
         self.worker = ConversionWorker(
-            self.project_root, self.cm, pdf_text=pdf_text, css_text=css_text
+            self.project_root, self.cm, pdf_text=pdf_text, css_text=css_text, preview=preview
         )
         self.worker.finished_sig.connect(lambda msg: self.on_finished(mw, msg))
         self.worker.error_sig.connect(lambda msg: self.on_error(mw, msg))
@@ -50,6 +51,7 @@ class ConversionCoordinator:
 
     def on_finished(self, mw, message: str) -> None:
         mw.command_panel.btn_scrape.setEnabled(True)
+        mw.command_panel.btn_preview.setEnabled(True)
         mw.command_panel.setProgress(100)
         mw.command_panel.setProgressText("Conversion completed!")
         mw.log_panel.appendLog(f"✅ {message}")
@@ -57,6 +59,7 @@ class ConversionCoordinator:
 
     def on_error(self, mw, message: str) -> None:
         mw.command_panel.btn_scrape.setEnabled(True)
+        mw.command_panel.btn_preview.setEnabled(True)
         mw.command_panel.setProgress(0)
         mw.command_panel.setProgressText("Conversion failed")
         mw.log_panel.appendLog(f"❌ Error: {message}")
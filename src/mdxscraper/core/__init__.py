@@ -21,11 +21,46 @@ Examples:
         ...     input_file="words.txt",
         ...     output_file="output.html"
         ... )
+
+    HTML, PDF and PNG from a single build:
+        >>> from mdxscraper.core import mdx2outputs
+        >>> mdx2outputs("dict.mdx", "words.txt", ["out.html", "out.pdf", "out.png"])
+
+    One file per lesson, rendered in parallel:
+        >>> from mdxscraper.core import mdx2shards
+        >>> mdx2shards("dict.mdx", "words.txt", "out_dir", output_format="pdf", pdf_options={})
+
+    One flashcard image per word, sharing one dictionary:
+        >>> from mdxscraper.core import mdx2cards
+        >>> mdx2cards("dict.mdx", "words.txt", "cards", output_format="png", workers=4)
+
+    EPUB with one chapter per lesson:
+        >>> from mdxscraper.core import mdx2epub
+        >>> mdx2epub("dict.mdx", "words.txt", "words.epub")
+
+    Anki package with one subdeck per lesson:
+        >>> from mdxscraper.core import mdx2apkg
+        >>> mdx2apkg("dict.mdx", "words.txt", "words.apkg")
+
+    One JSON record per word:
+        >>> from mdxscraper.core import mdx2jsonl
+        >>> mdx2jsonl("dict.mdx", "words.txt", "words.jsonl", with_text=True)
+
+    Asyncio services:
+        >>> from mdxscraper.core import AsyncDictionary
+        >>> async with AsyncDictionary("dict.mdx", max_workers=8) as adict:
+        ...     results = await adict.lookup_many(["hello", "world"])
 """
 
-from mdxscraper.core.converter import mdx2html, mdx2img, mdx2pdf
+from mdxscraper.core.aio import AsyncDictionary, amdx2html
+from mdxscraper.core.anki import mdx2apkg
+from mdxscraper.core.cards import mdx2cards
+from mdxscraper.core.converter import mdx2html, mdx2img, mdx2outputs, mdx2pdf
 from mdxscraper.core.dictionary import Dictionary
+from mdxscraper.core.epub import mdx2epub
+from mdxscraper.core.jsonl import mdx2jsonl
 from mdxscraper.core.parser import WordParser
+from mdxscraper.core.sharding import mdx2shards
 
 __all__ = [
     "Dictionary",
@@ -33,4 +68,12 @@ __all__ = [
     "mdx2html",
     "mdx2pdf",
     "mdx2img",
+    "mdx2outputs",
+    "mdx2shards",
+    "mdx2cards",
+    "mdx2epub",
+    "mdx2apkg",
+    "mdx2jsonl",
+    "AsyncDictionary",
+    "amdx2html",
 ]
@@ -0,0 +1,234 @@
+"""Asyncio front-end for dictionary lookups and HTML conversion.
+
+Dictionary lookups hit SQLite, the MDX file and zlib, all of which block. This module
+runs them on a bounded thread pool and limits the number of jobs queued on it, so a
+single event loop can issue thousands of lookups while awaiting callers simply wait
+their turn instead of piling work onto the executor.
+
+Example:
+    >>> async with AsyncDictionary("dict.mdx") as adict:
+    ...     html = await adict.lookup_html("hello")
+    ...     batch = await adict.lookup_many(["one", "two", "three"])
+    ...     async for key in adict:
+    ...         ...
+"""
+
+from __future__ import annotations
+
+import asyncio
+import queue
+import threading
+from collections import Counter, OrderedDict, deque
+from concurrent.futures import Executor, ThreadPoolExecutor
+from functools import partial
+from pathlib import Path
+from typing import Any, AsyncIterator, Callable, Iterable, Iterator, Optional, Tuple
+
+from mdxscraper.core.dictionary import Dictionary
+from mdxscraper.core.html_writer import Fragment, FragmentRenderer
+from mdxscraper.core.parser import WordParser
+
+
+class AsyncDictionary:
+    """Awaitable wrapper around :class:`Dictionary` backed by a bounded executor.
+
+    Args:
+        mdx_file: Path to the MDX dictionary file.
+        max_workers: Threads used for blocking lookups when no executor is supplied.
+        max_pending: Upper bound on jobs submitted to the executor at any time;
+            further calls wait on the event loop. Defaults to ``4 * max_workers``.
+        executor: Optional shared executor. It is not shut down by ``aclose``.
+    """
+
+    def __init__(
+        self,
+        mdx_file: Path | str,
+        max_workers: int = 4,
+        max_pending: int | None = None,
+        executor: Executor | None = None,
+    ):
+        if max_workers < 1:
+            raise ValueError("max_workers must be at least 1")
+        self.mdx_path = Path(mdx_file)
+        self.max_workers = max_workers
+        self.max_pending = max_pending or max_workers * 4
+        self._executor = executor
+        self._owns_executor = executor is None
+        self._slots = asyncio.Semaphore(self.max_pending)
+        self._dictionary: Dictionary | None = None
+
+    async def __aenter__(self) -> "AsyncDictionary":
+        await self.open()
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await self.aclose()
+
+    def __aiter__(self) -> AsyncIterator[str]:
+        return self.keys()
+
+    async def open(self) -> "AsyncDictionary":
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(
+                max_workers=self.max_workers, thread_name_prefix="mdx-lookup"
+            )
+        if self._dictionary is None:
+            self._dictionary = await self.run(Dictionary, self.mdx_path)
+        return self
+
+    async def aclose(self) -> None:
+        if self._dictionary is not None:
+            self._dictionary.close()
+            self._dictionary = None
+        if self._owns_executor and self._executor is not None:
+            executor, self._executor = self._executor, None
+            await asyncio.get_running_loop().run_in_executor(None, executor.shutdown)
+
+    @property
+    def dictionary(self) -> Dictionary:
+        if self._dictionary is None:
+            raise RuntimeError("AsyncDictionary is not open; use 'async with' or await open()")
+        return self._dictionary
+
+    async def run(self, func: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+        """Run a blocking callable on the executor, waiting for a free slot first."""
+        if self._executor is None:
+            raise RuntimeError("AsyncDictionary is not open; use 'async with' or await open()")
+        async with self._slots:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._executor, partial(func, *args, **kwargs))
+
+    async def lookup_html(self, word: str) -> str:
+        return await self.run(self.dictionary.lookup_html, word)
+
+    async def iter_lookup(
+        self, words: Iterable[str], window: int | None = None
+    ) -> AsyncIterator[Tuple[str, str]]:
+        """Yield ``(word, html)`` in input order while keeping ``window`` lookups in flight.
+
+        ``words`` is consumed lazily, so arbitrarily long inputs run in bounded memory.
+        """
+        window = window or self.max_pending
+        in_flight: deque[Tuple[str, asyncio.Task]] = deque()
+        try:
+            for word in words:
+                in_flight.append((word, asyncio.ensure_future(self.lookup_html(word))))
+                if len(in_flight) >= window:
+                    head, task = in_flight.popleft()
+                    yield head, await task
+            while in_flight:
+                head, task = in_flight.popleft()
+                yield head, await task
+        finally:
+            for _, task in in_flight:
+                task.cancel()
+
+    async def lookup_many(self, words: Iterable[str]) -> list[str]:
+        """Look up several words concurrently; results keep the input order."""
+        return [html async for _, html in self.iter_lookup(words)]
+
+    async def keys(self, query: str = "", batch_size: int = 1000) -> AsyncIterator[str]:
+        """Iterate MDX headwords page by page without loading the full key list."""
+        after = 0
+        while True:
+            page = await self.run(self.dictionary.key_page, query, after, batch_size)
+            if not page:
+                return
+            after = page[-1][0]
+            for _, key in page:
+                yield key
+
+
+async def amdx2html(
+    mdx_file: str | Path,
+    input_file: str | Path,
+    output_file: str | Path,
+    with_toc: bool = True,
+    h1_style: str | None = None,
+    scrap_style: str | None = None,
+    additional_styles: str | None = None,
+    max_workers: int = 4,
+    max_pending: int | None = None,
+    progress_callback: Optional[Callable[[int, str], None]] = None,
+) -> Tuple[int, int, OrderedDict]:
+    """Asyncio counterpart of :func:`mdx2html`.
+
+    Definitions are looked up concurrently and handed, in input order, to the
+    streaming writer running on a worker thread, which renders and writes each one as
+    it arrives; the event loop is never blocked. Repeated words are looked up once.
+    Returns the same ``(found, not_found, invalid_words)`` tuple.
+    """
+    from mdxscraper.core.converter import _stream_html
+
+    mdx_file = Path(mdx_file)
+    async with AsyncDictionary(mdx_file, max_workers=max_workers, max_pending=max_pending) as adict:
+        lessons = await adict.run(WordParser(str(input_file)).parse)
+        if progress_callback:
+            progress_callback(5, "Loading dictionary and parsing input...")
+
+        words = [word for lesson in lessons for word in lesson["words"]]
+        renderer = FragmentRenderer(adict.dictionary.impl, scrap_style)
+        definitions: queue.Queue = queue.Queue(maxsize=adict.max_pending)
+        stopped, ended = threading.Event(), threading.Event()
+
+        def fragments() -> Iterator[Fragment]:
+            while (item := definitions.get()) is not _DONE:
+                yield renderer.render(*item)
+            ended.set()
+            raise RuntimeError("lookups stopped before the word list was complete")
+
+        def write() -> Tuple[int, int, OrderedDict]:
+            try:
+                return _stream_html(
+                    lessons,
+                    fragments(),
+                    adict.dictionary,
+                    mdx_file,
+                    output_file,
+                    with_toc=with_toc,
+                    h1_style=h1_style,
+                    additional_styles=additional_styles,
+                    progress_callback=progress_callback,
+                )
+            finally:
+                # Let the lookups finish without waiting for a full queue
+                stopped.set()
+                while not ended.is_set() and definitions.get() is not _DONE:
+                    pass
+
+        writing = asyncio.ensure_future(asyncio.to_thread(write))
+        # Definitions of repeated words are kept until their last occurrence
+        remaining = Counter(words)
+        repeated: dict[str, str] = {}
+        lookups = adict.iter_lookup(dict.fromkeys(words))
+        try:
+            for word in words:
+                if stopped.is_set():
+                    break
+                html = repeated[word] if word in repeated else (await anext(lookups))[1]
+                remaining[word] -= 1
+                if remaining[word]:
+                    repeated[word] = html
+                else:
+                    repeated.pop(word, None)
+                await _put(definitions, (word, html))
+        finally:
+            await lookups.aclose()
+            await _put(definitions, _DONE)
+            # The writer has dropped a partial document if the lookups failed; their
+            # error is the one reported
+            await asyncio.wait([writing])
+            writing.exception()
+        return writing.result()
+
+
+# Marks the end of the definitions handed to the writer thread
+_DONE = object()
+
+
+async def _put(items: queue.Queue, item: Any) -> None:
+    """Put ``item`` on a bounded queue consumed by a thread, without blocking the loop."""
+    if items.full():
+        await asyncio.to_thread(items.put, item)
+    else:
+        items.put_nowait(item)
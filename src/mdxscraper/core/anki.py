@@ -0,0 +1,396 @@
+"""Anki package (.apkg) output: one note per word, one subdeck per lesson.
+
+:func:`mdx2apkg` writes a package Anki imports directly, without Anki or genanki
+installed::
+
+    collection.anki2    SQLite collection (schema 11)
+    media               JSON map of zip entry number to media file name
+    0, 1, ...           every MDD image once, named by content hash
+
+Each word becomes a note of a two-field note type (``Word``, ``Definition``) whose
+stylesheet is the dictionary CSS, so the CSS is stored once rather than per note.
+Lessons become subdecks ``<deck>::<lesson>``. Notes and cards are inserted in
+batches of ``BATCH_SIZE`` rows inside a single transaction, and indexes are built
+after the inserts. Note GUIDs and deck and note type ids are derived from the deck,
+lesson and word, so importing a regenerated package updates the existing notes
+instead of duplicating them.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import shutil
+import sqlite3
+import string
+import tempfile
+import time
+import zipfile
+from collections import OrderedDict
+from html import escape
+from pathlib import Path
+from typing import Callable, Optional, Tuple
+
+from mdxscraper.core.assets import AssetStore
+from mdxscraper.core.dictionary import Dictionary
+from mdxscraper.core.html_writer import FragmentRenderer
+from mdxscraper.core.images import ImageOptimizer
+from mdxscraper.core.parser import WordParser
+from mdxscraper.core.renderer import stylesheet_css
+
+BATCH_SIZE = 1000
+MODEL_NAME = "MdxScraper"
+CARD_CSS = ".card { font-family: Arial Unicode MS; text-align: left; }\n"
+
+# Already compressed; deflating them again only costs time
+_STORED_SUFFIXES = {".png", ".jpg", ".jpeg", ".gif", ".webp"}
+# Characters of Anki's base91 note GUIDs
+_GUID_CHARS = string.ascii_letters + string.digits + "!#$%&()*+,-./:;<=>?@[]^_`{|}~"
+
+_SCHEMA = """
+CREATE TABLE col (
+    id integer primary key, crt integer not null, mod integer not null,
+    scm integer not null, ver integer not null, dty integer not null,
+    usn integer not null, ls integer not null, conf text not null,
+    models text not null, decks text not null, dconf text not null, tags text not null
+);
+CREATE TABLE notes (
+    id integer primary key, guid text not null, mid integer not null,
+    mod integer not null, usn integer not null, tags text not null,
+    flds text not null, sfld integer not null, csum integer not null,
+    flags integer not null, data text not null
+);
+CREATE TABLE cards (
+    id integer primary key, nid integer not null, did integer not null,
+    ord integer not null, mod integer not null, usn integer not null,
+    type integer not null, queue integer not null, due integer not null,
+    ivl integer not null, factor integer not null, reps integer not null,
+    lapses integer not null, left integer not null, odue integer not null,
+    odid integer not null, flags integer not null, data text not null
+);
+CREATE TABLE revlog (
+    id integer primary key, cid integer not null, usn integer not null,
+    ease integer not null, ivl integer not null, lastIvl integer not null,
+    factor integer not null, time integer not null, type integer not null
+);
+CREATE TABLE graves (oid integer not null, type integer not null, usn integer not null);
+"""
+
+_INDEXES = """
+CREATE INDEX ix_notes_usn ON notes (usn);
+CREATE INDEX ix_cards_usn ON cards (usn);
+CREATE INDEX ix_revlog_usn ON revlog (usn);
+CREATE INDEX ix_cards_nid ON cards (nid);
+CREATE INDEX ix_cards_sched ON cards (did, queue, due);
+CREATE INDEX ix_revlog_cid ON revlog (cid);
+CREATE INDEX ix_notes_csum ON notes (csum);
+"""
+
+_CONF = {
+    "activeDecks": [1],
+    "curDeck": 1,
+    "newSpread": 0,
+    "collapseTime": 1200,
+    "timeLim": 0,
+    "estTimes": True,
+    "dueCounts": True,
+    "curModel": None,
+    "nextPos": 1,
+    "sortType": "noteFld",
+    "sortBackwards": False,
+    "addToCur": True,
+}
+
+_DCONF = {
+    "id": 1,
+    "name": "Default",
+    "mod": 0,
+    "usn": 0,
+    "maxTaken": 60,
+    "autoplay": True,
+    "timer": 0,
+    "replayq": True,
+    "dyn": False,
+    "new": {
+        "delays": [1, 10],
+        "ints": [1, 4, 7],
+        "initialFactor": 2500,
+        "order": 1,
+        "perDay": 20,
+        "bury": True,
+        "separate": True,
+    },
+    "rev": {
+        "perDay": 200,
+        "ease4": 1.3,
+        "fuzz": 0.05,
+        "maxIvl": 36500,
+        "ivlFct": 1,
+        "bury": True,
+        "minSpace": 1,
+    },
+    "lapse": {"delays": [10], "mult": 0, "minInt": 1, "leechFails": 8, "leechAction": 0},
+}
+
+
+class AnkiMediaStore(AssetStore):
+    """Asset store adding each unique image once to the package as a numbered entry.
+
+    Images are deduplicated by content hash across the whole deck; notes reference
+    them by bare file name, as Anki expects.
+    """
+
+    def __init__(self, package: zipfile.ZipFile):
+        super().__init__("media", base_url="")
+        self.package = package
+        # zip entry name -> media file name, the package's ``media`` map
+        self.files: dict[str, str] = {}
+        self._names: set[str] = set()
+
+    def store(self, src: str, data: bytes, image_format: str | None = None) -> str:
+        name = self.file_name(src, data, image_format)
+        with self._lock:
+            if name not in self._names:
+                compression = (
+                    zipfile.ZIP_STORED
+                    if Path(name).suffix in _STORED_SUFFIXES
+                    else zipfile.ZIP_DEFLATED
+                )
+                entry = str(len(self.files))
+                self.package.writestr(entry, data, compress_type=compression)
+                self.files[entry] = name
+                self._names.add(name)
+                self.files_written += 1
+                self.bytes_written += len(data)
+        return name
+
+
+def _digest(*parts: str) -> int:
+    return int.from_bytes(hashlib.sha1("\x1f".join(parts).encode("utf-8")).digest()[:8], "big")
+
+
+def _stable_id(*parts: str) -> int:
+    """A millisecond-timestamp-sized id that is the same for the same ``parts``."""
+    return (1 << 40) + _digest(*parts) % (1 << 40)
+
+
+def _guid(*parts: str) -> str:
+    """A base91 note GUID, the same for the same ``parts``."""
+    value = _digest(*parts)
+    chars = []
+    while value:
+        value, rem = divmod(value, len(_GUID_CHARS))
+        chars.append(_GUID_CHARS[rem])
+    return "".join(reversed(chars)) or _GUID_CHARS[0]
+
+
+def _checksum(text: str) -> int:
+    return int(hashlib.sha1(text.encode("utf-8")).hexdigest()[:8], 16)
+
+
+def _tag(name: str) -> str:
+    return "_".join(name.split())
+
+
+def _deck(deck_id: int, name: str, now: int) -> dict:
+    return {
+        "id": deck_id,
+        "name": name,
+        "mod": now,
+        "usn": -1,
+        "desc": "",
+        "dyn": 0,
+        "conf": 1,
+        "collapsed": False,
+        "extendNew": 10,
+        "extendRev": 50,
+        "newToday": [0, 0],
+        "revToday": [0, 0],
+        "lrnToday": [0, 0],
+        "timeToday": [0, 0],
+    }
+
+
+def _model(model_id: int, deck_id: int, css: str, now: int) -> dict:
+    fields = [
+        {"name": name, "ord": i, "sticky": False, "rtl": False, "font": "Arial", "size": 20}
+        for i, name in enumerate(("Word", "Definition"))
+    ]
+    template = {
+        "name": "Card 1",
+        "ord": 0,
+        "qfmt": '<div class="word">{{Word}}</div>',
+        "afmt": "{{FrontSide}}\n<hr id=answer>\n{{Definition}}",
+        "did": None,
+        "bqfmt": "",
+        "bafmt": "",
+    }
+    return {
+        "id": model_id,
+        "name": MODEL_NAME,
+        "type": 0,
+        "mod": now,
+        "usn": -1,
+        "sortf": 0,
+        "did": deck_id,
+        "tmpls": [template],
+        "flds": fields,
+        "css": css,
+        "latexPre": "",
+        "latexPost": "",
+        "tags": [],
+        "vers": [],
+        "req": [[0, "any", [0]]],
+    }
+
+
+def _create_collection(path: Path) -> sqlite3.Connection:
+    conn = sqlite3.connect(path, isolation_level=None)
+    # A fresh scratch file: a crash loses nothing worth journaling
+    conn.execute("PRAGMA journal_mode = OFF")
+    conn.execute("PRAGMA synchronous = OFF")
+    conn.executescript(_SCHEMA)
+    conn.execute("BEGIN")
+    return conn
+
+
+def _finish_collection(
+    conn: sqlite3.Connection, model: dict, decks: dict[int, dict], now: int
+) -> None:
+    conf = dict(_CONF, curModel=str(model["id"]))
+    conn.execute(
+        "INSERT INTO col VALUES (1, ?, ?, ?, 11, 0, 0, 0, ?, ?, ?, ?, '{}')",
+        (
+            now // 86400 * 86400,
+            now * 1000,
+            now * 1000,
+            json.dumps(conf),
+            json.dumps({str(model["id"]): model}),
+            json.dumps({str(deck_id): deck for deck_id, deck in decks.items()}),
+            json.dumps({"1": _DCONF}),
+        ),
+    )
+    conn.execute("COMMIT")
+    conn.executescript(_INDEXES)
+
+
+def mdx2apkg(
+    mdx_file: str | Path,
+    input_file: str | Path,
+    output_file: str | Path,
+    deck_name: str | None = None,
+    scrap_style: str | None = None,
+    additional_styles: str | None = None,
+    progress_callback: Optional[Callable[[int, str], None]] = None,
+    variants: bool = False,
+    optimize_images: bool | ImageOptimizer = False,
+) -> Tuple[int, int, OrderedDict]:
+    """Write the word list as an Anki package with one subdeck per lesson.
+
+    Every word found becomes a note with the word on the front and its definition on
+    the back, tagged with its lesson. ``deck_name`` defaults to the input file name.
+    Words not found are left out and reported. The remaining options work as in
+    ``mdx2html``. Returns the counts and invalid words like ``mdx2html``.
+    """
+    mdx_file = Path(mdx_file)
+    output_file = Path(output_file)
+    deck_name = deck_name or Path(input_file).stem
+    lessons = WordParser(str(input_file)).parse()
+    if progress_callback:
+        progress_callback(5, "Loading dictionary and parsing input...")
+
+    now = int(time.time())
+    model_id = _stable_id("model", MODEL_NAME, deck_name)
+    decks = {1: _deck(1, "Default", now)}
+    parent_id = _stable_id("deck", deck_name)
+    decks[parent_id] = _deck(parent_id, deck_name, now)
+
+    found_count = not_found_count = 0
+    invalid_words = OrderedDict()
+    head = None
+    # Note ids are creation timestamps in Anki; consecutive ones keep them unique
+    next_id = now * 1000
+    occurrences: dict[tuple[str, str], int] = {}
+
+    owned_optimizer = None
+    if optimize_images is True:
+        optimizer = owned_optimizer = ImageOptimizer()
+    else:
+        optimizer = optimize_images or None
+    output_file.parent.mkdir(parents=True, exist_ok=True)
+    build_dir = Path(tempfile.mkdtemp(prefix="mdxscraper-apkg-"))
+    collection = build_dir / "collection.anki2"
+    dictionary = Dictionary(mdx_file, variants=variants)
+    conn = None
+    try:
+        with zipfile.ZipFile(output_file, "w", zipfile.ZIP_DEFLATED) as package:
+            media = AnkiMediaStore(package)
+            renderer = FragmentRenderer(dictionary.impl, scrap_style, media, optimizer)
+            conn = _create_collection(collection)
+            notes, cards = [], []
+
+            def flush():
+                conn.executemany(
+                    "INSERT INTO notes VALUES (?, ?, ?, ?, -1, ?, ?, ?, ?, 0, '')", notes
+                )
+                conn.executemany(
+                    "INSERT INTO cards VALUES "
+                    "(?, ?, ?, 0, ?, -1, 0, 0, ?, 0, 0, 0, 0, 0, 0, 0, 0, '')",
+                    cards,
+                )
+                notes.clear()
+                cards.clear()
+
+            for done, lesson in enumerate(lessons):
+                if progress_callback:
+                    progress = 5 + int(done / max(len(lessons), 1) * 85)
+                    progress_callback(progress, f"Processing lesson: {lesson['name']}")
+                full_name = f"{deck_name}::{lesson['name']}"
+                deck_id = _stable_id("deck", full_name)
+                decks.setdefault(deck_id, _deck(deck_id, full_name, now))
+                tags = f" {_tag(lesson['name'])} " if _tag(lesson["name"]) else ""
+                for word in lesson["words"]:
+                    fragment = renderer.render(word, dictionary.lookup_html(word))
+                    if not fragment.found:
+                        not_found_count += 1
+                        invalid_words.setdefault(lesson["name"], []).append(word)
+                        continue
+                    found_count += 1
+                    if head is None:
+                        head = fragment.head
+                    key = (lesson["name"], word)
+                    occurrence = occurrences[key] = occurrences.get(key, 0) + 1
+                    guid = _guid(deck_name, lesson["name"], word, str(occurrence))
+                    fields = escape(word, False) + "\x1f" + fragment.html
+                    notes.append(
+                        (next_id, guid, model_id, now, tags, fields, word, _checksum(word))
+                    )
+                    cards.append((next_id, next_id, deck_id, now, found_count))
+                    next_id += 1
+                    if len(notes) >= BATCH_SIZE:
+                        flush()
+            flush()
+
+            if progress_callback:
+                progress_callback(90, "Writing collection...")
+            css = CARD_CSS + stylesheet_css(
+                head, mdx_file.parent, dictionary.impl, additional_styles
+            )
+            _finish_collection(conn, _model(model_id, parent_id, css, now), decks, now)
+            conn.close()
+            package.write(collection, "collection.anki2")
+            package.writestr("media", json.dumps(media.files))
+    except BaseException:
+        output_file.unlink(missing_ok=True)
+        raise
+    finally:
+        dictionary.close()
+        if owned_optimizer is not None:
+            owned_optimizer.close()
+        if conn is not None:
+            conn.close()
+        shutil.rmtree(build_dir, ignore_errors=True)
+
+    if progress_callback:
+        progress_callback(100, "Anki package generation completed!")
+    return found_count, not_found_count, invalid_words
@@ -0,0 +1,117 @@
+"""External asset storage for generated documents.
+
+Instead of inlining every MDD resource as a base64 data URI, :class:`AssetStore`
+writes each unique resource once into an ``assets/`` directory next to the output,
+named after a hash of its content, and hands back a relative URL for ``src``.
+Resources smaller than ``inline_threshold`` bytes stay inline as data URIs. With
+``precompress`` each compressible resource also gets a gzipped ``<name>.gz`` copy, for
+servers that serve precompressed files (e.g. nginx ``gzip_static``).
+"""
+
+from __future__ import annotations
+
+import hashlib
+import os
+import threading
+from base64 import b64encode
+from pathlib import Path
+from urllib.parse import quote
+
+from mdxscraper.core.compression import write_gzip_sibling
+from mdxscraper.utils import file_utils
+
+ASSET_DIR_NAME = "assets"
+
+# File suffixes for formats whose name differs from the usual extension
+_SUFFIXES = {"jpeg": ".jpg", "svg+xml": ".svg"}
+
+
+def data_uri(src: str, data: bytes, image_format: str | None = None) -> str:
+    """Inline ``data`` as a data URI.
+
+    The type is ``image_format`` when known (e.g. sniffed), otherwise guessed from the
+    extension of ``src``. SVG is inlined as URL-encoded text rather than base64.
+    """
+    if image_format == "svg+xml":
+        text = data.decode("utf-8", errors="replace")
+        return "data:image/svg+xml;charset=utf-8," + quote(text, safe="/:=;,'!*()~-._")
+    image_format = image_format or file_utils.get_image_format_from_src(src)
+    return "data:image/" + image_format + ";base64," + b64encode(data).decode("ascii")
+
+
+class AssetStore:
+    """Content-addressed resource directory shared by all fragments of a document.
+
+    Args:
+        directory: Directory the assets are written to (created on first write).
+        base_url: Prefix of the URLs returned by :meth:`url`, relative to the document.
+        inline_threshold: Resources smaller than this many bytes are returned as data
+            URIs instead of being written out.
+        precompress: Also write a ``.gz`` copy of each resource that compresses.
+    """
+
+    def __init__(
+        self,
+        directory: str | Path,
+        base_url: str = ASSET_DIR_NAME,
+        inline_threshold: int = 0,
+        precompress: bool = False,
+    ):
+        self.directory = Path(directory)
+        self.base_url = base_url.rstrip("/")
+        self.inline_threshold = inline_threshold
+        self.precompress = precompress
+        self.files_written = 0
+        self.bytes_written = 0
+        self._lock = threading.Lock()
+
+    def __getstate__(self):
+        # Sent to worker processes; each process gets its own lock
+        state = self.__dict__.copy()
+        del state["_lock"]
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+
+    @classmethod
+    def for_output(
+        cls, output_file: str | Path, inline_threshold: int = 0, precompress: bool = False
+    ) -> "AssetStore":
+        """Store in ``assets/`` beside ``output_file``, referenced relatively."""
+        return cls(
+            Path(output_file).parent / ASSET_DIR_NAME,
+            inline_threshold=inline_threshold,
+            precompress=precompress,
+        )
+
+    def file_name(self, src: str, data: bytes, image_format: str | None = None) -> str:
+        if image_format:
+            suffix = _SUFFIXES.get(image_format, "." + image_format)
+        else:
+            suffix = Path(src.replace("\\", "/")).suffix.lower() or ".bin"
+        return hashlib.sha256(data).hexdigest()[:32] + suffix
+
+    def url(self, src: str, data: bytes, image_format: str | None = None) -> str:
+        """Return the ``src`` to use for a resource, writing it out if needed."""
+        if len(data) < self.inline_threshold:
+            return data_uri(src, data, image_format)
+        return self.store(src, data, image_format)
+
+    def store(self, src: str, data: bytes, image_format: str | None = None) -> str:
+        """Write a resource regardless of its size; returns its URL."""
+        name = self.file_name(src, data, image_format)
+        path = self.directory / name
+        with self._lock:
+            if not path.exists():
+                self.directory.mkdir(parents=True, exist_ok=True)
+                # Other processes may write the same asset; publish it atomically
+                tmp_path = path.with_name(f"{name}.{os.getpid()}.{threading.get_ident()}.tmp")
+                tmp_path.write_bytes(data)
+                os.replace(tmp_path, path)
+                if self.precompress:
+                    write_gzip_sibling(path, data)
+                self.files_written += 1
+                self.bytes_written += len(data)
+        return f"{self.base_url}/{name}"
@@ -0,0 +1,208 @@
+"""Flashcard images: one image per word, or per lesson, from a single conversion.
+
+Generating a card per headword with ``mdx2img`` costs a full conversion each time: the
+dictionary is reopened, the stylesheet merged again and a wkhtmltoimage process started
+for a one-word document. :func:`mdx2cards` opens the dictionary once, writes the HTML of
+each card in turn into a build directory (one shared ``assets/`` directory, one merged
+stylesheet) and hands every page to a bounded pool of concurrent wkhtmltoimage
+processes::
+
+    out/
+        001-abandon.png
+        002-ability.png
+        ...
+
+Cards are numbered in word list order and named after their word or lesson, so the
+same word list always produces the same file names. Words the dictionary does not
+define get no card; they are returned as invalid words, like ``mdx2html`` does.
+"""
+
+from __future__ import annotations
+
+import logging
+import os
+import shutil
+import tempfile
+import time
+from collections import OrderedDict
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from pathlib import Path
+from typing import Callable, Optional, Tuple
+
+from mdxscraper.core.assets import AssetStore
+from mdxscraper.core.converter import _write_image
+from mdxscraper.core.dictionary import Dictionary
+from mdxscraper.core.html_writer import (
+    RENDERERS,
+    Fragment,
+    HtmlStreamWriter,
+    link_stylesheets,
+    render_head,
+)
+from mdxscraper.core.images import ImageOptimizer
+from mdxscraper.core.parser import WordParser
+from mdxscraper.core.sharding import Shard, plan_shards
+
+CARD_FORMATS = (".png", ".jpg", ".jpeg", ".webp")
+CARD_UNITS = ("word", "lesson")
+
+
+def plan_cards(lessons: list[dict], per: str = "word") -> list[Shard]:
+    """One card per word, named after the word, or one per lesson; numbered from 1."""
+    if per == "lesson":
+        return plan_shards(lessons)
+    if per != "word":
+        raise ValueError(f"Unknown card unit: {per!r} (expected one of {list(CARD_UNITS)})")
+    words = ((lesson, word) for lesson in lessons for word in lesson["words"])
+    return [
+        Shard(number, word, [{**lesson, "words": [word]}])
+        for number, (lesson, word) in enumerate(words, 1)
+    ]
+
+
+def _write_card(
+    card: Shard,
+    fragments: list[Fragment],
+    head: str,
+    html_file: Path,
+    heading: bool,
+    h1_style: str | None,
+) -> None:
+    """Write the HTML page of one card: its fragments, under the lesson heading if any."""
+    with HtmlStreamWriter(html_file, with_toc=False, h1_style=h1_style) as writer:
+        if heading:
+            writer.begin_lesson(card.name)
+        for fragment in fragments:
+            writer.add(fragment)
+        if heading:
+            writer.end_lesson()
+        writer.close(head)
+
+
+def mdx2cards(
+    mdx_file: str | Path,
+    input_file: str | Path,
+    output_dir: str | Path,
+    output_format: str = "png",
+    per: str = "word",
+    workers: int | None = None,
+    img_options: dict | None = None,
+    h1_style: str | None = None,
+    scrap_style: str | None = None,
+    additional_styles: str | None = None,
+    progress_callback: Optional[Callable[[int, str], None]] = None,
+    variants: bool = False,
+    backend: str = "bs4",
+    inline_threshold: int = 0,
+    optimize_images: bool | ImageOptimizer = False,
+) -> Tuple[int, int, OrderedDict]:
+    """Render one image per word (``per="word"``) or per lesson into ``output_dir``.
+
+    ``output_format`` is ``"png"``, ``"jpg"``, ``"jpeg"`` or ``"webp"``. At most
+    ``workers`` wkhtmltoimage processes run at once (default: all CPUs). Progress
+    messages report the throughput in images per second. The remaining options work
+    as in ``mdx2img``; ``img_options`` applies to every card. Returns the counts and
+    invalid words like ``mdx2html``.
+    """
+    suffix = "." + output_format.lower().lstrip(".")
+    if suffix not in CARD_FORMATS:
+        raise ValueError(f"Unknown card format: {output_format!r}")
+    if backend not in RENDERERS:
+        raise ValueError(f"Unknown HTML backend: {backend!r} (expected one of {list(RENDERERS)})")
+    mdx_file = Path(mdx_file)
+    output_dir = Path(output_dir)
+
+    plan = plan_cards(WordParser(str(input_file)).parse(), per)
+    digits = max(3, len(str(len(plan))))
+    workers = max(1, workers or os.cpu_count() or 1)
+    if progress_callback:
+        progress_callback(5, f"Rendering {len(plan)} cards...")
+
+    found_count = not_found_count = 0
+    invalid_words = OrderedDict()
+    # Rendered heads by the definition head they were built from
+    heads: dict[str | None, str] = {}
+    completed = skipped = 0
+    start = time.perf_counter()
+
+    def rate() -> float:
+        return completed / max(time.perf_counter() - start, 1e-9)
+
+    def collect(futures: set[Future], pending: dict[Future, Shard]) -> None:
+        nonlocal completed
+        for future in futures:
+            card = pending.pop(future)
+            future.result()
+            completed += 1
+            if progress_callback:
+                progress = 5 + int((completed + skipped) / len(plan) * 90)
+                progress_callback(
+                    progress,
+                    f"Card {completed + skipped}/{len(plan)}: {card.name} "
+                    f"({rate():.1f} images/s)",
+                )
+
+    def convert(html_file: Path, output_file: Path) -> None:
+        _write_image(html_file, output_file, img_options, build_dir)
+        os.remove(html_file)
+
+    output_dir.mkdir(parents=True, exist_ok=True)
+    build_dir = Path(tempfile.mkdtemp(prefix="mdxscraper-"))
+    assets = AssetStore.for_output(build_dir / "card.html", inline_threshold)
+    owned_optimizer = None
+    if optimize_images is True:
+        optimizer = owned_optimizer = ImageOptimizer()
+    else:
+        optimizer = optimize_images or None
+    dictionary = Dictionary(mdx_file, variants=variants)
+    try:
+        renderer = RENDERERS[backend](dictionary.impl, scrap_style, assets, optimizer)
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            pending: dict[Future, Shard] = {}
+            try:
+                for card in plan:
+                    fragments = []
+                    for lesson in card.lessons:
+                        for word in lesson["words"]:
+                            fragment = renderer.render(word, dictionary.lookup_html(word))
+                            if fragment.found:
+                                found_count += 1
+                            else:
+                                not_found_count += 1
+                                invalid_words.setdefault(lesson["name"], []).append(word)
+                            fragments.append(fragment)
+                    if per == "word" and not fragments[0].found:
+                        skipped += 1
+                        continue
+
+                    raw_head = next((f.head for f in fragments if f.head), None)
+                    if raw_head not in heads:
+                        head = render_head(raw_head, mdx_file, dictionary.impl, additional_styles)
+                        heads[raw_head] = link_stylesheets(head, assets)
+                    html_file = build_dir / card.file_name(".html", digits)
+                    _write_card(
+                        card, fragments, heads[raw_head], html_file, per == "lesson", h1_style
+                    )
+                    output_file = output_dir / card.file_name(suffix, digits)
+                    pending[executor.submit(convert, html_file, output_file)] = card
+                    # Keep the next pages ready without spooling the whole list to disk
+                    if len(pending) >= 2 * workers:
+                        done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                        collect(done, pending)
+                collect(wait(pending).done, pending)
+            except BaseException:
+                for future in pending:
+                    future.cancel()
+                raise
+    finally:
+        dictionary.close()
+        if owned_optimizer is not None:
+            owned_optimizer.close()
+        shutil.rmtree(build_dir, ignore_errors=True)
+
+    elapsed = time.perf_counter() - start
+    message = f"{completed} cards in {elapsed:.1f} s ({rate():.1f} images/s)"
+    logging.info(f"Rendered {message}; {skipped} words not found")
+    if progress_callback:
+        progress_callback(100, f"Rendered {message}")
+    return found_count, not_found_count, invalid_words
@@ -0,0 +1,165 @@
+"""Gzip output assembled from independently deflated segments.
+
+``.html.gz`` output is compressed while the document is rendered rather than in a
+second pass. The streaming writer spools the table of contents and the definitions
+separately and only learns the document head (the merged CSS) at the end, so the
+parts are compressed out of order:
+
+- each spool is a :class:`DeflateSpool`, a raw deflate stream of its own, flushed
+  to a byte boundary without a final block when it is done;
+- :class:`GzipMember` writes the gzip header, deflates the parts known only at the
+  end, splices the finished spools in between and closes the member with one final
+  block. The CRC-32 of the whole document is combined from the CRCs of the parts
+  (:func:`crc32_combine`).
+
+The result is a single standard gzip member, so browsers and static file servers
+handle it like any other ``.gz`` file. Deflate back-references never cross parts,
+which costs a fraction of a percent of compression.
+"""
+
+from __future__ import annotations
+
+import gzip
+import os
+import struct
+import tempfile
+import threading
+import zlib
+from pathlib import Path
+from typing import BinaryIO
+
+GZIP_LEVEL = 6
+
+# Formats already compressed; a .gz copy would not be smaller
+_COMPRESSED_SUFFIXES = {".png", ".jpg", ".jpeg", ".gif", ".webp", ".gz", ".woff2"}
+
+
+def is_gzip_path(output_file) -> bool:
+    """Whether ``output_file`` is a path to gzip-compressed output (``*.gz``)."""
+    return not hasattr(output_file, "write") and str(output_file).lower().endswith(".gz")
+
+
+def _gf2_times(matrix: list[int], vector: int) -> int:
+    result = 0
+    row = 0
+    while vector:
+        if vector & 1:
+            result ^= matrix[row]
+        vector >>= 1
+        row += 1
+    return result
+
+
+def _gf2_square(matrix: list[int]) -> list[int]:
+    return [_gf2_times(matrix, matrix[n]) for n in range(32)]
+
+
+def crc32_combine(crc1: int, crc2: int, len2: int) -> int:
+    """CRC-32 of ``A + B`` from ``crc1 = crc32(A)``, ``crc2 = crc32(B)`` and ``len(B)``.
+
+    A port of zlib's ``crc32_combine``: appends ``len2`` zero bytes to ``crc1`` by
+    repeated squaring of the CRC shift operator, in O(log len2).
+    """
+    if len2 <= 0:
+        return crc1
+    odd = [0xEDB88320] + [1 << n for n in range(31)]  # one zero bit
+    even = _gf2_square(odd)  # two zero bits
+    odd = _gf2_square(even)  # four zero bits
+    while True:
+        even = _gf2_square(odd)
+        if len2 & 1:
+            crc1 = _gf2_times(even, crc1)
+        len2 >>= 1
+        if not len2:
+            break
+        odd = _gf2_square(even)
+        if len2 & 1:
+            crc1 = _gf2_times(odd, crc1)
+        len2 >>= 1
+        if not len2:
+            break
+    return crc1 ^ crc2
+
+
+def _deflater(level: int):
+    return zlib.compressobj(level, zlib.DEFLATED, -zlib.MAX_WBITS)
+
+
+class DeflateSpool:
+    """Temporary spool that deflates everything written to it.
+
+    Holds the compressed bytes (in memory up to ``spool_size``, then on disk) and
+    the CRC-32 and length of the uncompressed data, for :meth:`GzipMember.splice`.
+    """
+
+    def __init__(self, spool_size: int, level: int = GZIP_LEVEL):
+        self.crc = 0
+        self.size = 0
+        self._spool = tempfile.SpooledTemporaryFile(max_size=spool_size)
+        self._deflate = _deflater(level)
+
+    def write(self, data: bytes) -> None:
+        self.crc = zlib.crc32(data, self.crc)
+        self.size += len(data)
+        self._spool.write(self._deflate.compress(data))
+
+    def finish(self):
+        """Flush the stream to a byte boundary and rewind; returns the compressed spool."""
+        self._spool.write(self._deflate.flush(zlib.Z_SYNC_FLUSH))
+        self._spool.seek(0)
+        return self._spool
+
+    def close(self) -> None:
+        self._spool.close()
+
+
+class GzipMember:
+    """Write one gzip member to ``out`` from plain and pre-deflated parts, in order."""
+
+    def __init__(self, out: BinaryIO, level: int = GZIP_LEVEL):
+        self.out = out
+        self.level = level
+        self.crc = 0
+        self.size = 0
+        # Magic, deflate, no flags, mtime 0 (reproducible output), no extra flags, unknown OS
+        out.write(b"\x1f\x8b\x08\x00\x00\x00\x00\x00\x00\xff")
+        self._deflate = _deflater(level)
+
+    def write(self, data: bytes) -> None:
+        self.out.write(self._deflate.compress(data))
+        self.crc = zlib.crc32(data, self.crc)
+        self.size += len(data)
+
+    def splice(self, spool: DeflateSpool) -> int:
+        """Copy a finished spool into the member; returns its uncompressed size."""
+        # Align the stream on a byte boundary so the spool's blocks can follow
+        self.out.write(self._deflate.flush(zlib.Z_SYNC_FLUSH))
+        self._deflate = _deflater(self.level)
+        compressed = spool.finish()
+        while chunk := compressed.read(1024 * 1024):
+            self.out.write(chunk)
+        self.crc = crc32_combine(self.crc, spool.crc, spool.size)
+        self.size += spool.size
+        return spool.size
+
+    def close(self) -> None:
+        # The final block ends the deflate stream
+        self.out.write(self._deflate.flush(zlib.Z_FINISH))
+        self.out.write(struct.pack("<II", self.crc, self.size & 0xFFFFFFFF))
+
+
+def write_gzip_sibling(path: Path, data: bytes) -> bool:
+    """Write ``path.gz`` next to ``path`` for static serving, if compressing pays off.
+
+    Returns whether the sibling was written; already compressed formats are skipped.
+    """
+    if path.suffix.lower() in _COMPRESSED_SUFFIXES:
+        return False
+    compressed = gzip.compress(data, compresslevel=9, mtime=0)
+    if len(compressed) >= len(data):
+        return False
+    gz_path = path.with_name(path.name + ".gz")
+    tmp_path = gz_path.with_name(f"{gz_path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+    tmp_path.write_bytes(compressed)
+    os.replace(tmp_path, gz_path)
+    return True
@@ -1,45 +1,236 @@
 from __future__ import annotations
 
+import io
+import logging
 import os
+import shutil
+import subprocess
 import tempfile
+import threading
 from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime, timedelta
 from pathlib import Path
-from typing import Callable, Optional, Tuple
+from typing import Any, BinaryIO, Callable, Iterable, Iterator, Optional, Tuple
 
 import imgkit
 import pdfkit
 from bs4 import BeautifulSoup
 from PIL import Image
 
+from mdxscraper.core.assets import AssetStore
+from mdxscraper.core.compression import is_gzip_path
 from mdxscraper.core.dictionary import Dictionary
+from mdxscraper.core.encoding import save_image
+from mdxscraper.core.html_writer import (
+    RENDERERS,
+    EntryDeduplicator,
+    Fragment,
+    HtmlStreamWriter,
+    link_stylesheets,
+    open_output,
+    reference_html,
+    render_head,
+)
+from mdxscraper.core.images import ImageOptimizer
+from mdxscraper.core.parallel import iter_fragments
 from mdxscraper.core.parser import WordParser
+from mdxscraper.core.pipeline import Pipeline, Stage, StageMetrics
 from mdxscraper.core.renderer import embed_images, merge_css
+from mdxscraper.core.slimming import HtmlSlimmer
 from mdxscraper.utils.path_utils import (
     get_wkhtmltopdf_path,
     validate_wkhtmltopdf_for_pdf_conversion,
 )
 
+OUTPUT_FORMATS = (".html", ".pdf", ".jpg", ".jpeg", ".png", ".webp")
+
 
 def mdx2html(
     mdx_file: str | Path,
     input_file: str | Path,
-    output_file: str | Path,
+    output_file: str | Path | BinaryIO,
     with_toc: bool = True,
     h1_style: str | None = None,
     scrap_style: str | None = None,
     additional_styles: str | None = None,
     progress_callback: Optional[Callable[[int, str], None]] = None,
+    hot_words: int = 0,
+    variants: bool = False,
+    stream: bool = False,
+    backend: str = "bs4",
+    workers: int = 1,
+    pipeline: bool = False,
+    metrics_callback: Optional[Callable[[list[StageMetrics]], None]] = None,
+    dedupe: bool = False,
+    external_assets: bool = False,
+    inline_threshold: int = 0,
+    optimize_images: bool | ImageOptimizer = False,
+    slim: bool | HtmlSlimmer = False,
+    precompress_assets: bool = False,
 ) -> Tuple[int, int, OrderedDict]:
-    found_count = 0
-    not_found_count = 0
-
+    """Look up every word of ``input_file`` and write an HTML document.
+
+    ``hot_words`` > 0 records lookup frequencies next to the dictionary and, on the
+    next run, preloads that many of the most frequent words in the background.
+    ``variants`` resolves inflected and alternative spellings through the variant index.
+    ``stream`` writes each word as soon as it is rendered instead of building the whole
+    document in memory, keeping peak memory flat for very long word lists.
+    ``backend`` selects how definitions are parsed and rewritten: ``"bs4"`` (default)
+    or ``"lxml"``, a faster lxml.html pipeline that always writes through the
+    streaming writer.
+    ``workers`` > 1 looks up and renders words on that many processes, each with its
+    own dictionary handle, and merges the fragments in input order (streaming writer).
+    ``pipeline`` runs lookup, transform (parse) and asset resolution (image inlining and
+    serialization) as concurrent stages feeding the streaming writer; when given,
+    ``metrics_callback`` receives the per-stage metrics once the document is written.
+    ``dedupe`` emits each resolved entry once: repeated words and words redirecting to
+    an entry already in the document are rendered as links to its first occurrence.
+    ``external_assets`` writes MDD images once into ``assets/`` beside the output, named
+    by content hash, and links them relatively; images smaller than
+    ``inline_threshold`` bytes stay inline as data URIs; ``precompress_assets`` also
+    writes a gzipped ``.gz`` copy of each compressible asset for static serving.
+    ``optimize_images`` sniffs, downscales and converts images before embedding them;
+    pass an ``ImageOptimizer`` to tune it or True for the defaults.
+    ``slim`` drops the stylesheet rules no element of the document can match, strips
+    scripts, hidden elements and ``sound://``/``entry://`` links, and minifies the
+    markup; pass an ``HtmlSlimmer`` to read the bytes saved from its ``stats``.
+    ``output_file`` may also be a binary file object, such as the stdin of a
+    wkhtmltopdf process; ``external_assets`` needs a path. A path ending in ``.gz``
+    (e.g. ``words.html.gz``) is gzip-compressed as the words are written, through the
+    streaming writer.
+    """
+    if backend not in RENDERERS:
+        raise ValueError(f"Unknown HTML backend: {backend!r} (expected one of {list(RENDERERS)})")
     mdx_file = Path(mdx_file)
-    dictionary = Dictionary(mdx_file)
-    lessons = WordParser(str(input_file)).parse()
+    dictionary = Dictionary(mdx_file, hot_words=hot_words, variants=variants)
+    owned_optimizer = None
+    try:
+        lessons = WordParser(str(input_file)).parse()
 
-    if progress_callback:
-        progress_callback(5, "Loading dictionary and parsing input...")
+        if progress_callback:
+            progress_callback(5, "Loading dictionary and parsing input...")
+
+        lookup = EntryDeduplicator(dictionary.lookup_html) if dedupe else dictionary.lookup_html
+        assets = (
+            AssetStore.for_output(output_file, inline_threshold, precompress_assets)
+            if external_assets
+            else None
+        )
+        if optimize_images is True:
+            optimizer = owned_optimizer = ImageOptimizer()
+        else:
+            optimizer = optimize_images or None
+        slimmer = HtmlSlimmer() if slim is True else slim or None
+        if stream or backend != "bs4" or workers > 1 or pipeline or is_gzip_path(output_file):
+            words = (word for lesson in lessons for word in lesson["words"])
+            stages = None
+            if workers > 1:
+                fragments = iter_fragments(
+                    mdx_file,
+                    words,
+                    workers,
+                    variants=variants,
+                    backend=backend,
+                    scrap_style=scrap_style,
+                    with_entries=dedupe,
+                    assets=assets,
+                    optimizer=optimizer,
+                )
+                if dedupe:
+                    fragments = _drop_duplicates(
+                        fragments, lookup, RENDERERS[backend](None, scrap_style)
+                    )
+            elif pipeline:
+                renderer = RENDERERS[backend](dictionary.impl, scrap_style, assets, optimizer)
+                stages = Pipeline(
+                    [
+                        Stage("lookup", lambda word: (word, lookup(word))),
+                        Stage("transform", lambda item: renderer.parse(*item)),
+                        Stage("assets", renderer.finish),
+                    ]
+                )
+                fragments = stages.run(words)
+            else:
+                renderer = RENDERERS[backend](dictionary.impl, scrap_style, assets, optimizer)
+                fragments = (renderer.render(word, lookup(word)) for word in words)
+            try:
+                return _stream_html(
+                    lessons,
+                    fragments,
+                    dictionary,
+                    mdx_file,
+                    output_file,
+                    with_toc=with_toc,
+                    h1_style=h1_style,
+                    additional_styles=additional_styles,
+                    progress_callback=progress_callback,
+                    slimmer=slimmer,
+                )
+            finally:
+                fragments.close()
+                if stages is not None and metrics_callback:
+                    metrics_callback(stages.metrics())
+        return _render_html(
+            lessons,
+            lookup,
+            dictionary,
+            mdx_file,
+            output_file,
+            with_toc=with_toc,
+            h1_style=h1_style,
+            scrap_style=scrap_style,
+            additional_styles=additional_styles,
+            progress_callback=progress_callback,
+            assets=assets,
+            optimizer=optimizer,
+            slimmer=slimmer,
+        )
+    finally:
+        dictionary.close()
+        if owned_optimizer is not None:
+            owned_optimizer.close()
+
+
+def _drop_duplicates(
+    fragments: Iterator[Fragment], deduplicator: EntryDeduplicator, renderer
+) -> Iterator[Fragment]:
+    """Replace fragments of entries already emitted with references to the first one."""
+    try:
+        for fragment in fragments:
+            first = None
+            if fragment.entry is not None:
+                first = deduplicator.first_occurrence(fragment.word, fragment.entry)
+            if first is not None:
+                fragment = renderer.render(fragment.word, reference_html(first))
+            yield fragment
+    finally:
+        fragments.close()
+
+
+def _render_html(
+    lessons: list,
+    lookup: Callable[[str], str],
+    dictionary: Dictionary,
+    mdx_file: Path,
+    output_file: str | Path | BinaryIO,
+    with_toc: bool = True,
+    h1_style: str | None = None,
+    scrap_style: str | None = None,
+    additional_styles: str | None = None,
+    progress_callback: Optional[Callable[[int, str], None]] = None,
+    assets: AssetStore | None = None,
+    optimizer: ImageOptimizer | None = None,
+    slimmer: HtmlSlimmer | None = None,
+) -> Tuple[int, int, OrderedDict]:
+    """Assemble, style and write the HTML document for already parsed lessons.
+
+    ``lookup`` maps a word to its definition HTML (empty string when missing), which
+    lets callers that resolve definitions elsewhere (e.g. ``amdx2html``) reuse the
+    same document assembly as ``mdx2html``.
+    """
+    found_count = 0
+    not_found_count = 0
 
     right_soup = BeautifulSoup(
         '<body style="font-family:Arial Unicode MS;"><div class="right"></div></body>', "lxml"
@@ -70,7 +261,7 @@ def mdx2html(
 
         invalid = False
         for word in lesson["words"]:
-            result = dictionary.lookup_html(word)
+            result = lookup(word)
             if len(result) == 0:
                 not_found_count += 1
                 # Always collect invalid words and embed a warning
@@ -123,15 +314,16 @@ def mdx2html(
 
     if progress_callback:
         progress_callback(85, "Embedding images...")
-    right_soup = embed_images(right_soup, dictionary.impl)
+    right_soup = embed_images(right_soup, dictionary.impl, assets=assets, optimizer=optimizer)
 
     if progress_callback:
         progress_callback(90, "Writing HTML file...")
     html = str(right_soup).encode("utf-8")
     html = html.replace(b"<body>", b"").replace(b"</body>", b"", html.count(b"</body>") - 1)
-    # Ensure output directory exists
-    Path(output_file).parent.mkdir(parents=True, exist_ok=True)
-    with open(output_file, "wb") as file:
+    if slimmer is not None:
+        html = slimmer.slim_document(html).encode("utf-8")
+        _log_slimming(slimmer)
+    with open_output(output_file) as file:
         file.write(html)
 
     if progress_callback:
@@ -141,6 +333,84 @@ def mdx2html(
     return found_count, not_found_count, invalid_words
 
 
+def _stream_html(
+    lessons: list,
+    fragments: Iterator[Fragment],
+    dictionary: Dictionary,
+    mdx_file: Path,
+    output_file: str | Path | BinaryIO,
+    with_toc: bool = True,
+    h1_style: str | None = None,
+    additional_styles: str | None = None,
+    progress_callback: Optional[Callable[[int, str], None]] = None,
+    slimmer: HtmlSlimmer | None = None,
+    stylesheets: AssetStore | None = None,
+    toc_lessons: list | None = None,
+) -> Tuple[int, int, OrderedDict]:
+    """Streaming counterpart of ``_render_html``: one fragment at a time, flat memory.
+
+    ``fragments`` yields one rendered fragment per word of ``lessons``, in order.
+    With ``stylesheets`` the merged CSS is written to that store and linked.
+    ``toc_lessons`` are the lessons listed in the table of contents, ``lessons`` by
+    default (e.g. the whole document in its first part).
+
+    The body is written to ``output_file`` as soon as the first definition has supplied
+    the document head. With ``slimmer`` the head depends on the whole document, so
+    the body is spooled until the end.
+    """
+    found_count = 0
+    not_found_count = 0
+    invalid_words = OrderedDict()
+    total_lessons = len(lessons)
+    head = None
+
+    def document_head(head: str | None) -> str:
+        head = render_head(head, mdx_file, dictionary.impl, additional_styles)
+        if slimmer is not None:
+            head = slimmer.slim_head(head)
+            _log_slimming(slimmer)
+        if stylesheets is not None:
+            head = link_stylesheets(head, stylesheets)
+        return head
+
+    with HtmlStreamWriter(output_file, with_toc=with_toc, h1_style=h1_style) as writer:
+        if with_toc and (slimmer is None or toc_lessons is not None):
+            toc_lessons = lessons if toc_lessons is None else toc_lessons
+            words = (word for lesson in toc_lessons for word in lesson["words"])
+            writer.plan_toc(toc_lessons, dictionary.present_words(words))
+        for processed_lessons, lesson in enumerate(lessons):
+            if progress_callback:
+                progress = 10 + int((processed_lessons / total_lessons) * 75)
+                progress_callback(progress, f"Processing lesson: {lesson['name']}")
+
+            writer.begin_lesson(lesson["name"], lesson.get("continued", False))
+            if slimmer is not None:
+                slimmer.usage.ids.add("lesson_" + lesson["name"])
+            for word in lesson["words"]:
+                fragment = next(fragments)
+                if fragment.found:
+                    found_count += 1
+                else:
+                    not_found_count += 1
+                    invalid_words.setdefault(lesson["name"], []).append(word)
+                if head is None:
+                    head = fragment.head
+                    if head is not None and slimmer is None:
+                        writer.start(document_head(head))
+                if slimmer is not None:
+                    fragment.html = slimmer.slim_html(fragment.html)
+                writer.add(fragment)
+            writer.end_lesson()
+
+        if progress_callback:
+            progress_callback(90, "Writing HTML file...")
+        writer.close(None if writer.started else document_head(head))
+
+    if progress_callback:
+        progress_callback(100, "HTML generation completed!")
+    return found_count, not_found_count, invalid_words
+
+
 def mdx2pdf(
     mdx_file: str | Path,
     input_file: str | Path,
@@ -152,8 +422,80 @@ def mdx2pdf(
     additional_styles: str | None = None,
     wkhtmltopdf_path: str = "auto",
     progress_callback: Optional[Callable[[int, str], None]] = None,
+    external_assets: bool = False,
+    inline_threshold: int = 0,
+    optimize_images: bool | ImageOptimizer = False,
+    slim: bool | HtmlSlimmer = False,
+    pdf_workers: int = 1,
+    pipe: bool = False,
 ) -> tuple[int, int, OrderedDict]:
-    with tempfile.NamedTemporaryFile(suffix=".html", delete=False) as temp:
+    """Render dictionary results to PDF using wkhtmltopdf via pdfkit.
+
+    With ``external_assets`` the intermediate HTML links its images from an asset
+    directory (see ``mdx2html``) that wkhtmltopdf is allowed to read.
+    ``optimize_images`` and ``slim`` are passed on to ``mdx2html``; slimming the
+    intermediate HTML shortens wkhtmltopdf's style matching and layout.
+
+    With ``pdf_workers`` > 1 the document is split at lesson boundaries, rendered by
+    that many concurrent wkhtmltopdf processes and merged with a bookmark per lesson
+    (see ``mdx2pdf_parallel``; requires ``pypdf``). The parts always link their images
+    from a shared asset directory, whatever ``external_assets`` says, and are written
+    to files, so ``pipe`` raises ValueError.
+
+    With ``pipe`` the HTML is written straight into wkhtmltopdf's stdin instead of a
+    temporary file. External assets need a base directory, so ``external_assets``
+    still uses a temporary file.
+    """
+    if pdf_workers > 1:
+        from mdxscraper.core.sharding import mdx2pdf_parallel
+
+        if pipe:
+            raise ValueError("pipe cannot be combined with pdf_workers > 1")
+
+        return mdx2pdf_parallel(
+            mdx_file,
+            input_file,
+            output_file,
+            pdf_options,
+            pdf_workers,
+            with_toc=with_toc,
+            h1_style=h1_style,
+            scrap_style=scrap_style,
+            additional_styles=additional_styles,
+            wkhtmltopdf_path=wkhtmltopdf_path,
+            progress_callback=progress_callback,
+            inline_threshold=inline_threshold,
+            optimize_images=optimize_images,
+            slim=slim,
+        )
+    if pipe and not external_assets:
+        # The HTML goes to wkhtmltopdf as it is written, so validate first
+        is_valid, error_message = validate_wkhtmltopdf_for_pdf_conversion(wkhtmltopdf_path)
+        if not is_valid:
+            raise RuntimeError(error_message)
+        config = pdfkit.configuration(wkhtmltopdf=get_wkhtmltopdf_path(wkhtmltopdf_path))
+        Path(output_file).parent.mkdir(parents=True, exist_ok=True)
+        command = pdfkit.PDFKit("", "string", options=pdf_options, configuration=config).command(
+            str(output_file)
+        )
+        write_html = _pipe_writer(
+            mdx_file,
+            input_file,
+            "PDF",
+            progress_callback,
+            with_toc=with_toc,
+            h1_style=h1_style,
+            scrap_style=scrap_style,
+            additional_styles=additional_styles,
+            **_html_kwargs(None, inline_threshold, optimize_images, slim),
+        )
+        found, not_found, invalid_words = _pipe_html(command, write_html)[0]
+        if progress_callback:
+            progress_callback(100, "PDF conversion completed!")
+        return found, not_found, invalid_words
+
+    asset_dir = tempfile.mkdtemp(prefix="mdxscraper-") if external_assets else None
+    with tempfile.NamedTemporaryFile(suffix=".html", delete=False, dir=asset_dir) as temp:
         temp_file = temp.name
 
         # Create a progress callback that scales HTML progress to 0-80%
@@ -171,6 +513,7 @@ def mdx2pdf(
             scrap_style=scrap_style,
             additional_styles=additional_styles,
             progress_callback=html_progress_callback,
+            **_html_kwargs(asset_dir, inline_threshold, optimize_images, slim),
         )
 
     # Validate wkhtmltopdf path before conversion
@@ -178,7 +521,7 @@ def mdx2pdf(
         progress_callback(80, "Validating wkhtmltopdf...")
     is_valid, error_message = validate_wkhtmltopdf_for_pdf_conversion(wkhtmltopdf_path)
     if not is_valid:
-        os.remove(temp_file)
+        _remove_temp_html(temp_file, asset_dir)
         raise RuntimeError(error_message)
 
     config_path = get_wkhtmltopdf_path(wkhtmltopdf_path)
@@ -188,8 +531,15 @@ def mdx2pdf(
 
     if progress_callback:
         progress_callback(90, "Converting HTML to PDF...")
-    pdfkit.from_file(temp_file, str(output_file), configuration=config, options=pdf_options)
-    os.remove(temp_file)
+    try:
+        pdfkit.from_file(
+            temp_file,
+            str(output_file),
+            configuration=config,
+            options=_allow_asset_dir(pdf_options, asset_dir),
+        )
+    finally:
+        _remove_temp_html(temp_file, asset_dir)
 
     if progress_callback:
         progress_callback(100, "PDF conversion completed!")
@@ -206,13 +556,42 @@ def mdx2img(
     scrap_style: str | None = None,
     additional_styles: str | None = None,
     progress_callback: Optional[Callable[[int, str], None]] = None,
+    external_assets: bool = False,
+    inline_threshold: int = 0,
+    optimize_images: bool | ImageOptimizer = False,
+    slim: bool | HtmlSlimmer = False,
+    pipe: bool = False,
 ) -> tuple[int, int, OrderedDict]:
     """Render dictionary results to an image using wkhtmltoimage via imgkit.
 
     The output format is inferred from the output file suffix (.jpg/.jpeg/.png/.webp).
-    Additional imgkit options can be supplied via img_options.
+    Additional imgkit options can be supplied via img_options. ``external_assets``,
+    ``optimize_images``, ``slim`` and ``pipe`` work as in ``mdx2pdf``; with ``pipe``
+    the image is also read from wkhtmltoimage's stdout into Pillow in memory. With
+    ``img_options["split_tiles"]`` a tall PNG/WEBP page is written as numbered tiles
+    beside ``output_file`` instead (see :mod:`mdxscraper.core.encoding`); a WEBP page
+    too tall for the format raises ValueError without it.
     """
-    with tempfile.NamedTemporaryFile(suffix=".html", delete=False) as temp:
+    suffix = Path(output_file).suffix.lower()
+    if pipe and not external_assets:
+        write_html = _pipe_writer(
+            mdx_file,
+            input_file,
+            suffix.upper(),
+            progress_callback,
+            with_toc=with_toc,
+            h1_style=h1_style,
+            scrap_style=scrap_style,
+            additional_styles=additional_styles,
+            **_html_kwargs(None, inline_threshold, optimize_images, slim),
+        )
+        found, not_found, invalid_words = _pipe_image(write_html, output_file, img_options)
+        if progress_callback:
+            progress_callback(100, f"{suffix.upper()} conversion completed!")
+        return found, not_found, invalid_words
+
+    asset_dir = tempfile.mkdtemp(prefix="mdxscraper-") if external_assets else None
+    with tempfile.NamedTemporaryFile(suffix=".html", delete=False, dir=asset_dir) as temp:
         temp_file = temp.name
 
         # Create a progress callback that scales HTML progress to 0-80%
@@ -230,81 +609,329 @@ def mdx2img(
             scrap_style=scrap_style,
             additional_styles=additional_styles,
             progress_callback=html_progress_callback,
+            **_html_kwargs(asset_dir, inline_threshold, optimize_images, slim),
         )
 
+    if progress_callback:
+        progress_callback(85, f"Converting HTML to {suffix.upper()}...")
+    try:
+        written = _write_image(temp_file, output_file, img_options, asset_dir)
+    finally:
+        _remove_temp_html(temp_file, asset_dir)
+
+    if progress_callback:
+        tiles = f" ({len(written)} tiles)" if len(written) > 1 else ""
+        progress_callback(100, f"{suffix.upper()} conversion completed!{tiles}")
+    return found, not_found, invalid_words
+
+
+def mdx2outputs(
+    mdx_file: str | Path,
+    input_file: str | Path,
+    output_files: Iterable[str | Path],
+    pdf_options: dict | None = None,
+    img_options: dict[str, dict] | None = None,
+    with_toc: bool = True,
+    h1_style: str | None = None,
+    scrap_style: str | None = None,
+    additional_styles: str | None = None,
+    wkhtmltopdf_path: str = "auto",
+    progress_callback: Optional[Callable[[int, str], None]] = None,
+    external_assets: bool = False,
+    inline_threshold: int = 0,
+    optimize_images: bool | ImageOptimizer = False,
+    slim: bool | HtmlSlimmer = False,
+) -> tuple[int, int, OrderedDict]:
+    """Build the document once and write it to every file in ``output_files``.
+
+    The format of each output follows its suffix (see ``OUTPUT_FORMATS``; at most one
+    ``.html``). Words are looked up and the HTML is written once: to the ``.html``
+    output if one is requested, else to a temporary file. That HTML is then the input
+    of every wkhtmltopdf/wkhtmltoimage conversion, all running concurrently.
+
+    ``img_options`` maps an image suffix to its options (see ``mdx2img``), e.g.
+    ``{".png": {"width": 800}}``. The other options work as in ``mdx2pdf``/``mdx2img``
+    and apply to the shared document, including the ``.html`` output.
+    """
+    outputs = [Path(output_file) for output_file in output_files]
+    suffixes = [output.suffix.lower() for output in outputs]
+    if not outputs:
+        raise ValueError("No output files given")
+    for suffix in suffixes:
+        if suffix not in OUTPUT_FORMATS:
+            raise ValueError(f"Unsupported output extension: {suffix}")
+    if suffixes.count(".html") > 1:
+        raise ValueError("At most one .html output is supported")
+
+    config = None
+    if ".pdf" in suffixes:
+        is_valid, error_message = validate_wkhtmltopdf_for_pdf_conversion(wkhtmltopdf_path)
+        if not is_valid:
+            raise RuntimeError(error_message)
+        config = pdfkit.configuration(wkhtmltopdf=get_wkhtmltopdf_path(wkhtmltopdf_path))
+
+    temp_file = temp_dir = None
+    if ".html" in suffixes:
+        html_file = str(outputs[suffixes.index(".html")])
+        Path(html_file).parent.mkdir(parents=True, exist_ok=True)
+        asset_dir = str(Path(html_file).parent) if external_assets else None
+    else:
+        temp_dir = tempfile.mkdtemp(prefix="mdxscraper-") if external_assets else None
+        with tempfile.NamedTemporaryFile(suffix=".html", delete=False, dir=temp_dir) as temp:
+            html_file = temp_file = temp.name
+        asset_dir = temp_dir
+    sinks = [output for output, suffix in zip(outputs, suffixes) if suffix != ".html"]
+
+    def html_progress_callback(progress: int, message: str):
+        if progress_callback:
+            progress_callback(int(progress * (0.8 if sinks else 1)), message)
+
+    def convert(output: Path) -> None:
+        suffix = output.suffix.lower()
+        if suffix == ".pdf":
+            output.parent.mkdir(parents=True, exist_ok=True)
+            pdfkit.from_file(
+                html_file,
+                str(output),
+                configuration=config,
+                options=_allow_asset_dir(pdf_options, asset_dir),
+            )
+        else:
+            _write_image(html_file, output, (img_options or {}).get(suffix), asset_dir)
+
+    try:
+        found, not_found, invalid_words = mdx2html(
+            mdx_file,
+            input_file,
+            html_file,
+            with_toc=with_toc,
+            h1_style=h1_style,
+            scrap_style=scrap_style,
+            additional_styles=additional_styles,
+            progress_callback=html_progress_callback,
+            **_html_kwargs(asset_dir, inline_threshold, optimize_images, slim),
+        )
+        if sinks:
+            if progress_callback:
+                names = ", ".join(output.suffix.upper() for output in sinks)
+                progress_callback(80, f"Converting HTML to {names}...")
+            # Each conversion is a wkhtmltopdf/wkhtmltoimage subprocess; threads suffice
+            with ThreadPoolExecutor(max_workers=len(sinks)) as executor:
+                futures = {executor.submit(convert, output): output for output in sinks}
+                for done, future in enumerate(as_completed(futures), 1):
+                    future.result()
+                    if progress_callback:
+                        progress = 80 + int(done / len(sinks) * 20)
+                        progress_callback(progress, f"Wrote {futures[future].name}")
+    finally:
+        if temp_file is not None:
+            _remove_temp_html(temp_file, temp_dir)
+
+    if progress_callback:
+        progress_callback(100, "Conversion completed!")
+    return found, not_found, invalid_words
+
+
+def _write_image(
+    html_file: str | Path,
+    output_file: str | Path,
+    img_options: dict | None = None,
+    asset_dir: str | Path | None = None,
+) -> list[Path]:
+    """Render ``html_file`` with wkhtmltoimage in the format of ``output_file``'s suffix.
+
+    Returns the files written: ``[output_file]``, or its tiles with ``split_tiles``.
+    """
     # Ensure output directory exists
     output_path = Path(output_file)
     output_path.parent.mkdir(parents=True, exist_ok=True)
-    # Build wkhtmltoimage options - whitelist only supported keys
-    options = {"enable-local-file-access": ""}
-    if img_options:
-        # Supported wkhtmltoimage keys we allow
-        allowed_keys = {"width", "zoom", "quality"}
-        for k, v in img_options.items():
-            if k in allowed_keys and v is not None and v != "":
-                options[k] = str(v)
-
     suffix = output_path.suffix.lower()
-    if progress_callback:
-        progress_callback(85, f"Converting HTML to {suffix.upper()}...")
+    options = _image_options(img_options, asset_dir, suffix)
 
-    # -------- WEBP --------
-    if suffix == ".webp":
-        # Render to a temporary PNG first, then convert to WEBP via Pillow
-        with tempfile.NamedTemporaryFile(suffix=".png", delete=False) as tmp_png:
-            tmp_png_path = tmp_png.name
-        try:
-            imgkit.from_file(temp_file, str(tmp_png_path), options=options)
-            with Image.open(tmp_png_path) as im:
-                webp_quality = 80 if not img_options else int(img_options.get("webp_quality", 80))
-                webp_lossless = (
-                    False if not img_options else bool(img_options.get("webp_lossless", False))
-                )
-                if webp_lossless:
-                    im.save(str(output_path), format="WEBP", lossless=True, quality=webp_quality)
-                else:
-                    im.save(str(output_path), format="WEBP", quality=webp_quality, method=6)
-        finally:
-            try:
-                os.remove(tmp_png_path)
-            except Exception:
-                pass
-    # -------- PNG --------
-    elif suffix == ".png":
-        # Render to temp, then Pillow optimize and recompress
+    # -------- WEBP / PNG --------
+    if suffix in (".webp", ".png"):
+        # Render to a temporary PNG first, then re-encode it with Pillow
         with tempfile.NamedTemporaryFile(suffix=".png", delete=False) as tmp_png:
             tmp_png_path = tmp_png.name
         try:
-            imgkit.from_file(temp_file, str(tmp_png_path), options=options)
-            with Image.open(tmp_png_path) as im:
-                png_optimize = (
-                    True if not img_options else bool(img_options.get("png_optimize", True))
-                )
-                png_compress_level = (
-                    9 if not img_options else int(img_options.get("png_compress_level", 9))
-                )
-                im.save(
-                    str(output_path),
-                    format="PNG",
-                    optimize=png_optimize,
-                    compress_level=png_compress_level,
-                )
+            imgkit.from_file(str(html_file), str(tmp_png_path), options=options)
+            return _save_image(tmp_png_path, output_path, img_options)
         finally:
             try:
                 os.remove(tmp_png_path)
             except Exception:
                 pass
-    # -------- JPG / JPEG --------
-    elif suffix in (".jpg", ".jpeg"):
+    # -------- JPG / JPEG and others (straight from wkhtmltoimage) --------
+    imgkit.from_file(str(html_file), str(output_path), options=options)
+    return [output_path]
+
+
+def _pipe_image(
+    write_html: Callable[[BinaryIO], Any],
+    output_file: str | Path,
+    img_options: dict | None = None,
+) -> Any:
+    """``_write_image`` over pipes: HTML on wkhtmltoimage's stdin, the image from stdout.
+
+    Returns what ``write_html`` returned.
+    """
+    output_path = Path(output_file)
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    suffix = output_path.suffix.lower()
+    options = _image_options(img_options, None, suffix)
+    # Without an output file name wkhtmltoimage needs the format spelled out
+    options["format"] = {".jpeg": "jpg", ".webp": "png"}.get(suffix, suffix.lstrip("."))
+    command = imgkit.IMGKit("", "string", options=options).command()
+
+    result, data = _pipe_html(command, write_html)
+    if suffix in (".webp", ".png"):
+        _save_image(io.BytesIO(data), output_path, img_options)
+    else:
+        output_path.write_bytes(data)
+    return result
+
+
+def _image_options(img_options: dict | None, asset_dir: str | Path | None, suffix: str) -> dict:
+    """wkhtmltoimage options for an image with ``suffix``."""
+    # Build wkhtmltoimage options - whitelist only supported keys
+    options = {"enable-local-file-access": ""}
+    if img_options:
+        # Supported wkhtmltoimage keys we allow
+        allowed_keys = {"width", "zoom", "quality"}
+        for k, v in img_options.items():
+            if k in allowed_keys and v is not None and v != "":
+                options[k] = str(v)
+    options = _allow_asset_dir(options, str(asset_dir) if asset_dir else None)
+    if suffix in (".jpg", ".jpeg"):
         # Set default JPEG quality for wkhtmltoimage
         options.setdefault("quality", "85")
-        imgkit.from_file(temp_file, str(output_path), options=options)
-    # -------- Others (fallback to wkhtmltoimage) --------
-    else:
-        imgkit.from_file(temp_file, str(output_path), options=options)
+    return options
 
-    os.remove(temp_file)
 
-    if progress_callback:
-        progress_callback(100, f"{suffix.upper()} conversion completed!")
-    return found, not_found, invalid_words
+def _save_image(source, output_path: Path, img_options: dict | None) -> list[Path]:
+    """Re-encode the PNG rendered by wkhtmltoimage (a path or file object) as WEBP or PNG."""
+    with Image.open(source) as im:
+        paths = save_image(im, output_path, img_options)
+    if len(paths) > 1:
+        logging.info(f"Wrote {len(paths)} tiles: {paths[0].name} ... {paths[-1].name}")
+    return paths
+
+
+def _pipe_writer(
+    mdx_file: str | Path,
+    input_file: str | Path,
+    target: str,
+    progress_callback: Optional[Callable[[int, str], None]],
+    **html_kwargs,
+) -> Callable[[BinaryIO], Tuple[int, int, OrderedDict]]:
+    """A ``write_html`` for ``_pipe_html`` running ``mdx2html`` into the pipe.
+
+    The streaming writer is used, so each definition goes into the pipe as soon as it
+    is rendered rather than after the whole document has been built in memory.
+    """
+
+    # Scale HTML progress to 0-80%, as for the temporary file
+    def html_progress_callback(progress: int, message: str):
+        if progress_callback:
+            progress_callback(int((progress / 100) * 80), message)
+
+    def write_html(stdin: BinaryIO) -> Tuple[int, int, OrderedDict]:
+        result = mdx2html(
+            mdx_file,
+            input_file,
+            stdin,
+            progress_callback=html_progress_callback,
+            stream=True,
+            **html_kwargs,
+        )
+        if progress_callback:
+            progress_callback(85, f"Converting HTML to {target}...")
+        return result
+
+    return write_html
+
+
+def _pipe_html(command: list[str], write_html: Callable[[BinaryIO], Any]) -> tuple[Any, bytes]:
+    """Run ``command`` with the HTML ``write_html`` writes on its stdin.
+
+    Returns ``write_html``'s result and everything the process wrote to stdout. Both
+    stdout and stderr are drained on threads while the HTML is written, so a full
+    pipe never stalls the process. Raises OSError if the process fails, like pdfkit.
+    """
+    process = subprocess.Popen(
+        command, stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.PIPE
+    )
+    stdout, stderr = io.BytesIO(), io.BytesIO()
+    drains = [
+        threading.Thread(target=shutil.copyfileobj, args=pipes, daemon=True)
+        for pipes in ((process.stdout, stdout), (process.stderr, stderr))
+    ]
+    for drain in drains:
+        drain.start()
+    broken = False
+    try:
+        try:
+            result = write_html(process.stdin)
+            # EOF: the renderer starts once its input is complete
+            process.stdin.close()
+        except BrokenPipeError:
+            # The process exited early; its exit code and stderr tell why
+            broken = True
+    except BaseException:
+        process.kill()
+        raise
+    finally:
+        try:
+            process.stdin.close()
+        except OSError:
+            pass
+        process.wait()
+        for drain in drains:
+            drain.join()
+    if broken or process.returncode != 0:
+        raise OSError(
+            f"{Path(command[0]).name} exited with code {process.returncode}:\n"
+            + stderr.getvalue().decode("utf-8", errors="replace")
+        )
+    return result, stdout.getvalue()
+
+
+def _html_kwargs(
+    asset_dir: str | None,
+    inline_threshold: int,
+    optimize_images: bool | ImageOptimizer,
+    slim: bool | HtmlSlimmer = False,
+) -> dict:
+    """Optional mdx2html arguments for the intermediate document of mdx2pdf/mdx2img."""
+    kwargs = {}
+    if asset_dir is not None:
+        kwargs.update(external_assets=True, inline_threshold=inline_threshold)
+    if optimize_images:
+        kwargs["optimize_images"] = optimize_images
+    if slim:
+        kwargs["slim"] = slim
+    return kwargs
+
+
+def _log_slimming(slimmer: HtmlSlimmer) -> None:
+    stats = slimmer.stats
+    logging.info(
+        f"Slimmed HTML: {stats.bytes_saved} bytes saved "
+        f"(markup {stats.html_in} -> {stats.html_out}, CSS {stats.css_in} -> {stats.css_out})"
+    )
+
+
+def _allow_asset_dir(options: dict | None, asset_dir: str | None) -> dict | None:
+    """Let wkhtmltopdf/wkhtmltoimage load local files from ``asset_dir``."""
+    if asset_dir is None:
+        return options
+    options = dict(options or {})
+    options.setdefault("enable-local-file-access", "")
+    options["allow"] = asset_dir
+    return options
+
+
+def _remove_temp_html(temp_file: str, asset_dir: str | None) -> None:
+    os.remove(temp_file)
+    if asset_dir is not None:
+        shutil.rmtree(asset_dir, ignore_errors=True)
@@ -1,45 +1,202 @@
 from __future__ import annotations
 
+import logging
+import sqlite3
+import threading
 from pathlib import Path
+from typing import Iterable, Iterator, Sequence
 
+from mdxscraper.core.hotwords import LookupLog
+from mdxscraper.core.variants import VariantIndex, VariantRules
 from mdxscraper.mdict.mdict_query import IndexBuilder
 
 
 class Dictionary:
-    def __init__(self, mdx_file: Path | str):
+    def __init__(
+        self,
+        mdx_file: Path | str,
+        hot_words: int = 0,
+        lookup_log: bool | None = None,
+        variants: bool | Sequence[VariantRules] = False,
+    ):
+        """打开 MDX 词典
+
+        Args:
+            mdx_file: MDX 文件路径
+            hot_words: 打开时在后台预取并解析查询频率最高的前 N 个词（0 表示关闭）
+            lookup_log: 是否把查询频率记录到 ``<name>.mdx.hot.json``，默认随 hot_words 开启
+            variants: 启用变体索引（词形变化、英美拼写、简繁转换），True 使用默认规则，
+                也可传入规则列表；未命中精确匹配时只做一次索引查询
+        """
         self.mdx_path = Path(mdx_file)
         self._impl = IndexBuilder(self.mdx_path)
+        self._variants: VariantIndex | None = None
+        if variants:
+            rules = None if variants is True else variants
+            self._variants = VariantIndex(self._impl, rules)
+        self._hot: dict[str, str] = {}
+        # present_words 已确认查不到的词，正式查询时不再重复回退查找
+        self._misses: set[str] = set()
+        self._closing = threading.Event()
+        self._preloader: threading.Thread | None = None
+        if lookup_log is None:
+            lookup_log = hot_words > 0
+        self._log = LookupLog.for_dictionary(self.mdx_path) if lookup_log else None
+        if hot_words > 0 and self._log is not None:
+            words = self._log.top(hot_words)
+            if words:
+                self._preloader = threading.Thread(
+                    target=self._preload, args=(words,), name="mdx-preload", daemon=True
+                )
+                self._preloader.start()
 
     def __enter__(self):
         return self
 
     def __exit__(self, exc_type, exc_val, exc_tb):
-        # 清理资源，如关闭数据库连接
-        # IndexBuilder 内部会管理自己的资源清理
-        pass
+        self.close()
+
+    def close(self):
+        # IndexBuilder 每次查询都会打开并关闭自己的连接，这里只需停止预取并保存查询记录
+        self._closing.set()
+        if self._preloader is not None:
+            self._preloader.join()
+            self._preloader = None
+        if self._log is not None:
+            self._log.save()
+
+    def _preload(self, words: list[str]) -> None:
+        """后台线程：解压热词所在的记录块进缓存，并保存解析好的释义"""
+        for word in words:
+            if self._closing.is_set():
+                return
+            try:
+                self._hot[word] = self._resolve(word)
+            except Exception as e:
+                logging.debug(f"Preloading '{word}' failed: {e}")
+
+    def wait_preloaded(self, timeout: float | None = None) -> bool:
+        """等待后台预取结束，返回是否已完成"""
+        if self._preloader is None:
+            return True
+        self._preloader.join(timeout)
+        return not self._preloader.is_alive()
 
     def _lookup_with_fallback(self, word: str) -> str:
         """查找词条，包含多种回退策略"""
         definitions = self._impl.mdx_lookup(word)
-        if len(definitions) == 0:
+        if len(definitions) == 0 and self._variants is not None:
+            # 大小写、连字符与词形变体均由变体索引一次查询完成
+            definitions = self._variants.lookup(word)
+        elif len(definitions) == 0:
             definitions = self._impl.mdx_lookup(word, ignorecase=True)
-        if len(definitions) == 0:
-            definitions = self._impl.mdx_lookup(word.replace("-", ""), ignorecase=True)
+            if len(definitions) == 0:
+                definitions = self._impl.mdx_lookup(word.replace("-", ""), ignorecase=True)
         if len(definitions) == 0:
             return ""
         return definitions[0].strip()
 
     def lookup_html(self, word: str) -> str:
         word = word.strip()
+        if self._log is not None:
+            self._log.record(word)
+        hot = self._hot.get(word)
+        if hot is not None:
+            return hot
+        return self._resolve(word)
+
+    def lookup_entry(self, word: str) -> tuple[str | None, str]:
+        """查找词条，返回 (实际命中的词头, 释义)
+
+        词头是索引中的原始键：跟随 ``@@@LINK=`` 跳转，并反映大小写、连字符与变体回退；
+        未找到时返回 (None, "")
+        """
+        word = word.strip()
+        if self._log is not None:
+            self._log.record(word)
+        target, definition = self._resolve_entry(word)
+        if not definition:
+            return None, ""
+        return self._headword(target) or target, definition
+
+    def _resolve(self, word: str) -> str:
+        return self._resolve_entry(word)[1]
+
+    def _resolve_entry(self, word: str) -> tuple[str, str]:
+        """返回 (最终查询的词, 释义)，``@@@LINK=`` 时为跳转目标"""
+        if word in self._misses:
+            return word, ""
         definition = self._lookup_with_fallback(word)
         if not definition:
-            return ""
+            return word, ""
 
         if definition.startswith("@@@LINK="):
             linked_word = definition.replace("@@@LINK=", "").strip()
-            return self._lookup_with_fallback(linked_word)
+            return linked_word, self._lookup_with_fallback(linked_word)
         else:
-            return definition
+            return word, definition
+
+    def _headword(self, word: str, conn: sqlite3.Connection | None = None) -> str | None:
+        """按 ``_lookup_with_fallback`` 的顺序找出 word 命中的索引键"""
+        if conn is None:
+            conn = sqlite3.connect(self._impl._mdx_db)
+            try:
+                return self._headword(word, conn)
+            finally:
+                conn.close()
+        sql = "SELECT key_text FROM MDX_INDEX WHERE key_text = ? LIMIT 1"
+        row = conn.execute(sql, (word,)).fetchone()
+        if row is None and self._variants is not None:
+            return self._variants.lookup_key(word)
+        sql = "SELECT key_text FROM MDX_INDEX WHERE lower(key_text) = lower(?) LIMIT 1"
+        for candidate in (word, word.replace("-", "")):
+            if row is not None:
+                break
+            row = conn.execute(sql, (candidate,)).fetchone()
+        return row[0] if row else None
+
+    def present_words(self, words: Iterable[str]) -> set[str]:
+        """返回 words 中能查到的词
+
+        与 ``lookup_entry`` 走同一条解析链（回退查找、变体、``@@@LINK=`` 跳转），
+        供流式输出预先写出目录；指向缺失词条的跳转算作查不到。查不到的词会被记住，
+        随后的正式查询直接返回空，不再重复整表扫描。
+        """
+        present = set()
+        for word in dict.fromkeys(words):
+            stripped = word.strip()
+            if stripped not in self._misses and self._resolve(stripped):
+                present.add(word)
+            else:
+                self._misses.add(stripped)
+        return present
+
+    def iter_keys(self, query: str = "", batch_size: int = 1000) -> Iterator[str]:
+        """逐页遍历 MDX 词头，避免一次性载入全部键（query 语法同 get_mdx_keys）"""
+        after = 0
+        while True:
+            page = self.key_page(query, after=after, limit=batch_size)
+            if not page:
+                return
+            after = page[-1][0]
+            for _, key in page:
+                yield key
+
+    def key_page(self, query: str = "", after: int = 0, limit: int = 1000) -> list[tuple[int, str]]:
+        """返回 rowid 大于 after 的一页 (rowid, key_text)，每次调用独立连接，可跨线程使用"""
+        sql = "SELECT rowid, key_text FROM MDX_INDEX WHERE rowid > ?"
+        params: tuple = (after,)
+        if query:
+            pattern = query.replace("*", "%") if "*" in query else query + "%"
+            sql += " AND key_text LIKE ?"
+            params += (pattern,)
+        sql += " ORDER BY rowid LIMIT ?"
+        params += (limit,)
+        conn = sqlite3.connect(self._impl._mdx_db)
+        try:
+            return conn.execute(sql, params).fetchall()
+        finally:
+            conn.close()
 
     @property
     def impl(self):
@@ -0,0 +1,246 @@
+"""Encoder profiles and tiled encoding for PNG/WEBP pages rendered by wkhtmltoimage.
+
+A word list renders to one very tall page, and re-encoding it with the smallest-output
+settings (PNG ``optimize`` at level 9, WEBP ``method=6``) can take longer than the
+rendering itself. ``img_options`` chooses the trade-off:
+
+``encoder``
+    ``"draft"``, ``"balanced"``, ``"smallest"`` (default) or ``"exhaustive"`` from
+    :data:`ENCODER_PROFILES`. Explicit ``png_optimize``/``png_compress_level``/
+    ``webp_method``/``webp_lossless_method`` keys override the profile; the last one
+    applies to ``webp_lossless`` output. Lossless WEBP at ``method=6`` is very slow
+    on tall pages, so only ``"exhaustive"`` uses it. ``png_compress_level`` is 0-9,
+    or -1 for zlib's default (6).
+``tile_height``
+    Slice PNG pages taller than this many pixels into tiles of that height and
+    encode the tiles concurrently (``encode_workers`` threads, default: all CPUs;
+    Pillow and zlib release the GIL while compressing).
+``split_tiles``
+    Write the tiles as numbered files (``page-001.png``, ``page-002.png``, ...)
+    instead of one image; the output file itself is then not written. WEBP is
+    limited to 16383 pixels per side, so taller WEBP pages need ``split_tiles``.
+
+A tiled PNG written as one file is assembled from deflate segments compressed in
+parallel (as pigz does), with unfiltered scanlines. Skipping Pillow's adaptive row
+filters is faster, and for text on a flat background the result is no larger;
+photographic content compresses worse. ``scripts/bench_encoding.py`` measures the
+trade-offs on a given page.
+"""
+
+from __future__ import annotations
+
+import os
+import struct
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+
+from PIL import Image
+
+from mdxscraper.core.images import _has_alpha
+
+
+@dataclass(frozen=True)
+class EncoderProfile:
+    """Pillow settings for re-encoding a rendered page."""
+
+    png_compress_level: int
+    png_optimize: bool
+    webp_method: int
+    # Lossless WEBP is far slower per method step than lossy
+    webp_lossless_method: int
+
+
+ENCODER_PROFILES = {
+    "draft": EncoderProfile(
+        png_compress_level=1, png_optimize=False, webp_method=0, webp_lossless_method=0
+    ),
+    "balanced": EncoderProfile(
+        png_compress_level=6, png_optimize=False, webp_method=4, webp_lossless_method=2
+    ),
+    "smallest": EncoderProfile(
+        png_compress_level=9, png_optimize=True, webp_method=6, webp_lossless_method=4
+    ),
+    "exhaustive": EncoderProfile(
+        png_compress_level=9, png_optimize=True, webp_method=6, webp_lossless_method=6
+    ),
+}
+DEFAULT_PROFILE = "smallest"
+WEBP_MAX_SIZE = 16383
+
+# PNG colour type and channels per Pillow mode, for the parallel PNG writer
+_PNG_MODES = {"L": (0, 1), "RGB": (2, 3), "LA": (4, 2), "RGBA": (6, 4)}
+_PNG_SIGNATURE = b"\x89PNG\r\n\x1a\n"
+# zlib stream header (deflate, 32K window) by compression level 0-9, as zlib writes it
+_ZLIB_HEADERS = [b"\x78\x01"] * 2 + [b"\x78\x5e"] * 4 + [b"\x78\x9c"] + [b"\x78\xda"] * 3
+
+
+def encoder_settings(img_options: dict | None) -> dict:
+    """Resolve the profile and explicit keys of ``img_options`` into Pillow settings."""
+    img_options = img_options or {}
+    name = img_options.get("encoder") or DEFAULT_PROFILE
+    if name not in ENCODER_PROFILES:
+        raise ValueError(
+            f"Unknown encoder profile: {name!r} (expected one of {list(ENCODER_PROFILES)})"
+        )
+    profile = ENCODER_PROFILES[name]
+    level = int(img_options.get("png_compress_level", profile.png_compress_level))
+    if level == -1:
+        level = 6
+    if not 0 <= level <= 9:
+        raise ValueError(f"png_compress_level must be between 0 and 9, or -1: {level}")
+    return {
+        "png_optimize": bool(img_options.get("png_optimize", profile.png_optimize)),
+        "png_compress_level": level,
+        "webp_method": int(img_options.get("webp_method", profile.webp_method)),
+        "webp_lossless_method": int(
+            img_options.get("webp_lossless_method", profile.webp_lossless_method)
+        ),
+        "webp_quality": int(img_options.get("webp_quality", 80)),
+        "webp_lossless": bool(img_options.get("webp_lossless", False)),
+    }
+
+
+def tile_paths(output_file: str | Path, count: int) -> list[Path]:
+    """Numbered file names for ``count`` tiles of ``output_file``."""
+    output_path = Path(output_file)
+    return [
+        output_path.with_name(f"{output_path.stem}-{n:03d}{output_path.suffix}")
+        for n in range(1, count + 1)
+    ]
+
+
+def save_image(
+    image: Image.Image, output_file: str | Path, img_options: dict | None
+) -> list[Path]:
+    """Encode ``image`` as PNG or WEBP by ``output_file``'s suffix; returns the files written.
+
+    That is ``[output_file]`` unless ``split_tiles`` is set and the page is tiled, in
+    which case it is the tile files. Raises ValueError for a WEBP page taller than
+    :data:`WEBP_MAX_SIZE` without ``split_tiles``.
+    """
+    img_options = img_options or {}
+    output_path = Path(output_file)
+    settings = encoder_settings(img_options)
+    webp = output_path.suffix.lower() == ".webp"
+    split = bool(img_options.get("split_tiles"))
+    if image.mode not in _PNG_MODES:
+        # Palette, CMYK, 16-bit ... as the modes the tiled writer and WEBP handle
+        image = image.convert("RGBA" if _has_alpha(image) else "RGB")
+    tile_height = int(img_options.get("tile_height") or 0)
+    if webp:
+        if image.height > WEBP_MAX_SIZE and not split:
+            raise ValueError(
+                f"A {image.height}px tall page exceeds the {WEBP_MAX_SIZE}px WEBP limit; "
+                "use PNG or set split_tiles"
+            )
+        # Tiles of one WEBP file cannot be encoded separately
+        tile_height = min(tile_height or WEBP_MAX_SIZE, WEBP_MAX_SIZE) if split else 0
+    if not tile_height or image.height <= tile_height:
+        _encode(image, output_path, settings)
+        return [output_path]
+
+    boxes = [
+        (0, top, image.width, min(top + tile_height, image.height))
+        for top in range(0, image.height, tile_height)
+    ]
+    workers = int(img_options.get("encode_workers") or os.cpu_count() or 1)
+    workers = max(1, min(workers, len(boxes)))
+    if split:
+        paths = tile_paths(output_path, len(boxes))
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            list(
+                executor.map(
+                    lambda box, path: _encode(image.crop(box), path, settings), boxes, paths
+                )
+            )
+        return paths
+
+    _write_png_tiled(image, output_path, boxes, settings["png_compress_level"], workers)
+    return [output_path]
+
+
+def _encode(image: Image.Image, output_path: Path, settings: dict) -> None:
+    if output_path.suffix.lower() == ".webp":
+        image.save(
+            str(output_path),
+            format="WEBP",
+            lossless=settings["webp_lossless"],
+            quality=settings["webp_quality"],
+            method=settings[
+                "webp_lossless_method" if settings["webp_lossless"] else "webp_method"
+            ],
+        )
+    else:
+        image.save(
+            str(output_path),
+            format="PNG",
+            optimize=settings["png_optimize"],
+            compress_level=settings["png_compress_level"],
+        )
+
+
+def _write_png_tiled(
+    image: Image.Image,
+    output_path: Path,
+    boxes: list[tuple[int, int, int, int]],
+    level: int,
+    workers: int,
+) -> None:
+    """Write ``image`` as one PNG whose zlib stream is compressed tile by tile in parallel.
+
+    Each tile's scanlines (filter type 0) become a raw deflate segment ending on a byte
+    boundary (Z_FULL_FLUSH), so the segments concatenate into a single valid stream;
+    the Adler-32 checksums of the tiles are combined for the zlib trailer.
+    """
+    color_type, channels = _PNG_MODES[image.mode]
+    stride = image.width * channels
+
+    def compress(box: tuple[int, int, int, int]) -> tuple[bytes, int, int]:
+        raw = image.crop(box).tobytes()
+        rows = b"".join(b"\x00" + raw[i : i + stride] for i in range(0, len(raw), stride))
+        compressor = zlib.compressobj(level, zlib.DEFLATED, -15)
+        last = box is boxes[-1]
+        data = compressor.compress(rows) + compressor.flush(
+            zlib.Z_FINISH if last else zlib.Z_FULL_FLUSH
+        )
+        return data, zlib.adler32(rows), len(rows)
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        segments = list(executor.map(compress, boxes))
+
+    checksum = segments[0][1]
+    for _, adler, length in segments[1:]:
+        checksum = _adler32_combine(checksum, adler, length)
+    ihdr = struct.pack(">IIBBBBB", image.width, image.height, 8, color_type, 0, 0, 0)
+
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    with open(output_path, "wb") as f:
+        f.write(_PNG_SIGNATURE)
+        f.write(_png_chunk(b"IHDR", ihdr))
+        # One IDAT per tile; together they hold a single zlib stream
+        for i, (data, _, _) in enumerate(segments):
+            if i == 0:
+                data = _ZLIB_HEADERS[level] + data
+            if i == len(segments) - 1:
+                data += struct.pack(">I", checksum)
+            f.write(_png_chunk(b"IDAT", data))
+        f.write(_png_chunk(b"IEND", b""))
+
+
+def _png_chunk(kind: bytes, data: bytes) -> bytes:
+    return struct.pack(">I", len(data)) + kind + data + struct.pack(">I", zlib.crc32(kind + data))
+
+
+def _adler32_combine(adler1: int, adler2: int, length2: int) -> int:
+    """Adler-32 of two concatenated blocks from their checksums (zlib's adler32_combine)."""
+    base = 65521
+    rem = length2 % base
+    sum1 = adler1 & 0xFFFF
+    sum2 = (rem * sum1) % base
+    sum1 += (adler2 & 0xFFFF) + base - 1
+    sum2 += (adler1 >> 16) + (adler2 >> 16) + base - rem
+    sum1 %= base
+    sum2 %= base
+    return sum1 | (sum2 << 16)
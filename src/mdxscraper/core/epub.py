@@ -0,0 +1,283 @@
+"""EPUB output: one chapter per lesson, streamed into the zip.
+
+:func:`mdx2epub` writes an EPUB 3 book (with an EPUB 2 ``toc.ncx`` for older
+readers) without building the document in memory::
+
+    mimetype
+    META-INF/container.xml
+    OEBPS/content.opf           manifest and spine, written last
+    OEBPS/nav.xhtml, toc.ncx    lessons (and words, with ``with_toc``)
+    OEBPS/style.css             the merged dictionary stylesheet, once
+    OEBPS/chapters/001-Lesson_1.xhtml
+    OEBPS/images/<sha256>.png   every MDD image once, named by content hash
+
+Each lesson is rendered word by word into a spool (in memory up to
+``SPOOL_SIZE``, then on disk) and copied into its zip entry when the lesson ends;
+zipfile accepts one open entry at a time, and images are added to the zip while a
+lesson is rendered. Memory therefore stays bounded whatever the word count.
+"""
+
+from __future__ import annotations
+
+import shutil
+import tempfile
+import uuid
+import zipfile
+from collections import OrderedDict
+from datetime import datetime, timezone
+from html import escape
+from pathlib import Path
+from typing import Callable, Optional, Tuple
+
+from mdxscraper.core.assets import AssetStore
+from mdxscraper.core.dictionary import Dictionary
+from mdxscraper.core.html_writer import FragmentRenderer
+from mdxscraper.core.images import ImageOptimizer
+from mdxscraper.core.parser import WordParser
+from mdxscraper.core.renderer import stylesheet_css
+from mdxscraper.core.sharding import Shard
+
+SPOOL_SIZE = 8 * 1024 * 1024
+STYLESHEET = "style.css"
+
+_MEDIA_TYPES = {
+    ".png": "image/png",
+    ".jpg": "image/jpeg",
+    ".jpeg": "image/jpeg",
+    ".gif": "image/gif",
+    ".svg": "image/svg+xml",
+    ".webp": "image/webp",
+    ".bmp": "image/bmp",
+    ".tif": "image/tiff",
+    ".tiff": "image/tiff",
+}
+# Already compressed; deflating them again only costs time
+_STORED_SUFFIXES = {".png", ".jpg", ".jpeg", ".gif", ".webp"}
+
+_CONTAINER_XML = """<?xml version="1.0" encoding="utf-8"?>
+<container version="1.0" xmlns="urn:oasis:names:tc:opendocument:xmlns:container">
+<rootfiles>
+<rootfile full-path="OEBPS/content.opf" media-type="application/oebps-package+xml"/>
+</rootfiles>
+</container>
+"""
+
+
+class EpubMediaStore(AssetStore):
+    """Asset store writing each unique image once into ``OEBPS/images/`` of the book."""
+
+    def __init__(self, book: zipfile.ZipFile, base_url: str = "../images"):
+        super().__init__("images", base_url=base_url)
+        self.book = book
+        self.names: list[str] = []
+        self._names: set[str] = set()
+
+    def store(self, src: str, data: bytes, image_format: str | None = None) -> str:
+        name = self.file_name(src, data, image_format)
+        with self._lock:
+            if name not in self._names:
+                suffix = Path(name).suffix
+                compression = (
+                    zipfile.ZIP_STORED if suffix in _STORED_SUFFIXES else zipfile.ZIP_DEFLATED
+                )
+                self.book.writestr(f"OEBPS/images/{name}", data, compress_type=compression)
+                self._names.add(name)
+                self.names.append(name)
+                self.files_written += 1
+                self.bytes_written += len(data)
+        return f"{self.base_url}/{name}"
+
+
+def _chapter_head(title: str, language: str) -> bytes:
+    return (
+        '<?xml version="1.0" encoding="utf-8"?>\n<!DOCTYPE html>\n'
+        f'<html xmlns="http://www.w3.org/1999/xhtml" xml:lang="{escape(language)}" '
+        f'lang="{escape(language)}">\n<head>\n<meta charset="utf-8"/>\n'
+        f"<title>{escape(title, False)}</title>\n"
+        f'<link href="../{STYLESHEET}" rel="stylesheet" type="text/css"/>\n</head>\n'
+        '<body style="font-family:Arial Unicode MS;">\n'
+    ).encode("utf-8")
+
+
+def _nav_xhtml(title: str, language: str, chapters: list[tuple[Shard, str]], words: bool) -> str:
+    items = []
+    for shard, file_name in chapters:
+        href = f"chapters/{file_name}"
+        sub = ""
+        if words:
+            links = "".join(
+                f'<li><a href="{escape(href)}#{escape("word_" + word)}">'
+                f"{escape(word, False)}</a></li>\n"
+                for lesson in shard.lessons
+                for word in lesson["words"]
+            )
+            sub = f"\n<ol>\n{links}</ol>\n" if links else ""
+        items.append(f'<li><a href="{escape(href)}">{escape(shard.name, False)}</a>{sub}</li>\n')
+    return (
+        '<?xml version="1.0" encoding="utf-8"?>\n<!DOCTYPE html>\n'
+        '<html xmlns="http://www.w3.org/1999/xhtml" xmlns:epub="http://www.idpf.org/2007/ops" '
+        f'xml:lang="{escape(language)}" lang="{escape(language)}">\n'
+        f"<head><meta charset=\"utf-8\"/><title>{escape(title, False)}</title></head>\n"
+        f'<body>\n<nav epub:type="toc" id="toc">\n<h1>{escape(title, False)}</h1>\n<ol>\n'
+        f"{''.join(items)}</ol>\n</nav>\n</body>\n</html>\n"
+    )
+
+
+def _toc_ncx(book_id: str, title: str, chapters: list[tuple[Shard, str]]) -> str:
+    points = "".join(
+        f'<navPoint id="nav-{shard.number}" playOrder="{shard.number}">'
+        f"<navLabel><text>{escape(shard.name, False)}</text></navLabel>"
+        f'<content src="chapters/{escape(file_name)}"/></navPoint>\n'
+        for shard, file_name in chapters
+    )
+    return (
+        '<?xml version="1.0" encoding="utf-8"?>\n'
+        '<ncx xmlns="http://www.daisy.org/z3986/2005/ncx/" version="2005-1">\n'
+        f'<head><meta name="dtb:uid" content="{escape(book_id)}"/></head>\n'
+        f"<docTitle><text>{escape(title, False)}</text></docTitle>\n"
+        f"<navMap>\n{points}</navMap>\n</ncx>\n"
+    )
+
+
+def _content_opf(
+    book_id: str,
+    title: str,
+    language: str,
+    chapters: list[tuple[Shard, str]],
+    images: list[str],
+) -> str:
+    modified = datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+    manifest = [
+        '<item id="nav" href="nav.xhtml" media-type="application/xhtml+xml" properties="nav"/>',
+        '<item id="ncx" href="toc.ncx" media-type="application/x-dtbncx+xml"/>',
+        f'<item id="css" href="{STYLESHEET}" media-type="text/css"/>',
+    ]
+    manifest += [
+        f'<item id="chapter-{shard.number}" href="chapters/{escape(file_name)}" '
+        'media-type="application/xhtml+xml"/>'
+        for shard, file_name in chapters
+    ]
+    manifest += [
+        f'<item id="img-{i}" href="images/{name}" '
+        f'media-type="{_MEDIA_TYPES.get(Path(name).suffix, "application/octet-stream")}"/>'
+        for i, name in enumerate(images, 1)
+    ]
+    spine = "".join(f'<itemref idref="chapter-{shard.number}"/>\n' for shard, _ in chapters)
+    return (
+        '<?xml version="1.0" encoding="utf-8"?>\n'
+        '<package xmlns="http://www.idpf.org/2007/opf" version="3.0" unique-identifier="bookid">\n'
+        '<metadata xmlns:dc="http://purl.org/dc/elements/1.1/">\n'
+        f'<dc:identifier id="bookid">{escape(book_id)}</dc:identifier>\n'
+        f"<dc:title>{escape(title, False)}</dc:title>\n"
+        f"<dc:language>{escape(language)}</dc:language>\n"
+        f'<meta property="dcterms:modified">{modified}</meta>\n'
+        "</metadata>\n"
+        f"<manifest>\n{chr(10).join(manifest)}\n</manifest>\n"
+        f'<spine toc="ncx">\n{spine}</spine>\n'
+        "</package>\n"
+    )
+
+
+def mdx2epub(
+    mdx_file: str | Path,
+    input_file: str | Path,
+    output_file: str | Path,
+    with_toc: bool = True,
+    h1_style: str | None = None,
+    scrap_style: str | None = None,
+    additional_styles: str | None = None,
+    progress_callback: Optional[Callable[[int, str], None]] = None,
+    variants: bool = False,
+    optimize_images: bool | ImageOptimizer = False,
+    title: str | None = None,
+    language: str = "en",
+) -> Tuple[int, int, OrderedDict]:
+    """Write the word list as an EPUB book with one chapter per lesson.
+
+    ``with_toc`` lists every word under its lesson in the book's table of contents;
+    without it the table of contents lists lessons only. ``title`` defaults to the
+    input file name and ``language`` is the book's language code. The remaining
+    options work as in ``mdx2html``. Returns the counts and invalid words like
+    ``mdx2html``.
+    """
+    mdx_file = Path(mdx_file)
+    output_file = Path(output_file)
+    title = title or Path(input_file).stem
+    # Stable across runs of the same conversion, so readers keep their position
+    book_id = "urn:uuid:" + str(uuid.uuid5(uuid.NAMESPACE_URL, f"{mdx_file.name}/{title}"))
+
+    lessons = WordParser(str(input_file)).parse()
+    chapters = [
+        (shard, shard.file_name(".xhtml"))
+        for shard in (Shard(i, lesson["name"], [lesson]) for i, lesson in enumerate(lessons, 1))
+    ]
+    if progress_callback:
+        progress_callback(5, "Loading dictionary and parsing input...")
+
+    found_count = not_found_count = 0
+    invalid_words = OrderedDict()
+    head = None
+    h1_attr = f' style="{escape(h1_style)}"' if h1_style else ""
+
+    owned_optimizer = None
+    if optimize_images is True:
+        optimizer = owned_optimizer = ImageOptimizer()
+    else:
+        optimizer = optimize_images or None
+    output_file.parent.mkdir(parents=True, exist_ok=True)
+    dictionary = Dictionary(mdx_file, variants=variants)
+    try:
+        with zipfile.ZipFile(output_file, "w", zipfile.ZIP_DEFLATED) as book:
+            # The mimetype entry must come first, uncompressed
+            book.writestr("mimetype", "application/epub+zip", compress_type=zipfile.ZIP_STORED)
+            book.writestr("META-INF/container.xml", _CONTAINER_XML)
+            media = EpubMediaStore(book)
+            renderer = FragmentRenderer(dictionary.impl, scrap_style, media, optimizer)
+
+            for done, (shard, file_name) in enumerate(chapters):
+                lesson = shard.lessons[0]
+                if progress_callback:
+                    progress = 5 + int(done / max(len(chapters), 1) * 85)
+                    progress_callback(progress, f"Processing lesson: {lesson['name']}")
+                with tempfile.SpooledTemporaryFile(max_size=SPOOL_SIZE) as chapter:
+                    chapter.write(_chapter_head(lesson["name"], language))
+                    chapter.write(
+                        f'<h1 id="{escape("lesson_" + lesson["name"])}"{h1_attr}>'
+                        f"{escape(lesson['name'], False)}</h1>\n".encode("utf-8")
+                    )
+                    for word in lesson["words"]:
+                        fragment = renderer.render(word, dictionary.lookup_html(word))
+                        if fragment.found:
+                            found_count += 1
+                        else:
+                            not_found_count += 1
+                            invalid_words.setdefault(lesson["name"], []).append(word)
+                        if head is None:
+                            head = fragment.head
+                        chapter.write(fragment.html.encode("utf-8"))
+                        chapter.write(b"\n")
+                    chapter.write(b"</body>\n</html>\n")
+                    chapter.seek(0)
+                    with book.open(f"OEBPS/chapters/{file_name}", "w", force_zip64=True) as entry:
+                        shutil.copyfileobj(chapter, entry, 1024 * 1024)
+
+            if progress_callback:
+                progress_callback(90, "Writing stylesheet and table of contents...")
+            css = stylesheet_css(head, mdx_file.parent, dictionary.impl, additional_styles)
+            book.writestr(f"OEBPS/{STYLESHEET}", css)
+            book.writestr("OEBPS/nav.xhtml", _nav_xhtml(title, language, chapters, with_toc))
+            book.writestr("OEBPS/toc.ncx", _toc_ncx(book_id, title, chapters))
+            book.writestr(
+                "OEBPS/content.opf", _content_opf(book_id, title, language, chapters, media.names)
+            )
+    except BaseException:
+        output_file.unlink(missing_ok=True)
+        raise
+    finally:
+        dictionary.close()
+        if owned_optimizer is not None:
+            owned_optimizer.close()
+
+    if progress_callback:
+        progress_callback(100, "EPUB generation completed!")
+    return found_count, not_found_count, invalid_words
@@ -0,0 +1,71 @@
+"""Persisted lookup-frequency log used to preload hot words.
+
+The log lives next to the dictionary as ``<name>.mdx.hot.json`` (alongside the
+``.mdx.db`` index) and stores ``{word: count}`` for the most frequent lookups.
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import os
+import threading
+from collections import Counter
+from pathlib import Path
+
+
+class LookupLog:
+    """Lookup counter for one dictionary, trimmed to ``max_entries`` on save."""
+
+    SUFFIX = ".hot.json"
+
+    def __init__(self, path: Path | str, max_entries: int = 20000):
+        self.path = Path(path)
+        self.max_entries = max_entries
+        self._counts: Counter[str] = Counter()
+        self._dirty = False
+        self._lock = threading.Lock()
+        self.load()
+
+    @classmethod
+    def for_dictionary(cls, mdx_path: Path | str, **kwargs) -> "LookupLog":
+        mdx_path = Path(mdx_path)
+        return cls(mdx_path.with_name(mdx_path.name + cls.SUFFIX), **kwargs)
+
+    def load(self) -> None:
+        if not self.path.is_file():
+            return
+        try:
+            data = json.loads(self.path.read_text(encoding="utf-8"))
+            self._counts = Counter({str(k): int(v) for k, v in data.items()})
+        except (OSError, ValueError, AttributeError) as e:
+            logging.warning(f"Ignoring unreadable lookup log {self.path}: {e}")
+            self._counts = Counter()
+
+    def record(self, word: str) -> None:
+        if not word:
+            return
+        with self._lock:
+            self._counts[word] += 1
+            self._dirty = True
+
+    def count(self, word: str) -> int:
+        return self._counts.get(word, 0)
+
+    def top(self, n: int) -> list[str]:
+        with self._lock:
+            return [word for word, _ in self._counts.most_common(n)]
+
+    def save(self) -> None:
+        with self._lock:
+            if not self._dirty:
+                return
+            data = dict(self._counts.most_common(self.max_entries))
+            self._dirty = False
+        # Write-then-rename so a crash never leaves a truncated log behind
+        tmp_path = self.path.with_name(self.path.name + ".tmp")
+        try:
+            tmp_path.write_text(json.dumps(data, ensure_ascii=False), encoding="utf-8")
+            os.replace(tmp_path, self.path)
+        except OSError as e:
+            logging.warning(f"Failed to save lookup log {self.path}: {e}")
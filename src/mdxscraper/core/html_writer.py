@@ -0,0 +1,449 @@
+"""Streaming HTML output for mdx2html.
+
+The default ``mdx2html`` path keeps the whole document in two BeautifulSoup trees and
+serializes it several times over. The streaming path renders each definition into a
+standalone fragment and hands it to :class:`HtmlStreamWriter`. The table of contents
+is written up front from the word list, so once the first definition has supplied the
+document head every fragment goes straight to the output and peak memory does not
+grow with the number of words. Only what cannot be written yet (the table of contents
+and the body before the head is known) is held in a spooled temporary file, kept in
+memory up to ``spool_size`` and then moved to disk. For ``.html.gz`` output the
+document is compressed as it is written, into a single gzip member (see
+:mod:`mdxscraper.core.compression`), and the spools hold deflated data.
+
+Fragments are rendered by one of two backends (see :data:`RENDERERS`): ``bs4`` builds a
+BeautifulSoup tree per definition and produces exactly the default ``mdx2html`` markup;
+``lxml`` parses with ``lxml.html``, rewrites images in a single pass over the tree and
+serializes with libxml2, which is several times faster. Its output is the same document
+up to HTML serialization details (attribute order, ``<br>`` instead of ``<br/>``).
+
+:class:`EntryDeduplicator` wraps a lookup function so that each resolved entry is
+emitted once; repeated words and words that resolve to the same entry (``@@@LINK=``
+redirects, variants) become short references to the first occurrence.
+"""
+
+from __future__ import annotations
+
+import gzip
+import hashlib
+import re
+import shutil
+import tempfile
+from contextlib import ExitStack, contextmanager
+from dataclasses import dataclass
+from html import escape
+from pathlib import Path
+from typing import Any, BinaryIO, Callable, Container, Iterator, Optional
+
+from bs4 import BeautifulSoup
+from lxml import etree
+from lxml import html as lxml_html
+
+from mdxscraper.core.assets import AssetStore
+from mdxscraper.core.compression import DeflateSpool, GzipMember, is_gzip_path
+from mdxscraper.core.images import ImageOptimizer
+from mdxscraper.core.renderer import embed_images, image_urls, merge_css
+
+BODY_OPEN = '<html>\n<body style="font-family:Arial Unicode MS;">'
+BODY_CLOSE = "</body></html>"
+
+# Data URIs cached across fragments before the cache is reset
+IMAGE_CACHE_ENTRIES = 512
+
+_STYLE_ELEMENT = re.compile(r"<style[^>]*>(.*?)</style>", re.S | re.I)
+
+
+@dataclass
+class Fragment:
+    """One rendered word of the document."""
+
+    word: str
+    html: str
+    found: bool
+    # Serialized <head> of the definition; carries the dictionary stylesheet link
+    head: Optional[str] = None
+    # Identity of the resolved entry, set when duplicates are resolved downstream
+    entry: Optional[str] = None
+
+
+@dataclass
+class ParsedFragment:
+    """A definition parsed and wrapped, before images are resolved and it is serialized."""
+
+    word: str
+    tree: Any
+    found: bool
+    head: Optional[str] = None
+
+
+class FragmentRenderer:
+    """Render a definition into a ``scrapedword`` fragment using BeautifulSoup.
+
+    ``render`` runs two steps that pipelined conversion executes on separate threads:
+    ``parse`` (parse and wrap the definition) and ``finish`` (inline images, serialize).
+    """
+
+    def __init__(
+        self,
+        dictionary=None,
+        scrap_style: str | None = None,
+        assets: AssetStore | None = None,
+        optimizer: ImageOptimizer | None = None,
+    ):
+        self.dictionary = dictionary
+        self.scrap_style = scrap_style
+        self.assets = assets
+        self.optimizer = optimizer
+        self._image_cache: dict[str, str | None] = {}
+
+    def render(self, word: str, result: str) -> Fragment:
+        return self.finish(self.parse(word, result))
+
+    def parse(self, word: str, result: str) -> ParsedFragment:
+        definition = BeautifulSoup(result, "lxml")
+        head = str(definition.head) if definition.head is not None else None
+
+        new_div = definition.new_tag("div")
+        if self.scrap_style:
+            new_div["style"] = self.scrap_style
+        new_div["id"] = "word_" + word
+        new_div["class"] = "scrapedword"
+        if definition.body:
+            new_div.extend(list(definition.body.contents))
+        return ParsedFragment(word, new_div, bool(result), head)
+
+    def finish(self, parsed: ParsedFragment) -> Fragment:
+        if self.dictionary is not None:
+            if len(self._image_cache) > IMAGE_CACHE_ENTRIES:
+                self._image_cache.clear()
+            embed_images(
+                parsed.tree, self.dictionary, self._image_cache, self.assets, self.optimizer
+            )
+        return Fragment(parsed.word, str(parsed.tree), parsed.found, parsed.head)
+
+
+class LxmlFragmentRenderer(FragmentRenderer):
+    """Render a definition into a ``scrapedword`` fragment using lxml.html."""
+
+    def parse(self, word: str, result: str) -> ParsedFragment:
+        wrapper = etree.Element("div")
+        # Same attribute order as BeautifulSoup's serializer
+        wrapper.set("class", "scrapedword")
+        wrapper.set("id", "word_" + word)
+        if self.scrap_style:
+            wrapper.set("style", self.scrap_style)
+
+        head = None
+        try:
+            document = lxml_html.document_fromstring(result) if result else None
+        except etree.ParserError:
+            # Whitespace or comment-only definitions have no document to speak of
+            document = None
+        if document is not None:
+            head_element = document.find("head")
+            if head_element is not None:
+                head = lxml_html.tostring(head_element, encoding="unicode")
+            body = document.find("body")
+            if body is not None:
+                wrapper.text = body.text
+                wrapper.extend(body)
+        return ParsedFragment(word, wrapper, bool(result), head)
+
+    def finish(self, parsed: ParsedFragment) -> Fragment:
+        self._rewrite(parsed.tree)
+        html = lxml_html.tostring(parsed.tree, encoding="unicode")
+        return Fragment(parsed.word, html, parsed.found, parsed.head)
+
+    def _rewrite(self, tree) -> None:
+        if self.dictionary is None or not hasattr(self.dictionary, "_mdd_db"):
+            return
+        if len(self._image_cache) > IMAGE_CACHE_ENTRIES:
+            self._image_cache.clear()
+        images = [img for img in tree.iter("img") if img.get("src") is not None]
+        srcs = [img.get("src") for img in images]
+        urls = image_urls(srcs, self.dictionary, self._image_cache, self.assets, self.optimizer)
+        for img, url in zip(images, urls):
+            if url is not None:
+                img.set("src", url)
+
+
+def entry_key(definition: str) -> str:
+    """Identity of a resolved definition, independent of the word that led to it."""
+    return hashlib.blake2b(definition.encode("utf-8"), digest_size=16).hexdigest()
+
+
+def reference_html(word: str) -> str:
+    """Definition markup for a repeated entry: a link to its first occurrence."""
+    return (
+        f'<a class="duplicate_entry" href="#{escape("word_" + word)}">{escape(word, False)}</a>'
+    )
+
+
+class EntryDeduplicator:
+    """Lookup wrapper that returns each resolved entry only once.
+
+    Words are looked up at most once. The first word that resolves to an entry gets
+    its definition; later words resolving to the same entry (repeats, ``@@@LINK=``
+    redirects, variants) get :func:`reference_html` pointing at that first word.
+    Missing words still return an empty string.
+    """
+
+    def __init__(self, lookup: Callable[[str], str]):
+        self.lookup = lookup
+        self.duplicates = 0
+        self._words: dict[str, Optional[str]] = {}
+        self._entries: dict[str, str] = {}
+
+    def __call__(self, word: str) -> str:
+        if word in self._words:
+            first = self._words[word]
+            if first is None:
+                return ""
+        else:
+            result = self.lookup(word)
+            if not result:
+                self._words[word] = None
+                return ""
+            first = self._entries.setdefault(entry_key(result), word)
+            self._words[word] = first
+            if first == word:
+                return result
+        self.duplicates += 1
+        return reference_html(first)
+
+    def first_occurrence(self, word: str, entry: str) -> Optional[str]:
+        """Register a rendered entry; return the earlier word it duplicates, if any."""
+        if word in self._words:
+            first = self._words[word]
+        else:
+            first = self._words[word] = self._entries.setdefault(entry, word)
+            if first == word:
+                return None
+        self.duplicates += 1
+        return first
+
+
+# Fragment rendering backends selectable through ``mdx2html(backend=...)``
+RENDERERS = {"bs4": FragmentRenderer, "lxml": LxmlFragmentRenderer}
+
+
+def render_head(head: str | None, mdx_file: Path, dictionary, additional_styles: str | None):
+    """Build the document ``<head>`` from the first definition head, with merged CSS."""
+    head_soup = BeautifulSoup(head or "<head></head>", "lxml")
+    head_soup.head.append(head_soup.new_tag("meta", charset="utf-8"))
+    if head:
+        head_soup = merge_css(head_soup, Path(mdx_file).parent, dictionary, additional_styles)
+    return str(head_soup.head)
+
+
+def link_stylesheets(head: str, assets: AssetStore) -> str:
+    """Move the ``<style>`` elements of a serialized head into ``assets`` and link them.
+
+    Documents sharing a store (e.g. the shards of one conversion) then share a single
+    stylesheet file, written once under its content hash.
+    """
+
+    def link(match: re.Match) -> str:
+        url = assets.store("style.css", match.group(1).encode("utf-8"))
+        return f'<link href="{escape(url)}" rel="stylesheet" type="text/css"/>'
+
+    return _STYLE_ELEMENT.sub(link, head)
+
+
+@contextmanager
+def open_output(
+    output_file: str | Path | BinaryIO, compress: bool | None = None
+) -> Iterator[BinaryIO]:
+    """Open ``output_file`` for binary writing; file objects (e.g. a pipe) pass through.
+
+    ``compress`` gzips what is written, by default when the path ends in ``.gz``.
+    """
+    if hasattr(output_file, "write"):
+        yield output_file
+        return
+    if compress is None:
+        compress = is_gzip_path(output_file)
+    Path(output_file).parent.mkdir(parents=True, exist_ok=True)
+    with open(output_file, "wb") as out:
+        if compress:
+            with gzip.GzipFile(fileobj=out, mode="wb", mtime=0) as gz:
+                yield gz
+        else:
+            yield out
+
+
+class HtmlStreamWriter:
+    """Incrementally write an mdx2html document.
+
+    ``output_file`` is a path or a binary file object (e.g. a pipe). ``compress`` gzips
+    the document as it is written, by default when the path ends in ``.gz``;
+    :attr:`bytes_written` is the size of the uncompressed document.
+
+    The body follows the head and the table of contents, so it can only go straight
+    to the output once both are known: :meth:`plan_toc` writes the table of contents
+    up front from the word list, and :meth:`start` writes the head. Until then the
+    body is spooled, and if :meth:`start` is never called :meth:`close` assembles the
+    document from the spools.
+
+    Usage::
+
+        writer = HtmlStreamWriter("out.html")
+        writer.plan_toc(lessons, present_words)
+        writer.begin_lesson("Lesson 1")
+        writer.add(fragment)        # spooled
+        writer.start(head_html)
+        writer.add(fragment)        # written to out.html
+        writer.end_lesson()
+        writer.close()
+    """
+
+    def __init__(
+        self,
+        output_file: str | Path | BinaryIO,
+        with_toc: bool = True,
+        h1_style: str | None = None,
+        spool_size: int = 8 * 1024 * 1024,
+        compress: bool | None = None,
+    ):
+        self.output_file = output_file if hasattr(output_file, "write") else Path(output_file)
+        self.with_toc = with_toc
+        self.h1_style = h1_style
+        self.compress = is_gzip_path(output_file) if compress is None else compress
+        self.bytes_written = 0
+        self._planned = False
+        self._file = None
+        self._out = None
+        if self.compress:
+            self._content = DeflateSpool(spool_size)
+            self._toc = DeflateSpool(spool_size)
+        else:
+            self._content = tempfile.SpooledTemporaryFile(max_size=spool_size)
+            self._toc = tempfile.SpooledTemporaryFile(max_size=spool_size)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.discard()
+
+    @property
+    def started(self) -> bool:
+        return self._out is not None
+
+    def plan_toc(self, lessons: list, present: Container[str]) -> None:
+        """Write the table of contents for ``lessons`` before their fragments arrive.
+
+        ``present`` holds the words that will be found; the others are marked invalid.
+        """
+        for lesson in lessons:
+            self._toc_lesson(lesson["name"])
+            for word in lesson["words"]:
+                self._toc_word(word, word in present)
+            self._toc.write(b"<br/>")
+        self._planned = True
+
+    def start(self, head: str) -> None:
+        """Write the head, the table of contents and the spooled body to the output.
+
+        Fragments added afterwards are written straight to the output.
+        """
+        if self.with_toc and not self._planned:
+            raise ValueError("plan_toc() must be called before start()")
+        self._start(head)
+
+    def _start(self, head: str) -> None:
+        stack = ExitStack()
+        file = stack.enter_context(open_output(self.output_file, compress=False))
+        out = GzipMember(file) if self.compress else file
+        self._file = stack
+        written = self._write(out, head.encode("utf-8"), BODY_OPEN.encode())
+        if self.with_toc:
+            written += self._write(out, b'<div class="left">') + self._copy(self._toc, out)
+            written += self._write(out, b'</div><div class="main">')
+        written += self._write(out, b'<div class="right">') + self._copy(self._content, out)
+        self.bytes_written = written
+        self._toc.close()
+        self._content.close()
+        # The table of contents is complete once the body is being written
+        self._planned = True
+        self._out = out
+
+    def begin_lesson(self, name: str, continued: bool = False) -> None:
+        """Start a lesson; a ``continued`` piece of one gets a heading without an anchor."""
+        style = f' style="{escape(self.h1_style)}"' if self.h1_style else ""
+        if continued:
+            self._emit(f"<h1{style}>{escape(name, False)} (continued)</h1>".encode())
+            return
+        anchor = escape("lesson_" + name)
+        self._emit(f'<h1 id="{anchor}"{style}>{escape(name, False)}</h1>'.encode())
+        if not self._planned:
+            self._toc_lesson(name)
+
+    def add(self, fragment: Fragment) -> None:
+        self._emit(b"\n")
+        self._emit(fragment.html.encode("utf-8"))
+        if not self._planned:
+            self._toc_word(fragment.word, fragment.found)
+
+    def end_lesson(self) -> None:
+        if not self._planned:
+            self._toc.write(b"<br/>")
+
+    def close(self, head: str | None = None) -> int:
+        """Finish the document, starting it with ``head`` first if needed; returns its size."""
+        if not self.started:
+            self._start(head)
+        self.bytes_written += self._write(
+            self._out, b"</div>", b"</div>" if self.with_toc else b"", BODY_CLOSE.encode()
+        )
+        if self.compress:
+            self._out.close()
+        self._file.close()
+        self._file = None
+        return self.bytes_written
+
+    def discard(self) -> None:
+        """Drop the spools; a document left unfinished by an error is removed."""
+        self._content.close()
+        self._toc.close()
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+            if isinstance(self.output_file, Path):
+                self.output_file.unlink(missing_ok=True)
+
+    def _emit(self, data: bytes) -> None:
+        if self._out is not None:
+            self._out.write(data)
+            self.bytes_written += len(data)
+        else:
+            self._content.write(data)
+
+    def _toc_lesson(self, name: str) -> None:
+        self._toc.write(
+            f'<a class="lesson" href="#{escape("lesson_" + name)}">'
+            f"{escape(name, False)}</a><br/>\n".encode()
+        )
+
+    def _toc_word(self, word: str, found: bool) -> None:
+        css_class = "word" if found else "word invalid_word"
+        self._toc.write(
+            f'<a class="{css_class}" href="#{escape("word_" + word)}">'
+            f"{escape(word, False)}</a><br/>\n".encode()
+        )
+
+    @staticmethod
+    def _write(out, *parts: bytes) -> int:
+        for part in parts:
+            out.write(part)
+        return sum(map(len, parts))
+
+    @staticmethod
+    def _copy(spool, out) -> int:
+        if isinstance(spool, DeflateSpool):
+            return out.splice(spool)
+        # Spools are only appended to, so the position is their size
+        size = spool.tell()
+        spool.seek(0)
+        shutil.copyfileobj(spool, out, 1024 * 1024)
+        return size
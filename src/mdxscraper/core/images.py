@@ -0,0 +1,223 @@
+"""Optional optimization of MDD images before they are embedded.
+
+Dictionaries often ship illustrations far larger than they are ever displayed, in
+formats (BMP, TIFF) that inflate the document. :class:`ImageOptimizer` sniffs the
+real format from the leading bytes, downscales rasters to ``max_size``, converts
+BMP/TIFF to PNG (or WebP), and turns SVG into text so it can be inlined without
+base64. Results are cached by content hash, and batches run on a process pool.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import io
+import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from typing import Mapping
+
+from PIL import Image
+
+# Formats Pillow saves as-is after downscaling; anything else is converted
+_KEEP_FORMATS = {"png", "jpeg", "gif", "webp"}
+_PIL_FORMATS = {"png": "PNG", "jpeg": "JPEG", "gif": "GIF", "webp": "WEBP"}
+_PIL_TO_FORMAT = {
+    "PNG": "png",
+    "JPEG": "jpeg",
+    "GIF": "gif",
+    "WEBP": "webp",
+    "BMP": "bmp",
+    "TIFF": "tiff",
+}
+
+
+def sniff_image_format(data: bytes) -> str | None:
+    """Image format from magic bytes, as used in ``data:image/<format>``; None if unknown."""
+    if data.startswith(b"\x89PNG\r\n\x1a\n"):
+        return "png"
+    if data.startswith(b"\xff\xd8\xff"):
+        return "jpeg"
+    if data.startswith((b"GIF87a", b"GIF89a")):
+        return "gif"
+    if data[:4] == b"RIFF" and data[8:12] == b"WEBP":
+        return "webp"
+    if data.startswith(b"BM"):
+        return "bmp"
+    if data.startswith((b"II*\x00", b"MM\x00*")):
+        return "tiff"
+    head = data[:512].lstrip(b"\xef\xbb\xbf \t\r\n").lower()
+    if head.startswith((b"<svg", b"<?xml")) and b"<svg" in data[:4096].lower():
+        return "svg+xml"
+    return None
+
+
+def optimize_image(
+    data: bytes,
+    max_size: tuple[int, int] = (1024, 1024),
+    lossless_format: str = "png",
+    jpeg_quality: int = 85,
+) -> tuple[bytes, str | None]:
+    """Return ``(data, format)`` for one image; unknown or broken data passes through."""
+    image_format = sniff_image_format(data)
+    if image_format is None or image_format == "svg+xml":
+        return data, image_format
+    try:
+        with Image.open(io.BytesIO(data)) as im:
+            image_format = _PIL_TO_FORMAT.get(im.format, image_format)
+            # Animated images would lose their frames
+            if getattr(im, "is_animated", False):
+                return data, image_format
+            convert = image_format not in _KEEP_FORMATS
+            resize = im.width > max_size[0] or im.height > max_size[1]
+            if not convert and not resize:
+                return data, image_format
+
+            target = lossless_format if convert else image_format
+            im.load()
+            if resize:
+                im.thumbnail(max_size, Image.Resampling.LANCZOS)
+            if target in ("jpeg", "webp") and im.mode not in ("RGB", "RGBA", "L"):
+                im = im.convert("RGBA" if target == "webp" and _has_alpha(im) else "RGB")
+            elif target == "jpeg" and im.mode == "RGBA":
+                im = im.convert("RGB")
+            elif target == "png" and im.mode not in ("1", "L", "LA", "P", "RGB", "RGBA"):
+                im = im.convert("RGBA" if _has_alpha(im) else "RGB")
+
+            out = io.BytesIO()
+            save_options = {"optimize": True}
+            if target == "jpeg":
+                save_options["quality"] = jpeg_quality
+            elif target == "webp":
+                save_options = {"lossless": True, "method": 6}
+            im.save(out, format=_PIL_FORMATS[target], **save_options)
+    except Exception:
+        return data, image_format
+
+    optimized = out.getvalue()
+    # Re-encoding an image in its own format can come out larger; keep the original
+    if not convert and len(optimized) >= len(data):
+        return data, image_format
+    return optimized, target
+
+
+def _has_alpha(im: Image.Image) -> bool:
+    return "A" in im.getbands() or "transparency" in im.info
+
+
+class ImageOptimizer:
+    """Content-hash cached image optimization, batched on a process pool.
+
+    Args:
+        max_size: Largest width and height kept; bigger images are downscaled.
+        lossless_format: Target for BMP/TIFF, ``"png"`` or ``"webp"`` (the WebKit in
+            wkhtmltopdf does not render WebP, so keep PNG for PDF output).
+        jpeg_quality: Quality for re-encoded JPEGs.
+        processes: Pool size for :meth:`optimize_many`; ``None`` uses all CPUs and
+            1 disables the pool.
+        cache_bytes: Upper bound on the optimized bytes kept in the cache.
+    """
+
+    def __init__(
+        self,
+        max_size: tuple[int, int] = (1024, 1024),
+        lossless_format: str = "png",
+        jpeg_quality: int = 85,
+        processes: int | None = None,
+        cache_bytes: int = 64 * 1024 * 1024,
+    ):
+        if lossless_format not in ("png", "webp"):
+            raise ValueError("lossless_format must be 'png' or 'webp'")
+        self.max_size = tuple(max_size)
+        self.lossless_format = lossless_format
+        self.jpeg_quality = jpeg_quality
+        self.processes = processes or os.cpu_count() or 1
+        self.cache_bytes = cache_bytes
+        self.bytes_in = 0
+        self.bytes_out = 0
+        self._cache: OrderedDict[str, tuple[bytes, str | None]] = OrderedDict()
+        self._cache_size = 0
+        self._lock = threading.Lock()
+        self._pool: ProcessPoolExecutor | None = None
+
+    def __getstate__(self):
+        # Worker processes get the settings, not the pool, lock or cache
+        state = self.__dict__.copy()
+        state.update(_lock=None, _pool=None, _cache=OrderedDict(), _cache_size=0)
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def close(self) -> None:
+        if self._pool is not None:
+            self._pool.shutdown()
+            self._pool = None
+
+    def optimize(self, data: bytes) -> tuple[bytes, str | None]:
+        """Optimize one image; returns ``(data, format)``."""
+        key = hashlib.sha256(data).hexdigest()
+        cached = self._cached(key)
+        if cached is None:
+            cached = optimize_image(data, self.max_size, self.lossless_format, self.jpeg_quality)
+            self._store(key, data, cached)
+        return cached
+
+    def optimize_many(self, images: Mapping[str, bytes]) -> dict[str, tuple[bytes, str | None]]:
+        """Optimize several images, uncached ones in parallel; keys are kept."""
+        results = {}
+        pending: dict[str, tuple[str, bytes]] = {}
+        for name, data in images.items():
+            key = hashlib.sha256(data).hexdigest()
+            cached = self._cached(key)
+            if cached is not None:
+                results[name] = cached
+            else:
+                pending[name] = (key, data)
+        if not pending:
+            return results
+
+        jobs = list(pending.values())
+        func = partial(
+            optimize_image,
+            max_size=self.max_size,
+            lossless_format=self.lossless_format,
+            jpeg_quality=self.jpeg_quality,
+        )
+        if self.processes > 1 and len(jobs) > 1:
+            if self._pool is None:
+                self._pool = ProcessPoolExecutor(max_workers=self.processes)
+            optimized = list(self._pool.map(func, [data for _, data in jobs]))
+        else:
+            optimized = [func(data) for _, data in jobs]
+        for name, (key, data), result in zip(pending, jobs, optimized):
+            self._store(key, data, result)
+            results[name] = result
+        return results
+
+    def _cached(self, key: str) -> tuple[bytes, str | None] | None:
+        with self._lock:
+            result = self._cache.get(key)
+            if result is not None:
+                self._cache.move_to_end(key)
+            return result
+
+    def _store(self, key: str, original: bytes, result: tuple[bytes, str | None]) -> None:
+        with self._lock:
+            self.bytes_in += len(original)
+            self.bytes_out += len(result[0])
+            if key in self._cache or len(result[0]) > self.cache_bytes:
+                return
+            self._cache[key] = result
+            self._cache_size += len(result[0])
+            while self._cache_size > self.cache_bytes:
+                _, (evicted, _) = self._cache.popitem(last=False)
+                self._cache_size -= len(evicted)
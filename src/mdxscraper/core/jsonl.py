@@ -0,0 +1,98 @@
+"""JSON Lines output: one record per word, for NLP and search pipelines.
+
+:func:`mdx2jsonl` writes each word as soon as it is looked up::
+
+    {"lesson": "Lesson 1", "word": "Colour", "resolved_headword": "color",
+     "html": "<div>...</div>", "found": true}
+
+``resolved_headword`` is the dictionary key the lookup landed on after following
+``@@@LINK=`` redirects and the case, hyphen and variant fallbacks. ``html`` is the
+definition as stored in the dictionary: images stay MDD references rather than
+embedded data, and ``with_images`` lists them. ``with_text`` adds a plain-text
+rendering of the definition. Nothing is kept per word, so memory stays constant
+whatever the length of the word list.
+"""
+
+from __future__ import annotations
+
+import json
+from collections import OrderedDict
+from pathlib import Path
+from typing import BinaryIO, Callable, Optional, Tuple
+
+from lxml import etree
+from lxml import html as lxml_html
+
+from mdxscraper.core.dictionary import Dictionary
+from mdxscraper.core.html_writer import open_output
+from mdxscraper.core.parser import WordParser
+
+
+def definition_fields(html: str, with_text: bool, with_images: bool) -> dict:
+    """The optional ``text`` and ``images`` fields of a record for ``html``."""
+    fields = {}
+    try:
+        root = lxml_html.fromstring(html)
+    except (etree.ParserError, ValueError):
+        root = None
+    if with_text:
+        fields["text"] = " ".join(root.text_content().split()) if root is not None else ""
+    if with_images:
+        fields["images"] = list(root.xpath("//img/@src")) if root is not None else []
+    return fields
+
+
+def mdx2jsonl(
+    mdx_file: str | Path,
+    input_file: str | Path,
+    output_file: str | Path | BinaryIO,
+    with_text: bool = False,
+    with_images: bool = False,
+    progress_callback: Optional[Callable[[int, str], None]] = None,
+    variants: bool = False,
+) -> Tuple[int, int, OrderedDict]:
+    """Write one JSON record per word of the word list.
+
+    ``output_file`` is a path or a binary file object (e.g. ``sys.stdout.buffer``); a
+    path ending in ``.gz`` is gzip-compressed as the records are written.
+    Words not found get a record with ``found`` false and an empty ``html``. Returns
+    the counts and invalid words like ``mdx2html``.
+    """
+    lessons = WordParser(str(input_file)).parse()
+    if progress_callback:
+        progress_callback(5, "Loading dictionary and parsing input...")
+
+    found_count = not_found_count = 0
+    invalid_words = OrderedDict()
+    dictionary = Dictionary(Path(mdx_file), variants=variants)
+    try:
+        with open_output(output_file) as out:
+            for done, lesson in enumerate(lessons):
+                if progress_callback:
+                    progress = 5 + int(done / max(len(lessons), 1) * 90)
+                    progress_callback(progress, f"Processing lesson: {lesson['name']}")
+                for word in lesson["words"]:
+                    headword, html = dictionary.lookup_entry(word)
+                    found = bool(html)
+                    if found:
+                        found_count += 1
+                    else:
+                        not_found_count += 1
+                        invalid_words.setdefault(lesson["name"], []).append(word)
+                    record = {
+                        "lesson": lesson["name"],
+                        "word": word,
+                        "resolved_headword": headword,
+                        "html": html,
+                        "found": found,
+                    }
+                    if with_text or with_images:
+                        record.update(definition_fields(html, with_text, with_images))
+                    out.write(json.dumps(record, ensure_ascii=False).encode("utf-8"))
+                    out.write(b"\n")
+    finally:
+        dictionary.close()
+
+    if progress_callback:
+        progress_callback(100, "JSONL generation completed!")
+    return found_count, not_found_count, invalid_words
@@ -0,0 +1,109 @@
+"""Process-pool lookup and rendering for ``mdx2html(workers=N)``.
+
+Each worker process opens its own :class:`Dictionary` (SQLite handles and file
+objects cannot be shared across processes) and turns chunks of words into rendered
+:class:`Fragment` objects. The parent keeps a bounded window of chunks in flight and
+yields fragments strictly in input order, so the document and its table of contents
+come out exactly as with a single process.
+"""
+
+from __future__ import annotations
+
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from pathlib import Path
+from typing import Iterable, Iterator
+
+from mdxscraper.core.assets import AssetStore
+from mdxscraper.core.dictionary import Dictionary
+from mdxscraper.core.html_writer import RENDERERS, Fragment, entry_key
+from mdxscraper.core.images import ImageOptimizer
+
+# Per-process state set up by _init_worker
+_dictionary: Dictionary | None = None
+_renderer = None
+_with_entries = False
+
+
+def _init_worker(
+    mdx_file: str,
+    variants,
+    backend: str,
+    scrap_style: str | None,
+    with_entries: bool,
+    assets: AssetStore | None,
+    optimizer: ImageOptimizer | None,
+) -> None:
+    global _dictionary, _renderer, _with_entries
+    _dictionary = Dictionary(mdx_file, variants=variants)
+    if optimizer is not None:
+        # Already one process per worker; no nested pools
+        optimizer.processes = 1
+    _renderer = RENDERERS[backend](_dictionary.impl, scrap_style, assets, optimizer)
+    _with_entries = with_entries
+
+
+def _render_chunk(words: list[str]) -> list[Fragment]:
+    fragments = []
+    for word in words:
+        result = _dictionary.lookup_html(word)
+        fragment = _renderer.render(word, result)
+        if _with_entries and result:
+            fragment.entry = entry_key(result)
+        fragments.append(fragment)
+    return fragments
+
+
+def _chunks(words: Iterable[str], size: int) -> Iterator[list[str]]:
+    chunk = []
+    for word in words:
+        chunk.append(word)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def iter_fragments(
+    mdx_file: str | Path,
+    words: Iterable[str],
+    workers: int,
+    chunk_size: int = 64,
+    variants=False,
+    backend: str = "bs4",
+    scrap_style: str | None = None,
+    window: int | None = None,
+    with_entries: bool = False,
+    assets: AssetStore | None = None,
+    optimizer: ImageOptimizer | None = None,
+) -> Iterator[Fragment]:
+    """Look up and render ``words`` on ``workers`` processes, yielding fragments in order.
+
+    At most ``window`` chunks (default ``2 * workers``) are pending at a time, so
+    memory stays bounded for arbitrarily long inputs. The dictionary index must
+    already exist; otherwise every worker would try to build it at once.
+    ``with_entries`` sets ``Fragment.entry`` so the caller can drop duplicate entries.
+    Each worker gets a copy of ``assets``; content-hash names keep their writes safe.
+    """
+    if workers < 1:
+        raise ValueError("workers must be at least 1")
+    window = window or workers * 2
+    pending: deque[Future] = deque()
+    with ProcessPoolExecutor(
+        max_workers=workers,
+        initializer=_init_worker,
+        initargs=(
+            str(mdx_file), variants, backend, scrap_style, with_entries, assets, optimizer
+        ),
+    ) as executor:
+        try:
+            for chunk in _chunks(words, chunk_size):
+                pending.append(executor.submit(_render_chunk, chunk))
+                if len(pending) >= window:
+                    yield from pending.popleft().result()
+            while pending:
+                yield from pending.popleft().result()
+        finally:
+            for future in pending:
+                future.cancel()
@@ -0,0 +1,187 @@
+"""Staged conversion pipeline with bounded queues between stages.
+
+A conversion is a chain of stages: the input source, then ``Stage`` functions
+(lookup, transform, asset resolution, ...), then the sink, which is whoever iterates
+the pipeline. Every stage runs on its own thread and hands items to the next through
+a bounded queue, so SQLite and MDD reads for later words overlap with parsing,
+image inlining and writing of earlier ones, while back-pressure keeps memory bounded.
+Items keep their input order.
+
+Each stage records :class:`StageMetrics`; ``Pipeline.metrics()`` returns a snapshot
+that is safe to read from another thread while the pipeline runs.
+
+Example:
+    >>> pipeline = Pipeline([Stage("lookup", lookup), Stage("render", render)])
+    >>> for fragment in pipeline.run(words):
+    ...     writer.add(fragment)
+    >>> for m in pipeline.metrics():
+    ...     print(m.name, m.items, f"{m.throughput:.0f}/s", m.queue_max)
+"""
+
+from __future__ import annotations
+
+import queue
+import threading
+import time
+from dataclasses import dataclass, replace
+from typing import Any, Callable, Iterable, Iterator, Sequence
+
+# Seconds a blocked stage waits before re-checking whether the pipeline was stopped
+_POLL_INTERVAL = 0.1
+
+_DONE = object()
+
+
+class _Failure:
+    def __init__(self, exc: BaseException):
+        self.exc = exc
+
+
+@dataclass
+class Stage:
+    """A named step that maps one item to the next."""
+
+    name: str
+    func: Callable[[Any], Any]
+
+
+@dataclass
+class StageMetrics:
+    """Counters for one stage.
+
+    ``busy`` is time spent processing items, ``waiting`` time spent blocked on an
+    empty input queue. ``queue_depth``/``queue_max`` describe the stage's input queue.
+    """
+
+    name: str
+    items: int = 0
+    busy: float = 0.0
+    waiting: float = 0.0
+    queue_depth: int = 0
+    queue_max: int = 0
+
+    @property
+    def throughput(self) -> float:
+        """Items per second of busy time."""
+        return self.items / self.busy if self.busy else 0.0
+
+
+class Pipeline:
+    """Run ``stages`` concurrently between a source iterable and the consuming loop."""
+
+    def __init__(self, stages: Sequence[Stage], maxsize: int = 64):
+        if maxsize < 1:
+            raise ValueError("maxsize must be at least 1")
+        self.stages = list(stages)
+        self.maxsize = maxsize
+        self._metrics = [StageMetrics("input")]
+        self._metrics += [StageMetrics(stage.name) for stage in self.stages]
+        self._metrics.append(StageMetrics("sink"))
+        self._queues: list[queue.Queue] = []
+        self._stop = threading.Event()
+
+    def metrics(self) -> list[StageMetrics]:
+        """Snapshot of every stage's metrics, from input to sink."""
+        for metrics, q in zip(self._metrics[1:], self._queues):
+            metrics.queue_depth = q.qsize()
+        return [replace(m) for m in self._metrics]
+
+    def run(self, source: Iterable) -> Iterator:
+        """Feed ``source`` through the stages and yield the results in order.
+
+        The time the caller spends between items is recorded as the ``sink`` stage.
+        Exceptions raised by any stage are re-raised here; closing the iterator early
+        stops all stage threads.
+        """
+        self._stop.clear()
+        self._queues = [queue.Queue(self.maxsize) for _ in range(len(self.stages) + 1)]
+        threads = [
+            threading.Thread(
+                target=self._feed, args=(iter(source), self._queues[0]), name="pipeline-input"
+            )
+        ]
+        for i, stage in enumerate(self.stages):
+            threads.append(
+                threading.Thread(
+                    target=self._work,
+                    args=(stage.func, i + 1, self._queues[i], self._queues[i + 1]),
+                    name=f"pipeline-{stage.name}",
+                )
+            )
+        for thread in threads:
+            thread.daemon = True
+            thread.start()
+
+        sink = self._metrics[-1]
+        try:
+            while True:
+                item = self._get(self._queues[-1], sink)
+                if item is _DONE:
+                    return
+                if isinstance(item, _Failure):
+                    raise item.exc
+                sink.items += 1
+                start = time.perf_counter()
+                try:
+                    yield item
+                finally:
+                    sink.busy += time.perf_counter() - start
+        finally:
+            self._stop.set()
+            for thread in threads:
+                thread.join()
+
+    def _feed(self, source: Iterator, outbox: queue.Queue) -> None:
+        metrics = self._metrics[0]
+        while not self._stop.is_set():
+            start = time.perf_counter()
+            try:
+                item = next(source)
+            except StopIteration:
+                self._put(outbox, _DONE, 1)
+                return
+            except BaseException as e:
+                self._put(outbox, _Failure(e), 1)
+                return
+            metrics.busy += time.perf_counter() - start
+            metrics.items += 1
+            self._put(outbox, item, 1)
+
+    def _work(self, func, index: int, inbox: queue.Queue, outbox: queue.Queue) -> None:
+        metrics = self._metrics[index]
+        while True:
+            item = self._get(inbox, metrics)
+            if item is _DONE or isinstance(item, _Failure):
+                self._put(outbox, item, index + 1)
+                return
+            start = time.perf_counter()
+            try:
+                result = func(item)
+            except BaseException as e:
+                self._put(outbox, _Failure(e), index + 1)
+                return
+            metrics.busy += time.perf_counter() - start
+            metrics.items += 1
+            self._put(outbox, result, index + 1)
+
+    def _get(self, inbox: queue.Queue, metrics: StageMetrics):
+        start = time.perf_counter()
+        try:
+            while not self._stop.is_set():
+                try:
+                    return inbox.get(timeout=_POLL_INTERVAL)
+                except queue.Empty:
+                    continue
+            return _DONE
+        finally:
+            metrics.waiting += time.perf_counter() - start
+
+    def _put(self, outbox: queue.Queue, item, consumer: int) -> None:
+        while not self._stop.is_set():
+            try:
+                outbox.put(item, timeout=_POLL_INTERVAL)
+            except queue.Full:
+                continue
+            metrics = self._metrics[consumer]
+            metrics.queue_max = max(metrics.queue_max, outbox.qsize())
+            return
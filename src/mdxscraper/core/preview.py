@@ -0,0 +1,152 @@
+"""Preview rendering: a small, fast PDF for iterating on styles.
+
+A full PDF of a long word list takes minutes, most of it spent laying out every
+definition and rasterizing full-resolution images. While tuning CSS or PDF presets
+a representative excerpt is enough. :func:`mdx2pdf_preview` renders only part of
+the word list, chosen by a :class:`PreviewProfile`:
+
+- the first ``lessons`` lessons, or ``sample_words`` words spread evenly over the
+  whole list (kept in their lessons, so headings still appear);
+- every image replaced by an empty box of the same size (:class:`PlaceholderImages`),
+  so the layout stays the same without image decoding or embedding;
+- low-resolution wkhtmltopdf options (:meth:`PreviewProfile.pdf_options`).
+
+The selection is deterministic, so repeated previews show the same words.
+"""
+
+from __future__ import annotations
+
+import io
+import json
+import os
+import tempfile
+from collections import OrderedDict
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable, Mapping, Optional, Tuple
+
+from PIL import Image
+
+from mdxscraper.core.converter import mdx2pdf
+from mdxscraper.core.images import ImageOptimizer
+from mdxscraper.core.parser import WordParser
+
+# Box size for images whose dimensions cannot be read (e.g. SVG)
+PLACEHOLDER_SIZE = (120, 90)
+
+
+@dataclass
+class PreviewProfile:
+    """Which part of the word list a preview renders, and how cheaply."""
+
+    lessons: int | None = 2
+    sample_words: int | None = None
+    placeholder_images: bool = True
+    dpi: int = 72
+
+    def select(self, lessons: list[dict]) -> list[dict]:
+        """The lessons to render: a word sample if ``sample_words``, else the first few."""
+        if self.sample_words:
+            return sample_words(lessons, self.sample_words)
+        if self.lessons:
+            return lessons[: self.lessons]
+        return lessons
+
+    def pdf_options(self, pdf_options: dict | None = None) -> dict:
+        """``pdf_options`` with low-resolution rendering settings."""
+        options = dict(pdf_options or {})
+        options.update(
+            {
+                "dpi": str(self.dpi),
+                "image-dpi": str(self.dpi),
+                "image-quality": "50",
+                "lowquality": "",
+                "no-outline": "",
+            }
+        )
+        options.pop("outline", None)
+        return options
+
+
+def sample_words(lessons: list[dict], count: int) -> list[dict]:
+    """Pick ``count`` words spread evenly over all lessons, keeping their lessons."""
+    total = sum(len(lesson["words"]) for lesson in lessons)
+    if count >= total:
+        return lessons
+    picked = {i * total // count for i in range(count)}
+    result = []
+    position = 0
+    for lesson in lessons:
+        words = [
+            word for offset, word in enumerate(lesson["words"]) if position + offset in picked
+        ]
+        position += len(lesson["words"])
+        if words:
+            result.append({**lesson, "words": words})
+    return result
+
+
+def placeholder_image(data: bytes) -> bytes:
+    """An SVG box with the dimensions of the image in ``data``."""
+    width, height = PLACEHOLDER_SIZE
+    try:
+        # Only reads the header
+        with Image.open(io.BytesIO(data)) as im:
+            width, height = im.size
+    except Exception:
+        pass
+    return (
+        f'<svg xmlns="http://www.w3.org/2000/svg" width="{width}" height="{height}">'
+        '<rect width="100%" height="100%" fill="#e0e0e0" stroke="#a0a0a0"/></svg>'
+    ).encode("utf-8")
+
+
+class PlaceholderImages(ImageOptimizer):
+    """Image "optimizer" that swaps every MDD image for a same-sized placeholder box."""
+
+    def __init__(self):
+        super().__init__(processes=1)
+
+    def optimize(self, data: bytes) -> tuple[bytes, str | None]:
+        box = placeholder_image(data)
+        self.bytes_in += len(data)
+        self.bytes_out += len(box)
+        return box, "svg+xml"
+
+    def optimize_many(self, images: Mapping[str, bytes]) -> dict[str, tuple[bytes, str | None]]:
+        return {name: self.optimize(data) for name, data in images.items()}
+
+
+def mdx2pdf_preview(
+    mdx_file: str | Path,
+    input_file: str | Path,
+    output_file: str | Path,
+    pdf_options: dict | None = None,
+    profile: PreviewProfile | None = None,
+    progress_callback: Optional[Callable[[int, str], None]] = None,
+    **kwargs,
+) -> Tuple[int, int, OrderedDict]:
+    """Render a preview PDF of ``input_file`` as chosen by ``profile``.
+
+    ``pdf_options`` are the regular options; the profile lowers their resolution.
+    Other keyword arguments are passed to ``mdx2pdf``. Returns the counts and invalid
+    words of the words rendered.
+    """
+    profile = profile or PreviewProfile()
+    lessons = profile.select(WordParser(str(input_file)).parse())
+    fd, word_list = tempfile.mkstemp(suffix=".json", prefix="mdxscraper-preview-")
+    with os.fdopen(fd, "w", encoding="utf-8") as f:
+        json.dump(lessons, f, ensure_ascii=False)
+    if profile.placeholder_images:
+        kwargs["optimize_images"] = PlaceholderImages()
+    try:
+        return mdx2pdf(
+            mdx_file,
+            word_list,
+            output_file,
+            profile.pdf_options(pdf_options),
+            progress_callback=progress_callback,
+            **kwargs,
+        )
+    finally:
+        os.remove(word_list)
@@ -1,27 +1,67 @@
 from __future__ import annotations
 
-from base64 import b64encode
 from pathlib import Path
 
 from bs4 import BeautifulSoup
 
+from mdxscraper.core.assets import AssetStore, data_uri
+from mdxscraper.core.images import ImageOptimizer
+from mdxscraper.core.stylesheets import decode_css, resolve_stylesheet
+from mdxscraper.mdict.mdict_query import IndexBuilder
+
+
+def stylesheet_links(head) -> list:
+    """``<link>`` elements of ``head`` that reference a stylesheet, in document order."""
+    links = []
+    for link in head.find_all("link", href=True):
+        rel = [value.lower() for value in link.get("rel") or []]
+        if "stylesheet" in rel or (not rel and link["href"].lower().endswith(".css")):
+            links.append(link)
+    return links
+
 
 def get_css(soup: BeautifulSoup, mdx_path: Path, dictionary) -> str:
-    css_name = soup.head.link["href"]
+    """Concatenate every stylesheet linked from ``soup.head``.
+
+    Stylesheets are looked up next to the MDX first, then in the MDD. Links that
+    cannot be resolved are skipped; LookupError is raised if none can be.
+    """
+    names = list(dict.fromkeys(link["href"] for link in stylesheet_links(soup.head)))
+    css = []
+    for name in names:
+        try:
+            css.append(_read_css(name, mdx_path, dictionary))
+        except LookupError:
+            continue
+    if names and not css:
+        raise LookupError(f"Stylesheet not found: {', '.join(names)}")
+    return "\n".join(css)
+
+
+def _read_css(css_name: str, mdx_path: Path, dictionary) -> str:
     css_path = Path(mdx_path) / css_name
     if css_path.exists():
-        css = css_path.read_bytes()
-    elif hasattr(dictionary, "_mdd_db"):
+        return decode_css(css_path.read_bytes())
+    if isinstance(dictionary, IndexBuilder):
+        css = resolve_stylesheet(dictionary, css_name)
+        if css is None:
+            raise LookupError(f"Stylesheet not found: {css_name}")
+        return css
+    if hasattr(dictionary, "_mdd_db"):
         css_key = dictionary.get_mdd_keys("*" + css_name)[0]
-        css = dictionary.mdd_lookup(css_key)[0]
-    else:
-        css = b""
-    return css.decode("utf-8")
+        return decode_css(dictionary.mdd_lookup(css_key)[0])
+    return ""
 
 
 def merge_css(
     soup: BeautifulSoup, mdx_path: Path, dictionary, additional_styles: str | None = None
 ) -> BeautifulSoup:
+    """Replace the stylesheet links in ``soup.head`` with one inline ``<style>``."""
+    if soup.head is None:
+        return soup
+    links = stylesheet_links(soup.head)
+    if not links:
+        return soup
     try:
         css = get_css(soup, mdx_path, dictionary)
     except Exception:
@@ -29,41 +69,145 @@ def merge_css(
     if additional_styles:
         css += additional_styles
 
-    soup.head.link.decompose()
-    soup.head.append(soup.new_tag("style", type="text/css"))
-    soup.head.style.string = css
+    for link in links:
+        link.decompose()
+    style = soup.new_tag("style", type="text/css")
+    style.string = css
+    soup.head.append(style)
     return soup
 
 
-def embed_images(soup: BeautifulSoup, dictionary) -> BeautifulSoup:
-    if not hasattr(dictionary, "_mdd_db"):
-        return soup
+def stylesheet_css(
+    head: str | None, mdx_path: Path, dictionary, additional_styles: str | None = None
+) -> str:
+    """The stylesheets linked from a serialized ``<head>``, then ``additional_styles``.
+
+    Stylesheets that cannot be read are left out, as ``merge_css`` leaves their links.
+    """
+    css = []
+    if head:
+        soup = BeautifulSoup(head, "lxml")
+        if soup.head is not None and stylesheet_links(soup.head):
+            try:
+                css.append(get_css(soup, mdx_path, dictionary))
+            except Exception:
+                pass
+    if additional_styles:
+        css.append(additional_styles)
+    return "\n".join(css)
 
-    cache: dict[str, str] = {}
-    for img in soup.find_all("img"):
-        if not img.has_attr("src"):
-            continue
 
-        src = img["src"]
-        src_path = src.replace("/", "\\")
+def embed_images(
+    soup: BeautifulSoup,
+    dictionary,
+    cache: dict[str, str | None] | None = None,
+    assets: AssetStore | None = None,
+    optimizer: ImageOptimizer | None = None,
+) -> BeautifulSoup:
+    """Inline MDD images as data URIs, or link them from ``assets`` when given.
 
-        if src_path in cache:
-            img["src"] = cache[src_path]
-            continue
+    ``optimizer`` downscales and converts images before they are embedded.
+    ``cache`` maps MDD keys to the new ``src`` (None for images not in the MDD), so
+    every spelling of a path (``a.png``, ``/a.png``, ``\\a.png``) resolves once; pass
+    the same dict across calls to share it between fragments of one document.
+    """
+    if not hasattr(dictionary, "_mdd_db"):
+        return soup
 
-        lookup_src = src_path
-        if not lookup_src.startswith("\\"):
-            lookup_src = "\\" + lookup_src
+    if cache is None:
+        cache = {}
+    images = [img for img in soup.find_all("img") if img.has_attr("src")]
+    urls = image_urls([img["src"] for img in images], dictionary, cache, assets, optimizer)
+    for img, url in zip(images, urls):
+        if url is not None:
+            img["src"] = url
 
-        imgs = dictionary.mdd_lookup(lookup_src)
-        if len(imgs) > 0:
-            from mdxscraper.utils.file_utils import get_image_format_from_src
+    return soup
 
-            image_format = get_image_format_from_src(src)
-            base64_str = (
-                "data:image/" + image_format + ";base64," + b64encode(imgs[0]).decode("ascii")
-            )
-            cache[src_path] = base64_str
-            img["src"] = base64_str
 
-    return soup
+def image_urls(
+    srcs: list[str],
+    dictionary,
+    cache: dict[str, str | None],
+    assets: AssetStore | None = None,
+    optimizer: ImageOptimizer | None = None,
+) -> list[str | None]:
+    """New ``src`` values for ``srcs``, None where the image is not in the MDD.
+
+    With an ``IndexBuilder`` all uncached images are resolved in one batch.
+    """
+    if isinstance(dictionary, IndexBuilder):
+        _resolve_images(srcs, dictionary, cache, assets, optimizer)
+        return [cache.get(_mdd_key(src)) for src in srcs]
+    return [image_url(src, dictionary, cache, assets, optimizer) for src in srcs]
+
+
+def _mdd_key(src: str) -> str:
+    src_path = src.replace("/", "\\")
+    return src_path if src_path.startswith("\\") else "\\" + src_path
+
+
+def _encode(
+    src: str, data: bytes, assets: AssetStore | None, image_format: str | None = None
+) -> str:
+    if assets is not None:
+        return assets.url(src, data, image_format)
+    return data_uri(src, data, image_format)
+
+
+def _resolve_images(
+    srcs: list[str],
+    dictionary: IndexBuilder,
+    cache: dict[str, str | None],
+    assets: AssetStore | None,
+    optimizer: ImageOptimizer | None = None,
+) -> None:
+    """Resolve every uncached image ``src`` with one batched MDD lookup into ``cache``.
+
+    Images missing from the MDD are cached as None so they are not looked up again.
+    """
+    # {MDD key: the first src naming it}; the original src names the asset file
+    pending: dict[str, str] = {}
+    for src in srcs:
+        key = _mdd_key(src)
+        if key not in cache:
+            pending.setdefault(key, src)
+    if not pending:
+        return
+
+    found = dictionary.mdd_lookup_many(pending)
+    if optimizer is not None:
+        found = optimizer.optimize_many(found)
+    for key, src in pending.items():
+        if key not in found:
+            cache[key] = None
+        elif optimizer is not None:
+            data, image_format = found[key]
+            cache[key] = _encode(src, data, assets, image_format)
+        else:
+            cache[key] = _encode(src, found[key], assets)
+
+
+def image_url(
+    src: str,
+    dictionary,
+    cache: dict[str, str | None],
+    assets: AssetStore | None = None,
+    optimizer: ImageOptimizer | None = None,
+) -> str | None:
+    """Return the new ``src`` for an MDD image, or None when it is not in the MDD."""
+    key = _mdd_key(src)
+    if key in cache:
+        return cache[key]
+
+    imgs = dictionary.mdd_lookup(key)
+    if len(imgs) == 0:
+        cache[key] = None
+        return None
+
+    data, image_format = imgs[0], None
+    if optimizer is not None:
+        data, image_format = optimizer.optimize(data)
+    url = _encode(src, data, assets, image_format)
+    cache[key] = url
+    return url
@@ -0,0 +1,586 @@
+"""Sharded conversion: one output file per lesson or per N words.
+
+Converting a workbook of hundreds of lessons with ``mdx2html``/``mdx2pdf`` produces a
+single huge file, rendered serially and slow to open. :func:`mdx2shards` splits the
+word list into shards (one per lesson, or one per ``words_per_shard`` words), renders
+them concurrently on a process pool and writes them into an output directory::
+
+    out/
+        index.html              links to every shard
+        001-Lesson_1.html       (or .pdf, .png, ...)
+        002-Lesson_2.html
+        assets/                 images and the merged stylesheet, shared by all shards
+
+Shared resources are content addressed, so each image and the stylesheet are written
+once however many shards use them. For PDF and image output the intermediate HTML and
+its assets live in a temporary build directory instead.
+
+The shard plan depends only on the word list and ``words_per_shard``, so any shard
+can be regenerated on its own with ``shards=[n]``.
+
+The same machinery renders one large PDF in parallel (``mdx2pdf(pdf_workers=n)``):
+:func:`mdx2pdf_parallel` cuts the word list into balanced groups of lessons (splitting
+only lessons larger than a group), runs one wkhtmltopdf process per group and
+concatenates the parts with :func:`merge_pdfs`, which bookmarks every lesson and points
+the links of the table of contents (in the first part) at pages of the merged PDF.
+Merging needs ``pypdf``.
+"""
+
+from __future__ import annotations
+
+import copy
+import os
+import re
+import shutil
+import tempfile
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import dataclass, field
+from html import escape
+from pathlib import Path
+from typing import Callable, Iterable, Optional, Tuple
+from urllib.parse import quote, unquote
+
+import pdfkit
+
+try:
+    import pypdf
+    from pypdf.generic import ArrayObject, NameObject, NullObject
+except ImportError:
+    pypdf = None
+
+from mdxscraper.core.assets import AssetStore
+from mdxscraper.core.converter import _allow_asset_dir, _stream_html, _write_image
+from mdxscraper.core.dictionary import Dictionary
+from mdxscraper.core.html_writer import RENDERERS
+from mdxscraper.core.images import ImageOptimizer
+from mdxscraper.core.parser import WordParser
+from mdxscraper.core.slimming import HtmlSlimmer, SlimStats
+from mdxscraper.utils.path_utils import (
+    get_wkhtmltopdf_path,
+    validate_wkhtmltopdf_for_pdf_conversion,
+)
+
+SHARD_FORMATS = (".html", ".pdf", ".png", ".jpg", ".jpeg", ".webp")
+INDEX_FILE = "index.html"
+# Upper bound on words per wkhtmltopdf process when rendering one PDF in parts
+PART_WORDS = 2000
+
+_UNSAFE_FILE_CHARS = re.compile(r"[^\w-]+")
+
+
+@dataclass
+class Shard:
+    """A slice of the word list rendered into one output file."""
+
+    number: int
+    name: str
+    lessons: list[dict] = field(default_factory=list)
+
+    @property
+    def word_count(self) -> int:
+        return sum(len(lesson["words"]) for lesson in self.lessons)
+
+    def file_name(self, suffix: str, digits: int = 3) -> str:
+        slug = _UNSAFE_FILE_CHARS.sub("_", self.name).strip("_")[:60] or "shard"
+        return f"{self.number:0{digits}d}-{slug}{suffix}"
+
+
+def plan_shards(lessons: list[dict], words_per_shard: int | None = None) -> list[Shard]:
+    """Split ``lessons`` into shards: one per lesson, or ``words_per_shard`` words each.
+
+    With ``words_per_shard`` a lesson may continue in the next shard; each part keeps
+    the lesson name. Shards are numbered from 1 in document order.
+    """
+    if words_per_shard is None:
+        return [Shard(i, lesson["name"], [lesson]) for i, lesson in enumerate(lessons, 1)]
+    if words_per_shard < 1:
+        raise ValueError("words_per_shard must be at least 1")
+
+    shards: list[Shard] = []
+    parts: list[dict] = []
+    count = 0
+
+    def flush():
+        names = [parts[0]["name"], parts[-1]["name"]]
+        name = names[0] if names[0] == names[1] else " - ".join(names)
+        shards.append(Shard(len(shards) + 1, name, parts.copy()))
+        parts.clear()
+
+    for lesson in lessons:
+        words = lesson["words"]
+        start = 0
+        while True:
+            taken = words[start : start + words_per_shard - count]
+            parts.append({**lesson, "words": taken})
+            count += len(taken)
+            start += len(taken)
+            if count == words_per_shard:
+                flush()
+                count = 0
+            if start >= len(words):
+                break
+    if parts:
+        flush()
+    return shards
+
+
+def plan_parts(lessons: list[dict], parts: int) -> list[Shard]:
+    """Split ``lessons`` into at most ``parts`` shards of about the same number of words.
+
+    Consecutive lessons are grouped so that each lesson starts on a fresh page of its
+    part. A lesson holding more words than a part is split by word count first; its
+    later pieces keep the name and are marked ``"continued"``.
+    """
+    if parts < 1:
+        raise ValueError("parts must be at least 1")
+    # Empty lessons still cost a heading
+    target = -(-sum(max(1, len(lesson["words"])) for lesson in lessons) // parts)
+    pieces = []
+    for lesson in lessons:
+        words = lesson["words"]
+        if len(words) <= target:
+            pieces.append(lesson)
+            continue
+        count = -(-len(words) // target)
+        size = -(-len(words) // count)
+        for start in range(0, len(words), size):
+            piece = {**lesson, "words": words[start : start + size]}
+            if start:
+                piece["continued"] = True
+            pieces.append(piece)
+
+    parts = min(parts, len(pieces))
+    weights = [max(1, len(piece["words"])) for piece in pieces]
+    total = sum(weights)
+    shards: list[Shard] = []
+    group: list[dict] = []
+    done = 0
+
+    def flush():
+        names = [group[0]["name"], group[-1]["name"]]
+        name = names[0] if names[0] == names[1] else " - ".join(names)
+        shards.append(Shard(len(shards) + 1, name, group.copy()))
+        group.clear()
+
+    for i, (piece, weight) in enumerate(zip(pieces, weights)):
+        group.append(piece)
+        done += weight
+        open_parts = parts - len(shards) - 1
+        if open_parts and (
+            done * parts >= total * (len(shards) + 1) or len(pieces) - i - 1 == open_parts
+        ):
+            flush()
+    if group:
+        flush()
+    return shards
+
+
+@dataclass
+class _ShardSettings:
+    """Everything a worker needs besides the shard itself; sent to each process."""
+
+    mdx_file: str
+    build_dir: str
+    with_toc: bool = True
+    h1_style: str | None = None
+    scrap_style: str | None = None
+    additional_styles: str | None = None
+    variants: bool = False
+    backend: str = "bs4"
+    inline_threshold: int = 0
+    precompress_assets: bool = False
+    optimize_images: bool | ImageOptimizer = False
+    slim: bool = False
+    pdf_options: dict | None = None
+    img_options: dict | None = None
+    wkhtmltopdf: str | None = None
+
+
+def _render_shard(
+    settings: _ShardSettings,
+    shard: Shard,
+    html_file: str,
+    output_file: str | None,
+    toc: list[dict] | None = None,
+) -> Tuple[Tuple[int, int, OrderedDict], Optional[SlimStats]]:
+    """Write one shard as HTML and, for PDF/image output, convert it.
+
+    ``toc`` lists the lessons of the table of contents: the shard's own by default,
+    none when empty. Returns the shard's counts and, with ``slim``, its slimming stats.
+    """
+    optimizer = None
+    if settings.optimize_images is True:
+        optimizer = ImageOptimizer(processes=1)
+    elif settings.optimize_images:
+        # Already one process per shard; no nested pools. The copy leaves the caller's
+        # optimizer (shared by in-process shards) untouched
+        optimizer = copy.copy(settings.optimize_images)
+        optimizer.processes = 1
+    assets = AssetStore.for_output(
+        html_file, settings.inline_threshold, settings.precompress_assets
+    )
+
+    slimmer = HtmlSlimmer() if settings.slim else None
+    with Dictionary(settings.mdx_file, variants=settings.variants) as dictionary:
+        renderer = RENDERERS[settings.backend](
+            dictionary.impl, settings.scrap_style, assets, optimizer
+        )
+        words = (word for lesson in shard.lessons for word in lesson["words"])
+        fragments = (renderer.render(word, dictionary.lookup_html(word)) for word in words)
+        result = _stream_html(
+            shard.lessons,
+            fragments,
+            dictionary,
+            Path(settings.mdx_file),
+            html_file,
+            with_toc=settings.with_toc and toc != [],
+            h1_style=settings.h1_style,
+            additional_styles=settings.additional_styles,
+            slimmer=slimmer,
+            stylesheets=assets,
+            toc_lessons=toc,
+        )
+
+    if output_file is not None:
+        if output_file.endswith(".pdf"):
+            pdfkit.from_file(
+                html_file,
+                output_file,
+                configuration=pdfkit.configuration(wkhtmltopdf=settings.wkhtmltopdf),
+                options=_allow_asset_dir(settings.pdf_options, settings.build_dir),
+            )
+        else:
+            _write_image(html_file, output_file, settings.img_options, settings.build_dir)
+        os.remove(html_file)
+    return result, slimmer.stats if slimmer is not None else None
+
+
+def _run_shards(
+    settings: _ShardSettings,
+    jobs: list[tuple],
+    workers: int | None,
+    report: Callable[[Shard, int], None],
+) -> dict[int, tuple]:
+    """Render ``jobs`` on up to ``workers`` processes; results keyed by shard number."""
+    results: dict[int, tuple] = {}
+    workers = max(1, min(workers or os.cpu_count() or 1, len(jobs)))
+    if workers == 1:
+        for job in jobs:
+            results[job[0].number] = _render_shard(settings, *job)
+            report(job[0], len(results))
+        return results
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = {executor.submit(_render_shard, settings, *job): job[0] for job in jobs}
+        try:
+            for future in as_completed(futures):
+                results[futures[future].number] = future.result()
+                report(futures[future], len(results))
+        except BaseException:
+            for future in futures:
+                future.cancel()
+            raise
+    return results
+
+
+def _sum_results(
+    results: dict[int, tuple], slimmer: HtmlSlimmer | None = None
+) -> Tuple[int, int, OrderedDict]:
+    """Add up per-shard results in shard order, and their slimming stats into ``slimmer``."""
+    found_count = not_found_count = 0
+    invalid_words = OrderedDict()
+    for number in sorted(results):
+        (found, not_found, invalid), stats = results[number]
+        if slimmer is not None and stats is not None:
+            slimmer.stats.add(stats)
+        found_count += found
+        not_found_count += not_found
+        for lesson, words in invalid.items():
+            invalid_words.setdefault(lesson, []).extend(words)
+    return found_count, not_found_count, invalid_words
+
+
+def _wkhtmltopdf(wkhtmltopdf_path: str) -> str:
+    """Validate and resolve the wkhtmltopdf executable, raising RuntimeError if unusable."""
+    is_valid, error_message = validate_wkhtmltopdf_for_pdf_conversion(wkhtmltopdf_path)
+    if not is_valid:
+        raise RuntimeError(error_message)
+    return get_wkhtmltopdf_path(wkhtmltopdf_path)
+
+
+def write_index(
+    index_file: str | Path, shards: Iterable[Shard], suffix: str, title: str = "Index"
+) -> None:
+    """Write a plain HTML page linking every shard file."""
+    items = "".join(
+        f'<li><a href="{quote(shard.file_name(suffix))}">{escape(shard.name, False)}</a>'
+        f" ({shard.word_count} words)</li>\n"
+        for shard in shards
+    )
+    Path(index_file).write_text(
+        '<!DOCTYPE html>\n<html>\n<head><meta charset="utf-8"/>'
+        f"<title>{escape(title, False)}</title></head>\n"
+        f"<body>\n<h1>{escape(title, False)}</h1>\n<ol>\n{items}</ol>\n</body>\n</html>\n",
+        encoding="utf-8",
+    )
+
+
+def mdx2shards(
+    mdx_file: str | Path,
+    input_file: str | Path,
+    output_dir: str | Path,
+    output_format: str = "html",
+    words_per_shard: int | None = None,
+    workers: int | None = None,
+    shards: Iterable[int] | None = None,
+    with_toc: bool = True,
+    h1_style: str | None = None,
+    scrap_style: str | None = None,
+    additional_styles: str | None = None,
+    progress_callback: Optional[Callable[[int, str], None]] = None,
+    variants: bool = False,
+    backend: str = "bs4",
+    pdf_options: dict | None = None,
+    img_options: dict | None = None,
+    wkhtmltopdf_path: str = "auto",
+    inline_threshold: int = 0,
+    optimize_images: bool | ImageOptimizer = False,
+    slim: bool = False,
+    precompress_assets: bool = False,
+) -> Tuple[int, int, OrderedDict]:
+    """Convert ``input_file`` into one file per shard in ``output_dir``, plus an index.
+
+    ``output_format`` is ``"html"``, ``"pdf"`` or an image format (``"png"``, ``"jpg"``,
+    ``"webp"``). Shards are one per lesson, or ``words_per_shard`` words each, and are
+    rendered on ``workers`` processes (default: all CPUs). ``shards`` regenerates only
+    the given shard numbers; the index page is always rewritten. ``precompress_assets``
+    also writes a gzipped ``.gz`` copy of each compressible shared asset (such as the
+    stylesheet) of HTML shards, for static serving. The remaining options work as in
+    ``mdx2html``/``mdx2pdf``/``mdx2img``. Returns the totals over the shards
+    rendered, like ``mdx2html``.
+    """
+    suffix = "." + output_format.lower().lstrip(".")
+    if suffix not in SHARD_FORMATS:
+        raise ValueError(f"Unknown shard format: {output_format!r}")
+    if backend not in RENDERERS:
+        raise ValueError(f"Unknown HTML backend: {backend!r} (expected one of {list(RENDERERS)})")
+    output_dir = Path(output_dir)
+
+    plan = plan_shards(WordParser(str(input_file)).parse(), words_per_shard)
+    selected = plan
+    if shards is not None:
+        numbers = set(shards)
+        unknown = numbers - {shard.number for shard in plan}
+        if unknown:
+            raise ValueError(f"No such shards: {sorted(unknown)} (1-{len(plan)})")
+        selected = [shard for shard in plan if shard.number in numbers]
+    if progress_callback:
+        progress_callback(5, f"Rendering {len(selected)} of {len(plan)} shards...")
+
+    wkhtmltopdf = _wkhtmltopdf(wkhtmltopdf_path) if suffix == ".pdf" else None
+    # Build the dictionary index up front; workers would otherwise all try to build it
+    Dictionary(mdx_file).close()
+
+    output_dir.mkdir(parents=True, exist_ok=True)
+    build_dir = output_dir if suffix == ".html" else Path(tempfile.mkdtemp(prefix="mdxscraper-"))
+    settings = _ShardSettings(
+        str(mdx_file),
+        str(build_dir),
+        with_toc=with_toc,
+        h1_style=h1_style,
+        scrap_style=scrap_style,
+        additional_styles=additional_styles,
+        variants=variants,
+        backend=backend,
+        inline_threshold=inline_threshold,
+        # PDF and image shards only use their assets in the build directory
+        precompress_assets=precompress_assets and suffix == ".html",
+        optimize_images=optimize_images,
+        slim=slim,
+        pdf_options=pdf_options,
+        img_options=img_options,
+        wkhtmltopdf=wkhtmltopdf,
+    )
+    jobs = [
+        (
+            shard,
+            str(build_dir / shard.file_name(".html")),
+            None if suffix == ".html" else str(output_dir / shard.file_name(suffix)),
+        )
+        for shard in selected
+    ]
+
+    def report(shard: Shard, done: int) -> None:
+        if progress_callback:
+            progress = 5 + int(done / len(jobs) * 90)
+            progress_callback(progress, f"Shard {done}/{len(jobs)}: {shard.name}")
+
+    try:
+        results = _run_shards(settings, jobs, workers, report)
+    finally:
+        if build_dir != output_dir:
+            shutil.rmtree(build_dir, ignore_errors=True)
+
+    write_index(output_dir / INDEX_FILE, plan, suffix, Path(input_file).stem)
+    if progress_callback:
+        progress_callback(100, "Sharded conversion completed!")
+    return _sum_results(results)
+
+
+def merge_pdfs(parts: Iterable[Tuple[str | Path, Shard]], output_file: str | Path) -> None:
+    """Concatenate part PDFs into ``output_file`` with one bookmark per lesson.
+
+    Each lesson's bookmark points at the page of its heading, found in the part's own
+    outline (wkhtmltopdf outlines ``<h1>`` headings unless ``no-outline`` is set); a
+    lesson missing from the outline is bookmarked at the page of the previous one.
+
+    Links to an anchor in another part (``#lesson_*`` and ``#word_*`` in a table of
+    contents covering several parts) leave wkhtmltopdf as links to the part's HTML
+    file. They are pointed at pages of the merged document instead: a lesson at its
+    heading, a word at the page its lesson starts on.
+    """
+    if pypdf is None:
+        raise RuntimeError("Merging PDF parts requires pypdf: pip install pypdf")
+    writer = pypdf.PdfWriter()
+    targets: dict[str, int] = {}
+    for path, shard in parts:
+        reader = pypdf.PdfReader(str(path))
+        offset = len(writer.pages)
+        writer.append(reader, import_outline=False)
+        for lesson, page in zip(shard.lessons, _lesson_pages(reader, shard.lessons)):
+            for word in lesson["words"]:
+                targets.setdefault("word_" + word, offset + page)
+            # A lesson split across parts is bookmarked where it starts
+            if not lesson.get("continued"):
+                targets.setdefault("lesson_" + lesson["name"], offset + page)
+                writer.add_outline_item(lesson["name"], offset + page)
+    _link_pages(writer, targets)
+    Path(output_file).parent.mkdir(parents=True, exist_ok=True)
+    with open(output_file, "wb") as f:
+        writer.write(f)
+
+
+def _lesson_pages(reader, lessons: list[dict]) -> list[int]:
+    """Page index of each lesson heading in a part, matched in order by outline title.
+
+    A ``continued`` piece has no heading of its own; it starts on the page where the
+    previous lesson does (the first page, as pieces open their part).
+    """
+    headings = []
+    for item in reader.outline:
+        # Nested lists hold the children of the previous entry
+        if not isinstance(item, list):
+            headings.append((item.title, reader.get_destination_page_number(item)))
+    pages = []
+    page = position = 0
+    for lesson in lessons:
+        if not lesson.get("continued"):
+            for i in range(position, len(headings)):
+                if headings[i][0].strip() == lesson["name"].strip():
+                    page, position = headings[i][1], i + 1
+                    break
+        pages.append(page)
+    return pages
+
+
+def _link_pages(writer, targets: dict[str, int]) -> None:
+    """Turn links to ``file#anchor`` with an anchor in ``targets`` into page links."""
+    for page in writer.pages:
+        for annotation in page.get("/Annots") or ():
+            annotation = annotation.get_object()
+            action = annotation.get("/A")
+            if annotation.get("/Subtype") != "/Link" or action is None:
+                continue
+            action = action.get_object()
+            if action.get("/S") != "/URI":
+                continue
+            location, _, anchor = str(action.get("/URI", "")).partition("#")
+            target = targets.get(unquote(anchor))
+            if target is None or location.split(":", 1)[0] not in ("", "file"):
+                continue
+            del annotation["/A"]
+            annotation[NameObject("/Dest")] = ArrayObject(
+                [writer.pages[target].indirect_reference, NameObject("/XYZ")]
+                + [NullObject()] * 3
+            )
+
+
+def mdx2pdf_parallel(
+    mdx_file: str | Path,
+    input_file: str | Path,
+    output_file: str | Path,
+    pdf_options: dict | None,
+    pdf_workers: int,
+    with_toc: bool = True,
+    h1_style: str | None = None,
+    scrap_style: str | None = None,
+    additional_styles: str | None = None,
+    wkhtmltopdf_path: str = "auto",
+    progress_callback: Optional[Callable[[int, str], None]] = None,
+    inline_threshold: int = 0,
+    optimize_images: bool | ImageOptimizer = False,
+    slim: bool | HtmlSlimmer = False,
+) -> Tuple[int, int, OrderedDict]:
+    """Render one PDF on ``pdf_workers`` concurrent wkhtmltopdf processes.
+
+    The lessons are cut into balanced groups of at least ``pdf_workers`` parts and at
+    most :data:`PART_WORDS` words each, so no single wkhtmltopdf process has to lay out
+    the whole document. The parts are merged in order with a bookmark per lesson.
+    With ``with_toc`` the first part starts with the table of contents of the whole
+    document and the other parts have none. A lesson split across parts goes on under
+    a "(continued)" heading without an anchor.
+
+    The parts link their images from a shared asset directory, as ``mdx2pdf`` does
+    with ``external_assets``. Each part is slimmed on its own; an ``HtmlSlimmer``
+    passed as ``slim`` collects the stats of all of them.
+    """
+    if pypdf is None:
+        raise RuntimeError("Parallel PDF rendering requires pypdf: pip install pypdf")
+    wkhtmltopdf = _wkhtmltopdf(wkhtmltopdf_path)
+    lessons = WordParser(str(input_file)).parse()
+    words = sum(len(lesson["words"]) for lesson in lessons)
+    plan = plan_parts(lessons, max(pdf_workers, -(-words // PART_WORDS)))
+    if progress_callback:
+        progress_callback(5, f"Rendering {len(plan)} parts on {pdf_workers} processes...")
+    Dictionary(mdx_file).close()
+
+    build_dir = Path(tempfile.mkdtemp(prefix="mdxscraper-"))
+    settings = _ShardSettings(
+        str(mdx_file),
+        str(build_dir),
+        with_toc=with_toc,
+        h1_style=h1_style,
+        scrap_style=scrap_style,
+        additional_styles=additional_styles,
+        inline_threshold=inline_threshold,
+        optimize_images=optimize_images,
+        slim=bool(slim),
+        pdf_options=pdf_options,
+        wkhtmltopdf=wkhtmltopdf,
+    )
+    jobs = [
+        (
+            shard,
+            str(build_dir / shard.file_name(".html")),
+            str(build_dir / shard.file_name(".pdf")),
+            lessons if shard.number == 1 else [],
+        )
+        for shard in plan
+    ]
+
+    def report(shard: Shard, done: int) -> None:
+        if progress_callback:
+            progress = 5 + int(done / len(jobs) * 85)
+            progress_callback(progress, f"Part {done}/{len(jobs)}: {shard.name}")
+
+    try:
+        results = _run_shards(settings, jobs, pdf_workers, report)
+        if progress_callback:
+            progress_callback(90, "Merging PDF parts...")
+        merge_pdfs(((output, shard) for shard, _, output, _ in jobs), output_file)
+    finally:
+        shutil.rmtree(build_dir, ignore_errors=True)
+
+    if progress_callback:
+        progress_callback(100, "PDF conversion completed!")
+    return _sum_results(results, slim if isinstance(slim, HtmlSlimmer) else None)
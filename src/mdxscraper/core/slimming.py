@@ -0,0 +1,328 @@
+"""Optional slimming of generated HTML before it is rendered to PDF or images.
+
+Dictionary stylesheets cover the whole dictionary, while a word list only uses a
+small part of their selectors, and wkhtmltopdf layout time grows with the number of
+rules it has to match. :class:`HtmlSlimmer` records which tags, classes, ids and
+attributes occur in the document, drops the CSS rules whose selectors cannot match
+any of them, and minifies what is left. Definitions are cleaned up as well: scripts,
+audio, comments, ``display:none`` elements, event handler attributes and
+``sound://``/``entry://`` links are removed, and runs of whitespace are collapsed.
+
+Pruning is conservative: a selector is kept unless one of its compound selectors
+needs a tag, class, id or attribute that the document does not contain.
+"""
+
+from __future__ import annotations
+
+import re
+from dataclasses import dataclass, field
+
+from lxml import html as lxml_html
+
+# Elements that produce no output in a static rendering
+_DROP_TAGS = {"script", "noscript", "audio", "template"}
+# Elements whose whitespace is significant
+_PREFORMATTED = {"pre", "textarea", "style", "script"}
+# Grouping at-rules whose blocks contain style rules to prune
+_GROUPING_RULES = {"media", "supports", "document", "-moz-document", "layer", "container"}
+
+# Markup mdx2html puts around the definitions
+DOCUMENT_TAGS = {"html", "head", "body", "meta", "style", "div", "a", "h1", "br"}
+DOCUMENT_CLASSES = {
+    "left",
+    "main",
+    "right",
+    "lesson",
+    "word",
+    "invalid_word",
+    "scrapedword",
+    "duplicate_entry",
+}
+DOCUMENT_ATTRIBUTES = {"class", "id", "href", "style", "charset"}
+
+_WHITESPACE = re.compile(r"\s+")
+_COMMENT_OR_STRING = re.compile(r"/\*.*?(?:\*/|$)|\"(?:\\.|[^\"\\])*\"|'(?:\\.|[^'\\])*'", re.S)
+_AROUND_PUNCTUATION = re.compile(r"\s*([{};,>])\s*")
+_AFTER_COLON = re.compile(r":\s+")
+_BEFORE_COLON = re.compile(r"\s+:")
+_DISPLAY_NONE = re.compile(r"(?:^|;)\s*display\s*:\s*none\b", re.I)
+_NON_RENDERABLE_HREF = re.compile(r"\s*(?:sound|entry|bword|javascript):", re.I)
+_FUNCTIONAL_PSEUDO = re.compile(r"::?[\w-]+\([^()]*\)")
+_ATTRIBUTE_SELECTOR = re.compile(r"\[\s*([\w-]+)[^\]]*\]")
+_PSEUDO = re.compile(r"::?[\w-]+")
+_COMBINATORS = re.compile(r"[\s>+~]+")
+_TAG = re.compile(r"[A-Za-z][\w-]*")
+_CLASS = re.compile(r"\.([\w-]+)")
+_ID = re.compile(r"#([\w-]+)")
+_AT_RULE = re.compile(r"@([\w-]+)")
+# Strings (skipped whole) and the characters that delimit rules
+_RULE_TOKENS = re.compile(r"\"(?:\\.|[^\"\\])*\"?|'(?:\\.|[^'\\])*'?|[{};]")
+_STYLE_ELEMENT = re.compile(r"(<style[^>]*>)(.*?)(</style>)", re.S | re.I)
+
+
+@dataclass
+class CssUsage:
+    """Tags, classes, ids and attribute names present in a document."""
+
+    tags: set[str] = field(default_factory=lambda: set(DOCUMENT_TAGS))
+    classes: set[str] = field(default_factory=lambda: set(DOCUMENT_CLASSES))
+    ids: set[str] = field(default_factory=set)
+    attributes: set[str] = field(default_factory=lambda: set(DOCUMENT_ATTRIBUTES))
+
+    def add(self, element) -> None:
+        """Record one lxml element (not its children)."""
+        self.tags.add(element.tag.lower())
+        self.classes.update(element.get("class", "").split())
+        if element.get("id"):
+            self.ids.add(element.get("id"))
+        self.attributes.update(name.lower() for name in element.attrib)
+
+    def may_match(self, selector: str) -> bool:
+        """False only if ``selector`` certainly matches nothing in the document."""
+        if "\\" in selector or "|" in selector:
+            return True
+        # Arguments of :not(), :is(), :nth-child() ... do not have to be present
+        previous = None
+        while previous != selector:
+            previous, selector = selector, _FUNCTIONAL_PSEUDO.sub("", selector)
+        for name in _ATTRIBUTE_SELECTOR.findall(selector):
+            if name.lower() not in self.attributes:
+                return False
+        selector = _PSEUDO.sub("", _ATTRIBUTE_SELECTOR.sub("", selector))
+        for compound in _COMBINATORS.split(selector):
+            tag = _TAG.match(compound)
+            if tag and tag.group().lower() not in self.tags:
+                return False
+            if any(name not in self.classes for name in _CLASS.findall(compound)):
+                return False
+            if any(name not in self.ids for name in _ID.findall(compound)):
+                return False
+        return True
+
+
+@dataclass
+class SlimStats:
+    """Sizes in bytes before and after slimming."""
+
+    html_in: int = 0
+    html_out: int = 0
+    css_in: int = 0
+    css_out: int = 0
+    elements_removed: int = 0
+
+    @property
+    def bytes_saved(self) -> int:
+        return self.html_in - self.html_out + self.css_in - self.css_out
+
+    def add(self, other: "SlimStats") -> None:
+        """Accumulate the sizes of ``other``, e.g. those of another part of a document."""
+        for name in ("html_in", "html_out", "css_in", "css_out", "elements_removed"):
+            setattr(self, name, getattr(self, name) + getattr(other, name))
+
+
+def minify_css(css: str) -> str:
+    """Remove comments and redundant whitespace, leaving strings untouched."""
+    out = []
+    pos = 0
+    for match in _COMMENT_OR_STRING.finditer(css):
+        out.append(_minify_gap(css[pos : match.start()]))
+        if not match.group().startswith("/*"):
+            out.append(match.group())
+        pos = match.end()
+    out.append(_minify_gap(css[pos:]))
+    return "".join(out).strip()
+
+
+def _minify_gap(text: str) -> str:
+    text = _WHITESPACE.sub(" ", text)
+    text = _AFTER_COLON.sub(":", _AROUND_PUNCTUATION.sub(r"\1", text))
+    return text.replace(";}", "}")
+
+
+def minify_declarations(style: str) -> str:
+    """Minify an inline ``style`` attribute."""
+    return _BEFORE_COLON.sub(":", minify_css(style)).strip(" ;")
+
+
+def prune_css(css: str, usage: CssUsage) -> str:
+    """Drop the style rules of ``css`` whose selectors all fail ``usage.may_match``."""
+    out = []
+    for prelude, block in _split_rules(_strip_comments(css)):
+        if block is None:
+            out.append(prelude + ";")
+        elif prelude.startswith("@"):
+            at_rule = _AT_RULE.match(prelude)
+            if at_rule and at_rule.group(1).lower() in _GROUPING_RULES:
+                inner = prune_css(block, usage)
+                if inner.strip():
+                    out.append(f"{prelude}{{{inner}}}")
+            else:
+                # @font-face, @keyframes, @page ... are kept whole
+                out.append(f"{prelude}{{{block}}}")
+        else:
+            selectors = [s for s in _split_selectors(prelude) if usage.may_match(s)]
+            if selectors:
+                out.append(f"{','.join(selectors)}{{{block}}}")
+    return "\n".join(out)
+
+
+def _strip_comments(css: str) -> str:
+    return _COMMENT_OR_STRING.sub(lambda m: "" if m.group().startswith("/*") else m.group(), css)
+
+
+def _split_rules(css: str) -> list[tuple[str, str | None]]:
+    """Top-level ``(prelude, block)`` pairs; ``block`` is None for ``@import ...;``."""
+    rules = []
+    depth = 0
+    start = 0
+    prelude = None
+    for match in _RULE_TOKENS.finditer(css):
+        token = match.group()
+        i = match.start()
+        if token == "{":
+            if depth == 0:
+                prelude = css[start:i]
+                start = i + 1
+            depth += 1
+        elif token == "}":
+            if depth == 0:
+                # Stray closing brace; browsers skip it as well
+                start = i + 1
+            else:
+                depth -= 1
+                if depth == 0:
+                    rules.append((prelude.strip(), css[start:i]))
+                    start = i + 1
+        elif token == ";" and depth == 0:
+            statement = css[start:i].strip()
+            if statement:
+                rules.append((statement, None))
+            start = i + 1
+    if depth > 0:
+        # Unterminated block at the end of the stylesheet
+        rules.append((prelude.strip(), css[start:] + "}" * (depth - 1)))
+    return rules
+
+
+def _split_selectors(prelude: str) -> list[str]:
+    selectors = []
+    depth = 0
+    start = 0
+    quote = None
+    for i, char in enumerate(prelude):
+        if quote:
+            if char == quote:
+                quote = None
+        elif char in "\"'":
+            quote = char
+        elif char in "([":
+            depth += 1
+        elif char in ")]":
+            depth -= 1
+        elif char == "," and depth == 0:
+            selectors.append(prelude[start:i].strip())
+            start = i + 1
+    selectors.append(prelude[start:].strip())
+    return [s for s in selectors if s]
+
+
+def _collapse(text: str | None) -> str | None:
+    return _WHITESPACE.sub(" ", text) if text else text
+
+
+class HtmlSlimmer:
+    """Slim the fragments of one document, then prune its stylesheet.
+
+    Fragments must all pass through :meth:`slim_html` before :meth:`slim_head` (or
+    :meth:`slim_css`) prunes the stylesheet, so the usage they record is complete.
+    :meth:`slim_document` does both for a document that is already assembled.
+    Sizes before and after are accumulated in :attr:`stats`.
+    """
+
+    def __init__(self):
+        self.usage = CssUsage()
+        self.stats = SlimStats()
+
+    def slim_html(self, html: str) -> str:
+        """Slim a fragment of body markup and record its selectors."""
+        if not html or not html.strip():
+            return html
+        root = lxml_html.fragment_fromstring(html, create_parent="div")
+        self._slim_children(root)
+        root.text = _collapse(root.text)
+        # Drop the <div> ... </div> of the wrapper
+        slimmed = lxml_html.tostring(root, encoding="unicode")[5:-6]
+        self.stats.html_in += len(html.encode("utf-8"))
+        self.stats.html_out += len(slimmed.encode("utf-8"))
+        return slimmed
+
+    def slim_css(self, css: str) -> str:
+        """Prune ``css`` against the selectors recorded so far, and minify it."""
+        slimmed = minify_css(prune_css(css, self.usage))
+        self.stats.css_in += len(css.encode("utf-8"))
+        self.stats.css_out += len(slimmed.encode("utf-8"))
+        return slimmed
+
+    def slim_head(self, head: str) -> str:
+        """Slim every ``<style>`` element of a serialized ``<head>``."""
+        return _STYLE_ELEMENT.sub(
+            lambda m: m.group(1) + self.slim_css(m.group(2)) + m.group(3), head
+        )
+
+    def slim_document(self, html: str | bytes) -> str:
+        """Slim a complete HTML document."""
+        html_in = len(html) if isinstance(html, bytes) else len(html.encode("utf-8"))
+        document = lxml_html.document_fromstring(html)
+        body = document.find("body")
+        if body is not None:
+            self.usage.add(body)
+            self._slim_children(body)
+            body.text = _collapse(body.text)
+        css_in, css_out = self.stats.css_in, self.stats.css_out
+        for style in document.iter("style"):
+            if style.text:
+                style.text = self.slim_css(style.text)
+        slimmed = lxml_html.tostring(document, encoding="unicode")
+        # Stylesheets are counted in css_in/css_out, the rest of the document here
+        self.stats.html_in += html_in - (self.stats.css_in - css_in)
+        self.stats.html_out += len(slimmed.encode("utf-8")) - (self.stats.css_out - css_out)
+        return slimmed
+
+    def _slim_children(self, parent, preformatted: bool = False) -> None:
+        for element in list(parent):
+            if not preformatted:
+                element.tail = _collapse(element.tail)
+            if not isinstance(element.tag, str):
+                # Comments and processing instructions
+                element.drop_tree()
+                continue
+            tag = element.tag.lower()
+            style = element.get("style")
+            if (
+                tag in _DROP_TAGS
+                or element.get("hidden") is not None
+                or (style and _DISPLAY_NONE.search(style))
+            ):
+                element.drop_tree()
+                self.stats.elements_removed += 1
+                continue
+
+            for name in [name for name in element.attrib if name.lower().startswith("on")]:
+                del element.attrib[name]
+            if style is not None:
+                style = minify_declarations(style)
+                if style:
+                    element.set("style", style)
+                else:
+                    del element.attrib["style"]
+            href = element.get("href")
+            if tag == "a" and href is not None and _NON_RENDERABLE_HREF.match(href):
+                del element.attrib["href"]
+            if tag == "style" and element.text:
+                element.text = minify_css(element.text)
+
+            element_preformatted = preformatted or tag in _PREFORMATTED
+            if not element_preformatted:
+                element.text = _collapse(element.text)
+            self.usage.add(element)
+            self._slim_children(element, element_preformatted)
@@ -0,0 +1,120 @@
+"""Resolution of dictionary stylesheets stored in the MDD.
+
+Definitions link their stylesheet by a relative name (``<link rel="stylesheet"
+href="oald.css">``), while MDD keys are backslash paths such as ``\\oald.css``.
+Matching the name with ``get_mdd_keys("*" + name)`` is a leading-wildcard ``LIKE``
+that scans the whole MDD index, so :func:`resolve_stylesheet` first tries the exact
+and normalized keys through the ``key_text`` index and only scans when they all miss.
+
+Resolved, decoded stylesheets are cached per dictionary, keyed by a fingerprint of
+the MDD files (path, size, modification time), so later conversions with the same
+dictionary skip the MDD entirely. Stylesheets that are not found are cached too.
+"""
+
+from __future__ import annotations
+
+import codecs
+import os
+import re
+import threading
+from collections import OrderedDict
+from urllib.parse import unquote, urlsplit
+
+from mdxscraper.mdict.mdict_query import IndexBuilder
+
+# Resolved stylesheets kept across conversions
+CACHE_ENTRIES = 64
+
+_cache: OrderedDict[tuple, str | None] = OrderedDict()
+_cache_lock = threading.Lock()
+
+_CHARSET_RULE = re.compile(rb'^@charset\s+["\']([\w.:-]+)["\']\s*;')
+
+
+def mdd_keys(name: str) -> list[str]:
+    """Candidate MDD keys for a stylesheet ``href``, most specific first."""
+    path = unquote(urlsplit(name).path).replace("/", "\\")
+    parts = [part for part in path.split("\\") if part not in ("", ".")]
+    if not parts:
+        return []
+    keys = ["\\" + "\\".join(parts), "\\" + parts[-1]]
+    keys += [key.lower() for key in keys]
+    return list(dict.fromkeys(keys))
+
+
+def decode_css(data: bytes) -> str:
+    """Decode a stylesheet, honouring a byte order mark or ``@charset`` rule."""
+    for bom, encoding in (
+        (codecs.BOM_UTF8, "utf-8-sig"),
+        (codecs.BOM_UTF16_LE, "utf-16"),
+        (codecs.BOM_UTF16_BE, "utf-16"),
+    ):
+        if data.startswith(bom):
+            return data.decode(encoding, errors="replace")
+    match = _CHARSET_RULE.match(data)
+    if match:
+        try:
+            return data.decode(match.group(1).decode("ascii"), errors="replace")
+        except LookupError:
+            pass
+    return data.decode("utf-8", errors="replace")
+
+
+def resolve_stylesheet(dictionary: IndexBuilder, name: str) -> str | None:
+    """Return the decoded stylesheet ``name`` from the dictionary's MDD, or None."""
+    fingerprint = _fingerprint(dictionary)
+    key = (fingerprint, name)
+    if fingerprint is not None:
+        with _cache_lock:
+            if key in _cache:
+                _cache.move_to_end(key)
+                return _cache[key]
+
+    css = _lookup(dictionary, name)
+    if fingerprint is not None:
+        with _cache_lock:
+            _cache[key] = css
+            while len(_cache) > CACHE_ENTRIES:
+                _cache.popitem(last=False)
+    return css
+
+
+def clear_cache() -> None:
+    """Forget all resolved stylesheets."""
+    with _cache_lock:
+        _cache.clear()
+
+
+def _lookup(dictionary: IndexBuilder, name: str) -> str | None:
+    if not getattr(dictionary, "_mdd_db", None):
+        return None
+    keys = mdd_keys(name)
+    found = dictionary.mdd_lookup_many(keys)
+    for key in keys:
+        if key in found:
+            return decode_css(found[key])
+
+    # Stylesheet kept in a subdirectory of the MDD but linked by its bare name
+    if keys:
+        basename = keys[0][keys[0].rfind("\\") :]
+        matches = dictionary.get_mdd_keys("*" + basename)
+        if matches:
+            records = dictionary.mdd_lookup(matches[0])
+            if records:
+                return decode_css(records[0])
+    return None
+
+
+def _fingerprint(dictionary: IndexBuilder) -> tuple | None:
+    """Identity of the dictionary's MDD contents; None if it cannot be determined."""
+    paths = [getattr(dictionary, "_mdd_file", None), getattr(dictionary, "_mdd_db", None)]
+    fingerprint = []
+    for path in paths:
+        if not path:
+            return None
+        try:
+            stat = os.stat(path)
+        except (OSError, TypeError, ValueError):
+            return None
+        fingerprint.append((os.path.abspath(path), stat.st_size, stat.st_mtime_ns))
+    return tuple(fingerprint)
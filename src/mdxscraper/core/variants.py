@@ -0,0 +1,413 @@
+"""Variant index for morphological fallback lookups.
+
+``Dictionary`` falls back from an exact match to case-insensitive and hyphen-stripped
+matches, one SQL query each, and still misses forms such as "running", "geese" or
+"color" vs "colour". The variant index is built once from the dictionary's own
+headwords: every headword is expanded by pluggable rule sets into the forms a user
+might type, and each form is stored against the headword's ``MDX_INDEX`` row. A
+fallback is then a single indexed probe.
+
+The table lives in the dictionary's ``.mdx.db`` next to ``MDX_INDEX`` and is rebuilt
+whenever the configured rule sets or their tables change (or the vendored index is
+rebuilt). The default rule sets are only built when a variant index is first used.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import sqlite3
+from functools import lru_cache
+from typing import Iterable, Iterator, Sequence
+
+try:
+    import opencc  # type: ignore
+except ImportError:
+    opencc = None
+
+# Rank of the built-in normalisations; rule sets are ranked after them in list order
+RANK_CASEFOLD = 0
+RANK_HYPHENLESS = 1
+RANK_RULES = 2
+
+
+class VariantRules:
+    """Base class for variant rule sets.
+
+    Subclasses generate the alternative forms a headword may be looked up by. Forms
+    are lowercased by the index, so rules need not worry about case.
+    """
+
+    name = "base"
+
+    def variants(self, key: str) -> Iterable[str]:
+        raise NotImplementedError
+
+    def tables(self) -> object:
+        """The data the variants depend on besides the code, e.g. lookup tables."""
+        return None
+
+    @property
+    def signature(self) -> str:
+        """Name and a hash of :meth:`tables`; the index is rebuilt when it changes."""
+        digest = hashlib.blake2b(repr(self.tables()).encode("utf-8"), digest_size=8)
+        return f"{self.name}:{digest.hexdigest()}"
+
+
+_VOWELS = set("aeiou")
+
+# Irregular forms keyed by lemma
+_IRREGULAR = {
+    "be": ("am", "is", "are", "was", "were", "been", "being"),
+    "have": ("has", "had", "having"),
+    "do": ("does", "did", "done", "doing"),
+    "go": ("goes", "went", "gone", "going"),
+    "run": ("ran",),
+    "see": ("saw", "seen"),
+    "take": ("took", "taken"),
+    "give": ("gave", "given"),
+    "eat": ("ate", "eaten"),
+    "write": ("wrote", "written"),
+    "speak": ("spoke", "spoken"),
+    "break": ("broke", "broken"),
+    "choose": ("chose", "chosen"),
+    "drive": ("drove", "driven"),
+    "ride": ("rode", "ridden"),
+    "rise": ("rose", "risen"),
+    "fall": ("fell", "fallen"),
+    "forget": ("forgot", "forgotten"),
+    "get": ("got", "gotten"),
+    "begin": ("began", "begun"),
+    "drink": ("drank", "drunk"),
+    "sing": ("sang", "sung"),
+    "swim": ("swam", "swum"),
+    "ring": ("rang", "rung"),
+    "come": ("came",),
+    "become": ("became",),
+    "know": ("knew", "known"),
+    "grow": ("grew", "grown"),
+    "throw": ("threw", "thrown"),
+    "fly": ("flew", "flown", "flies"),
+    "draw": ("drew", "drawn"),
+    "wear": ("wore", "worn"),
+    "tear": ("tore", "torn"),
+    "bring": ("brought",),
+    "buy": ("bought",),
+    "think": ("thought",),
+    "teach": ("taught",),
+    "catch": ("caught",),
+    "fight": ("fought",),
+    "seek": ("sought",),
+    "make": ("made",),
+    "say": ("said",),
+    "pay": ("paid",),
+    "lay": ("laid",),
+    "find": ("found",),
+    "keep": ("kept",),
+    "sleep": ("slept",),
+    "feel": ("felt",),
+    "leave": ("left",),
+    "meet": ("met",),
+    "send": ("sent",),
+    "spend": ("spent",),
+    "build": ("built",),
+    "lose": ("lost",),
+    "hold": ("held",),
+    "stand": ("stood",),
+    "understand": ("understood",),
+    "sell": ("sold",),
+    "tell": ("told",),
+    "hear": ("heard",),
+    "lead": ("led",),
+    "sit": ("sat",),
+    "win": ("won",),
+    "good": ("better", "best"),
+    "bad": ("worse", "worst"),
+    "far": ("farther", "further", "farthest", "furthest"),
+    "man": ("men",),
+    "woman": ("women",),
+    "child": ("children",),
+    "person": ("people",),
+    "foot": ("feet",),
+    "tooth": ("teeth",),
+    "goose": ("geese",),
+    "mouse": ("mice",),
+    "louse": ("lice",),
+    "ox": ("oxen",),
+    "criterion": ("criteria",),
+    "phenomenon": ("phenomena",),
+    "analysis": ("analyses",),
+    "crisis": ("crises",),
+    "thesis": ("theses",),
+    "cactus": ("cacti",),
+    "fungus": ("fungi",),
+    "datum": ("data",),
+    "medium": ("media",),
+}
+
+# British -> American suffix rewrites; applied in both directions
+_SPELLING_SUFFIXES = (
+    ("isation", "ization"),
+    ("ise", "ize"),
+    ("ised", "ized"),
+    ("ising", "izing"),
+    ("yse", "yze"),
+    ("our", "or"),
+    ("tre", "ter"),
+    ("bre", "ber"),
+    ("ogue", "og"),
+    ("ence", "ense"),
+    ("lled", "led"),
+    ("lling", "ling"),
+    ("ller", "ler"),
+)
+
+
+class EnglishInflectionRules(VariantRules):
+    """Regular and irregular English inflections plus British/American spellings."""
+
+    name = "en-inflection"
+
+    def __init__(self, irregular: dict[str, Sequence[str]] | None = None):
+        self.irregular = dict(_IRREGULAR)
+        if irregular:
+            self.irregular.update(irregular)
+
+    def tables(self) -> object:
+        return sorted((lemma, tuple(forms)) for lemma, forms in self.irregular.items())
+
+    def variants(self, key: str) -> Iterator[str]:
+        word = key.lower()
+        if not word.isascii() or not word.replace("-", "").replace(" ", "").isalpha():
+            return
+        yield from self.irregular.get(word, ())
+        yield from self.inflect(word)
+        for spelling in self.spellings(word):
+            yield spelling
+            yield from self.inflect(spelling)
+
+    @staticmethod
+    def _doubles_final(word: str) -> bool:
+        # Consonant-vowel-consonant endings may double: stop -> stopped, prefer -> preferred;
+        # "qu" counts as a consonant (quit -> quitting)
+        return (
+            len(word) >= 3
+            and word[-1] not in _VOWELS
+            and word[-1] not in "wxy"
+            and word[-2] in _VOWELS
+            and (word[-3] not in _VOWELS or word[-4:-2] == "qu")
+        )
+
+    @classmethod
+    def _stems(cls, word: str) -> list[str]:
+        """Stems for -ed / -ing / -er / -est of a word not ending in e or consonant + y."""
+        if not cls._doubles_final(word):
+            return [word]
+        doubled = word + word[-1]
+        vowel_groups = sum(
+            1 for i, c in enumerate(word) if c in _VOWELS and (i == 0 or word[i - 1] not in _VOWELS)
+        )
+        if vowel_groups == 1:
+            return [doubled]
+        # Doubling follows the stress (preferred, but opened), and British spelling
+        # doubles a final l regardless (travelled, traveled): keep both candidates
+        return [doubled, word]
+
+    def inflect(self, word: str) -> Iterator[str]:
+        if " " in word or len(word) < 2:
+            return
+        # -s / -es / -ies / -ves
+        if word.endswith(("s", "x", "z", "ch", "sh")):
+            yield word + "es"
+        elif word[-1] == "y" and word[-2] not in _VOWELS:
+            yield word[:-1] + "ies"
+        else:
+            yield word + "s"
+        if word.endswith("fe"):
+            yield word[:-2] + "ves"
+        elif word.endswith("f"):
+            yield word[:-1] + "ves"
+        # -ed / -ing / -er / -est
+        if word[-1] == "e":
+            stem = word[:-1]
+            yield word + "d"
+            yield stem + "ing"
+            yield word + "r"
+            yield word + "st"
+        elif word[-1] == "y" and word[-2] not in _VOWELS:
+            stem = word[:-1]
+            yield stem + "ied"
+            yield word + "ing"
+            yield stem + "ier"
+            yield stem + "iest"
+        else:
+            for stem in self._stems(word):
+                yield stem + "ed"
+                yield stem + "ing"
+                yield stem + "er"
+                yield stem + "est"
+
+    @staticmethod
+    def spellings(word: str) -> Iterator[str]:
+        for british, american in _SPELLING_SUFFIXES:
+            if word.endswith(british) and len(word) > len(british) + 1:
+                yield word[: -len(british)] + american
+            elif word.endswith(american) and len(word) > len(american) + 1:
+                yield word[: -len(american)] + british
+
+
+# Common simplified/traditional character pairs; OpenCC is used instead when installed
+_SIMPLIFIED = (
+    "这说时会过对国来学发经动还见长东车马门问间题听书读写语认识让请谢现电话机开关页业"
+    "乐习买卖钱铁钟头风飞饭鱼鸟鸡龙爱边变别从单当点队儿个后华画欢几记节进觉课们两难鸭"
+    "样药应园远运众专转总错岁万无为与义议亚严网线红绿蓝黄图团体条厅历丽灯汉号视贝齐气"
+    "区热声师实术树双岛导报帮笔毕标宾补层产场厂尘虫处传础辞达带断尔丰"
+)
+_TRADITIONAL = (
+    "這說時會過對國來學發經動還見長東車馬門問間題聽書讀寫語認識讓請謝現電話機開關頁業"
+    "樂習買賣錢鐵鐘頭風飛飯魚鳥雞龍愛邊變別從單當點隊兒個後華畫歡幾記節進覺課們兩難鴨"
+    "樣藥應園遠運眾專轉總錯歲萬無為與義議亞嚴網線紅綠藍黃圖團體條廳歷麗燈漢號視貝齊氣"
+    "區熱聲師實術樹雙島導報幫筆畢標賓補層產場廠塵蟲處傳礎辭達帶斷爾豐"
+)
+
+
+class ChineseVariantRules(VariantRules):
+    """Map headwords between Simplified and Traditional Chinese."""
+
+    name = "zh-hans-hant"
+
+    def __init__(self, mapping: dict[str, str] | None = None):
+        pairs = dict(zip(_SIMPLIFIED, _TRADITIONAL))
+        if mapping:
+            pairs.update(mapping)
+        self._pairs = pairs
+        self._to_traditional = str.maketrans(pairs)
+        self._to_simplified = str.maketrans({t: s for s, t in pairs.items()})
+        self._opencc = (
+            (opencc.OpenCC("s2t"), opencc.OpenCC("t2s")) if opencc is not None else None
+        )
+
+    def tables(self) -> object:
+        return sorted(self._pairs.items()), self._opencc is not None
+
+    def variants(self, key: str) -> Iterator[str]:
+        if not any("一" <= ch <= "鿿" for ch in key):
+            return
+        if self._opencc is not None:
+            yield self._opencc[0].convert(key)
+            yield self._opencc[1].convert(key)
+        yield key.translate(self._to_traditional)
+        yield key.translate(self._to_simplified)
+
+
+@lru_cache(maxsize=None)
+def default_rules() -> tuple[VariantRules, ...]:
+    """The built-in rule sets, built on first use (OpenCC converters are costly)."""
+    return (EnglishInflectionRules(), ChineseVariantRules())
+
+
+class VariantIndex:
+    """Variant -> headword-row table stored in an ``IndexBuilder``'s ``.mdx.db``."""
+
+    TABLE = "VARIANT_INDEX"
+
+    def __init__(self, impl, rules: Sequence[VariantRules] | None = None, rebuild=False):
+        self._impl = impl
+        self.rules = tuple(default_rules() if rules is None else rules)
+        self.signature = ",".join(rule.signature for rule in self.rules)
+        if rebuild or not self.is_current():
+            self.build()
+
+    @property
+    def db(self) -> str:
+        return self._impl._mdx_db
+
+    def is_current(self) -> bool:
+        conn = sqlite3.connect(self.db)
+        try:
+            row = conn.execute(
+                "SELECT name FROM sqlite_master WHERE type='table' AND name=?", (self.TABLE,)
+            ).fetchone()
+            if not row:
+                return False
+            row = conn.execute("SELECT value FROM META WHERE key = 'variant_rules'").fetchone()
+            return bool(row) and row[0] == self.signature
+        finally:
+            conn.close()
+
+    def _rows(self, keys: Iterable[tuple[int, str]]) -> Iterator[tuple[str, int, int]]:
+        for row_id, key in keys:
+            folded = key.lower()
+            yield folded, row_id, RANK_CASEFOLD
+            if "-" in folded:
+                yield folded.replace("-", ""), row_id, RANK_HYPHENLESS
+            for rank, rule in enumerate(self.rules, start=RANK_RULES):
+                for variant in set(rule.variants(key)):
+                    variant = variant.lower()
+                    if variant and variant != folded:
+                        yield variant, row_id, rank
+
+    def build(self) -> int:
+        """(Re)build the table from all headwords; returns the number of variants."""
+        conn = sqlite3.connect(self.db)
+        try:
+            conn.execute(f"DROP TABLE IF EXISTS {self.TABLE}")
+            conn.execute(
+                f"""CREATE TABLE {self.TABLE}
+                   (variant text not null,
+                    row_id integer not null,
+                    rank integer not null
+                    )"""
+            )
+            keys = conn.execute("SELECT rowid, key_text FROM MDX_INDEX").fetchall()
+            conn.executemany(f"INSERT INTO {self.TABLE} VALUES (?,?,?)", self._rows(keys))
+            conn.execute(f"CREATE INDEX variant_form_index ON {self.TABLE} (variant, rank)")
+            conn.execute("DELETE FROM META WHERE key = 'variant_rules'")
+            conn.execute("INSERT INTO META VALUES ('variant_rules', ?)", (self.signature,))
+            conn.commit()
+            return conn.execute(f"SELECT count(*) FROM {self.TABLE}").fetchone()[0]
+        finally:
+            conn.close()
+
+    def _best_match(self, word: str) -> tuple | None:
+        """The MDX_INDEX row ``word`` resolves to, with one indexed probe."""
+        folded = word.lower()
+        candidates = (folded, folded.replace("-", ""))
+        sql = (
+            f"SELECT m.* FROM {self.TABLE} v JOIN MDX_INDEX m ON m.rowid = v.row_id "
+            "WHERE v.variant IN (?, ?) ORDER BY v.rank, v.row_id LIMIT 1"
+        )
+        conn = sqlite3.connect(self.db)
+        try:
+            return conn.execute(sql, candidates).fetchone()
+        finally:
+            conn.close()
+
+    def lookup_key(self, word: str) -> str | None:
+        """The headword ``word`` resolves to, or None."""
+        result = self._best_match(word)
+        return result[0] if result else None
+
+    def lookup_indexes(self, word: str) -> list[dict]:
+        """Resolve ``word`` to the best matching headword row with one indexed probe."""
+        result = self._best_match(word)
+        if not result:
+            return []
+        return [
+            {
+                "file_name": result[1],
+                "file_pos": result[2],
+                "compressed_size": result[3],
+                "decompressed_size": result[4],
+                "record_block_type": result[5],
+                "record_start": result[6],
+                "record_end": result[7],
+                "offset": result[8],
+            }
+        ]
+
+    def lookup(self, word: str) -> list[str]:
+        indexes = self.lookup_indexes(word)
+        if not indexes:
+            return []
+        with open(self._impl._mdx_file, "rb") as mdx_file:
+            return [self._impl.get_mdx_by_index(mdx_file, index) for index in indexes]
@@ -17,6 +17,7 @@ class CommandPanel(QWidget):
     importRequested = Signal()
     exportRequested = Signal()
     scrapeRequested = Signal()
+    previewRequested = Signal()
 
     def __init__(self, parent: QWidget | None = None):
         super().__init__(parent)
@@ -62,6 +63,13 @@ class CommandPanel(QWidget):
         self.btn_scrape.setObjectName("scrape-button")
         self.btn_scrape.clicked.connect(self.scrapeRequested.emit)
         row_scrape.addWidget(self.btn_scrape)
+        row_scrape.addSpacing(12)
+        # Quick low-resolution PDF of the first lessons, for tuning presets
+        self.btn_preview = QPushButton("Preview PDF", self)
+        self.btn_preview.setFixedWidth(120)
+        self.btn_preview.setFixedHeight(45)
+        self.btn_preview.clicked.connect(self.previewRequested.emit)
+        row_scrape.addWidget(self.btn_preview)
         row_scrape.addItem(QSpacerItem(20, 10, QSizePolicy.Expanding, QSizePolicy.Minimum))
         root.addLayout(row_scrape)
 
@@ -89,5 +97,11 @@ class CommandPanel(QWidget):
     def setEnabled(self, enabled: bool) -> None:  # noqa: A003, N802
         super().setEnabled(enabled)
         # Keep buttons consistent when disabling panel
-        for b in (self.btn_restore, self.btn_import, self.btn_export, self.btn_scrape):
+        for b in (
+            self.btn_restore,
+            self.btn_import,
+            self.btn_export,
+            self.btn_scrape,
+            self.btn_preview,
+        ):
             b.setEnabled(enabled)
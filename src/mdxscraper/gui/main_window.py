@@ -176,6 +176,7 @@ class MainWindow(QMainWindow):
         self.command_panel.importRequested.connect(self.import_config)
         self.command_panel.exportRequested.connect(self.export_config)
         self.command_panel.scrapeRequested.connect(self.run_conversion)
+        self.command_panel.previewRequested.connect(self.run_preview)
 
         # Create log panel (bottom)
         self.log_panel = LogPanel(self)
@@ -349,7 +350,7 @@ class MainWindow(QMainWindow):
             self,
             "Select output file",
             str(Path(start_dir) / (default_filename + ".html" if default_filename else "")),
-            "HTML files (*.html);;PDF files (*.pdf);;JPG files (*.jpg);;PNG files (*.png);;WEBP files (*.webp);;All files (*.*)",
+            "HTML files (*.html);;Compressed HTML files (*.html.gz);;PDF files (*.pdf);;JPG files (*.jpg);;PNG files (*.png);;WEBP files (*.webp);;EPUB files (*.epub);;Anki packages (*.apkg);;JSON Lines files (*.jsonl);;All files (*.*)",
         )
         if file:
             self.settings.set_output_file(file)
@@ -373,6 +374,9 @@ class MainWindow(QMainWindow):
     def run_conversion(self):
         self.convc.run(self)
 
+    def run_preview(self):
+        self.convc.run(self, preview=True)
+
     def on_run_finished(self, message: str):
         self.convc.on_finished(self, message)
 
@@ -521,7 +525,10 @@ class MainWindow(QMainWindow):
             if current_output:
                 out_path = Path(current_output)
                 new_base = Path(text).stem
-                new_name = new_base + out_path.suffix
+                suffix = out_path.suffix
+                if suffix.lower() == ".gz":
+                    suffix = Path(out_path.stem).suffix + suffix
+                new_name = new_base + suffix
                 new_output_path = out_path.with_name(new_name)
                 self.settings.set_output_file(str(new_output_path))
                 # Reflect change in UI
@@ -3,8 +3,12 @@
 Exports the vendored mdict-query API used by this project.
 """
 
+from .block_cache import BlockCache
 from .mdict_query import IndexBuilder
+from .record_decoder import RecordDecoder
 
 __all__ = [
+    "BlockCache",
     "IndexBuilder",
+    "RecordDecoder",
 ]
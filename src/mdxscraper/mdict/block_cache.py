@@ -0,0 +1,61 @@
+"""Bounded LRU cache of decompressed MDX/MDD record blocks.
+
+Many headwords share one record block, and every vendored lookup re-reads and
+re-decompresses it. ``BlockCache`` keeps recently used blocks in memory up to a
+byte budget; it is thread-safe so concurrent lookups (``AsyncDictionary``, hot-word
+preloading) can share it.
+"""
+
+from __future__ import annotations
+
+import threading
+from collections import OrderedDict
+from typing import Hashable
+
+
+class BlockCache:
+    def __init__(self, max_bytes: int = 64 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._blocks: OrderedDict[Hashable, bytes] = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._blocks)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._blocks
+
+    @property
+    def size(self) -> int:
+        return self._size
+
+    def get(self, key: Hashable) -> bytes | None:
+        with self._lock:
+            block = self._blocks.get(key)
+            if block is None:
+                self.misses += 1
+                return None
+            self._blocks.move_to_end(key)
+            self.hits += 1
+            return block
+
+    def put(self, key: Hashable, block: bytes) -> None:
+        if len(block) > self.max_bytes:
+            return
+        with self._lock:
+            previous = self._blocks.pop(key, None)
+            if previous is not None:
+                self._size -= len(previous)
+            self._blocks[key] = block
+            self._size += len(block)
+            while self._size > self.max_bytes:
+                _, evicted = self._blocks.popitem(last=False)
+                self._size -= len(evicted)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._blocks.clear()
+            self._size = 0
@@ -3,11 +3,16 @@ from __future__ import annotations
 """mdict-query wrapper.
 
 Adds the vendored mdict-query directory to sys.path and imports the upstream
-module unchanged, so we can sync vendor code without edits.
+module unchanged, so we can sync vendor code without edits. Project-specific
+fast paths live in the ``IndexBuilder`` subclass below instead of the vendor tree.
 """
 
+import sqlite3
 import sys
+import zlib
+from contextlib import closing
 from pathlib import Path
+from typing import Iterable
 
 # Ensure vendored mdict-query is importable as top-level module names
 _vendor_dir = Path(__file__).resolve().parent / "vendor"
@@ -16,7 +21,123 @@ if str(_vendor_dir) not in sys.path:
 
 import mdict_query as _mdict_query  # type: ignore
 
-# Re-export stable API
-IndexBuilder = _mdict_query.IndexBuilder  # noqa: N816 (preserve original name)
+from mdxscraper.mdict.block_cache import BlockCache
+from mdxscraper.mdict.record_decoder import RecordDecoder
 
-__all__ = ["IndexBuilder"]
+
+# Keys per IN (...) query; stays below SQLite's historical 999 parameter limit
+_SQL_BATCH = 500
+
+
+class IndexBuilder(_mdict_query.IndexBuilder):  # noqa: N801 (preserve original name)
+    """Vendored ``IndexBuilder`` with a single-pass record decoding path."""
+
+    _record_decoder: RecordDecoder | None = None
+    _block_cache: BlockCache | None = None
+
+    @property
+    def record_decoder(self) -> RecordDecoder:
+        # Built lazily: encoding and stylesheet are only known once __init__ has
+        # read (or rebuilt) the META table.
+        if self._record_decoder is None:
+            self._record_decoder = RecordDecoder(self._encoding, self._stylesheet)
+        return self._record_decoder
+
+    @property
+    def block_cache(self) -> BlockCache:
+        if self._block_cache is None:
+            self._block_cache = BlockCache()
+        return self._block_cache
+
+    @staticmethod
+    def decompress_block(record_block_compressed: bytes, index: dict) -> bytes:
+        """Decompress one record block (type 0: raw, 1: LZO, 2: zlib)."""
+        record_block_type = index["record_block_type"]
+        if record_block_type == 0:
+            return record_block_compressed[8:]
+        if record_block_type == 1:
+            if _mdict_query.lzo is None:
+                raise RuntimeError("LZO compression is not supported")
+            return _mdict_query.lzo.decompress(
+                record_block_compressed[8:],
+                initSize=index["decompressed_size"],
+                blockSize=1308672,
+            )
+        if record_block_type == 2:
+            return zlib.decompress(record_block_compressed[8:])
+        raise ValueError(f"Unknown record block type: {record_block_type}")
+
+    def read_block(self, fmdx, index: dict) -> bytes:
+        # Only real files are cached; the key must identify the block across opens
+        file_name = getattr(fmdx, "name", None)
+        key = (file_name, index["file_pos"]) if isinstance(file_name, str) else None
+        if key is not None:
+            block = self.block_cache.get(key)
+            if block is not None:
+                return block
+        fmdx.seek(index["file_pos"])
+        block = self.decompress_block(fmdx.read(index["compressed_size"]), index)
+        if key is not None:
+            self.block_cache.put(key, block)
+        return block
+
+    def read_record(self, fmdx, index: dict) -> memoryview:
+        """Return the record bytes as a zero-copy view into its decompressed block."""
+        start = index["record_start"] - index["offset"]
+        end = index["record_end"] - index["offset"]
+        return memoryview(self.read_block(fmdx, index))[start:end]
+
+    def get_mdx_by_index(self, fmdx, index):
+        return self.record_decoder.decode(self.read_record(fmdx, index))
+
+    def get_mdd_by_index(self, fmdx, index):
+        return bytes(self.read_record(fmdx, index))
+
+    def mdd_lookup_many(self, keywords: Iterable[str]) -> dict[str, bytes]:
+        """Resolve many MDD keys at once; returns ``{key: data}`` for the keys found.
+
+        Keys are matched with set-based ``IN`` queries, records are grouped by MDD
+        volume and record block, and each block is read and decompressed once. Like
+        ``mdd_lookup(key)[0]``, the first indexed record wins for duplicate keys.
+        """
+        keys = list(dict.fromkeys(keywords))
+        if not keys or not getattr(self, "_mdd_db", None):
+            return {}
+
+        rows = {}
+        with closing(sqlite3.connect(self._mdd_db)) as conn:
+            for i in range(0, len(keys), _SQL_BATCH):
+                batch = keys[i : i + _SQL_BATCH]
+                sql = (
+                    "SELECT rowid, * FROM MDX_INDEX WHERE key_text IN "
+                    f"({', '.join('?' * len(batch))}) ORDER BY rowid"
+                )
+                for row in conn.execute(sql, batch):
+                    rows.setdefault(row[1], row)
+
+        # {volume: {block file_pos: [(key, index), ...]}}
+        volumes: dict[str, dict[int, list]] = {}
+        for key, row in rows.items():
+            index = {
+                "file_name": row[2],
+                "file_pos": row[3],
+                "compressed_size": row[4],
+                "decompressed_size": row[5],
+                "record_block_type": row[6],
+                "record_start": row[7],
+                "record_end": row[8],
+                "offset": row[9],
+            }
+            volumes.setdefault(index["file_name"], {}).setdefault(index["file_pos"], [])
+            volumes[index["file_name"]][index["file_pos"]].append((key, index))
+
+        results = {}
+        for volume, blocks in volumes.items():
+            with open(volume, "rb") as fmdd:
+                for file_pos in sorted(blocks):
+                    for key, index in blocks[file_pos]:
+                        results[key] = self.get_mdd_by_index(fmdd, index)
+        return results
+
+
+__all__ = ["BlockCache", "IndexBuilder", "RecordDecoder"]
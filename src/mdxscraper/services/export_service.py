@@ -1,11 +1,14 @@
 from __future__ import annotations
 
 from pathlib import Path
-from typing import Any, Callable, Dict, List, Optional, Tuple
+from typing import TYPE_CHECKING, Any, Callable, Dict, List, Optional, Tuple
 
 from mdxscraper.services.presets_service import PresetsService
 from mdxscraper.services.settings_service import SettingsService
 
+if TYPE_CHECKING:
+    from mdxscraper.core.preview import PreviewProfile
+
 
 class ExportService:
     def __init__(self, settings: SettingsService, presets: PresetsService):
@@ -25,6 +28,17 @@ class ExportService:
         base.update(parsed)
         return base
 
+    def build_preview_profile(self) -> "PreviewProfile":
+        from mdxscraper.core.preview import PreviewProfile
+
+        cm = self.settings.cm
+        return PreviewProfile(
+            lessons=int(cm.get("preview.lessons", 2) or 0) or None,
+            sample_words=int(cm.get("preview.sample_words", 0) or 0) or None,
+            placeholder_images=bool(cm.get("preview.placeholder_images", True)),
+            dpi=int(cm.get("preview.dpi", 72) or 72),
+        )
+
     def build_image_options(self, output_suffix: str) -> Dict[str, Any]:
         cm = self.settings.cm
         opts: Dict[str, Any] = {}
@@ -62,9 +76,12 @@ class ExportService:
         from mdxscraper.core.converter import mdx2html, mdx2img, mdx2pdf
 
         suffix = output_path.suffix.lower()
+        if suffix == ".gz":
+            # Compressed as written; the inner extension picks the format (.html.gz)
+            suffix = Path(output_path.stem).suffix.lower() + suffix
         h1_style, scrap_style, additional_styles = self.parse_css_styles(css_text)
 
-        if suffix == ".html":
+        if suffix in (".html", ".html.gz"):
             with_toc = settings_service.get("basic.with_toc", True)
             return mdx2html(
                 mdx_file,
@@ -106,5 +123,106 @@ class ExportService:
                 additional_styles=additional_styles,
                 progress_callback=progress_callback,
             )
+        elif suffix == ".epub":
+            from mdxscraper.core.epub import mdx2epub
+
+            with_toc = settings_service.get("basic.with_toc", True)
+            return mdx2epub(
+                mdx_file,
+                input_file,
+                output_path,
+                with_toc=with_toc,
+                h1_style=h1_style,
+                scrap_style=scrap_style,
+                additional_styles=additional_styles,
+                progress_callback=progress_callback,
+            )
+        elif suffix == ".apkg":
+            from mdxscraper.core.anki import mdx2apkg
+
+            return mdx2apkg(
+                mdx_file,
+                input_file,
+                output_path,
+                scrap_style=scrap_style,
+                additional_styles=additional_styles,
+                progress_callback=progress_callback,
+            )
+        elif suffix in (".jsonl", ".jsonl.gz"):
+            from mdxscraper.core.jsonl import mdx2jsonl
+
+            return mdx2jsonl(
+                mdx_file,
+                input_file,
+                output_path,
+                with_text=True,
+                with_images=True,
+                progress_callback=progress_callback,
+            )
         else:
             raise RuntimeError(f"Unsupported output extension: {suffix}")
+
+    def execute_preview(
+        self,
+        input_file: Path,
+        mdx_file: Path,
+        output_path: Path,
+        pdf_text: str = "",
+        css_text: str = "",
+        settings_service: Optional[SettingsService] = None,
+        progress_callback: Optional[Callable[[int, str], None]] = None,
+    ) -> Tuple[int, int, List[str]]:
+        """Render a quick low-resolution PDF of part of the word list, for tuning presets."""
+        from mdxscraper.core.preview import mdx2pdf_preview
+
+        h1_style, scrap_style, additional_styles = self.parse_css_styles(css_text)
+        return mdx2pdf_preview(
+            mdx_file,
+            input_file,
+            output_path,
+            self.build_pdf_options(pdf_text),
+            profile=self.build_preview_profile(),
+            progress_callback=progress_callback,
+            with_toc=settings_service.get("basic.with_toc", True),
+            h1_style=h1_style,
+            scrap_style=scrap_style,
+            additional_styles=additional_styles,
+            wkhtmltopdf_path=settings_service.get("advanced.wkhtmltopdf_path", "auto"),
+        )
+
+    def execute_multi_export(
+        self,
+        input_file: Path,
+        mdx_file: Path,
+        output_paths: List[Path],
+        pdf_text: str = "",
+        css_text: str = "",
+        settings_service: Optional[SettingsService] = None,
+        progress_callback: Optional[Callable[[int, str], None]] = None,
+    ) -> Tuple[int, int, List[str]]:
+        """Export to several formats at once, looking every word up only once."""
+        from mdxscraper.core.converter import OUTPUT_FORMATS, mdx2outputs
+
+        suffixes = {path.suffix.lower() for path in output_paths}
+        unsupported = sorted(suffixes - set(OUTPUT_FORMATS))
+        if unsupported:
+            raise RuntimeError(f"Unsupported output extension: {unsupported[0]}")
+        h1_style, scrap_style, additional_styles = self.parse_css_styles(css_text)
+        img_options = {
+            suffix: self.build_image_options(suffix)
+            for suffix in suffixes
+            if suffix not in (".html", ".pdf")
+        }
+        return mdx2outputs(
+            mdx_file,
+            input_file,
+            output_paths,
+            pdf_options=self.build_pdf_options(pdf_text) if ".pdf" in suffixes else None,
+            img_options=img_options,
+            with_toc=settings_service.get("basic.with_toc", True),
+            h1_style=h1_style,
+            scrap_style=scrap_style,
+            additional_styles=additional_styles,
+            wkhtmltopdf_path=settings_service.get("advanced.wkhtmltopdf_path", "auto"),
+            progress_callback=progress_callback,
+        )
@@ -3,12 +3,19 @@ from __future__ import annotations
 import json
 import os
 import platform
+import shutil
 import subprocess
+import threading
 from pathlib import Path
 
 # In-memory cache for current session only (portable-friendly)
 _session_cache = {"detected_path": None, "is_valid": None, "message": None}
 
+# Successful validations: resolved executable -> {"size", "mtime_ns", "message"}
+_validation_cache: dict[str, dict] = {}
+_validation_cache_file: Path | None = None
+_validation_lock = threading.Lock()
+
 
 def detect_wkhtmltopdf_path() -> str:
     """Detect wkhtmltopdf path"""
@@ -80,6 +87,82 @@ def validate_wkhtmltopdf_path(path: str) -> tuple[bool, str]:
         return False, f"Error: {str(e)}"
 
 
+def _executable_key(path: str) -> tuple[str, int, int] | None:
+    """(resolved path, size, mtime_ns) of an executable, or None if it can't be found."""
+    resolved = path if Path(path).is_absolute() else shutil.which(path)
+    if not resolved:
+        return None
+    try:
+        resolved = os.path.realpath(resolved)
+        st = os.stat(resolved)
+    except OSError:
+        return None
+    return resolved, st.st_size, st.st_mtime_ns
+
+
+def set_validation_cache_file(cache_file: str | Path | None) -> None:
+    """Persist validations in ``cache_file`` (JSON) across processes; None keeps them in memory."""
+    global _validation_cache_file
+    with _validation_lock:
+        _validation_cache_file = Path(cache_file) if cache_file else None
+        _validation_cache.clear()
+        if _validation_cache_file is not None:
+            try:
+                _validation_cache.update(
+                    json.loads(_validation_cache_file.read_text(encoding="utf-8"))
+                )
+            except (OSError, ValueError):
+                pass
+
+
+def _save_validation_cache() -> None:
+    if _validation_cache_file is None:
+        return
+    try:
+        _validation_cache_file.parent.mkdir(parents=True, exist_ok=True)
+        temp = _validation_cache_file.with_suffix(".tmp")
+        temp.write_text(json.dumps(_validation_cache, indent=2), encoding="utf-8")
+        os.replace(temp, _validation_cache_file)
+    except OSError:
+        pass
+
+
+def validate_executable_cached(path: str) -> tuple[bool, str]:
+    """
+    Like validate_wkhtmltopdf_path, but remembers successful results.
+
+    Results are keyed by the resolved executable and its size and mtime, so replacing
+    or upgrading the binary validates it again. Works for wkhtmltopdf and
+    wkhtmltoimage alike. Failures are not cached, so a fixed installation is picked
+    up on the next call.
+
+    Returns:
+        tuple[bool, str]: (is_valid, error_message)
+    """
+    key = _executable_key(path) if path else None
+    if key is None:
+        return validate_wkhtmltopdf_path(path)
+    resolved, size, mtime_ns = key
+    with _validation_lock:
+        entry = _validation_cache.get(resolved)
+    if entry and entry.get("size") == size and entry.get("mtime_ns") == mtime_ns:
+        return True, entry.get("message", "")
+
+    is_valid, message = validate_wkhtmltopdf_path(resolved)
+    if is_valid:
+        with _validation_lock:
+            _validation_cache[resolved] = {"size": size, "mtime_ns": mtime_ns, "message": message}
+            _save_validation_cache()
+    return is_valid, message
+
+
+def clear_validation_cache() -> None:
+    """Forget all cached validations, including the persisted ones."""
+    with _validation_lock:
+        _validation_cache.clear()
+        _save_validation_cache()
+
+
 def get_auto_detect_status() -> tuple[bool, str, str]:
     """
     Get the status of auto-detection with session caching.
@@ -114,15 +197,17 @@ def clear_auto_detect_cache():
 
 
 def force_auto_detect():
-    """Force a fresh auto-detection, ignoring session cache"""
+    """Force a fresh auto-detection, ignoring session and validation caches"""
     clear_auto_detect_cache()
+    clear_validation_cache()
     return get_auto_detect_status()
 
 
 def validate_wkhtmltopdf_for_pdf_conversion(config_path: str) -> tuple[bool, str]:
     """
     Validate wkhtmltopdf path specifically for PDF conversion.
-    This is called at runtime when actually converting to PDF.
+    This is called at runtime when actually converting to PDF, so successful
+    validations are cached (see validate_executable_cached).
 
     Returns:
         tuple[bool, str]: (is_valid, error_message)
@@ -138,7 +223,7 @@ def validate_wkhtmltopdf_for_pdf_conversion(config_path: str) -> tuple[bool, str
         config_path = detected_path
 
     # Validate the path
-    is_valid, message = validate_wkhtmltopdf_path(config_path)
+    is_valid, message = validate_executable_cached(config_path)
     if not is_valid:
         return (
             False,
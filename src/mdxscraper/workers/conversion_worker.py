@@ -5,6 +5,7 @@ from pathlib import Path
 from PySide6.QtCore import QThread, Signal
 
 from mdxscraper.config.config_manager import ConfigManager
+from mdxscraper.core.compression import is_gzip_path
 from mdxscraper.services.export_service import ExportService
 from mdxscraper.services.presets_service import PresetsService
 from mdxscraper.services.settings_service import SettingsService
@@ -17,13 +18,20 @@ class ConversionWorker(QThread):
     progress_sig = Signal(int, str)  # progress percentage, status message
 
     def __init__(
-        self, project_root: Path, cm: ConfigManager, pdf_text: str = "", css_text: str = ""
+        self,
+        project_root: Path,
+        cm: ConfigManager,
+        pdf_text: str = "",
+        css_text: str = "",
+        preview: bool = False,
     ):
         super().__init__()
         self.project_root = project_root
         self.cm = cm
         self._pdf_text = pdf_text
         self._css_text = css_text
+        # Quick PDF of part of the word list next to the output, for tuning presets
+        self._preview = preview
         # Services for export pipeline
         self._settings_service = SettingsService(project_root, cm)
         self._presets_service = PresetsService(project_root)
@@ -68,6 +76,12 @@ class ConversionWorker(QThread):
                 output_name = output_path.name
                 output_path = output_dir / (current_time + "_" + output_name)
 
+            if self._preview:
+                stem = output_path.stem
+                if is_gzip_path(output_path):
+                    stem = Path(stem).stem
+                output_path = output_path.with_name(stem + "-preview.pdf")
+
             suffix = output_path.suffix.lower()
             self.log_sig.emit(f"🔄 Running conversion: {mdx_file.name} -> {output_path.name}")
             self.progress_sig.emit(10, "Starting conversion...")
@@ -78,7 +92,12 @@ class ConversionWorker(QThread):
                 scaled_progress = 10 + int((progress / 100) * 80)
                 self.progress_sig.emit(scaled_progress, message)
 
-            found, not_found, invalid_words = self._export_service.execute_export(
+            export = (
+                self._export_service.execute_preview
+                if self._preview
+                else self._export_service.execute_export
+            )
+            found, not_found, invalid_words = export(
                 input_file,
                 mdx_file,
                 output_path,
@@ -90,7 +109,7 @@ class ConversionWorker(QThread):
 
             # Backup input file to output directory if enabled
             self.progress_sig.emit(90, "Processing backup files...")
-            if self.cm.get_backup_input():
+            if self.cm.get_backup_input() and not self._preview:
                 try:
                     src = Path(input_file)
                     backup_dir = output_path.parent
@@ -118,7 +137,7 @@ class ConversionWorker(QThread):
 
             # Write invalid words file if enabled and there are any invalid words
             self.progress_sig.emit(95, "Saving invalid words...")
-            if self.cm.get_save_invalid_words() and invalid_words:
+            if self.cm.get_save_invalid_words() and invalid_words and not self._preview:
                 from mdxscraper.utils.file_utils import write_invalid_words_file
 
                 # Filename pattern: [timestamp_]input_name_invalid.txt
@@ -0,0 +1,206 @@
+"""Tests for the asyncio lookup API"""
+
+import asyncio
+import shutil
+import threading
+import time
+from pathlib import Path
+from unittest.mock import Mock, patch
+
+import pytest
+
+from mdxscraper.core.aio import AsyncDictionary, amdx2html
+from mdxscraper.core.converter import mdx2html
+
+SAMPLE_DIR = Path(__file__).resolve().parents[2] / "data" / "mdict" / "Learn These Words First"
+
+
+def _mock_dictionary(definitions=None, delay=0.0):
+    mock_dictionary = Mock()
+    definitions = definitions or {}
+
+    def lookup(word):
+        if delay:
+            time.sleep(delay)
+        return definitions.get(word, "")
+
+    mock_dictionary.lookup_html.side_effect = lookup
+    mock_dictionary.present_words.side_effect = lambda words: set(words) & set(definitions)
+    return mock_dictionary
+
+
+def test_lookup_html_runs_off_loop_thread():
+    """Lookups should run on executor threads, not the event loop thread"""
+    threads = []
+    mock_dictionary = Mock()
+    mock_dictionary.lookup_html.side_effect = lambda w: threads.append(
+        threading.current_thread().name
+    ) or "<p>ok</p>"
+
+    async def run():
+        async with AsyncDictionary("test.mdx", max_workers=2) as adict:
+            return await adict.lookup_html("word")
+
+    with patch("mdxscraper.core.aio.Dictionary", return_value=mock_dictionary):
+        result = asyncio.run(run())
+
+    assert result == "<p>ok</p>"
+    assert threads and threads[0].startswith("mdx-lookup")
+
+
+def test_lookup_many_preserves_order():
+    """lookup_many should return results in input order"""
+    mock_dictionary = _mock_dictionary({"a": "<p>a</p>", "c": "<p>c</p>"})
+
+    async def run():
+        async with AsyncDictionary("test.mdx", max_workers=3) as adict:
+            return await adict.lookup_many(["a", "b", "c"])
+
+    with patch("mdxscraper.core.aio.Dictionary", return_value=mock_dictionary):
+        assert asyncio.run(run()) == ["<p>a</p>", "", "<p>c</p>"]
+
+
+def test_executor_backpressure():
+    """No more than max_pending jobs should be in flight at once"""
+    active = 0
+    peak = 0
+    lock = threading.Lock()
+
+    def lookup(word):
+        nonlocal active, peak
+        with lock:
+            active += 1
+            peak = max(peak, active)
+        time.sleep(0.005)
+        with lock:
+            active -= 1
+        return word
+
+    mock_dictionary = Mock()
+    mock_dictionary.lookup_html.side_effect = lookup
+
+    async def run():
+        async with AsyncDictionary("test.mdx", max_workers=8, max_pending=3) as adict:
+            return await asyncio.gather(*(adict.lookup_html(str(i)) for i in range(30)))
+
+    with patch("mdxscraper.core.aio.Dictionary", return_value=mock_dictionary):
+        results = asyncio.run(run())
+
+    assert results == [str(i) for i in range(30)]
+    assert peak <= 3
+
+
+def test_async_key_iteration_pages():
+    """async for should walk keys page by page"""
+    pages = {0: [(1, "alpha"), (2, "beta")], 2: [(3, "gamma")], 3: []}
+    mock_dictionary = Mock()
+    mock_dictionary.key_page.side_effect = lambda query, after, limit: pages[after]
+
+    async def run():
+        async with AsyncDictionary("test.mdx") as adict:
+            return [key async for key in adict]
+
+    with patch("mdxscraper.core.aio.Dictionary", return_value=mock_dictionary):
+        assert asyncio.run(run()) == ["alpha", "beta", "gamma"]
+
+
+def test_run_requires_open():
+    """Using the wrapper before opening should fail clearly"""
+    adict = AsyncDictionary("test.mdx")
+    with pytest.raises(RuntimeError, match="not open"):
+        asyncio.run(adict.lookup_html("word"))
+
+
+def test_invalid_max_workers():
+    with pytest.raises(ValueError):
+        AsyncDictionary("test.mdx", max_workers=0)
+
+
+def test_amdx2html_counts_and_progress(tmp_path):
+    """amdx2html should return the same stats as mdx2html"""
+    lessons = [{"name": "Lesson 1", "words": ["word1", "missing", "word1"]}]
+    mock_dictionary = _mock_dictionary({"word1": "<html><body>definition</body></html>"})
+    progress = Mock()
+
+    with patch("mdxscraper.core.aio.Dictionary", return_value=mock_dictionary):
+        with patch("mdxscraper.core.aio.WordParser") as mock_parser:
+            with patch("mdxscraper.core.converter.merge_css", side_effect=lambda s, *a: s):
+                with patch("mdxscraper.core.converter.embed_images", side_effect=lambda s, *a, **kw: s):
+                    mock_parser.return_value.parse.return_value = lessons
+                    found, not_found, invalid_words = asyncio.run(
+                        amdx2html(
+                            Path("test.mdx"),
+                            Path("test.txt"),
+                            tmp_path / "out" / "output.html",
+                            progress_callback=progress,
+                        )
+                    )
+
+    assert (found, not_found) == (2, 1)
+    assert invalid_words == {"Lesson 1": ["missing"]}
+    # Duplicated words are only looked up once
+    assert mock_dictionary.lookup_html.call_count == 2
+    percents = [call[0][0] for call in progress.call_args_list]
+    assert percents == sorted(percents)
+    assert percents[-1] == 100
+    assert "definition" in (tmp_path / "out" / "output.html").read_text(encoding="utf-8")
+
+
+def test_amdx2html_streams_long_lists_in_order(tmp_path):
+    """More words than the lookup window still come out in input order"""
+    words = [f"w{n % 40}" for n in range(200)]
+    lessons = [{"name": "L1", "words": words[:120]}, {"name": "L2", "words": words[120:]}]
+    definitions = {w: f"<p>def {w}</p>" for w in words if w != "w7"}
+    mock_dictionary = _mock_dictionary(definitions, delay=0.001)
+    output = tmp_path / "output.html"
+
+    with patch("mdxscraper.core.aio.Dictionary", return_value=mock_dictionary):
+        with patch("mdxscraper.core.aio.WordParser") as mock_parser:
+            mock_parser.return_value.parse.return_value = lessons
+            found, not_found, _ = asyncio.run(
+                amdx2html("test.mdx", "test.txt", output, max_workers=2, max_pending=3)
+            )
+
+    assert (found, not_found) == (195, 5)
+    assert mock_dictionary.lookup_html.call_count == 40
+    html = output.read_text(encoding="utf-8")
+    body = html[html.index('<div class="right">') :]
+    positions = [body.index(f'id="word_{w}"') for w in dict.fromkeys(words)]
+    assert positions == sorted(positions)
+    assert 'class="word invalid_word" href="#word_w7"' in html
+
+
+def test_amdx2html_lookup_failure_removes_output(tmp_path):
+    lessons = [{"name": "L1", "words": [f"w{n}" for n in range(50)]}]
+    mock_dictionary = _mock_dictionary({f"w{n}": "<p>x</p>" for n in range(50)})
+    mock_dictionary.lookup_html.side_effect = lambda w: (
+        (_ for _ in ()).throw(OSError("broken mdx")) if w == "w30" else "<p>x</p>"
+    )
+    output = tmp_path / "output.html"
+
+    with patch("mdxscraper.core.aio.Dictionary", return_value=mock_dictionary):
+        with patch("mdxscraper.core.aio.WordParser") as mock_parser:
+            mock_parser.return_value.parse.return_value = lessons
+            with pytest.raises(OSError, match="broken mdx"):
+                asyncio.run(amdx2html("test.mdx", "test.txt", output, max_pending=2))
+
+    assert not output.exists()
+
+
+def test_amdx2html_embeds_images_like_mdx2html(tmp_path):
+    """MDD images are inlined as in the synchronous converter"""
+    mdx = SAMPLE_DIR / "Learn These Words First.mdx"
+    if not mdx.exists():
+        pytest.skip("sample dictionary not available")
+    for name in ("Learn These Words First.mdx", "Learn These Words First.mdd", "ltwf.css"):
+        shutil.copy(SAMPLE_DIR / name, tmp_path / name)
+    words = tmp_path / "words.txt"
+    words.write_text("# Lesson 1\n1-01\n1-02\nxyzzy\n# Lesson 2\n1-01\n", encoding="utf-8")
+
+    sync_stats = mdx2html(tmp_path / mdx.name, words, tmp_path / "sync.html")
+    async_stats = asyncio.run(amdx2html(tmp_path / mdx.name, words, tmp_path / "async.html"))
+
+    assert async_stats == sync_stats
+    html = (tmp_path / "async.html").read_text(encoding="utf-8")
+    assert 'src="data:image/' in html
+    assert html == (tmp_path / "sync.html").read_text(encoding="utf-8")
@@ -0,0 +1,129 @@
+"""Tests for Anki package output (mdx2apkg)"""
+
+import json
+import re
+import shutil
+import sqlite3
+import zipfile
+from pathlib import Path
+from unittest.mock import patch
+
+import pytest
+
+from mdxscraper.core.anki import mdx2apkg
+
+SAMPLE_DIR = Path(__file__).resolve().parents[2] / "data" / "mdict" / "Learn These Words First"
+
+
+@pytest.fixture
+def sample_mdx(tmp_path):
+    mdx = SAMPLE_DIR / "Learn These Words First.mdx"
+    if not mdx.exists():
+        pytest.skip("sample dictionary not available")
+    for name in ("Learn These Words First.mdx", "Learn These Words First.mdd", "ltwf.css"):
+        shutil.copy(SAMPLE_DIR / name, tmp_path / name)
+    return tmp_path / mdx.name
+
+
+@pytest.fixture
+def word_list(tmp_path):
+    words = tmp_path / "words.txt"
+    # 1-01 appears twice: its images must be stored once
+    words.write_text("# Lesson 1\n1-01\n1-02\nxyzzy\n# Lesson 2\n1-03\n1-01\n", encoding="utf-8")
+    return words
+
+
+def _collection(package, tmp_path):
+    path = tmp_path / "collection.anki2"
+    path.write_bytes(package.read("collection.anki2"))
+    return sqlite3.connect(path)
+
+
+def test_mdx2apkg_writes_collection(tmp_path, sample_mdx, word_list):
+    output = tmp_path / "out" / "words.apkg"
+    progress = []
+    found, not_found, invalid = mdx2apkg(
+        sample_mdx, word_list, output, progress_callback=lambda p, m: progress.append(p)
+    )
+
+    assert (found, not_found) == (4, 1)
+    assert invalid == {"Lesson 1": ["xyzzy"]}
+    assert progress[-1] == 100
+
+    with zipfile.ZipFile(output) as package:
+        media = json.loads(package.read("media"))
+        assert sorted(package.namelist()) == sorted(["collection.anki2", "media", *media])
+        names = list(media.values())
+        assert names and len(names) == len(set(names))
+        assert all(re.fullmatch(r"[0-9a-f]{32}\.\w+", name) for name in names)
+        conn = _collection(package, tmp_path)
+
+    ver, models, decks = conn.execute("SELECT ver, models, decks FROM col").fetchone()
+    assert ver == 11
+    (model,) = json.loads(models).values()
+    assert [f["name"] for f in model["flds"]] == ["Word", "Definition"]
+    assert model["css"].count(".card") >= 1 and len(model["css"]) > 100
+    deck_names = {d["id"]: d["name"] for d in json.loads(decks).values()}
+    assert {"words", "words::Lesson 1", "words::Lesson 2"} <= set(deck_names.values())
+
+    rows = conn.execute(
+        "SELECT n.sfld, n.flds, n.tags, n.guid, c.did FROM notes n JOIN cards c ON c.nid = n.id "
+        "ORDER BY c.due"
+    ).fetchall()
+    assert [r[0] for r in rows] == ["1-01", "1-02", "1-03", "1-01"]
+    assert [deck_names[r[4]] for r in rows] == ["words::Lesson 1"] * 2 + ["words::Lesson 2"] * 2
+    assert rows[0][2] == " Lesson_1 "
+    assert len({r[3] for r in rows}) == 4
+    # Definitions reference the media by file name; the CSS lives in the note type
+    definition = rows[0][1].split("\x1f")[1]
+    assert "data:image" not in definition and "<style" not in definition
+    for src in re.findall(r'src="([^"]+)"', definition):
+        assert src in names
+    assert conn.execute("PRAGMA integrity_check").fetchone() == ("ok",)
+    conn.close()
+
+
+def test_mdx2apkg_keeps_additional_styles_without_dictionary_css(
+    tmp_path, sample_mdx, word_list
+):
+    output = tmp_path / "words.apkg"
+    extra = ".scrapedword { color: #123456 }"
+    with patch("mdxscraper.core.renderer.get_css", side_effect=LookupError("gone")):
+        mdx2apkg(sample_mdx, word_list, output, additional_styles=extra)
+
+    with zipfile.ZipFile(output) as package:
+        conn = _collection(package, tmp_path)
+    (model,) = json.loads(conn.execute("SELECT models FROM col").fetchone()[0]).values()
+    conn.close()
+    assert model["css"].endswith(extra)
+
+
+def test_mdx2apkg_ids_are_stable_across_runs(tmp_path, sample_mdx, word_list):
+    guids = []
+    for name in ("a.apkg", "b.apkg"):
+        mdx2apkg(sample_mdx, word_list, tmp_path / name, deck_name="Deck")
+        with zipfile.ZipFile(tmp_path / name) as package:
+            conn = _collection(package, tmp_path)
+        guids.append(conn.execute("SELECT guid, mid FROM notes ORDER BY guid").fetchall())
+        conn.close()
+    assert guids[0] == guids[1]
+
+
+def test_mdx2apkg_inserts_in_batches(tmp_path, sample_mdx, word_list):
+    output = tmp_path / "words.apkg"
+    with patch("mdxscraper.core.anki.BATCH_SIZE", 1):
+        found, _, _ = mdx2apkg(sample_mdx, word_list, output)
+
+    with zipfile.ZipFile(output) as package:
+        conn = _collection(package, tmp_path)
+    assert conn.execute("SELECT count(*) FROM notes").fetchone() == (found,)
+    assert conn.execute("SELECT count(*) FROM cards").fetchone() == (found,)
+    conn.close()
+
+
+def test_mdx2apkg_removes_partial_package_on_error(tmp_path, sample_mdx, word_list):
+    output = tmp_path / "words.apkg"
+    with patch("mdxscraper.core.anki.Dictionary.lookup_html", side_effect=RuntimeError("broken")):
+        with pytest.raises(RuntimeError, match="broken"):
+            mdx2apkg(sample_mdx, word_list, output)
+    assert not output.exists()
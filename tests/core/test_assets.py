@@ -0,0 +1,88 @@
+"""Tests for external asset storage"""
+
+import gzip
+import pickle
+from unittest.mock import Mock
+
+from bs4 import BeautifulSoup
+
+from mdxscraper.core.assets import AssetStore, data_uri
+from mdxscraper.core.converter import _allow_asset_dir
+from mdxscraper.core.renderer import embed_images
+
+
+def test_asset_store_writes_each_resource_once(tmp_path):
+    store = AssetStore(tmp_path / "assets")
+
+    first = store.url("img\\a.PNG", b"image-bytes")
+    second = store.url("other/b.png", b"image-bytes")
+    third = store.url("c.jpg", b"different")
+
+    assert first == second
+    assert first.startswith("assets/") and first.endswith(".png")
+    assert third.endswith(".jpg") and third != first
+    assert sorted(p.name for p in (tmp_path / "assets").iterdir()) == sorted(
+        [first.split("/")[1], third.split("/")[1]]
+    )
+    assert (tmp_path / first).read_bytes() == b"image-bytes"
+    assert store.files_written == 2
+    assert store.bytes_written == len(b"image-bytes") + len(b"different")
+
+
+def test_asset_store_inlines_small_resources(tmp_path):
+    store = AssetStore(tmp_path / "assets", inline_threshold=10)
+
+    assert store.url("icon.png", b"tiny") == data_uri("icon.png", b"tiny")
+    assert store.url("big.png", b"x" * 10).startswith("assets/")
+    assert not any(p.suffix == ".tmp" for p in (tmp_path / "assets").iterdir())
+
+
+def test_asset_store_for_output_and_pickle(tmp_path):
+    store = AssetStore.for_output(tmp_path / "out" / "doc.html", inline_threshold=5)
+    assert store.directory == tmp_path / "out" / "assets"
+
+    clone = pickle.loads(pickle.dumps(store))
+    assert clone.directory == store.directory
+    assert clone.inline_threshold == 5
+    assert clone.url("a.gif", b"gif-data").startswith("assets/")
+
+
+def test_embed_images_links_assets(tmp_path):
+    soup = BeautifulSoup('<img src="a.png"/><img src="a.png"/><img src="none.png"/>', "lxml")
+    dictionary = Mock()
+    dictionary._mdd_db = True
+    dictionary.mdd_lookup.side_effect = lambda key: [b"png-data"] if key == "\\a.png" else []
+    store = AssetStore(tmp_path / "assets")
+
+    embed_images(soup, dictionary, assets=store)
+
+    srcs = [img["src"] for img in soup.find_all("img")]
+    assert srcs[0] == srcs[1] == store.url("a.png", b"png-data")
+    assert srcs[2] == "none.png"
+    assert store.files_written == 1
+
+
+def test_allow_asset_dir_options():
+    assert _allow_asset_dir({"page-size": "A4"}, None) == {"page-size": "A4"}
+    options = {"page-size": "A4"}
+    allowed = _allow_asset_dir(options, "/tmp/assets-dir")
+    assert allowed == {
+        "page-size": "A4",
+        "enable-local-file-access": "",
+        "allow": "/tmp/assets-dir",
+    }
+    # The caller's options are left untouched
+    assert options == {"page-size": "A4"}
+
+
+def test_asset_store_precompresses_compressible_assets(tmp_path):
+    store = AssetStore(tmp_path / "assets", precompress=True)
+    svg = b'<svg xmlns="http://www.w3.org/2000/svg">' + b"<rect/>" * 100 + b"</svg>"
+
+    svg_url = store.url("icon.svg", svg)
+    png_url = store.url("a.png", b"\x89PNG-bytes" * 100)
+
+    assert gzip.decompress((tmp_path / (svg_url + ".gz")).read_bytes()) == svg
+    assert not (tmp_path / (png_url + ".gz")).exists()
+    assert store.files_written == 2
+    assert pickle.loads(pickle.dumps(store)).precompress
@@ -0,0 +1,156 @@
+"""Tests for batch flashcard images (mdx2cards)"""
+
+import shutil
+import threading
+import time
+from pathlib import Path
+from unittest.mock import patch
+
+import pytest
+
+from mdxscraper.core import cards
+from mdxscraper.core.cards import mdx2cards, plan_cards
+
+SAMPLE_DIR = Path(__file__).resolve().parents[2] / "data" / "mdict" / "Learn These Words First"
+
+LESSONS = [
+    {"name": "L1", "words": ["a", "b"]},
+    {"name": "L2", "words": []},
+    {"name": "L3", "words": ["c"]},
+]
+
+
+@pytest.fixture
+def sample_mdx(tmp_path):
+    mdx = SAMPLE_DIR / "Learn These Words First.mdx"
+    if not mdx.exists():
+        pytest.skip("sample dictionary not available")
+    for name in ("Learn These Words First.mdx", "Learn These Words First.mdd", "ltwf.css"):
+        shutil.copy(SAMPLE_DIR / name, tmp_path / name)
+    return tmp_path / mdx.name
+
+
+@pytest.fixture
+def word_list(tmp_path):
+    words = tmp_path / "words.txt"
+    words.write_text(
+        "# Lesson 1\n1-01\n1-02\nxyzzy\n# Lesson 2\n1-03\n1-04\n# Lesson 3\n1-05\n",
+        encoding="utf-8",
+    )
+    return words
+
+
+@pytest.fixture
+def renders():
+    """Patch wkhtmltoimage, recording the HTML of every card and the peak concurrency."""
+    state = {"pages": {}, "running": 0, "peak": 0, "build_dirs": set()}
+    lock = threading.Lock()
+
+    def fake_write_image(html_file, output_file, img_options=None, asset_dir=None):
+        with lock:
+            state["running"] += 1
+            state["peak"] = max(state["peak"], state["running"])
+        time.sleep(0.01)
+        state["pages"][Path(output_file).name] = Path(html_file).read_text("utf-8")
+        state["build_dirs"].add(asset_dir)
+        Path(output_file).write_bytes(b"img")
+        with lock:
+            state["running"] -= 1
+
+    with patch("mdxscraper.core.cards._write_image", side_effect=fake_write_image):
+        yield state
+
+
+def test_plan_cards_per_word_and_per_lesson():
+    per_word = plan_cards(LESSONS)
+    assert [(c.number, c.name, c.lessons) for c in per_word] == [
+        (1, "a", [{"name": "L1", "words": ["a"]}]),
+        (2, "b", [{"name": "L1", "words": ["b"]}]),
+        (3, "c", [{"name": "L3", "words": ["c"]}]),
+    ]
+    assert [c.name for c in plan_cards(LESSONS, per="lesson")] == ["L1", "L2", "L3"]
+    with pytest.raises(ValueError, match="card unit"):
+        plan_cards(LESSONS, per="page")
+
+
+def test_mdx2cards_one_image_per_word(tmp_path, sample_mdx, word_list, renders):
+    progress = []
+    with patch("mdxscraper.core.cards.Dictionary", wraps=cards.Dictionary) as mock_dictionary:
+        found, not_found, invalid = mdx2cards(
+            sample_mdx,
+            word_list,
+            tmp_path / "cards",
+            workers=2,
+            progress_callback=lambda p, m: progress.append((p, m)),
+        )
+
+    assert (found, not_found) == (5, 1)
+    assert invalid == {"Lesson 1": ["xyzzy"]}
+    assert mock_dictionary.call_count == 1
+    # Deterministic names in word list order; no card for the missing word
+    assert sorted(p.name for p in (tmp_path / "cards").iterdir()) == [
+        "001-1-01.png",
+        "002-1-02.png",
+        "004-1-03.png",
+        "005-1-04.png",
+        "006-1-05.png",
+    ]
+    page = renders["pages"]["001-1-01.png"]
+    assert 'id="word_1-01"' in page and "word_1-02" not in page
+    assert "<h1" not in page and 'class="left"' not in page
+    # One merged stylesheet in the shared build directory, removed afterwards
+    assert page.count('rel="stylesheet"') == 1
+    assert all(not Path(d).exists() for d in renders["build_dirs"])
+    assert renders["peak"] <= 2
+    assert progress[-1][0] == 100 and "images/s" in progress[-1][1]
+    assert any(m.startswith("Card 6/6") and "images/s" in m for _, m in progress)
+
+
+def test_mdx2cards_per_lesson(tmp_path, sample_mdx, word_list, renders):
+    mdx2cards(sample_mdx, word_list, tmp_path / "cards", output_format="jpg", per="lesson")
+
+    assert sorted(renders["pages"]) == ["001-Lesson_1.jpg", "002-Lesson_2.jpg", "003-Lesson_3.jpg"]
+    page = renders["pages"]["001-Lesson_1.jpg"]
+    assert "<h1" in page and "Lesson 1</h1>" in page
+    assert "word_1-01" in page and "word_1-02" in page and "word_1-03" not in page
+
+
+def test_mdx2cards_bounds_pending_pages(tmp_path, sample_mdx, renders):
+    words = tmp_path / "many.txt"
+    words.write_text("\n".join(f"1-{n:02d}" for n in range(1, 21)), encoding="utf-8")
+    spooled = []
+    real_write_card = cards._write_card
+
+    def write_card(card, fragments, head, html_file, heading, h1_style):
+        real_write_card(card, fragments, head, html_file, heading, h1_style)
+        spooled.append(len(list(Path(html_file).parent.glob("*.html"))))
+
+    with patch("mdxscraper.core.cards._write_card", side_effect=write_card):
+        mdx2cards(sample_mdx, words, tmp_path / "cards", workers=1)
+
+    assert len(list((tmp_path / "cards").iterdir())) == 20
+    assert renders["peak"] == 1
+    assert max(spooled) <= 2
+
+
+def test_mdx2cards_error_stops_and_cleans_up(tmp_path, sample_mdx, word_list):
+    build_dirs = []
+
+    def failing_write_image(html_file, output_file, img_options=None, asset_dir=None):
+        build_dirs.append(asset_dir)
+        raise OSError("wkhtmltoimage failed")
+
+    with patch("mdxscraper.core.cards._write_image", side_effect=failing_write_image):
+        with pytest.raises(OSError, match="wkhtmltoimage failed"):
+            mdx2cards(sample_mdx, word_list, tmp_path / "cards", workers=1)
+
+    assert build_dirs and not Path(build_dirs[0]).exists()
+
+
+@pytest.mark.parametrize(
+    "kwargs, message",
+    [({"output_format": "pdf"}, "card format"), ({"backend": "html5lib"}, "HTML backend")],
+)
+def test_mdx2cards_rejects_bad_options(kwargs, message):
+    with pytest.raises(ValueError, match=message):
+        mdx2cards("d.mdx", "w.txt", "out", **kwargs)
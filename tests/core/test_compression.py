@@ -0,0 +1,69 @@
+"""Tests for gzip output assembled from deflated segments"""
+
+import gzip
+import os
+import zlib
+
+import pytest
+
+from mdxscraper.core.compression import (
+    DeflateSpool,
+    GzipMember,
+    crc32_combine,
+    is_gzip_path,
+    write_gzip_sibling,
+)
+
+
+@pytest.mark.parametrize(
+    "first, second",
+    [(b"abc", b"defgh"), (b"", b"x"), (b"x", b""), (os.urandom(1000), os.urandom(70001))],
+)
+def test_crc32_combine_matches_zlib(first, second):
+    combined = crc32_combine(zlib.crc32(first), zlib.crc32(second), len(second))
+    assert combined == zlib.crc32(first + second)
+
+
+def test_gzip_member_splices_spools_in_order(tmp_path):
+    toc, content = DeflateSpool(spool_size=16), DeflateSpool(spool_size=16)
+    for n in range(200):
+        toc.write(f"<a>{n}</a>".encode())
+        content.write(f"<div>definition {n}</div>\n".encode())
+    expected = b"<head/>" + b"".join(f"<a>{n}</a>".encode() for n in range(200)) + b"|"
+    expected += b"".join(f"<div>definition {n}</div>\n".encode() for n in range(200)) + b"end"
+
+    path = tmp_path / "out.gz"
+    with open(path, "wb") as out:
+        member = GzipMember(out)
+        member.write(b"<head/>")
+        assert member.splice(toc) == toc.size
+        member.write(b"|")
+        member.splice(content)
+        member.write(b"end")
+        member.close()
+    toc.close()
+    content.close()
+
+    data = path.read_bytes()
+    assert gzip.decompress(data) == expected
+    # A single gzip member, so every gzip reader sees the whole document
+    decompressor = zlib.decompressobj(wbits=31)
+    assert decompressor.decompress(data) == expected and decompressor.eof
+    assert decompressor.unused_data == b""
+    assert len(data) < len(expected) / 3
+
+
+def test_is_gzip_path(tmp_path):
+    assert is_gzip_path(tmp_path / "words.html.GZ")
+    assert not is_gzip_path(tmp_path / "words.html")
+    with open(tmp_path / "x.gz", "wb") as f:
+        assert not is_gzip_path(f)
+
+
+def test_write_gzip_sibling_skips_incompressible(tmp_path):
+    css = tmp_path / "style.css"
+    assert write_gzip_sibling(css, b".a { color: red; }\n" * 50)
+    assert gzip.decompress((tmp_path / "style.css.gz").read_bytes()) == b".a { color: red; }\n" * 50
+    assert not write_gzip_sibling(tmp_path / "pic.png", b"\x89PNG" * 100)
+    assert not write_gzip_sibling(tmp_path / "noise.svg", os.urandom(64))
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["style.css.gz"]
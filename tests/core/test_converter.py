@@ -246,6 +246,7 @@ def test_mdx2img_basic():
                             with patch("mdxscraper.core.converter.Image.open") as mock_image_open:
                                 mock_image = Mock()
                                 mock_image.size = (800, 600)
+                                mock_image.mode = "RGB"
                                 mock_image_open.return_value.__enter__.return_value = mock_image
                                 mock_parser.return_value.parse.return_value = lessons
                                 mock_imgkit.return_value = None
@@ -34,3 +34,50 @@ def test_dictionary_context_and_impl_and_lookup(monkeypatch, tmp_path):
         assert d.lookup_html("LINK") == "<div>hello</div>"
         # fallback behavior for missing
         assert d.lookup_html("missing") == ""
+
+
+def test_dictionary_iter_keys_pages(monkeypatch, tmp_path):
+    import sqlite3
+
+    db = tmp_path / "dummy.mdx.db"
+    conn = sqlite3.connect(db)
+    conn.execute("CREATE TABLE MDX_INDEX (key_text text not null)")
+    conn.executemany(
+        "INSERT INTO MDX_INDEX VALUES (?)", [(k,) for k in ["apple", "apply", "banana", "cherry"]]
+    )
+    conn.commit()
+    conn.close()
+
+    class DbIndex(DummyIndex):
+        _mdx_db = str(db)
+
+    monkeypatch.setattr("mdxscraper.core.dictionary.IndexBuilder", DbIndex)
+    d = Dictionary(tmp_path / "dummy.mdx")
+    assert list(d.iter_keys(batch_size=3)) == ["apple", "apply", "banana", "cherry"]
+    assert list(d.iter_keys("app", batch_size=1)) == ["apple", "apply"]
+    assert list(d.iter_keys("*an*")) == ["banana"]
+    assert d.key_page(after=3) == [(4, "cherry")]
+
+
+def test_dictionary_present_words_follows_lookup(monkeypatch, tmp_path):
+    class CountingIndex(DummyIndex):
+        calls = 0
+
+        def mdx_lookup(self, word: str, ignorecase: bool = False):
+            CountingIndex.calls += 1
+            if word == "DEAD":
+                return ["@@@LINK=nowhere"]
+            return super().mdx_lookup(word, ignorecase)
+
+    monkeypatch.setattr("mdxscraper.core.dictionary.IndexBuilder", CountingIndex)
+    d = Dictionary(tmp_path / "dummy.mdx")
+    words = ["hello", "Hello ", "LINK", "DEAD", "missing", "missing"]
+    present = d.present_words(words)
+
+    # A link to a missing entry is not found, exactly as lookup_html reports it
+    assert present == {"hello", "Hello ", "LINK"}
+    assert all(bool(d.lookup_html(w)) == (w in present) for w in words)
+    # Misses found while planning are not looked up again
+    calls = CountingIndex.calls
+    assert d.lookup_html("missing") == "" and d.lookup_entry("DEAD") == (None, "")
+    assert CountingIndex.calls == calls
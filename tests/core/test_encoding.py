@@ -0,0 +1,151 @@
+"""Tests for encoder profiles and tiled PNG/WEBP encoding"""
+
+import io
+import zlib
+from unittest.mock import patch
+
+import pytest
+from PIL import Image, ImageDraw
+
+from mdxscraper.core.converter import _save_image
+from mdxscraper.core.encoding import (
+    ENCODER_PROFILES,
+    WEBP_MAX_SIZE,
+    _adler32_combine,
+    encoder_settings,
+    save_image,
+)
+
+
+def _page(height=1000, mode="RGB"):
+    image = Image.new(mode, (120, height), "white")
+    draw = ImageDraw.Draw(image)
+    for y in range(0, height, 14):
+        draw.text((4, y), f"line {y} lorem ipsum", fill="black")
+    return image
+
+
+def test_encoder_settings_profiles_and_overrides():
+    assert encoder_settings(None)["png_compress_level"] == 9
+    draft = encoder_settings({"encoder": "draft"})
+    assert (draft["png_compress_level"], draft["png_optimize"], draft["webp_method"]) == (
+        1,
+        False,
+        0,
+    )
+    # Explicit keys win over the profile
+    overridden = encoder_settings({"encoder": "draft", "png_compress_level": 7})
+    assert overridden["png_compress_level"] == 7
+    assert set(ENCODER_PROFILES) == {"draft", "balanced", "smallest", "exhaustive"}
+    with pytest.raises(ValueError, match="Unknown encoder profile"):
+        encoder_settings({"encoder": "fastest"})
+
+
+def test_png_compress_level_default_and_range():
+    assert encoder_settings({"png_compress_level": -1})["png_compress_level"] == 6
+    for level in (-2, 10):
+        with pytest.raises(ValueError, match="png_compress_level"):
+            encoder_settings({"png_compress_level": level})
+
+
+def test_lossless_webp_method_6_is_opt_in():
+    assert encoder_settings({})["webp_method"] == 6
+    assert encoder_settings({})["webp_lossless_method"] < 6
+    assert encoder_settings({"encoder": "exhaustive"})["webp_lossless_method"] == 6
+    # webp_method is for lossy output; lossless has its own key
+    assert encoder_settings({"webp_method": 6})["webp_lossless_method"] == 4
+    assert encoder_settings({"webp_lossless_method": 6})["webp_lossless_method"] == 6
+
+
+def test_lossless_webp_is_encoded_with_the_lossless_method(tmp_path):
+    image = _page(100)
+    with patch.object(Image.Image, "save") as save:
+        save_image(image, tmp_path / "page.webp", {"webp_lossless": True})
+        save_image(image, tmp_path / "page.webp", {})
+    assert [c.kwargs["method"] for c in save.call_args_list] == [4, 6]
+    assert [c.kwargs["lossless"] for c in save.call_args_list] == [True, False]
+
+
+def test_adler32_combine_matches_zlib():
+    a, b = b"hello " * 1000, b"world" * 70000
+    assert _adler32_combine(zlib.adler32(a), zlib.adler32(b), len(b)) == zlib.adler32(a + b)
+
+
+@pytest.mark.parametrize("mode", ["RGB", "RGBA", "L"])
+@pytest.mark.parametrize("level", [-1, 1, 6, 9])
+def test_tiled_png_is_one_lossless_image(tmp_path, mode, level):
+    image = _page(mode=mode)
+    output = tmp_path / "page.png"
+
+    paths = save_image(
+        image, output, {"tile_height": 300, "png_compress_level": level, "encode_workers": 2}
+    )
+
+    assert paths == [output]
+    with Image.open(output) as decoded:
+        decoded.load()
+        assert (decoded.mode, decoded.size) == (mode, image.size)
+        assert decoded.tobytes() == image.tobytes()
+
+
+@pytest.mark.parametrize("mode", ["P", "I;16", "CMYK", "LA"])
+def test_tiled_png_converts_other_modes(tmp_path, mode):
+    image = _page(mode="RGB").convert(mode)
+    output = tmp_path / "page.png"
+
+    assert save_image(image, output, {"tile_height": 300}) == [output]
+    with Image.open(output) as decoded:
+        decoded.load()
+        assert decoded.size == image.size
+        assert decoded.mode in ("RGB", "RGBA", "LA")
+
+
+def test_split_tiles_writes_numbered_files(tmp_path):
+    image = _page(1000)
+
+    paths = save_image(image, tmp_path / "page.png", {"tile_height": 400, "split_tiles": True})
+
+    assert [p.name for p in paths] == ["page-001.png", "page-002.png", "page-003.png"]
+    assert not (tmp_path / "page.png").exists()
+    heights = []
+    for path in paths:
+        with Image.open(path) as tile:
+            heights.append(tile.height)
+    assert heights == [400, 400, 200]
+
+
+def test_tall_webp_needs_split_tiles(tmp_path):
+    image = Image.new("RGB", (8, WEBP_MAX_SIZE + 10), "white")
+
+    with pytest.raises(ValueError, match="split_tiles"):
+        save_image(image, tmp_path / "page.webp", {"encoder": "draft"})
+    assert list(tmp_path.iterdir()) == []
+
+    paths = save_image(image, tmp_path / "page.webp", {"encoder": "draft", "split_tiles": True})
+
+    assert [p.name for p in paths] == ["page-001.webp", "page-002.webp"]
+    with Image.open(paths[1]) as tile:
+        assert tile.size == (8, 10)
+
+
+def test_webp_tile_height_still_writes_one_file(tmp_path):
+    paths = save_image(_page(1000), tmp_path / "page.webp", {"tile_height": 400})
+    assert paths == [tmp_path / "page.webp"]
+    assert [p.name for p in tmp_path.iterdir()] == ["page.webp"]
+
+
+def test_short_pages_are_not_tiled(tmp_path):
+    paths = save_image(_page(200), tmp_path / "page.webp", {"tile_height": 400})
+    assert paths == [tmp_path / "page.webp"]
+
+
+def test_save_image_reencodes_rendered_png(tmp_path):
+    rendered = io.BytesIO()
+    _page(600).save(rendered, "PNG")
+    rendered.seek(0)
+
+    options = {"encoder": "balanced", "split_tiles": True, "tile_height": 250}
+    paths = _save_image(rendered, tmp_path / "out.webp", options)
+
+    assert paths == sorted(tmp_path.iterdir())
+    assert [p.name for p in paths] == ["out-001.webp", "out-002.webp", "out-003.webp"]
@@ -0,0 +1,119 @@
+"""Tests for EPUB output (mdx2epub)"""
+
+import re
+import shutil
+import zipfile
+from pathlib import Path
+from unittest.mock import patch
+
+import pytest
+from lxml import etree
+
+from mdxscraper.core.epub import mdx2epub
+
+SAMPLE_DIR = Path(__file__).resolve().parents[2] / "data" / "mdict" / "Learn These Words First"
+
+
+@pytest.fixture
+def sample_mdx(tmp_path):
+    mdx = SAMPLE_DIR / "Learn These Words First.mdx"
+    if not mdx.exists():
+        pytest.skip("sample dictionary not available")
+    for name in ("Learn These Words First.mdx", "Learn These Words First.mdd", "ltwf.css"):
+        shutil.copy(SAMPLE_DIR / name, tmp_path / name)
+    return tmp_path / mdx.name
+
+
+@pytest.fixture
+def word_list(tmp_path):
+    words = tmp_path / "words.txt"
+    # 1-01 appears twice: its images must be stored once
+    words.write_text("# Lesson 1\n1-01\n1-02\nxyzzy\n# Lesson 2\n1-03\n1-01\n", encoding="utf-8")
+    return words
+
+
+def test_mdx2epub_writes_valid_book(tmp_path, sample_mdx, word_list):
+    output = tmp_path / "out" / "words.epub"
+    progress = []
+    found, not_found, invalid = mdx2epub(
+        sample_mdx, word_list, output, progress_callback=lambda p, m: progress.append(p)
+    )
+
+    assert (found, not_found) == (4, 1)
+    assert invalid == {"Lesson 1": ["xyzzy"]}
+    assert progress[-1] == 100
+
+    with zipfile.ZipFile(output) as book:
+        first = book.infolist()[0]
+        assert (first.filename, first.compress_type) == ("mimetype", zipfile.ZIP_STORED)
+        assert book.read("mimetype") == b"application/epub+zip"
+        names = book.namelist()
+        for name in names:
+            if name.endswith((".xhtml", ".opf", ".ncx", ".xml")):
+                etree.fromstring(book.read(name))
+        assert [n for n in names if n.startswith("OEBPS/chapters/")] == [
+            "OEBPS/chapters/001-Lesson_1.xhtml",
+            "OEBPS/chapters/002-Lesson_2.xhtml",
+        ]
+        images = [n for n in names if n.startswith("OEBPS/images/")]
+        assert images and len(images) == len(set(images))
+        assert all(re.fullmatch(r"OEBPS/images/[0-9a-f]{32}\.\w+", n) for n in images)
+
+        chapter = book.read("OEBPS/chapters/002-Lesson_2.xhtml").decode("utf-8")
+        assert "data:image" not in chapter
+        assert chapter.count('href="../style.css"') == 1
+        # The repeated word links the images already stored for lesson 1
+        for src in re.findall(r'src="\.\./(images/[^"]+)"', chapter):
+            assert "OEBPS/" + src in images
+
+        opf = book.read("OEBPS/content.opf").decode("utf-8")
+        for image in images:
+            assert f'href="{image[len("OEBPS/"):]}"' in opf
+        assert opf.index('idref="chapter-1"') < opf.index('idref="chapter-2"')
+        assert book.read("OEBPS/style.css").strip()
+        assert "word_1-02" in book.read("OEBPS/nav.xhtml").decode("utf-8")
+
+
+def test_mdx2epub_toc_lists_lessons_only_without_with_toc(tmp_path, sample_mdx, word_list):
+    output = tmp_path / "words.epub"
+    mdx2epub(sample_mdx, word_list, output, with_toc=False, title="Workbook", language="fr")
+
+    with zipfile.ZipFile(output) as book:
+        nav = book.read("OEBPS/nav.xhtml").decode("utf-8")
+        opf = book.read("OEBPS/content.opf").decode("utf-8")
+    assert "Lesson 2" in nav and "word_" not in nav
+    assert "<dc:title>Workbook</dc:title>" in opf and "<dc:language>fr</dc:language>" in opf
+
+
+@pytest.mark.parametrize("stylesheet", ["found", "missing"])
+def test_mdx2epub_keeps_additional_styles(tmp_path, sample_mdx, word_list, stylesheet):
+    output = tmp_path / "words.epub"
+    extra = ".scrapedword { color: #123456 }"
+    if stylesheet == "missing":
+        with patch("mdxscraper.core.renderer.get_css", side_effect=LookupError("gone")):
+            mdx2epub(sample_mdx, word_list, output, additional_styles=extra)
+    else:
+        mdx2epub(sample_mdx, word_list, output, additional_styles=extra)
+
+    with zipfile.ZipFile(output) as book:
+        css = book.read("OEBPS/style.css").decode("utf-8")
+    assert css.endswith(extra)
+    assert (len(css) > len(extra)) == (stylesheet == "found")
+
+
+def test_mdx2epub_spools_large_chapters_to_disk(tmp_path, sample_mdx, word_list):
+    output = tmp_path / "words.epub"
+    with patch("mdxscraper.core.epub.SPOOL_SIZE", 64):
+        mdx2epub(sample_mdx, word_list, output)
+
+    with zipfile.ZipFile(output) as book:
+        chapter = book.read("OEBPS/chapters/001-Lesson_1.xhtml").decode("utf-8")
+    assert chapter.rstrip().endswith("</html>") and "word_1-02" in chapter
+
+
+def test_mdx2epub_removes_partial_book_on_error(tmp_path, sample_mdx, word_list):
+    output = tmp_path / "words.epub"
+    with patch("mdxscraper.core.epub.Dictionary.lookup_html", side_effect=RuntimeError("broken")):
+        with pytest.raises(RuntimeError, match="broken"):
+            mdx2epub(sample_mdx, word_list, output)
+    assert not output.exists()
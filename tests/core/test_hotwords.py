@@ -0,0 +1,75 @@
+"""Tests for hot-word lookup log and Dictionary preloading"""
+
+import json
+from unittest.mock import Mock, patch
+
+from mdxscraper.core.dictionary import Dictionary
+from mdxscraper.core.hotwords import LookupLog
+
+
+def test_lookup_log_sidecar_path(tmp_path):
+    log = LookupLog.for_dictionary(tmp_path / "dict.mdx")
+    assert log.path == tmp_path / "dict.mdx.hot.json"
+
+
+def test_lookup_log_record_top_and_save(tmp_path):
+    log = LookupLog(tmp_path / "hot.json", max_entries=2)
+    for word in ["a", "b", "b", "c", "c", "c", ""]:
+        log.record(word)
+    assert log.top(2) == ["c", "b"]
+    log.save()
+
+    data = json.loads((tmp_path / "hot.json").read_text(encoding="utf-8"))
+    assert data == {"c": 3, "b": 2}
+    assert LookupLog(tmp_path / "hot.json").count("c") == 3
+
+
+def test_lookup_log_ignores_corrupt_file(tmp_path):
+    path = tmp_path / "hot.json"
+    path.write_text("{not json", encoding="utf-8")
+    log = LookupLog(path)
+    assert log.top(5) == []
+
+
+def test_lookup_log_save_is_noop_when_clean(tmp_path):
+    log = LookupLog(tmp_path / "hot.json")
+    log.save()
+    assert not (tmp_path / "hot.json").exists()
+
+
+def _builder(definitions):
+    builder = Mock()
+    builder.mdx_lookup.side_effect = lambda word, ignorecase=None: (
+        [definitions[word]] if word in definitions else []
+    )
+    return builder
+
+
+def test_dictionary_records_and_preloads_hot_words(tmp_path):
+    mdx = tmp_path / "dict.mdx"
+    (tmp_path / "dict.mdx.hot.json").write_text(json.dumps({"hello": 5, "world": 2}))
+    builder = _builder({"hello": "<p>hello</p>", "world": "<p>world</p>"})
+
+    with patch("mdxscraper.core.dictionary.IndexBuilder", return_value=builder):
+        dictionary = Dictionary(mdx, hot_words=1)
+        assert dictionary.wait_preloaded(timeout=5)
+        calls_after_preload = builder.mdx_lookup.call_count
+
+        # Preloaded word is served from memory, the other one hits the index
+        assert dictionary.lookup_html("hello") == "<p>hello</p>"
+        assert builder.mdx_lookup.call_count == calls_after_preload
+        assert dictionary.lookup_html("world") == "<p>world</p>"
+        assert builder.mdx_lookup.call_count == calls_after_preload + 1
+        dictionary.close()
+
+    data = json.loads((tmp_path / "dict.mdx.hot.json").read_text(encoding="utf-8"))
+    assert data == {"hello": 6, "world": 3}
+
+
+def test_dictionary_without_hot_words_keeps_no_log(tmp_path):
+    builder = _builder({"hello": "<p>hello</p>"})
+    with patch("mdxscraper.core.dictionary.IndexBuilder", return_value=builder):
+        with Dictionary(tmp_path / "dict.mdx") as dictionary:
+            assert dictionary.lookup_html("hello") == "<p>hello</p>"
+            assert dictionary.wait_preloaded()
+    assert not (tmp_path / "dict.mdx.hot.json").exists()
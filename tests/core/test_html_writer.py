@@ -0,0 +1,308 @@
+"""Tests for the streaming HTML writer"""
+
+import gzip
+from pathlib import Path
+from unittest.mock import Mock, patch
+
+from mdxscraper.core.converter import mdx2html
+import pytest
+
+from mdxscraper.core.html_writer import (
+    EntryDeduplicator,
+    Fragment,
+    FragmentRenderer,
+    HtmlStreamWriter,
+    LxmlFragmentRenderer,
+    entry_key,
+    reference_html,
+    render_head,
+)
+
+
+def test_fragment_renderer_wraps_body_contents():
+    renderer = FragmentRenderer(scrap_style="color:red")
+    fragment = renderer.render(
+        "hello", '<link rel="stylesheet" href="d.css"/><p class="Sense">hi</p>'
+    )
+    assert fragment.html == (
+        '<div class="scrapedword" id="word_hello" style="color:red">'
+        '<p class="Sense">hi</p></div>'
+    )
+    assert fragment.found
+    assert 'href="d.css"' in fragment.head
+
+
+def test_fragment_renderer_not_found():
+    fragment = FragmentRenderer().render("missing", "")
+    assert not fragment.found
+    assert fragment.head is None
+    assert fragment.html == '<div class="scrapedword" id="word_missing"></div>'
+
+
+def test_fragment_renderer_shares_image_cache():
+    dictionary = Mock()
+    dictionary._mdd_db = True
+    dictionary.mdd_lookup.return_value = [b"img"]
+    renderer = FragmentRenderer(dictionary)
+    first = renderer.render("a", '<img src="pic.png"/>')
+    second = renderer.render("b", '<img src="pic.png"/>')
+    assert "data:image/png;base64,aW1n" in first.html
+    assert "data:image/png;base64,aW1n" in second.html
+    assert dictionary.mdd_lookup.call_count == 1
+
+
+def test_lxml_renderer_matches_bs4_markup():
+    result = (
+        '<link rel="stylesheet" href="d.css"/>'
+        '<p class="Sense">caf\u00e9 &amp; <b>tea</b></p><img src="x/pic.png"/> tail'
+    )
+    dictionaries = [Mock(_mdd_db=True), Mock(_mdd_db=True)]
+    for dictionary in dictionaries:
+        dictionary.mdd_lookup.return_value = [b"img"]
+
+    bs4_fragment = FragmentRenderer(dictionaries[0], "margin:0").render("café", result)
+    lxml_fragment = LxmlFragmentRenderer(dictionaries[1], "margin:0").render("café", result)
+
+    # Only the void element syntax differs between the two serializers
+    assert lxml_fragment.html == bs4_fragment.html.replace("/>", ">")
+    assert lxml_fragment.found
+    assert 'href="d.css"' in lxml_fragment.head
+    dictionaries[1].mdd_lookup.assert_called_once_with("\\x\\pic.png")
+
+
+@pytest.mark.parametrize("result", ["", "   ", "<!-- nothing -->"])
+def test_lxml_renderer_empty_definitions(result):
+    fragment = LxmlFragmentRenderer().render("w", result)
+    assert fragment.html == '<div class="scrapedword" id="word_w"></div>'
+    assert fragment.found == bool(result)
+
+
+def test_writer_assembles_toc_and_content(tmp_path):
+    output = tmp_path / "sub" / "out.html"
+    writer = HtmlStreamWriter(output, h1_style="color:blue")
+    writer.begin_lesson("L1")
+    writer.add(Fragment("a&b", '<div id="word_a&amp;b">x</div>', True))
+    writer.add(Fragment("zz", "<div></div>", False))
+    writer.end_lesson()
+    size = writer.close("<head></head>")
+
+    html = output.read_text(encoding="utf-8")
+    assert size == output.stat().st_size
+    assert html.startswith('<head></head><html>\n<body style="font-family:Arial Unicode MS;">')
+    assert '<div class="left"><a class="lesson" href="#lesson_L1">L1</a><br/>\n' in html
+    assert '<a class="word" href="#word_a&amp;b">a&amp;b</a><br/>\n' in html
+    assert '<a class="word invalid_word" href="#word_zz">zz</a>' in html
+    assert '<h1 id="lesson_L1" style="color:blue">L1</h1>\n<div id="word_a&amp;b">x</div>' in html
+    assert html.endswith("</div></div></body></html>")
+
+
+def test_writer_without_toc(tmp_path):
+    output = tmp_path / "out.html"
+    with HtmlStreamWriter(output, with_toc=False, spool_size=1) as writer:
+        writer.begin_lesson("L1")
+        writer.add(Fragment("a", "<div>a</div>", True))
+        writer.end_lesson()
+        writer.close("<head></head>")
+    html = output.read_text(encoding="utf-8")
+    assert 'class="left"' not in html
+    assert '<div class="right"><h1 id="lesson_L1">L1</h1>\n<div>a</div></div></body>' in html
+
+
+def test_writer_continued_lesson_has_no_anchor(tmp_path):
+    output = tmp_path / "out.html"
+    with HtmlStreamWriter(output, with_toc=False, h1_style="color:blue") as writer:
+        writer.begin_lesson("L1", continued=True)
+        writer.add(Fragment("a", "<div>a</div>", True))
+        writer.end_lesson()
+        writer.close("<head></head>")
+    html = output.read_text(encoding="utf-8")
+    assert '<h1 style="color:blue">L1 (continued)</h1>\n<div>a</div>' in html
+    assert "lesson_L1" not in html
+
+
+def test_writer_compresses_gz_output(tmp_path):
+    outputs = []
+    for name in ("out.html", "out.html.gz"):
+        with HtmlStreamWriter(tmp_path / name, spool_size=64) as writer:
+            for lesson in ("L1", "L2"):
+                writer.begin_lesson(lesson)
+                for n in range(50):
+                    writer.add(Fragment(f"w{n}", f"<div>{lesson} definition {n}</div>", n % 7 != 0))
+                writer.end_lesson()
+            outputs.append(writer.close("<head><style>p{}</style></head>"))
+
+    plain = (tmp_path / "out.html").read_bytes()
+    compressed = (tmp_path / "out.html.gz").read_bytes()
+    assert outputs == [len(plain), len(plain)]
+    assert gzip.decompress(compressed) == plain
+    assert len(compressed) < len(plain) / 3
+
+
+def test_writer_writes_body_straight_to_output_once_started(tmp_path):
+    output = tmp_path / "out.html"
+    lessons = [{"name": "L1", "words": ["a", "zz", "b"]}]
+    with HtmlStreamWriter(output, spool_size=1) as writer:
+        writer.plan_toc(lessons, {"a", "b"})
+        writer.begin_lesson("L1")
+        writer.add(Fragment("a", "<div>a</div>", True))
+        writer.start("<head></head>")
+        writer.add(Fragment("zz", "<div>zz</div>", False))
+        writer._out.flush()
+        partial = output.read_text(encoding="utf-8")
+        writer.add(Fragment("b", "<div>b</div>", True))
+        writer.end_lesson()
+        size = writer.close()
+
+    html = output.read_text(encoding="utf-8")
+    assert size == output.stat().st_size
+    assert partial.endswith("<div>a</div>\n<div>zz</div>")
+    assert '<a class="word invalid_word" href="#word_zz">zz</a>' in partial
+    assert html.startswith(partial)
+    assert html.endswith("<div>b</div></div></div></body></html>")
+
+
+def test_writer_requires_planned_toc_to_start(tmp_path):
+    with HtmlStreamWriter(tmp_path / "out.html") as writer:
+        with pytest.raises(ValueError, match="plan_toc"):
+            writer.start("<head></head>")
+    assert not (tmp_path / "out.html").exists()
+
+
+def test_writer_removes_unfinished_output(tmp_path):
+    output = tmp_path / "out.html"
+    with pytest.raises(RuntimeError):
+        with HtmlStreamWriter(output, with_toc=False) as writer:
+            writer.start("<head></head>")
+            writer.add(Fragment("a", "<div>a</div>", True))
+            raise RuntimeError("lookup failed")
+    assert not output.exists()
+
+
+def test_writer_streams_gz_output_after_start(tmp_path):
+    lessons = [{"name": "L1", "words": [f"w{n}" for n in range(50)]}]
+    outputs = []
+    for name in ("out.html", "out.html.gz"):
+        with HtmlStreamWriter(tmp_path / name, spool_size=64) as writer:
+            writer.plan_toc(lessons, {"w1", "w2"})
+            writer.begin_lesson("L1")
+            for n in range(50):
+                if n == 3:
+                    writer.start("<head></head>")
+                writer.add(Fragment(f"w{n}", f"<div>definition {n}</div>", n in (1, 2)))
+            writer.end_lesson()
+            writer.close()
+        outputs.append((tmp_path / name).read_bytes())
+
+    plain, compressed = outputs
+    assert gzip.decompress(compressed) == plain
+
+
+def test_render_head_without_stylesheet_keeps_charset():
+    assert render_head(None, Path("d.mdx"), Mock(), None) == '<head><meta charset="utf-8"/></head>'
+
+
+def test_mdx2html_stream_matches_default_output(tmp_path):
+    lessons = [
+        {"name": "Lesson 1", "words": ["word1", "word2"]},
+        {"name": "Lesson 2", "words": ["word3"]},
+    ]
+    mock_dictionary = Mock()
+    mock_dictionary.impl = Mock(spec=[])
+    mock_dictionary.lookup_html.side_effect = lambda w: (
+        "" if w == "word2" else f"<p>{w}</p>"
+    )
+    mock_dictionary.present_words.side_effect = lambda words: {
+        w for w in words if mock_dictionary.lookup_html(w)
+    }
+
+    outputs = []
+    for stream in (False, True):
+        output = tmp_path / f"out_{stream}.html"
+        with patch("mdxscraper.core.converter.WordParser") as mock_parser:
+            with patch("mdxscraper.core.converter.Dictionary", return_value=mock_dictionary):
+                mock_parser.return_value.parse.return_value = lessons
+                result = mdx2html(
+                    "test.mdx", "test.txt", output, h1_style="color:red", stream=stream
+                )
+        assert result[:2] == (2, 1)
+        outputs.append(output.read_bytes())
+
+    # Without a stylesheet head the default path omits <head>; the rest must match
+    default, streamed = outputs
+    assert streamed.endswith(default.lstrip(b"\n"))
+
+
+def test_mdx2html_gz_output_streams_compressed(tmp_path):
+    lessons = [{"name": "Lesson 1", "words": ["word1", "word2"]}]
+    mock_dictionary = Mock()
+    mock_dictionary.impl = Mock(spec=[])
+    mock_dictionary.lookup_html.side_effect = lambda w: f"<p>{w}</p>"
+    mock_dictionary.present_words.side_effect = lambda words: {
+        w for w in words if mock_dictionary.lookup_html(w)
+    }
+
+    outputs = []
+    for name, stream in (("out.html", True), ("out.html.gz", False)):
+        with patch("mdxscraper.core.converter.WordParser") as mock_parser:
+            with patch("mdxscraper.core.converter.Dictionary", return_value=mock_dictionary):
+                mock_parser.return_value.parse.return_value = lessons
+                mdx2html("test.mdx", "test.txt", tmp_path / name, stream=stream)
+        outputs.append((tmp_path / name).read_bytes())
+
+    streamed, compressed = outputs
+    assert compressed[:2] == b"\x1f\x8b"
+    assert gzip.decompress(compressed) == streamed
+
+
+def test_mdx2html_rejects_unknown_backend():
+    with pytest.raises(ValueError, match="Unknown HTML backend"):
+        mdx2html("test.mdx", "test.txt", "out.html", backend="html5lib")
+
+
+def test_entry_deduplicator_references_first_occurrence():
+    definitions = {"run": "<p>run</p>", "ran": "<p>run</p>", "walk": "<p>walk</p>"}
+    lookup = Mock(side_effect=lambda w: definitions.get(w, ""))
+    dedupe = EntryDeduplicator(lookup)
+
+    assert dedupe("run") == "<p>run</p>"
+    assert dedupe("ran") == reference_html("run")
+    assert dedupe("walk") == "<p>walk</p>"
+    assert dedupe("run") == reference_html("run")
+    assert dedupe("nope") == ""
+    assert dedupe("nope") == ""
+    assert dedupe.duplicates == 2
+    # Every distinct word is looked up once
+    assert lookup.call_count == 4
+
+
+def test_entry_deduplicator_first_occurrence_by_entry():
+    dedupe = EntryDeduplicator(Mock())
+    key = entry_key("<p>run</p>")
+    assert dedupe.first_occurrence("run", key) is None
+    assert dedupe.first_occurrence("ran", key) == "run"
+    assert dedupe.first_occurrence("run", key) == "run"
+    assert dedupe.first_occurrence("walk", entry_key("<p>walk</p>")) is None
+
+
+def test_reference_html_escapes_word():
+    assert reference_html("a&b") == '<a class="duplicate_entry" href="#word_a&amp;b">a&amp;b</a>'
+
+
+def test_mdx2html_dedupe_renders_references(tmp_path):
+    lessons = [{"name": "L1", "words": ["run", "ran", "run", "missing"]}]
+    mock_dictionary = Mock()
+    mock_dictionary.impl = Mock(spec=[])
+    mock_dictionary.lookup_html.side_effect = lambda w: "" if w == "missing" else "<p>run</p>"
+
+    output = tmp_path / "out.html"
+    with patch("mdxscraper.core.converter.WordParser") as mock_parser:
+        with patch("mdxscraper.core.converter.Dictionary", return_value=mock_dictionary):
+            mock_parser.return_value.parse.return_value = lessons
+            found, not_found, invalid = mdx2html("t.mdx", "t.txt", output, dedupe=True)
+
+    html = output.read_text(encoding="utf-8")
+    assert (found, not_found) == (3, 1)
+    assert invalid == {"L1": ["missing"]}
+    assert html.count("<p>run</p>") == 1
+    assert html.count('<a class="duplicate_entry" href="#word_run">run</a>') == 2
+    assert mock_dictionary.lookup_html.call_count == 3
@@ -0,0 +1,121 @@
+"""Tests for image optimization"""
+
+import io
+import pickle
+from unittest.mock import Mock
+
+import pytest
+from bs4 import BeautifulSoup
+from PIL import Image
+
+from mdxscraper.core.assets import AssetStore, data_uri
+from mdxscraper.core.images import ImageOptimizer, optimize_image, sniff_image_format
+from mdxscraper.core.renderer import embed_images
+
+SVG = b'<?xml version="1.0"?>\n<svg xmlns="http://www.w3.org/2000/svg"><rect width="1"/></svg>'
+
+
+def make_image(fmt: str, size=(40, 20), mode="RGB") -> bytes:
+    out = io.BytesIO()
+    Image.new(mode, size, "red").save(out, format=fmt)
+    return out.getvalue()
+
+
+@pytest.mark.parametrize(
+    "fmt, expected",
+    [
+        ("PNG", "png"),
+        ("JPEG", "jpeg"),
+        ("GIF", "gif"),
+        ("WEBP", "webp"),
+        ("BMP", "bmp"),
+        ("TIFF", "tiff"),
+    ],
+)
+def test_sniff_image_format(fmt, expected):
+    assert sniff_image_format(make_image(fmt)) == expected
+
+
+def test_sniff_svg_and_unknown():
+    assert sniff_image_format(SVG) == "svg+xml"
+    assert sniff_image_format(b"  <svg></svg>") == "svg+xml"
+    assert sniff_image_format(b"not an image") is None
+
+
+def test_bmp_and_tiff_convert_to_png():
+    for fmt in ("BMP", "TIFF"):
+        data, image_format = optimize_image(make_image(fmt))
+        assert image_format == "png"
+        assert sniff_image_format(data) == "png"
+
+
+def test_convert_to_webp():
+    data, image_format = optimize_image(make_image("BMP"), lossless_format="webp")
+    assert image_format == "webp"
+    assert sniff_image_format(data) == "webp"
+
+
+def test_downscale_keeps_format_and_aspect():
+    data, image_format = optimize_image(make_image("JPEG", (400, 200)), max_size=(100, 100))
+    assert image_format == "jpeg"
+    with Image.open(io.BytesIO(data)) as im:
+        assert im.size == (100, 50)
+
+
+def test_small_images_pass_through_unchanged():
+    png = make_image("PNG")
+    assert optimize_image(png) == (png, "png")
+    assert optimize_image(SVG) == (SVG, "svg+xml")
+    assert optimize_image(b"garbage") == (b"garbage", None)
+    # Truncated data sniffed as PNG is returned untouched
+    assert optimize_image(png[:20]) == (png[:20], "png")
+
+
+def test_svg_is_inlined_as_text(tmp_path):
+    uri = data_uri("pic.svg", SVG, "svg+xml")
+    assert uri.startswith("data:image/svg+xml;charset=utf-8,%3C%3Fxml")
+    assert ";base64," not in uri
+    assert AssetStore(tmp_path).url("pic", SVG, "svg+xml").endswith(".svg")
+
+
+def test_optimizer_caches_by_content():
+    optimizer = ImageOptimizer(processes=1)
+    bmp = make_image("BMP")
+    first = optimizer.optimize(bmp)
+    assert optimizer.optimize(bytes(bmp)) is first
+    assert optimizer.bytes_in == len(bmp)
+    assert optimizer.bytes_out == len(first[0])
+
+
+def test_optimize_many_on_process_pool():
+    images = {"a.bmp": make_image("BMP"), "b.tif": make_image("TIFF", (30, 30)), "c": b"x"}
+    with ImageOptimizer(processes=2) as optimizer:
+        results = optimizer.optimize_many(images)
+        assert optimizer.optimize_many(images) == results
+    assert [fmt for _, fmt in results.values()] == ["png", "png", None]
+    assert results["c"] == (b"x", None)
+
+
+def test_optimizer_pickles_settings_only():
+    optimizer = ImageOptimizer(max_size=(10, 10), processes=1)
+    optimizer.optimize(make_image("BMP"))
+    clone = pickle.loads(pickle.dumps(optimizer))
+    assert clone.max_size == (10, 10)
+    assert len(clone._cache) == 0
+    assert clone.optimize(make_image("BMP"))[1] == "png"
+
+
+def test_optimizer_rejects_unknown_target():
+    with pytest.raises(ValueError):
+        ImageOptimizer(lossless_format="gif")
+
+
+def test_embed_images_uses_optimized_format():
+    soup = BeautifulSoup('<img src="fig.bmp"/>', "lxml")
+    dictionary = Mock()
+    dictionary._mdd_db = True
+    dictionary.mdd_lookup.return_value = [make_image("BMP")]
+
+    embed_images(soup, dictionary, optimizer=ImageOptimizer(processes=1))
+
+    assert soup.img["src"].startswith("data:image/png;base64,iVBORw0KGgo")
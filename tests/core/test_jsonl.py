@@ -0,0 +1,91 @@
+"""Tests for JSON Lines output (mdx2jsonl) and Dictionary.lookup_entry"""
+
+import gzip
+import io
+import json
+import shutil
+from pathlib import Path
+
+import pytest
+
+from mdxscraper.core.dictionary import Dictionary
+from mdxscraper.core.jsonl import definition_fields, mdx2jsonl
+
+SAMPLE_DIR = Path(__file__).resolve().parents[2] / "data" / "mdict" / "Learn These Words First"
+
+
+@pytest.fixture
+def sample_mdx(tmp_path):
+    mdx = SAMPLE_DIR / "Learn These Words First.mdx"
+    if not mdx.exists():
+        pytest.skip("sample dictionary not available")
+    for name in ("Learn These Words First.mdx", "Learn These Words First.mdd", "ltwf.css"):
+        shutil.copy(SAMPLE_DIR / name, tmp_path / name)
+    return tmp_path / mdx.name
+
+
+@pytest.fixture
+def word_list(tmp_path):
+    words = tmp_path / "words.txt"
+    words.write_text("# Lesson 1\n1-01\nStuck\n# Lesson 2\nxyzzy\nARMOR\n", encoding="utf-8")
+    return words
+
+
+def test_lookup_entry_reports_resolved_headword(sample_mdx):
+    with Dictionary(sample_mdx) as dictionary:
+        assert dictionary.lookup_entry("1-01")[0] == "1-01"
+        # @@@LINK= redirects and case fallbacks
+        headword, html = dictionary.lookup_entry(" Stuck ")
+        assert headword == "stick" and html == dictionary.lookup_html("stuck")
+        assert dictionary.lookup_entry("ARMOR")[0] == "armour"
+        assert dictionary.lookup_entry("xyzzy") == (None, "")
+
+    with Dictionary(sample_mdx, variants=True) as dictionary:
+        assert dictionary.lookup_entry("sticks")[0] == "stick"
+
+
+def test_mdx2jsonl_writes_one_record_per_word(tmp_path, sample_mdx, word_list):
+    output = tmp_path / "out" / "words.jsonl"
+    progress = []
+    found, not_found, invalid = mdx2jsonl(
+        sample_mdx, word_list, output, progress_callback=lambda p, m: progress.append(p)
+    )
+
+    assert (found, not_found) == (3, 1)
+    assert invalid == {"Lesson 2": ["xyzzy"]}
+    assert progress[-1] == 100
+    records = [json.loads(line) for line in output.read_text("utf-8").splitlines()]
+    assert [(r["lesson"], r["word"], r["resolved_headword"], r["found"]) for r in records] == [
+        ("Lesson 1", "1-01", "1-01", True),
+        ("Lesson 1", "Stuck", "stick", True),
+        ("Lesson 2", "xyzzy", None, False),
+        ("Lesson 2", "ARMOR", "armour", True),
+    ]
+    assert records[2]["html"] == ""
+    assert "text" not in records[0] and "images" not in records[0]
+
+
+def test_mdx2jsonl_text_and_image_references(sample_mdx, word_list):
+    buffer = io.BytesIO()
+    mdx2jsonl(sample_mdx, word_list, buffer, with_text=True, with_images=True)
+
+    records = [json.loads(line) for line in buffer.getvalue().decode("utf-8").splitlines()]
+    first = records[0]
+    assert first["text"] and "<" not in first["text"]
+    assert first["images"] and all(not src.startswith("data:") for src in first["images"])
+    assert all(src in first["html"] for src in first["images"])
+    assert (records[2]["text"], records[2]["images"]) == ("", [])
+
+
+def test_definition_fields():
+    html = '<div>A  <b>red</b>\n apple<img src="a.png"/></div>'
+    assert definition_fields(html, True, True) == {"text": "A red apple", "images": ["a.png"]}
+    assert definition_fields("", True, False) == {"text": ""}
+
+
+def test_mdx2jsonl_gz_output(tmp_path, sample_mdx, word_list):
+    output = tmp_path / "words.jsonl.gz"
+    mdx2jsonl(sample_mdx, word_list, output)
+
+    lines = gzip.decompress(output.read_bytes()).decode("utf-8").splitlines()
+    assert [json.loads(line)["word"] for line in lines] == ["1-01", "Stuck", "xyzzy", "ARMOR"]
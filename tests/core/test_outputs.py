@@ -0,0 +1,115 @@
+"""Tests for multi-target conversion (mdx2outputs)"""
+
+import shutil
+from pathlib import Path
+from unittest.mock import patch
+
+import pytest
+
+from mdxscraper.core import converter
+from mdxscraper.core.converter import mdx2outputs
+
+SAMPLE_DIR = Path(__file__).resolve().parents[2] / "data" / "mdict" / "Learn These Words First"
+
+
+@pytest.fixture
+def sample_mdx(tmp_path):
+    mdx = SAMPLE_DIR / "Learn These Words First.mdx"
+    if not mdx.exists():
+        pytest.skip("sample dictionary not available")
+    for name in ("Learn These Words First.mdx", "Learn These Words First.mdd", "ltwf.css"):
+        shutil.copy(SAMPLE_DIR / name, tmp_path / name)
+    return tmp_path / mdx.name
+
+
+@pytest.fixture
+def word_list(tmp_path):
+    words = tmp_path / "words.txt"
+    words.write_text("# Lesson 1\n1-01\n1-02\nxyzzy\n", encoding="utf-8")
+    return words
+
+
+@pytest.fixture
+def sinks():
+    """Patch wkhtmltopdf/wkhtmltoimage, recording the HTML each conversion reads."""
+    inputs = {}
+
+    def fake_convert(html_file, output_file, configuration=None, options=None):
+        inputs[Path(output_file).suffix] = (html_file, Path(html_file).read_text("utf-8"))
+        Path(output_file).write_bytes(b"out")
+
+    with patch(
+        "mdxscraper.core.converter.validate_wkhtmltopdf_for_pdf_conversion",
+        return_value=(True, ""),
+    ), patch("mdxscraper.core.converter.get_wkhtmltopdf_path", return_value="wkhtmltopdf"), patch(
+        "mdxscraper.core.converter.pdfkit"
+    ) as mock_pdfkit, patch(
+        "mdxscraper.core.converter.imgkit"
+    ) as mock_imgkit:
+        mock_pdfkit.from_file.side_effect = fake_convert
+        mock_imgkit.from_file.side_effect = fake_convert
+        yield inputs
+
+
+def test_mdx2outputs_builds_html_once(tmp_path, sample_mdx, word_list, sinks):
+    outputs = [tmp_path / "out" / name for name in ("o.html", "o.pdf", "o.jpg")]
+    progress = []
+
+    with patch(
+        "mdxscraper.core.converter.Dictionary", wraps=converter.Dictionary
+    ) as mock_dictionary:
+        found, not_found, invalid = mdx2outputs(
+            sample_mdx,
+            word_list,
+            outputs,
+            pdf_options={"page-size": "A4"},
+            img_options={".jpg": {"quality": 50}},
+            progress_callback=lambda p, m: progress.append(p),
+        )
+
+    assert (found, not_found) == (2, 1)
+    assert invalid == {"Lesson 1": ["xyzzy"]}
+    assert mock_dictionary.call_count == 1
+    html = outputs[0].read_text(encoding="utf-8")
+    # Both conversions read the finished .html output itself
+    assert sinks[".pdf"] == (str(outputs[0]), html)
+    assert sinks[".jpg"] == (str(outputs[0]), html)
+    assert outputs[1].exists() and outputs[2].exists()
+    assert progress[-1] == 100 and 80 in progress
+
+
+def test_mdx2outputs_without_html_removes_temp_file(tmp_path, sample_mdx, word_list, sinks):
+    mdx2outputs(sample_mdx, word_list, [tmp_path / "o.pdf", tmp_path / "o.jpg"])
+
+    temp_file = Path(sinks[".pdf"][0])
+    assert temp_file == Path(sinks[".jpg"][0])
+    assert not temp_file.exists()
+    assert sorted(p.name for p in tmp_path.glob("o.*")) == ["o.jpg", "o.pdf"]
+
+
+def test_mdx2outputs_external_assets_allows_html_dir(tmp_path, sample_mdx, word_list):
+    output = tmp_path / "out" / "o.html"
+    with patch(
+        "mdxscraper.core.converter.validate_wkhtmltopdf_for_pdf_conversion",
+        return_value=(True, ""),
+    ), patch("mdxscraper.core.converter.get_wkhtmltopdf_path", return_value="wkhtmltopdf"), patch(
+        "mdxscraper.core.converter.pdfkit"
+    ) as mock_pdfkit:
+        mdx2outputs(sample_mdx, word_list, [output, tmp_path / "o.pdf"], external_assets=True)
+
+    options = mock_pdfkit.from_file.call_args.kwargs["options"]
+    assert options["allow"] == str(output.parent)
+    assert (output.parent / "assets").is_dir()
+
+
+@pytest.mark.parametrize(
+    "outputs, message",
+    [
+        ([], "No output files"),
+        (["a.docx"], "Unsupported output extension"),
+        (["a.html", "b.html"], "At most one"),
+    ],
+)
+def test_mdx2outputs_rejects_bad_targets(outputs, message):
+    with pytest.raises(ValueError, match=message):
+        mdx2outputs("d.mdx", "w.txt", outputs)
@@ -0,0 +1,80 @@
+"""Tests for process-pool rendering (mdx2html workers=N)"""
+
+import shutil
+from pathlib import Path
+
+import pytest
+
+from mdxscraper.core.converter import mdx2html
+from mdxscraper.core.dictionary import Dictionary
+from mdxscraper.core.html_writer import FragmentRenderer
+from mdxscraper.core.parallel import _chunks, iter_fragments
+
+SAMPLE_MDX = (
+    Path(__file__).resolve().parents[2]
+    / "data"
+    / "mdict"
+    / "Learn These Words First"
+    / "Learn These Words First.mdx"
+)
+
+
+@pytest.fixture
+def sample_mdx(tmp_path):
+    if not SAMPLE_MDX.exists():
+        pytest.skip("sample dictionary not available")
+    mdx_file = tmp_path / SAMPLE_MDX.name
+    shutil.copy(SAMPLE_MDX, mdx_file)
+    return mdx_file
+
+
+def test_chunks_keeps_order_and_remainder():
+    assert list(_chunks(iter("abcde"), 2)) == [["a", "b"], ["c", "d"], ["e"]]
+    assert list(_chunks([], 3)) == []
+
+
+def test_iter_fragments_rejects_zero_workers():
+    with pytest.raises(ValueError):
+        list(iter_fragments("dict.mdx", ["a"], workers=0))
+
+
+def test_mdx2html_workers_match_single_process(sample_mdx, tmp_path):
+    input_file = tmp_path / "words.txt"
+    input_file.write_text(
+        "# Lesson 1\nsee\nnotaword\nbig\n# Lesson 2\nsmall\nhouse\nxyzzy\ngo\n",
+        encoding="utf-8",
+    )
+    serial = tmp_path / "serial.html"
+    parallel = tmp_path / "parallel.html"
+
+    expected = mdx2html(sample_mdx, input_file, serial, stream=True)
+    result = mdx2html(sample_mdx, input_file, parallel, workers=2)
+
+    assert result == expected
+    assert expected[1] == 2
+    assert parallel.read_bytes() == serial.read_bytes()
+
+
+def test_iter_fragments_yields_in_input_order(sample_mdx):
+    words = ["see", "big", "notaword", "small", "house", "go", "come"]
+    with Dictionary(sample_mdx) as dictionary:
+        renderer = FragmentRenderer(dictionary.impl)
+        expected = [renderer.render(w, dictionary.lookup_html(w)) for w in words]
+
+    # Tiny chunks and window so several chunks cycle through both processes
+    fragments = list(iter_fragments(sample_mdx, words, workers=2, chunk_size=2, window=2))
+    assert fragments == expected
+
+
+def test_mdx2html_workers_dedupe_matches_single_process(sample_mdx, tmp_path):
+    input_file = tmp_path / "words.txt"
+    input_file.write_text("# L1\nsee\nbig\nsee\n# L2\nbig\nnotaword\nsee\n", encoding="utf-8")
+    serial = tmp_path / "serial.html"
+    parallel = tmp_path / "parallel.html"
+
+    expected = mdx2html(sample_mdx, input_file, serial, stream=True, dedupe=True)
+    result = mdx2html(sample_mdx, input_file, parallel, workers=2, dedupe=True)
+
+    assert result == expected
+    assert parallel.read_bytes() == serial.read_bytes()
+    assert serial.read_text(encoding="utf-8").count('class="duplicate_entry"') == 3
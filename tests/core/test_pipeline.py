@@ -0,0 +1,82 @@
+"""Tests for the staged conversion pipeline"""
+
+import threading
+from unittest.mock import Mock, patch
+
+import pytest
+
+from mdxscraper.core.converter import mdx2html
+from mdxscraper.core.pipeline import Pipeline, Stage
+
+
+def test_pipeline_keeps_order_and_counts_items():
+    pipeline = Pipeline([Stage("double", lambda x: x * 2), Stage("str", str)], maxsize=2)
+    assert list(pipeline.run(range(100))) == [str(i * 2) for i in range(100)]
+
+    metrics = pipeline.metrics()
+    assert [m.name for m in metrics] == ["input", "double", "str", "sink"]
+    assert all(m.items == 100 for m in metrics)
+    assert all(m.queue_max <= 2 for m in metrics)
+    assert metrics[1].throughput > 0
+
+
+def test_pipeline_reraises_stage_errors():
+    def fail(x):
+        if x == 3:
+            raise KeyError(x)
+        return x
+
+    pipeline = Pipeline([Stage("fail", fail)])
+    with pytest.raises(KeyError):
+        list(pipeline.run(range(10)))
+    assert not [t for t in threading.enumerate() if t.name.startswith("pipeline-")]
+
+
+def test_pipeline_reraises_source_errors():
+    def source():
+        yield 1
+        raise RuntimeError("broken input")
+
+    with pytest.raises(RuntimeError, match="broken input"):
+        list(Pipeline([Stage("id", lambda x: x)]).run(source()))
+
+
+def test_pipeline_early_close_stops_threads():
+    results = Pipeline([Stage("id", lambda x: x)], maxsize=1).run(iter(range(10**6)))
+    assert next(results) == 0
+    results.close()
+    assert not [t for t in threading.enumerate() if t.name.startswith("pipeline-")]
+
+
+def test_pipeline_rejects_empty_queues():
+    with pytest.raises(ValueError):
+        Pipeline([], maxsize=0)
+
+
+def test_mdx2html_pipeline_matches_stream(tmp_path):
+    lessons = [
+        {"name": "Lesson 1", "words": ["word1", "word2"]},
+        {"name": "Lesson 2", "words": ["word3"]},
+    ]
+    mock_dictionary = Mock()
+    mock_dictionary.impl = Mock(spec=[])
+    mock_dictionary.lookup_html.side_effect = lambda w: "" if w == "word2" else f"<p>{w}</p>"
+    mock_dictionary.present_words.side_effect = lambda words: {
+        w for w in words if mock_dictionary.lookup_html(w)
+    }
+    metrics_callback = Mock()
+
+    outputs = []
+    for options in ({"stream": True}, {"pipeline": True, "metrics_callback": metrics_callback}):
+        output = tmp_path / "out.html"
+        with patch("mdxscraper.core.converter.WordParser") as mock_parser:
+            with patch("mdxscraper.core.converter.Dictionary", return_value=mock_dictionary):
+                mock_parser.return_value.parse.return_value = lessons
+                result = mdx2html("test.mdx", "test.txt", output, **options)
+        assert result[:2] == (2, 1)
+        outputs.append(output.read_bytes())
+
+    assert outputs[0] == outputs[1]
+    (metrics,), _ = metrics_callback.call_args
+    assert [m.name for m in metrics] == ["input", "lookup", "transform", "assets", "sink"]
+    assert all(m.items == 3 for m in metrics)
@@ -0,0 +1,145 @@
+"""Tests for piping HTML to wkhtmltopdf/wkhtmltoimage (pipe=True)"""
+
+import shutil
+import sys
+from pathlib import Path
+from unittest.mock import patch
+
+import pytest
+from PIL import Image
+
+from mdxscraper.core.converter import _pipe_html, mdx2img, mdx2pdf
+
+SAMPLE_DIR = Path(__file__).resolve().parents[2] / "data" / "mdict" / "Learn These Words First"
+
+# Stand-ins for the renderers: read HTML on stdin, write the result to a file or stdout
+FAKE_WKHTMLTOPDF = (
+    "import sys; html = sys.stdin.buffer.read(); assert html.startswith(b'<head>');"
+    "open(sys.argv[1], 'wb').write(b'%PDF ' + html)"
+)
+FAKE_WKHTMLTOIMAGE = (
+    "import io, sys; from PIL import Image; assert b'</html>' in sys.stdin.buffer.read();"
+    "out = io.BytesIO(); Image.new('RGB', (4, 3), 'red').save(out, sys.argv[1]);"
+    "sys.stdout.buffer.write(out.getvalue())"
+)
+
+
+@pytest.fixture
+def sample_mdx(tmp_path):
+    mdx = SAMPLE_DIR / "Learn These Words First.mdx"
+    if not mdx.exists():
+        pytest.skip("sample dictionary not available")
+    for name in ("Learn These Words First.mdx", "Learn These Words First.mdd", "ltwf.css"):
+        shutil.copy(SAMPLE_DIR / name, tmp_path / name)
+    return tmp_path / mdx.name
+
+
+@pytest.fixture
+def word_list(tmp_path):
+    words = tmp_path / "words.txt"
+    words.write_text("# Lesson 1\n1-01\n1-02\nxyzzy\n", encoding="utf-8")
+    return words
+
+
+@pytest.fixture
+def no_temp_files():
+    with patch("tempfile.NamedTemporaryFile", side_effect=AssertionError("temp file")):
+        yield
+
+
+def test_pipe_html_streams_stdin_and_collects_stdout():
+    command = [sys.executable, "-c", "import sys; sys.stdout.write(sys.stdin.read().upper())"]
+    result, stdout = _pipe_html(command, lambda stdin: stdin.write(b"abc" * 100_000) and "ok")
+    assert (result, stdout) == ("ok", b"ABC" * 100_000)
+
+
+def test_pipe_html_reports_renderer_failure():
+    failing = [sys.executable, "-c", "import sys; sys.stderr.write('boom'); sys.exit(3)"]
+    # The renderer exits without reading: writing more than a pipe buffer breaks the pipe
+    with pytest.raises(OSError, match="exited with code 3:\n.*boom"):
+        _pipe_html(failing, lambda stdin: stdin.write(b"x" * 10_000_000))
+
+
+def test_pipe_html_kills_renderer_when_writing_fails():
+    command = [sys.executable, "-c", "import sys; sys.stdin.read()"]
+
+    def write_html(stdin):
+        raise ValueError("lookup failed")
+
+    with pytest.raises(ValueError, match="lookup failed"):
+        _pipe_html(command, write_html)
+
+
+def test_mdx2pdf_pipe(tmp_path, sample_mdx, word_list, no_temp_files):
+    output = tmp_path / "out" / "o.pdf"
+    progress = []
+
+    with patch(
+        "mdxscraper.core.converter.validate_wkhtmltopdf_for_pdf_conversion",
+        return_value=(True, ""),
+    ), patch("mdxscraper.core.converter.get_wkhtmltopdf_path", return_value="wkhtmltopdf"), patch(
+        "mdxscraper.core.converter.pdfkit"
+    ) as mock_pdfkit, patch(
+        "mdxscraper.core.converter._render_html", side_effect=AssertionError("buffered")
+    ):
+        mock_pdfkit.PDFKit.return_value.command.side_effect = lambda path: [
+            sys.executable,
+            "-c",
+            FAKE_WKHTMLTOPDF,
+            path,
+        ]
+        found, not_found, invalid = mdx2pdf(
+            sample_mdx,
+            word_list,
+            output,
+            {"page-size": "A4"},
+            progress_callback=lambda p, m: progress.append(p),
+            pipe=True,
+        )
+
+    assert (found, not_found) == (2, 1)
+    assert invalid == {"Lesson 1": ["xyzzy"]}
+    pdf = output.read_bytes()
+    assert pdf.startswith(b"%PDF <head>") and b'id="lesson_Lesson 1"' in pdf
+    assert mock_pdfkit.PDFKit.call_args.kwargs["options"] == {"page-size": "A4"}
+    mock_pdfkit.from_file.assert_not_called()
+    assert progress[-1] == 100 and 85 in progress
+
+
+@pytest.mark.parametrize("suffix, image_format", [(".webp", "WEBP"), (".jpg", "JPEG")])
+def test_mdx2img_pipe_reads_image_from_stdout(
+    tmp_path, sample_mdx, word_list, no_temp_files, suffix, image_format
+):
+    output = tmp_path / f"o{suffix}"
+
+    with patch("mdxscraper.core.converter.imgkit.IMGKit") as mock_imgkit:
+        mock_imgkit.return_value.command.side_effect = lambda: [
+            sys.executable,
+            "-c",
+            FAKE_WKHTMLTOIMAGE,
+            "PNG" if suffix == ".webp" else "JPEG",
+        ]
+        mdx2img(sample_mdx, word_list, output, {"width": 800}, pipe=True)
+
+    options = mock_imgkit.call_args.kwargs["options"]
+    assert options["format"] == ("png" if suffix == ".webp" else "jpg")
+    assert options["width"] == "800"
+    with Image.open(output) as image:
+        assert (image.format, image.size) == (image_format, (4, 3))
+
+
+def test_mdx2pdf_pipe_falls_back_to_temp_file_for_external_assets(
+    tmp_path, sample_mdx, word_list
+):
+    with patch(
+        "mdxscraper.core.converter.validate_wkhtmltopdf_for_pdf_conversion",
+        return_value=(True, ""),
+    ), patch("mdxscraper.core.converter.get_wkhtmltopdf_path", return_value="wkhtmltopdf"), patch(
+        "mdxscraper.core.converter.pdfkit"
+    ) as mock_pdfkit:
+        mdx2pdf(sample_mdx, word_list, tmp_path / "o.pdf", {}, external_assets=True, pipe=True)
+
+    html_file = mock_pdfkit.from_file.call_args.args[0]
+    assert html_file.endswith(".html")
+    assert mock_pdfkit.from_file.call_args.kwargs["options"]["allow"] == str(Path(html_file).parent)
+    mock_pdfkit.PDFKit.assert_not_called()
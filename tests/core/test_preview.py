@@ -0,0 +1,149 @@
+"""Tests for preview rendering (mdx2pdf_preview)"""
+
+import io
+import json
+import shutil
+from pathlib import Path
+from unittest.mock import patch
+from urllib.parse import unquote
+
+import pytest
+from bs4 import BeautifulSoup
+from PIL import Image
+
+from mdxscraper.core.preview import (
+    PlaceholderImages,
+    PreviewProfile,
+    mdx2pdf_preview,
+    placeholder_image,
+    sample_words,
+)
+from mdxscraper.core.renderer import embed_images
+
+SAMPLE_DIR = Path(__file__).resolve().parents[2] / "data" / "mdict" / "Learn These Words First"
+
+LESSONS = [
+    {"name": "L1", "words": ["a", "b", "c", "d"]},
+    {"name": "L2", "words": []},
+    {"name": "L3", "words": ["e", "f"]},
+    {"name": "L4", "words": ["g", "h"]},
+]
+
+
+@pytest.fixture
+def sample_mdx(tmp_path):
+    mdx = SAMPLE_DIR / "Learn These Words First.mdx"
+    if not mdx.exists():
+        pytest.skip("sample dictionary not available")
+    for name in ("Learn These Words First.mdx", "Learn These Words First.mdd", "ltwf.css"):
+        shutil.copy(SAMPLE_DIR / name, tmp_path / name)
+    return tmp_path / mdx.name
+
+
+@pytest.fixture
+def word_list(tmp_path):
+    words = tmp_path / "words.txt"
+    words.write_text(
+        "# Lesson 1\n1-01\n1-02\n# Lesson 2\n1-03\n# Lesson 3\n1-04\n1-05\n",
+        encoding="utf-8",
+    )
+    return words
+
+
+def _png(width, height):
+    buffer = io.BytesIO()
+    Image.new("RGB", (width, height), "red").save(buffer, format="PNG")
+    return buffer.getvalue()
+
+
+def test_profile_selects_first_lessons_or_a_sample():
+    assert [l["name"] for l in PreviewProfile(lessons=2).select(LESSONS)] == ["L1", "L2"]
+    assert PreviewProfile(lessons=None).select(LESSONS) == LESSONS
+    assert PreviewProfile(sample_words=4).select(LESSONS) == [
+        {"name": "L1", "words": ["a", "c"]},
+        {"name": "L3", "words": ["e"]},
+        {"name": "L4", "words": ["g"]},
+    ]
+
+
+def test_sample_words_keeps_everything_when_count_covers_the_list():
+    assert sample_words(LESSONS, 8) == LESSONS
+    assert sample_words(LESSONS, 1) == [{"name": "L1", "words": ["a"]}]
+
+
+def test_profile_pdf_options_lower_resolution():
+    options = PreviewProfile(dpi=96).pdf_options({"page-size": "A5", "outline": ""})
+    assert options["page-size"] == "A5"
+    assert options["dpi"] == options["image-dpi"] == "96"
+    assert "lowquality" in options and "no-outline" in options
+    assert "outline" not in options
+
+
+def test_placeholder_keeps_image_size():
+    box = placeholder_image(_png(300, 40)).decode("utf-8")
+    assert 'width="300" height="40"' in box
+    # Unreadable images get the default box
+    assert 'width="120" height="90"' in placeholder_image(b"<svg/>").decode("utf-8")
+
+
+def test_placeholder_images_replace_mdd_images():
+    class FakeMdd:
+        _mdd_db = True
+
+        def mdd_lookup(self, key):
+            return [_png(64, 32)] if key == "\\pic.png" else []
+
+    soup = BeautifulSoup('<img src="pic.png"/><img src="missing.png"/>', "lxml")
+    embed_images(soup, FakeMdd(), optimizer=PlaceholderImages())
+
+    images = soup.find_all("img")
+    assert images[0]["src"].startswith("data:image/svg+xml")
+    assert unquote(images[0]["src"]).endswith(placeholder_image(_png(64, 32)).decode("utf-8"))
+    assert images[1]["src"] == "missing.png"
+
+
+def test_mdx2pdf_preview_renders_selection(tmp_path, word_list):
+    calls = []
+
+    def fake_mdx2pdf(mdx_file, input_file, output_file, pdf_options, **kwargs):
+        calls.append((json.loads(Path(input_file).read_text("utf-8")), pdf_options, kwargs))
+        return 2, 0, {}
+
+    with patch("mdxscraper.core.preview.mdx2pdf", side_effect=fake_mdx2pdf) as mock_mdx2pdf:
+        result = mdx2pdf_preview(
+            "d.mdx", word_list, tmp_path / "p.pdf", {"page-size": "A4"}, with_toc=False
+        )
+
+    assert result == (2, 0, {})
+    lessons, options, kwargs = calls[0]
+    assert [l["name"] for l in lessons] == ["Lesson 1", "Lesson 2"]
+    assert options["page-size"] == "A4" and options["image-dpi"] == "72"
+    assert isinstance(kwargs["optimize_images"], PlaceholderImages)
+    assert kwargs["with_toc"] is False
+    # The temporary word list is removed
+    assert not Path(mock_mdx2pdf.call_args.args[1]).exists()
+
+
+def test_mdx2pdf_preview_end_to_end(tmp_path, sample_mdx, word_list):
+    rendered = {}
+
+    def fake_from_file(html_file, output_file, configuration=None, options=None):
+        rendered["html"] = Path(html_file).read_text("utf-8")
+        rendered["options"] = options
+        Path(output_file).write_bytes(b"%PDF")
+
+    with patch(
+        "mdxscraper.core.converter.validate_wkhtmltopdf_for_pdf_conversion",
+        return_value=(True, ""),
+    ), patch("mdxscraper.core.converter.get_wkhtmltopdf_path", return_value="wkhtmltopdf"), patch(
+        "mdxscraper.core.converter.pdfkit"
+    ) as mock_pdfkit:
+        mock_pdfkit.from_file.side_effect = fake_from_file
+        found, not_found, _ = mdx2pdf_preview(
+            sample_mdx, word_list, tmp_path / "p.pdf", profile=PreviewProfile(lessons=1)
+        )
+
+    assert (found, not_found) == (2, 0)
+    assert "word_1-01" in rendered["html"] and "word_1-03" not in rendered["html"]
+    assert "data:image/png" not in rendered["html"]
+    assert rendered["options"]["lowquality"] == ""
@@ -7,12 +7,12 @@ import pytest
 from bs4 import BeautifulSoup
 
 from mdxscraper.core.renderer import embed_images, get_css, merge_css
+from mdxscraper.mdict.mdict_query import IndexBuilder
 
 
 def test_get_css_from_file():
     """Test getting CSS from file"""
-    mock_soup = Mock()
-    mock_soup.head.link = {"href": "style.css"}
+    soup = BeautifulSoup('<html><head><link href="style.css"></head></html>', "html.parser")
 
     mock_mdx_path = Path("test.mdx")
     mock_dictionary = Mock()
@@ -21,15 +21,14 @@ def test_get_css_from_file():
 
     with patch("pathlib.Path.exists", return_value=True):
         with patch("pathlib.Path.read_bytes", return_value=css_content.encode("utf-8")):
-            result = get_css(mock_soup, mock_mdx_path, mock_dictionary)
+            result = get_css(soup, mock_mdx_path, mock_dictionary)
 
             assert result == css_content
 
 
 def test_get_css_from_mdd():
     """Test getting CSS from MDD database"""
-    mock_soup = Mock()
-    mock_soup.head.link = {"href": "style.css"}
+    soup = BeautifulSoup('<html><head><link href="style.css"></head></html>', "html.parser")
 
     mock_mdx_path = Path("test.mdx")
     mock_dictionary = Mock()
@@ -38,7 +37,7 @@ def test_get_css_from_mdd():
     mock_dictionary.mdd_lookup.return_value = [b"body { margin: 0; }"]
 
     with patch("pathlib.Path.exists", return_value=False):
-        result = get_css(mock_soup, mock_mdx_path, mock_dictionary)
+        result = get_css(soup, mock_mdx_path, mock_dictionary)
 
         assert result == "body { margin: 0; }"
         mock_dictionary.get_mdd_keys.assert_called_once_with("*style.css")
@@ -47,8 +46,7 @@ def test_get_css_from_mdd():
 
 def test_get_css_not_found():
     """Test getting CSS when not found"""
-    mock_soup = Mock()
-    mock_soup.head.link = {"href": "style.css"}
+    soup = BeautifulSoup('<html><head><link href="style.css"></head></html>', "html.parser")
 
     mock_mdx_path = Path("test.mdx")
     mock_dictionary = Mock()
@@ -56,15 +54,14 @@ def test_get_css_not_found():
     mock_dictionary.mdd_lookup.return_value = [b""]
 
     with patch("pathlib.Path.exists", return_value=False):
-        result = get_css(mock_soup, mock_mdx_path, mock_dictionary)
+        result = get_css(soup, mock_mdx_path, mock_dictionary)
 
         assert result == ""
 
 
 def test_get_css_exception():
     """Test getting CSS when exception occurs"""
-    mock_soup = Mock()
-    mock_soup.head.link = {"href": "style.css"}
+    soup = BeautifulSoup('<html><head><link href="style.css"></head></html>', "html.parser")
 
     mock_mdx_path = Path("test.mdx")
     mock_dictionary = Mock()
@@ -73,7 +70,7 @@ def test_get_css_exception():
         with patch("pathlib.Path.read_bytes", side_effect=Exception("File error")):
             # The actual function doesn't handle exceptions, so it should raise
             with pytest.raises(Exception, match="File error"):
-                get_css(mock_soup, mock_mdx_path, mock_dictionary)
+                get_css(soup, mock_mdx_path, mock_dictionary)
 
 
 def test_merge_css_basic():
@@ -314,3 +311,65 @@ def test_embed_images_base64_encoding():
 
         expected_b64 = base64.b64encode(b"fake_image_data").decode("ascii")
         assert expected_b64 in img["src"]
+
+
+def test_embed_images_batches_index_builder_lookups():
+    """IndexBuilder dictionaries resolve all images with one batched lookup"""
+    soup = BeautifulSoup(
+        '<img src="a.png"/><img src="img/b.jpg"/><img src="a.png"/><img src="missing.png"/>',
+        "lxml",
+    )
+    mock_dictionary = Mock(spec=IndexBuilder)
+    mock_dictionary._mdd_db = "dict.mdd.db"
+    mock_dictionary.mdd_lookup_many.return_value = {"\\a.png": b"png", "\\img\\b.jpg": b"jpg"}
+    cache = {}
+
+    embed_images(soup, mock_dictionary, cache)
+
+    (keys,), _ = mock_dictionary.mdd_lookup_many.call_args
+    assert list(keys) == ["\\a.png", "\\img\\b.jpg", "\\missing.png"]
+    mock_dictionary.mdd_lookup.assert_not_called()
+    srcs = [img["src"] for img in soup.find_all("img")]
+    assert srcs[0] == srcs[2] == "data:image/png;base64,cG5n"
+    assert srcs[1] == "data:image/jpeg;base64,anBn"
+    assert srcs[3] == "missing.png"
+
+    # Cached images are not requested again
+    embed_images(BeautifulSoup('<img src="a.png"/>', "lxml"), mock_dictionary, cache)
+    assert mock_dictionary.mdd_lookup_many.call_count == 1
+
+
+def test_embed_images_rewrites_every_src_spelling_and_caches_misses():
+    """Leading slashes map to the same MDD key; missing images are not looked up twice"""
+    soup = BeautifulSoup(
+        '<img src="a.png"/><img src="/a.png"/><img src="\\a.png"/><img src="missing.png"/>',
+        "lxml",
+    )
+    mock_dictionary = Mock(spec=IndexBuilder)
+    mock_dictionary._mdd_db = "dict.mdd.db"
+    mock_dictionary.mdd_lookup_many.side_effect = lambda keys: {
+        key: b"png" for key in keys if key == "\\a.png"
+    }
+    cache = {}
+
+    embed_images(soup, mock_dictionary, cache)
+
+    (keys,), _ = mock_dictionary.mdd_lookup_many.call_args
+    assert list(keys) == ["\\a.png", "\\missing.png"]
+    srcs = [img["src"] for img in soup.find_all("img")]
+    assert srcs[:3] == ["data:image/png;base64,cG5n"] * 3
+    assert srcs[3] == "missing.png"
+
+    embed_images(BeautifulSoup('<img src="/missing.png"/>', "lxml"), mock_dictionary, cache)
+    embed_images(BeautifulSoup('<img src="/a.png"/>', "lxml"), mock_dictionary, cache)
+    assert mock_dictionary.mdd_lookup_many.call_count == 1
+
+
+def test_embed_images_caches_misses_without_batching():
+    mock_dictionary = Mock()
+    mock_dictionary._mdd_db = True
+    mock_dictionary.mdd_lookup.return_value = []
+    cache = {}
+    for _ in range(3):
+        embed_images(BeautifulSoup('<img src="nope.png"/>', "lxml"), mock_dictionary, cache)
+    assert mock_dictionary.mdd_lookup.call_count == 1
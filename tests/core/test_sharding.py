@@ -0,0 +1,352 @@
+"""Tests for sharded output (mdx2shards)"""
+
+import gzip
+import re
+import shutil
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from unittest.mock import patch
+
+import pytest
+
+from mdxscraper.core.converter import mdx2pdf
+from mdxscraper.core.images import ImageOptimizer
+from mdxscraper.core.sharding import (
+    INDEX_FILE,
+    Shard,
+    merge_pdfs,
+    mdx2shards,
+    plan_parts,
+    plan_shards,
+)
+
+SAMPLE_DIR = Path(__file__).resolve().parents[2] / "data" / "mdict" / "Learn These Words First"
+
+LESSONS = [
+    {"name": "L1", "words": ["a", "b", "c"]},
+    {"name": "L2", "words": []},
+    {"name": "L3", "words": ["d", "e"]},
+]
+
+
+@pytest.fixture
+def sample_mdx(tmp_path):
+    mdx = SAMPLE_DIR / "Learn These Words First.mdx"
+    if not mdx.exists():
+        pytest.skip("sample dictionary not available")
+    for name in ("Learn These Words First.mdx", "Learn These Words First.mdd", "ltwf.css"):
+        shutil.copy(SAMPLE_DIR / name, tmp_path / name)
+    return tmp_path / mdx.name
+
+
+@pytest.fixture
+def word_list(tmp_path):
+    words = tmp_path / "words.txt"
+    words.write_text(
+        "# Lesson 1\n1-01\n1-02\nxyzzy\n# Lesson 2\n1-03\n1-04\n# Lesson 3\n1-05\n",
+        encoding="utf-8",
+    )
+    return words
+
+
+def test_plan_shards_per_lesson():
+    shards = plan_shards(LESSONS)
+    assert [(s.number, s.name, s.word_count) for s in shards] == [
+        (1, "L1", 3),
+        (2, "L2", 0),
+        (3, "L3", 2),
+    ]
+
+
+def test_plan_shards_per_word_count_splits_lessons():
+    shards = plan_shards(LESSONS, words_per_shard=2)
+    assert [(s.name, s.lessons) for s in shards] == [
+        ("L1", [{"name": "L1", "words": ["a", "b"]}]),
+        (
+            "L1 - L3",
+            [
+                {"name": "L1", "words": ["c"]},
+                {"name": "L2", "words": []},
+                {"name": "L3", "words": ["d"]},
+            ],
+        ),
+        ("L3", [{"name": "L3", "words": ["e"]}]),
+    ]
+    with pytest.raises(ValueError):
+        plan_shards(LESSONS, words_per_shard=0)
+
+
+def test_plan_parts_balances_whole_lessons():
+    lessons = [{"name": f"L{i}", "words": ["w"] * n} for i, n in enumerate([5, 1, 1, 3, 2, 0])]
+    shards = plan_parts(lessons, 3)
+    assert [(s.name, s.word_count) for s in shards] == [
+        ("L0", 5),
+        ("L1 - L3", 5),
+        ("L4 - L5", 2),
+    ]
+    assert [lesson for s in shards for lesson in s.lessons] == lessons
+    assert len(plan_parts(lessons[1:3], 5)) == 2
+    with pytest.raises(ValueError):
+        plan_parts(lessons, 0)
+
+
+def test_plan_parts_splits_oversized_lessons_by_word_count():
+    lessons = [
+        {"name": "Big", "words": [f"b{n}" for n in range(10)]},
+        {"name": "Small", "words": ["s0", "s1"]},
+    ]
+    shards = plan_parts(lessons, 3)
+    assert [(s.name, s.word_count) for s in shards] == [("Big", 4), ("Big", 4), ("Big - Small", 4)]
+    pieces = [lesson for s in shards for lesson in s.lessons]
+    assert [w for piece in pieces for w in piece["words"]] == lessons[0]["words"] + ["s0", "s1"]
+    assert [piece.get("continued", False) for piece in pieces] == [False, True, True, False]
+    assert len(plan_parts(lessons[:1], 4)) == 4
+
+
+def _write_pdf(path, pages, headings):
+    """Write a PDF of blank pages with a top-level outline entry per heading."""
+    pypdf = pytest.importorskip("pypdf")
+    writer = pypdf.PdfWriter()
+    for _ in range(pages):
+        writer.add_blank_page(100, 100)
+    for title, page in headings:
+        parent = writer.add_outline_item(title, page)
+        writer.add_outline_item("definition", page, parent=parent)
+    with open(path, "wb") as f:
+        writer.write(f)
+
+
+def test_merge_pdfs_bookmarks_each_lesson(tmp_path):
+    pypdf = pytest.importorskip("pypdf")
+    first = Shard(1, "A - B", [{"name": "A", "words": []}, {"name": "B", "words": []}])
+    second = Shard(2, "C - D", [{"name": "C", "words": []}, {"name": "D", "words": []}])
+    _write_pdf(tmp_path / "1.pdf", 3, [("A", 0), ("B", 2)])
+    # D is missing from the outline, e.g. wkhtmltopdf ran with no-outline
+    _write_pdf(tmp_path / "2.pdf", 2, [("C", 1)])
+
+    merge_pdfs([(tmp_path / "1.pdf", first), (tmp_path / "2.pdf", second)], tmp_path / "o.pdf")
+
+    reader = pypdf.PdfReader(tmp_path / "o.pdf")
+    assert len(reader.pages) == 5
+    assert [(item.title, reader.get_destination_page_number(item)) for item in reader.outline] == [
+        ("A", 0),
+        ("B", 2),
+        ("C", 4),
+        ("D", 4),
+    ]
+
+
+def test_merge_pdfs_bookmarks_split_lessons_once(tmp_path):
+    pypdf = pytest.importorskip("pypdf")
+    first = Shard(1, "A", [{"name": "A", "words": ["a"]}])
+    second = Shard(2, "A - B", [{"name": "A", "words": ["b"], "continued": True}])
+    second.lessons.append({"name": "B", "words": []})
+    _write_pdf(tmp_path / "1.pdf", 2, [("A", 0)])
+    _write_pdf(tmp_path / "2.pdf", 2, [("A", 0), ("B", 1)])
+
+    merge_pdfs([(tmp_path / "1.pdf", first), (tmp_path / "2.pdf", second)], tmp_path / "o.pdf")
+
+    reader = pypdf.PdfReader(tmp_path / "o.pdf")
+    assert [(item.title, reader.get_destination_page_number(item)) for item in reader.outline] == [
+        ("A", 0),
+        ("B", 3),
+    ]
+
+
+def test_merge_pdfs_points_toc_links_at_merged_pages(tmp_path):
+    pypdf = pytest.importorskip("pypdf")
+    from pypdf.annotations import Link
+
+    first = Shard(1, "A", [{"name": "A", "words": ["a"]}])
+    second = Shard(2, "A - B", [{"name": "A", "words": ["b"], "continued": True}])
+    second.lessons.append({"name": "B", "words": ["c d"]})
+    _write_pdf(tmp_path / "1.pdf", 1, [("A", 0)])
+    _write_pdf(tmp_path / "2.pdf", 3, [("A (continued)", 0), ("B", 2)])
+    # Links of the first part's table of contents as wkhtmltopdf leaves them
+    writer = pypdf.PdfWriter(clone_from=tmp_path / "1.pdf")
+    hrefs = ["#lesson_B", "#word_b", "#word_c%20d", "#word_zz"]
+    urls = ["file:///tmp/build/001-A.html" + href for href in hrefs]
+    for i, url in enumerate(urls + ["https://example.com/#word_b"]):
+        writer.add_annotation(0, Link(rect=(0, i * 10, 50, i * 10 + 8), url=url))
+    writer.write(tmp_path / "1.pdf")
+
+    merge_pdfs([(tmp_path / "1.pdf", first), (tmp_path / "2.pdf", second)], tmp_path / "o.pdf")
+
+    reader = pypdf.PdfReader(tmp_path / "o.pdf")
+    links = [a.get_object() for a in reader.pages[0]["/Annots"]]
+    pages = [
+        reader.get_page_number(a["/Dest"][0]) if "/Dest" in a else a["/A"]["/URI"] for a in links
+    ]
+    assert pages == [3, 1, 3, urls[3], "https://example.com/#word_b"]
+    assert [item.title for item in reader.outline] == ["A", "B"]
+
+
+def test_mdx2pdf_parallel_merges_parts_in_order(tmp_path, sample_mdx, word_list):
+    pypdf = pytest.importorskip("pypdf")
+    output = tmp_path / "out.pdf"
+    rendered = []
+    tocs = []
+
+    def fake_from_file(html_file, output_file, configuration=None, options=None):
+        html = Path(html_file).read_text(encoding="utf-8")
+        lessons = re.findall(r"<h1 id=\"[^\"]*\">([^<]*)</h1>", html)
+        _write_pdf(output_file, len(lessons), [(name, i) for i, name in enumerate(lessons)])
+        rendered.append(lessons)
+        tocs.append((lessons[0], re.findall(r'class="lesson" href="#lesson_([^"]*)"', html)))
+
+    with patch(
+        "mdxscraper.core.sharding.validate_wkhtmltopdf_for_pdf_conversion",
+        return_value=(True, ""),
+    ), patch("mdxscraper.core.sharding.get_wkhtmltopdf_path", return_value="wkhtmltopdf"), patch(
+        "mdxscraper.core.sharding.pdfkit"
+    ) as mock_pdfkit, patch(
+        "mdxscraper.core.sharding.ProcessPoolExecutor", ThreadPoolExecutor
+    ):
+        mock_pdfkit.from_file.side_effect = fake_from_file
+        found, not_found, invalid = mdx2pdf(
+            sample_mdx, word_list, output, {"quiet": ""}, pdf_workers=2
+        )
+
+    assert (found, not_found) == (5, 1)
+    assert invalid == {"Lesson 1": ["xyzzy"]}
+    assert sorted(rendered) == [["Lesson 1"], ["Lesson 2", "Lesson 3"]]
+    # One table of contents for the whole document, at the start of the first part
+    assert sorted(tocs) == [("Lesson 1", ["Lesson 1", "Lesson 2", "Lesson 3"]), ("Lesson 2", [])]
+    reader = pypdf.PdfReader(output)
+    assert [(item.title, reader.get_destination_page_number(item)) for item in reader.outline] == [
+        ("Lesson 1", 0),
+        ("Lesson 2", 1),
+        ("Lesson 3", 2),
+    ]
+
+
+def test_mdx2pdf_parallel_collects_slimming_stats(tmp_path, sample_mdx, word_list):
+    pytest.importorskip("pypdf")
+    from mdxscraper.core.slimming import HtmlSlimmer
+
+    def fake_from_file(html_file, output_file, configuration=None, options=None):
+        _write_pdf(output_file, 1, [])
+
+    slimmer = HtmlSlimmer()
+    with patch(
+        "mdxscraper.core.sharding.validate_wkhtmltopdf_for_pdf_conversion",
+        return_value=(True, ""),
+    ), patch("mdxscraper.core.sharding.get_wkhtmltopdf_path", return_value="wkhtmltopdf"), patch(
+        "mdxscraper.core.sharding.pdfkit"
+    ) as mock_pdfkit, patch(
+        "mdxscraper.core.sharding.ProcessPoolExecutor", ThreadPoolExecutor
+    ):
+        mock_pdfkit.from_file.side_effect = fake_from_file
+        mdx2pdf(sample_mdx, word_list, tmp_path / "out.pdf", {}, pdf_workers=2, slim=slimmer)
+
+    assert slimmer.stats.html_in > slimmer.stats.html_out > 0
+    assert slimmer.stats.css_in > slimmer.stats.css_out > 0
+
+
+def test_mdx2pdf_parallel_rejects_pipe(tmp_path):
+    with pytest.raises(ValueError, match="pipe"):
+        mdx2pdf("d.mdx", "w.txt", tmp_path / "out.pdf", {}, pdf_workers=2, pipe=True)
+
+
+def test_shard_file_name_is_safe():
+    assert Shard(7, "Unit 3: a/b & c").file_name(".pdf") == "007-Unit_3_a_b_c.pdf"
+    assert Shard(12, "第一课").file_name(".html") == "012-第一课.html"
+    assert Shard(1, "??").file_name(".html") == "001-shard.html"
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_mdx2shards_html(tmp_path, sample_mdx, word_list, workers):
+    output_dir = tmp_path / "out"
+    progress = []
+
+    found, not_found, invalid = mdx2shards(
+        sample_mdx,
+        word_list,
+        output_dir,
+        workers=workers,
+        progress_callback=lambda p, m: progress.append(p),
+    )
+
+    assert (found, not_found) == (5, 1)
+    assert invalid == {"Lesson 1": ["xyzzy"]}
+    shard_files = sorted(p.name for p in output_dir.glob("*.html") if p.name != INDEX_FILE)
+    assert shard_files == ["001-Lesson_1.html", "002-Lesson_2.html", "003-Lesson_3.html"]
+    assert progress[0] == 5 and progress[-1] == 100
+
+    # One stylesheet shared by every shard, images written once into assets/
+    stylesheets = list((output_dir / "assets").glob("*.css"))
+    assert len(stylesheets) == 1
+    for name in shard_files:
+        html = (output_dir / name).read_text(encoding="utf-8")
+        assert f'<link href="assets/{stylesheets[0].name}" rel="stylesheet"' in html
+        assert "data:image" not in html
+    index = (output_dir / INDEX_FILE).read_text(encoding="utf-8")
+    assert '<a href="002-Lesson_2.html">Lesson 2</a> (2 words)' in index
+
+
+def test_mdx2shards_leaves_callers_optimizer_untouched(tmp_path, sample_mdx, word_list):
+    optimizer = ImageOptimizer(processes=4)
+    mdx2shards(sample_mdx, word_list, tmp_path / "out", workers=1, optimize_images=optimizer)
+    assert optimizer.processes == 4
+
+
+def test_mdx2shards_precompresses_shared_assets(tmp_path, sample_mdx, word_list):
+    output_dir = tmp_path / "out"
+    mdx2shards(sample_mdx, word_list, output_dir, workers=1, precompress_assets=True)
+
+    (stylesheet,) = (output_dir / "assets").glob("*.css")
+    compressed = (output_dir / "assets" / (stylesheet.name + ".gz")).read_bytes()
+    assert gzip.decompress(compressed) == stylesheet.read_bytes()
+    assert not list((output_dir / "assets").glob("*.png.gz"))
+
+
+def test_mdx2shards_regenerates_selected_shards(tmp_path, sample_mdx, word_list):
+    output_dir = tmp_path / "out"
+    mdx2shards(sample_mdx, word_list, output_dir, words_per_shard=2, workers=1)
+    for path in output_dir.glob("00*.html"):
+        path.unlink()
+
+    found, not_found, _ = mdx2shards(
+        sample_mdx, word_list, output_dir, words_per_shard=2, workers=1, shards=[2]
+    )
+
+    assert (found, not_found) == (1, 1)
+    assert [p.name for p in output_dir.glob("00*.html")] == ["002-Lesson_1_-_Lesson_2.html"]
+    assert "003-Lesson_2_-_Lesson_3.html" in (output_dir / INDEX_FILE).read_text(encoding="utf-8")
+    with pytest.raises(ValueError, match="No such shards"):
+        mdx2shards(sample_mdx, word_list, output_dir, words_per_shard=2, shards=[9])
+
+
+def test_mdx2shards_pdf_converts_each_shard(tmp_path, sample_mdx, word_list):
+    output_dir = tmp_path / "out"
+    rendered = []
+
+    def fake_from_file(html_file, output_file, configuration=None, options=None):
+        assert Path(options["allow"]) == Path(html_file).parent
+        assert (Path(html_file).parent / "assets").is_dir()
+        Path(output_file).write_bytes(b"%PDF")
+        rendered.append(html_file)
+
+    with patch(
+        "mdxscraper.core.sharding.validate_wkhtmltopdf_for_pdf_conversion",
+        return_value=(True, ""),
+    ), patch("mdxscraper.core.sharding.get_wkhtmltopdf_path", return_value="wkhtmltopdf"), patch(
+        "mdxscraper.core.sharding.pdfkit"
+    ) as mock_pdfkit:
+        mock_pdfkit.from_file.side_effect = fake_from_file
+        mdx2shards(sample_mdx, word_list, output_dir, output_format="pdf", workers=1)
+
+    assert sorted(p.name for p in output_dir.glob("*.pdf")) == [
+        "001-Lesson_1.pdf",
+        "002-Lesson_2.pdf",
+        "003-Lesson_3.pdf",
+    ]
+    # The intermediate HTML and its build directory are removed
+    assert not Path(rendered[0]).parent.exists()
+    assert not (output_dir / "assets").exists()
+    mock_pdfkit.configuration.assert_called_with(wkhtmltopdf="wkhtmltopdf")
+
+
+def test_mdx2shards_rejects_unknown_format(tmp_path):
+    with pytest.raises(ValueError, match="Unknown shard format"):
+        mdx2shards("d.mdx", "w.txt", tmp_path, output_format="docx")
@@ -0,0 +1,127 @@
+"""Tests for HTML slimming and unused-CSS pruning"""
+
+from unittest.mock import Mock, patch
+
+import pytest
+
+from mdxscraper.core.converter import _html_kwargs, mdx2html
+from mdxscraper.core.slimming import CssUsage, HtmlSlimmer, minify_css, prune_css
+
+
+def _usage(tags=(), classes=(), ids=(), attributes=()):
+    usage = CssUsage()
+    usage.tags.update(tags)
+    usage.classes.update(classes)
+    usage.ids.update(ids)
+    usage.attributes.update(attributes)
+    return usage
+
+
+@pytest.mark.parametrize(
+    "selector, expected",
+    [
+        (".pos", True),
+        (".gone", False),
+        ("span.pos > b", True),
+        ("table td", False),
+        ("p .pos .gone", False),
+        ("#word_a:hover::before", True),
+        ("#nope", False),
+        ("p:not(.gone)", True),
+        ("li:nth-child(2n+1)", False),
+        ("[data-x='a.b']", False),
+        ("p[title]", True),
+        (".a\\:b", True),
+        ("*", True),
+    ],
+)
+def test_css_usage_may_match(selector, expected):
+    usage = _usage(tags={"span", "b", "p"}, classes={"pos"}, ids={"word_a"}, attributes={"title"})
+    assert usage.may_match(selector) is expected
+
+
+def test_prune_css_keeps_at_rules_and_matching_selectors():
+    css = """
+    @charset "utf-8";
+    /* comment with { brace */
+    .pos, .gone { color: red; content: "}{;" }
+    .gone { a: b }
+    @media screen and (max-width: 600px) { .gone { a: b } .pos { c: d } }
+    @media print { .gone { a: b } }
+    @font-face { font-family: "A B"; src: url("a b.ttf") }
+    """
+    pruned = minify_css(prune_css(css, _usage(classes={"pos"})))
+    assert pruned == (
+        '@charset "utf-8";.pos{color:red;content:"}{;"}'
+        "@media screen and (max-width:600px){.pos{c:d}}"
+        '@font-face{font-family:"A B";src:url("a b.ttf")}'
+    )
+
+
+def test_prune_css_tolerates_broken_stylesheets():
+    usage = _usage(classes={"pos"})
+    assert prune_css("} .pos { a: b } .pos { c: d", usage) == ".pos{ a: b }\n.pos{ c: d}"
+
+
+def test_slim_html_strips_non_rendering_markup():
+    slimmer = HtmlSlimmer()
+    html = (
+        '<div class="scrapedword" id="word_a">\n  <span class="pos" onclick="play()">n.</span>'
+        '<script>alert(1)</script><!-- note --><a href="sound://a.mp3"><img src="a.png"></a>'
+        '<p style="display: none">hidden</p><p style="color : red ; ">two   words</p>'
+        "<pre>keep\n  this</pre></div>"
+    )
+
+    slimmed = slimmer.slim_html(html)
+
+    assert slimmed == (
+        '<div class="scrapedword" id="word_a"> <span class="pos">n.</span><a><img src="a.png">'
+        '</a><p style="color:red">two words</p><pre>keep\n  this</pre></div>'
+    )
+    assert {"span", "img", "pre"} <= slimmer.usage.tags
+    assert "pos" in slimmer.usage.classes and "word_a" in slimmer.usage.ids
+    assert slimmer.stats.elements_removed == 2
+    assert slimmer.stats.bytes_saved == len(html) - len(slimmed)
+
+
+def test_slim_head_prunes_against_recorded_fragments():
+    slimmer = HtmlSlimmer()
+    slimmer.slim_html('<span class="pos">n.</span>')
+    css = ".pos {a:b}\n.gone {c:d}"
+    head = f'<head><meta charset="utf-8"/><style type="text/css">{css}</style></head>'
+
+    assert slimmer.slim_head(head) == (
+        '<head><meta charset="utf-8"/><style type="text/css">.pos{a:b}</style></head>'
+    )
+    assert (slimmer.stats.css_in, slimmer.stats.css_out) == (len(css), len(".pos{a:b}"))
+
+
+@pytest.mark.parametrize("stream", [False, True])
+def test_mdx2html_slim(tmp_path, stream):
+    (tmp_path / "d.css").write_text(".used { color: red; }\n.unused { color: blue; }\n")
+    lessons = [{"name": "L1", "words": ["a", "b"]}]
+    mock_dictionary = Mock()
+    mock_dictionary.impl = Mock(spec=[])
+    mock_dictionary.lookup_html.side_effect = lambda w: (
+        '<head><link rel="stylesheet" href="d.css"></head>'
+        f'<body><p class="used">{w}<script>track()</script></p></body>'
+    )
+    slimmer = HtmlSlimmer()
+
+    output = tmp_path / "out.html"
+    with patch("mdxscraper.core.converter.WordParser") as mock_parser:
+        with patch("mdxscraper.core.converter.Dictionary", return_value=mock_dictionary):
+            mock_parser.return_value.parse.return_value = lessons
+            result = mdx2html(tmp_path / "d.mdx", "t.txt", output, stream=stream, slim=slimmer)
+
+    html = output.read_text(encoding="utf-8")
+    assert result[:2] == (2, 0)
+    assert ".used{color:red}" in html
+    assert ".unused" not in html and "<script>" not in html
+    assert html.count('<p class="used">') == 2
+    assert slimmer.stats.bytes_saved > 0
+
+
+def test_html_kwargs_passes_slim_on():
+    assert _html_kwargs(None, 0, False) == {}
+    assert _html_kwargs(None, 0, False, slim=True) == {"slim": True}
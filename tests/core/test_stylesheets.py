@@ -0,0 +1,112 @@
+"""Tests for dictionary stylesheet resolution"""
+
+import codecs
+import os
+from pathlib import Path
+from unittest.mock import Mock
+
+import pytest
+from bs4 import BeautifulSoup
+
+from mdxscraper.core import stylesheets
+from mdxscraper.core.renderer import merge_css
+from mdxscraper.core.stylesheets import decode_css, mdd_keys, resolve_stylesheet
+from mdxscraper.mdict.mdict_query import IndexBuilder
+
+
+@pytest.fixture(autouse=True)
+def clear_stylesheet_cache():
+    stylesheets.clear_cache()
+    yield
+    stylesheets.clear_cache()
+
+
+def _index_builder(tmp_path, stylesheets_by_key):
+    mdd = tmp_path / "dict.mdd"
+    db = tmp_path / "dict.mdd.db"
+    if not mdd.exists():
+        mdd.write_bytes(b"mdd")
+        db.write_bytes(b"db")
+    dictionary = Mock(spec=IndexBuilder)
+    dictionary._mdd_file = str(mdd)
+    dictionary._mdd_db = str(db)
+    dictionary.mdd_lookup_many.side_effect = lambda keys: {
+        key: stylesheets_by_key[key] for key in keys if key in stylesheets_by_key
+    }
+    dictionary.get_mdd_keys.return_value = []
+    return dictionary
+
+
+def test_mdd_keys_normalizes_hrefs():
+    assert mdd_keys("style.css") == ["\\style.css"]
+    assert mdd_keys("./CSS/Main.css?v=2") == [
+        "\\CSS\\Main.css",
+        "\\Main.css",
+        "\\css\\main.css",
+        "\\main.css",
+    ]
+    assert mdd_keys("/a%20b.css") == ["\\a b.css"]
+    assert mdd_keys("") == []
+
+
+def test_decode_css_encodings():
+    assert decode_css(codecs.BOM_UTF8 + "a{}".encode()) == "a{}"
+    assert decode_css(codecs.BOM_UTF16_LE + "é{}".encode("utf-16-le")) == "é{}"
+    assert decode_css('@charset "gbk";\n.词{}'.encode("gbk")) == '@charset "gbk";\n.词{}'
+    assert decode_css(b"a{content:'\xff'}") == "a{content:'�'}"
+
+
+def test_resolve_stylesheet_uses_exact_keys_and_caches(tmp_path):
+    dictionary = _index_builder(tmp_path, {"\\style.css": b"body{margin:0}"})
+
+    assert resolve_stylesheet(dictionary, "style.css") == "body{margin:0}"
+    assert resolve_stylesheet(dictionary, "style.css") == "body{margin:0}"
+
+    dictionary.mdd_lookup_many.assert_called_once_with(["\\style.css"])
+    dictionary.get_mdd_keys.assert_not_called()
+
+    # A new IndexBuilder for the same files hits the cache
+    other = _index_builder(tmp_path, {})
+    assert resolve_stylesheet(other, "style.css") == "body{margin:0}"
+    other.mdd_lookup_many.assert_not_called()
+
+
+def test_resolve_stylesheet_invalidated_by_changed_mdd(tmp_path):
+    dictionary = _index_builder(tmp_path, {"\\style.css": b"old"})
+    assert resolve_stylesheet(dictionary, "style.css") == "old"
+
+    Path(dictionary._mdd_file).write_bytes(b"rebuilt mdd")
+    os.utime(dictionary._mdd_file, ns=(1, 1))
+    dictionary.mdd_lookup_many.side_effect = lambda keys: {"\\style.css": b"new"}
+    assert resolve_stylesheet(dictionary, "style.css") == "new"
+
+
+def test_resolve_stylesheet_falls_back_to_suffix_match(tmp_path):
+    dictionary = _index_builder(tmp_path, {})
+    dictionary.get_mdd_keys.return_value = ["\\css\\style.css"]
+    dictionary.mdd_lookup.return_value = [b"p{}"]
+
+    assert resolve_stylesheet(dictionary, "style.css") == "p{}"
+    dictionary.get_mdd_keys.assert_called_once_with("*\\style.css")
+
+    # Misses are cached as well
+    dictionary.get_mdd_keys.return_value = []
+    assert resolve_stylesheet(dictionary, "missing.css") is None
+    assert resolve_stylesheet(dictionary, "missing.css") is None
+    assert dictionary.get_mdd_keys.call_count == 2
+
+
+def test_merge_css_merges_all_stylesheet_links(tmp_path):
+    dictionary = _index_builder(tmp_path, {"\\a.css": b"a{}", "\\b.css": b"b{}"})
+    (tmp_path / "local.css").write_text("local{}", encoding="utf-8")
+    soup = BeautifulSoup(
+        '<html><head><link rel="stylesheet" href="a.css"><link rel="icon" href="i.png">'
+        '<link rel="stylesheet" href="local.css"><link rel="stylesheet" href="gone.css">'
+        '<link rel="stylesheet" href="b.css"></head><body></body></html>',
+        "html.parser",
+    )
+
+    merge_css(soup, tmp_path, dictionary, "extra{}")
+
+    assert [link["href"] for link in soup.head.find_all("link")] == ["i.png"]
+    assert soup.head.style.string == "a{}\nlocal{}\nb{}extra{}"
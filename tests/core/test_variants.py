@@ -0,0 +1,136 @@
+"""Tests for the variant index and rule sets"""
+
+import sqlite3
+import subprocess
+import sys
+from unittest.mock import Mock, patch
+
+from mdxscraper.core.dictionary import Dictionary
+from mdxscraper.core.variants import (
+    ChineseVariantRules,
+    EnglishInflectionRules,
+    VariantIndex,
+    default_rules,
+)
+
+
+def test_english_rules_regular_and_irregular_forms():
+    rules = EnglishInflectionRules()
+    assert {"runs", "running", "ran"} <= set(rules.variants("run"))
+    assert {"geese"} <= set(rules.variants("goose"))
+    assert {"studies", "studied", "studying"} <= set(rules.variants("study"))
+    assert {"making", "made", "makes"} <= set(rules.variants("make"))
+    assert {"boxes"} <= set(rules.variants("box"))
+
+
+def test_english_rules_double_final_consonant_of_longer_stems():
+    rules = EnglishInflectionRules()
+    assert {"travelled", "travelling", "traveled"} <= set(rules.variants("travel"))
+    assert {"controlled", "controlling"} <= set(rules.variants("control"))
+    assert {"preferred", "preferring"} <= set(rules.variants("prefer"))
+    assert "opened" in set(rules.variants("open"))
+    assert {"stopped", "quitting"} <= set(rules.variants("stop")) | set(rules.variants("quit"))
+    assert "stoped" not in set(rules.variants("stop"))
+    assert {"fixed", "played"} <= set(rules.variants("fix")) | set(rules.variants("play"))
+
+
+def test_english_rules_british_american_spellings():
+    rules = EnglishInflectionRules()
+    assert {"color", "colors"} <= set(rules.variants("colour"))
+    assert {"centre"} <= set(rules.variants("center"))
+    assert {"organize"} <= set(rules.variants("organise"))
+
+
+def test_english_rules_skip_non_alphabetic_keys():
+    rules = EnglishInflectionRules()
+    assert list(rules.variants("中文")) == []
+    assert list(rules.variants("a1")) == []
+
+
+def test_chinese_rules_both_directions():
+    rules = ChineseVariantRules()
+    assert "學習" in set(rules.variants("学习"))
+    assert "学习" in set(rules.variants("學習"))
+    assert list(rules.variants("hello")) == []
+
+
+class FakeImpl:
+    def __init__(self, db, keys):
+        self._mdx_db = str(db)
+        self._mdx_file = __file__
+        conn = sqlite3.connect(db)
+        conn.execute(
+            """CREATE TABLE MDX_INDEX (key_text text not null, file_path text, file_pos integer,
+            compressed_size integer, decompressed_size integer, record_block_type integer,
+            record_start integer, record_end integer, offset integer)"""
+        )
+        conn.execute("CREATE TABLE META (key text, value text)")
+        conn.executemany(
+            "INSERT INTO MDX_INDEX VALUES (?,NULL,?,0,0,0,0,0,0)",
+            [(key, pos) for pos, key in enumerate(keys)],
+        )
+        conn.commit()
+        conn.close()
+        self.keys = keys
+
+    def get_mdx_by_index(self, fmdx, index):
+        return f"<p>{self.keys[index['file_pos']]}</p>"
+
+
+def test_variant_index_single_probe_resolution(tmp_path):
+    impl = FakeImpl(tmp_path / "dict.mdx.db", ["run", "Goose", "colour", "well-being", "学习"])
+    index = VariantIndex(impl)
+
+    assert index.lookup("running") == ["<p>run</p>"]
+    assert index.lookup("GEESE") == ["<p>Goose</p>"]
+    assert index.lookup("goose") == ["<p>Goose</p>"]
+    assert index.lookup("colors") == ["<p>colour</p>"]
+    assert index.lookup("wellbeing") == ["<p>well-being</p>"]
+    assert index.lookup("學習") == ["<p>学习</p>"]
+    assert index.lookup("missing") == []
+
+
+def test_variant_index_reused_until_rules_change(tmp_path):
+    impl = FakeImpl(tmp_path / "dict.mdx.db", ["run"])
+    VariantIndex(impl)
+    with patch.object(VariantIndex, "build") as mock_build:
+        VariantIndex(impl)
+        mock_build.assert_not_called()
+        VariantIndex(impl, rules=[ChineseVariantRules()])
+        mock_build.assert_called_once()
+
+
+def test_variant_index_rebuilt_when_rule_tables_change(tmp_path):
+    impl = FakeImpl(tmp_path / "dict.mdx.db", ["mouse", "学习"])
+    VariantIndex(impl, rules=[EnglishInflectionRules(), ChineseVariantRules()])
+    with patch.object(VariantIndex, "build") as mock_build:
+        VariantIndex(impl, rules=[EnglishInflectionRules(), ChineseVariantRules()])
+        mock_build.assert_not_called()
+        VariantIndex(impl, rules=[EnglishInflectionRules({"mouse": ("meese",)})])
+        VariantIndex(impl, rules=[ChineseVariantRules({"学": "斈"})])
+        assert mock_build.call_count == 2
+
+
+def test_default_rules_built_on_first_use():
+    code = (
+        "import mdxscraper.core.dictionary, mdxscraper.core.variants as v;"
+        "print(v.default_rules.cache_info().currsize)"
+    )
+    result = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True)
+    assert result.stdout.strip() == "0", result.stderr
+    assert default_rules() is default_rules()
+
+
+def test_dictionary_uses_variant_index_instead_of_fallback_queries():
+    builder = Mock()
+    builder.mdx_lookup.return_value = []
+    variant_index = Mock()
+    variant_index.lookup.return_value = ["<p>run</p>"]
+
+    with patch("mdxscraper.core.dictionary.IndexBuilder", return_value=builder):
+        with patch("mdxscraper.core.dictionary.VariantIndex", return_value=variant_index):
+            dictionary = Dictionary("test.mdx", variants=True)
+            assert dictionary.lookup_html("running") == "<p>run</p>"
+
+    builder.mdx_lookup.assert_called_once_with("running")
+    variant_index.lookup.assert_called_once_with("running")
@@ -0,0 +1,45 @@
+"""Tests for BlockCache and cached block reads"""
+
+import zlib
+
+from mdxscraper.mdict.block_cache import BlockCache
+from mdxscraper.mdict.mdict_query import IndexBuilder
+
+
+def test_block_cache_lru_eviction_by_bytes():
+    cache = BlockCache(max_bytes=10)
+    cache.put("a", b"1234")
+    cache.put("b", b"5678")
+    assert cache.get("a") == b"1234"  # refresh "a"
+    cache.put("c", b"90ab")
+    assert "b" not in cache
+    assert "a" in cache and "c" in cache
+    assert cache.size == 8
+
+
+def test_block_cache_rejects_oversized_and_counts():
+    cache = BlockCache(max_bytes=4)
+    cache.put("big", b"12345")
+    assert len(cache) == 0
+    assert cache.get("big") is None
+    cache.put("k", b"12")
+    assert cache.get("k") == b"12"
+    assert (cache.hits, cache.misses) == (1, 1)
+    cache.clear()
+    assert len(cache) == 0 and cache.size == 0
+
+
+def test_read_block_uses_cache_for_real_files(tmp_path):
+    block = b"record data"
+    payload = b"\x02\x00\x00\x00" + b"\x00" * 4 + zlib.compress(block)
+    path = tmp_path / "dict.mdx"
+    path.write_bytes(payload)
+    index = {"file_pos": 0, "compressed_size": len(payload), "record_block_type": 2}
+
+    builder = IndexBuilder.__new__(IndexBuilder)
+    with open(path, "rb") as f:
+        assert builder.read_block(f, index) == block
+    path.write_bytes(b"")  # a second read must not touch the file
+    with open(path, "rb") as f:
+        assert builder.read_block(f, index) == block
+    assert builder.block_cache.hits == 1
@@ -0,0 +1,46 @@
+"""Tests for batched MDD resolution in IndexBuilder"""
+
+import shutil
+from pathlib import Path
+
+import pytest
+
+from mdxscraper.mdict.mdict_query import IndexBuilder
+
+SAMPLE_DIR = Path(__file__).resolve().parents[2] / "data" / "mdict" / "Learn These Words First"
+
+
+@pytest.fixture(scope="module")
+def sample_builder(tmp_path_factory):
+    if not (SAMPLE_DIR / "Learn These Words First.mdd").exists():
+        pytest.skip("sample dictionary not available")
+    tmp_path = tmp_path_factory.mktemp("mdd")
+    for suffix in (".mdx", ".mdd"):
+        name = "Learn These Words First" + suffix
+        shutil.copy(SAMPLE_DIR / name, tmp_path / name)
+    return IndexBuilder(tmp_path / "Learn These Words First.mdx")
+
+
+def test_mdd_lookup_many_matches_single_lookups(sample_builder):
+    keys = sample_builder.get_mdd_keys()[:40]
+    assert keys
+
+    results = sample_builder.mdd_lookup_many(keys + ["\\no-such-image.png", keys[0]])
+
+    assert set(results) == set(keys)
+    for key in keys:
+        assert results[key] == sample_builder.mdd_lookup(key)[0]
+
+
+def test_mdd_lookup_many_decompresses_each_block_once(sample_builder):
+    keys = sample_builder.get_mdd_keys()[:40]
+    sample_builder.block_cache.clear()
+    sample_builder.block_cache.misses = 0
+
+    sample_builder.mdd_lookup_many(keys)
+
+    assert sample_builder.block_cache.misses == len(sample_builder.block_cache)
+
+
+def test_mdd_lookup_many_empty(sample_builder):
+    assert sample_builder.mdd_lookup_many([]) == {}
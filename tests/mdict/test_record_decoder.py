@@ -0,0 +1,84 @@
+"""Tests for RecordDecoder and the IndexBuilder decode path"""
+
+import io
+import zlib
+
+import pytest
+
+from mdxscraper.mdict.mdict_query import IndexBuilder
+from mdxscraper.mdict.record_decoder import RecordDecoder
+
+STYLESHEET = {"1": ["<b>", "</b>"], "2": ["<i>", "</i>"]}
+
+
+def test_decode_without_stylesheet():
+    decoder = RecordDecoder("UTF-8")
+    assert decoder.decode("hello 世界\x00".encode("utf-8")) == "hello 世界"
+    assert not decoder.has_styles
+
+
+def test_decode_memoryview_and_encoding():
+    decoder = RecordDecoder("GBK")
+    data = memoryview("中文释义".encode("gbk"))
+    assert decoder.decode(data) == "中文释义"
+
+
+def test_expand_styles_matches_vendor_semantics():
+    decoder = RecordDecoder("UTF-8", STYLESHEET)
+    text = "head`1`bold\n`2`italic"
+    assert decoder.decode(text.encode("utf-8")) == "head<b>bold</b>\r\n<i>italic</i>"
+
+
+def test_expand_styles_unknown_marker_is_dropped():
+    decoder = RecordDecoder("UTF-8", STYLESHEET)
+    assert decoder.decode(b"`9`plain") == "plain"
+
+
+def test_text_without_markers_is_untouched():
+    decoder = RecordDecoder("UTF-8", STYLESHEET)
+    assert decoder.decode(b"no markers here") == "no markers here"
+
+
+def _builder(encoding="UTF-8", stylesheet=None):
+    builder = IndexBuilder.__new__(IndexBuilder)
+    builder._encoding = encoding
+    builder._stylesheet = stylesheet or {}
+    return builder
+
+
+def test_get_mdx_by_index_zlib_block():
+    block = b"xxxx`1`word`2`def"
+    compressed = b"\x02\x00\x00\x00" + b"\x00" * 4 + zlib.compress(block)
+    fmdx = io.BytesIO(b"pad" + compressed)
+    index = {
+        "file_pos": 3,
+        "compressed_size": len(compressed),
+        "decompressed_size": len(block),
+        "record_block_type": 2,
+        "record_start": 104,
+        "record_end": 100 + len(block),
+        "offset": 100,
+    }
+    builder = _builder(stylesheet=STYLESHEET)
+    assert builder.get_mdx_by_index(fmdx, index) == "<b>word</b><i>def</i>"
+
+
+def test_read_record_is_memoryview():
+    raw = b"\x00" * 8 + b"abcdef"
+    index = {
+        "file_pos": 0,
+        "compressed_size": len(raw),
+        "decompressed_size": 6,
+        "record_block_type": 0,
+        "record_start": 2,
+        "record_end": 5,
+        "offset": 0,
+    }
+    view = _builder().read_record(io.BytesIO(raw), index)
+    assert isinstance(view, memoryview)
+    assert bytes(view) == b"cde"
+
+
+def test_decompress_block_unknown_type():
+    with pytest.raises(ValueError):
+        IndexBuilder.decompress_block(b"\x00" * 12, {"record_block_type": 7})
@@ -196,3 +196,134 @@ def test_execute_export_image(mock_mdx2img):
 
     assert result == (8, 0, [])
     mock_mdx2img.assert_called_once()
+
+
+@patch("mdxscraper.core.converter.mdx2outputs")
+def test_execute_multi_export(mock_mdx2outputs):
+    """Test exporting several formats in one call"""
+    mock_mdx2outputs.return_value = (3, 0, [])
+
+    settings = Mock(spec=SettingsService)
+    settings.cm = Mock()
+    settings.cm.get.side_effect = lambda key, default=None: default
+    settings.get.side_effect = lambda key, default=None: default
+    presets = Mock(spec=PresetsService)
+    presets.parse_css_preset.return_value = (None, None, None)
+    presets.parse_pdf_preset.return_value = {}
+    service = ExportService(settings, presets)
+
+    outputs = [Path("out.html"), Path("out.pdf"), Path("out.webp")]
+    result = service.execute_multi_export(
+        Path("test.txt"), Path("dict.mdx"), outputs, settings_service=settings
+    )
+
+    assert result == (3, 0, [])
+    kwargs = mock_mdx2outputs.call_args.kwargs
+    assert mock_mdx2outputs.call_args.args[2] == outputs
+    assert kwargs["pdf_options"]["page-size"] == "A4"
+    assert set(kwargs["img_options"]) == {".webp"}
+    assert kwargs["img_options"][".webp"]["webp_quality"] == 80
+
+    with pytest.raises(RuntimeError, match="Unsupported output extension"):
+        service.execute_multi_export(
+            Path("test.txt"), Path("dict.mdx"), [Path("out.docx")], settings_service=settings
+        )
+
+
+def test_execute_preview_uses_preview_profile(tmp_path):
+    settings = Mock(spec=SettingsService)
+    settings.cm = Mock()
+    settings.cm.get.side_effect = lambda key, default: {
+        "preview.lessons": 0,
+        "preview.sample_words": 30,
+    }.get(key, default)
+    settings.get.side_effect = lambda key, default: default
+    presets = Mock(spec=PresetsService)
+    presets.parse_pdf_preset.return_value = {}
+    presets.parse_css_preset.return_value = ("color:red", None, None)
+
+    service = ExportService(settings, presets)
+    with patch("mdxscraper.core.preview.mdx2pdf_preview", return_value=(1, 0, {})) as mock_preview:
+        result = service.execute_preview(
+            Path("words.txt"), Path("d.mdx"), tmp_path / "out.pdf", settings_service=settings
+        )
+
+    assert result == (1, 0, {})
+    args, kwargs = mock_preview.call_args
+    assert args[2] == tmp_path / "out.pdf"
+    # mdx2pdf_preview lowers the resolution itself; the options arrive unchanged
+    assert "image-dpi" not in args[3] and "lowquality" not in args[3]
+    profile = kwargs["profile"]
+    assert (profile.lessons, profile.sample_words, profile.placeholder_images) == (None, 30, True)
+    assert kwargs["h1_style"] == "color:red"
+
+
+def test_execute_export_epub(tmp_path):
+    settings = Mock(spec=SettingsService)
+    settings.get.side_effect = lambda key, default: default
+    presets = Mock(spec=PresetsService)
+    presets.parse_css_preset.return_value = (None, "margin:0", None)
+
+    service = ExportService(settings, presets)
+    with patch("mdxscraper.core.epub.mdx2epub", return_value=(2, 0, {})) as mock_epub:
+        result = service.execute_export(
+            Path("words.txt"), Path("d.mdx"), tmp_path / "out.epub", settings_service=settings
+        )
+
+    assert result == (2, 0, {})
+    assert mock_epub.call_args.args[2] == tmp_path / "out.epub"
+    assert mock_epub.call_args.kwargs["scrap_style"] == "margin:0"
+
+
+def test_execute_export_apkg(tmp_path):
+    settings = Mock(spec=SettingsService)
+    settings.get.side_effect = lambda key, default: default
+    presets = Mock(spec=PresetsService)
+    presets.parse_css_preset.return_value = (None, "margin:0", None)
+
+    service = ExportService(settings, presets)
+    with patch("mdxscraper.core.anki.mdx2apkg", return_value=(2, 0, {})) as mock_apkg:
+        result = service.execute_export(
+            Path("words.txt"), Path("d.mdx"), tmp_path / "out.apkg", settings_service=settings
+        )
+
+    assert result == (2, 0, {})
+    assert mock_apkg.call_args.args[2] == tmp_path / "out.apkg"
+    assert mock_apkg.call_args.kwargs["scrap_style"] == "margin:0"
+
+
+def test_execute_export_jsonl(tmp_path):
+    settings = Mock(spec=SettingsService)
+    settings.get.side_effect = lambda key, default: default
+    presets = Mock(spec=PresetsService)
+    presets.parse_css_preset.return_value = (None, None, None)
+
+    service = ExportService(settings, presets)
+    with patch("mdxscraper.core.jsonl.mdx2jsonl", return_value=(3, 1, {})) as mock_jsonl:
+        result = service.execute_export(
+            Path("words.txt"), Path("d.mdx"), tmp_path / "out.jsonl", settings_service=settings
+        )
+
+    assert result == (3, 1, {})
+    assert mock_jsonl.call_args.args[2] == tmp_path / "out.jsonl"
+    assert mock_jsonl.call_args.kwargs["with_text"] is True
+
+
+def test_execute_export_html_gz(tmp_path):
+    settings = Mock(spec=SettingsService)
+    settings.get.side_effect = lambda key, default: default
+    presets = Mock(spec=PresetsService)
+    presets.parse_css_preset.return_value = (None, None, None)
+
+    service = ExportService(settings, presets)
+    with patch("mdxscraper.core.converter.mdx2html", return_value=(1, 0, {})) as mock_html:
+        result = service.execute_export(
+            Path("words.txt"), Path("d.mdx"), tmp_path / "out.html.gz", settings_service=settings
+        )
+
+    assert result == (1, 0, {})
+    assert mock_html.call_args.args[2] == tmp_path / "out.html.gz"
+    with pytest.raises(RuntimeError, match="Unsupported output extension: .gz"):
+        service.execute_export(
+            Path("words.txt"), Path("d.mdx"), tmp_path / "out.gz", settings_service=settings
+        )
@@ -1,5 +1,7 @@
 from __future__ import annotations
 
+import json
+import os
 from unittest import mock
 
 from mdxscraper.utils import path_utils
@@ -27,3 +29,75 @@ def test_validate_wkhtmltopdf_path_variants(monkeypatch):
     with mock.patch("subprocess.run", side_effect=FileNotFoundError()):
         ok, msg = path_utils.validate_wkhtmltopdf_path("/missing/binary")
         assert not ok and "not found" in msg.lower()
+
+
+def _fake_binary(tmp_path):
+    binary = tmp_path / "wkhtmltopdf"
+    binary.write_text("#!/bin/sh\n", encoding="utf-8")
+    return binary
+
+
+def test_validate_executable_cached_by_path_size_mtime(monkeypatch, tmp_path):
+    binary = _fake_binary(tmp_path)
+    calls = []
+    monkeypatch.setattr(
+        path_utils, "validate_wkhtmltopdf_path", lambda p: calls.append(p) or (True, "v1")
+    )
+    path_utils.set_validation_cache_file(None)
+
+    assert path_utils.validate_executable_cached(str(binary)) == (True, "v1")
+    assert path_utils.validate_executable_cached(str(binary)) == (True, "v1")
+    assert len(calls) == 1
+
+    # A replaced binary is validated again
+    os.utime(binary, ns=(1, 1))
+    path_utils.validate_executable_cached(str(binary))
+    assert len(calls) == 2
+
+    path_utils.clear_validation_cache()
+    path_utils.validate_executable_cached(str(binary))
+    assert len(calls) == 3
+
+
+def test_validate_executable_cached_skips_failures(monkeypatch, tmp_path):
+    binary = _fake_binary(tmp_path)
+    calls = []
+    monkeypatch.setattr(
+        path_utils, "validate_wkhtmltopdf_path", lambda p: calls.append(p) or (False, "bad")
+    )
+    path_utils.set_validation_cache_file(None)
+
+    assert path_utils.validate_executable_cached(str(binary)) == (False, "bad")
+    assert path_utils.validate_executable_cached(str(binary)) == (False, "bad")
+    assert len(calls) == 2
+    # Missing executables go straight to the uncached check
+    assert path_utils.validate_executable_cached(str(tmp_path / "missing")) == (False, "bad")
+
+
+def test_validation_cache_file_persists(monkeypatch, tmp_path):
+    binary = _fake_binary(tmp_path)
+    cache_file = tmp_path / "cache" / "validation.json"
+    monkeypatch.setattr(path_utils, "validate_wkhtmltopdf_path", lambda p: (True, "v1"))
+    path_utils.set_validation_cache_file(cache_file)
+    path_utils.validate_executable_cached(str(binary))
+
+    # A new process: loading the file is enough, no subprocess needed
+    monkeypatch.setattr(path_utils, "validate_wkhtmltopdf_path", mock.Mock())
+    path_utils.set_validation_cache_file(cache_file)
+    try:
+        assert path_utils.validate_executable_cached(str(binary)) == (True, "v1")
+        path_utils.validate_wkhtmltopdf_path.assert_not_called()
+        assert os.path.realpath(binary) in json.loads(cache_file.read_text(encoding="utf-8"))
+    finally:
+        path_utils.set_validation_cache_file(None)
+
+
+def test_pdf_conversion_validation_uses_cache(monkeypatch, tmp_path):
+    binary = _fake_binary(tmp_path)
+    run = mock.Mock(return_value=mock.Mock(returncode=0, stdout="wkhtmltopdf 0.12.6"))
+    monkeypatch.setattr(path_utils.subprocess, "run", run)
+    path_utils.set_validation_cache_file(None)
+
+    for _ in range(3):
+        assert path_utils.validate_wkhtmltopdf_for_pdf_conversion(str(binary)) == (True, "")
+    assert run.call_count == 1
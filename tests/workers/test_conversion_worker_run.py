@@ -130,3 +130,37 @@ def test_conversion_worker_success_flow(monkeypatch, tmp_path: Path):
     assert progresses.values and any(p >= 50 for p, _ in progresses.values)
     assert finished.values and "Done." in finished.values[0]
     assert out.exists()
+
+
+@pytest.mark.usefixtures("mock_qt_application")
+def test_conversion_worker_preview_name_drops_compound_suffix(monkeypatch, tmp_path: Path):
+    from mdxscraper.config.config_manager import ConfigManager
+    from mdxscraper.workers import conversion_worker as mod
+    from mdxscraper.workers.conversion_worker import ConversionWorker
+
+    cm = ConfigManager(tmp_path)
+    seed_defaults_and_theme(tmp_path)
+    cm.load()
+    inp = tmp_path / "data" / "input.txt"
+    inp.parent.mkdir(parents=True, exist_ok=True)
+    inp.write_text("# L\nword", encoding="utf-8")
+    mdx = tmp_path / "data" / "dict.mdx"
+    mdx.write_text("stub", encoding="utf-8")
+    cm.set("basic.input_file", str(inp))
+    cm.set("basic.dictionary_file", str(mdx))
+    cm.set("basic.output_file", str(tmp_path / "data" / "out.html.gz"))
+    cm.set_output_add_timestamp(False)
+
+    outputs = []
+
+    class StubExport:
+        def execute_preview(self, input_file, mdx_file, output_path, **kwargs):
+            outputs.append(output_path)
+            Path(output_path).write_bytes(b"%PDF")
+            return 1, 0, {}
+
+    monkeypatch.setattr(mod, "ExportService", lambda *a, **k: StubExport())
+    w = ConversionWorker(tmp_path, cm, preview=True)
+    w.run()
+
+    assert outputs == [tmp_path / "data" / "out-preview.pdf"]